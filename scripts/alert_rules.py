@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Alert Rule Engine
+Evaluates watchlist/threshold rules against a snapshot after fin.py runs and
+writes the alerts that fired. Rules are compiled once: conditions on the
+same metric and operator share one sorted threshold array, so each group is a
+single searchsorted over the snapshot column no matter how many rules use
+it. By default a rule only fires on the day it becomes true (edge-triggered
+against the previous snapshot).
+
+Rules file (JSON list):
+  {"id": "nvda-cheap", "ticker": "NVDA", "when": [["PEG", "<", 1]]}
+  {"id": "semis-hot", "industry": "Semiconductors", "when": [["RSI", ">", 70]]}
+  {"id": "new-100", "new_entrant": true, "when": [["Investor_Score", ">=", 100]]}
+Optional keys: "tickers", "sector", "trigger": "edge" | "level". "sector" and
+"industry" take one name or a list of names.
+
+Usage: python scripts/alert_rules.py --rules alert_rules.json [--date YYYY-MM-DD] [--out alerts.json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from snapshot_history import DATA_DIR, list_snapshot_dates, load_snapshot
+
+OPERATORS = ('<', '<=', '>', '>=', '==')
+SCOPE_COLUMNS = {'tickers': 'Ticker', 'sector': 'Sector', 'industry': 'Industry'}
+TRIGGERS = ('edge', 'level')
+
+
+class CompiledRules:
+    """Rules lowered to sorted threshold groups and scope incidence tables"""
+
+    def __init__(self, rules: Sequence[Dict]):
+        self.rules = [self.validate(rule, i) for i, rule in enumerate(rules)]
+        self.ids = [rule['id'] for rule in self.rules]
+        self.edge = np.array([rule['trigger'] == 'edge' for rule in self.rules], dtype=bool)
+        self.new_entrant = np.array([rule['new_entrant'] for rule in self.rules], dtype=bool)
+
+        # Conditions are numbered in rule order so each rule owns a contiguous run
+        conditions = [(r, metric, op, float(value))
+                      for r, rule in enumerate(self.rules) for metric, op, value in rule['when']]
+        self.condition_rule = np.array([c[0] for c in conditions], dtype=np.int64)
+        self.rule_starts = np.searchsorted(self.condition_rule, np.arange(len(self.rules)))
+
+        grouped: Dict[Tuple[str, str], List[Tuple[float, int]]] = {}
+        for c, (_, metric, op, value) in enumerate(conditions):
+            grouped.setdefault((metric, op), []).append((value, c))
+        self.groups = {
+            key: (np.array([v for v, _ in sorted(items)]), np.array([c for _, c in sorted(items)], dtype=np.int64))
+            for key, items in grouped.items()
+        }
+
+        # Per scope dimension: (known values, incidence[value code, rule]); the
+        # extra last row is for values no rule names, reached by code -1
+        self.scopes = {}
+        for dimension in SCOPE_COLUMNS:
+            wanted = [rule.get(dimension) for rule in self.rules]
+            if all(w is None for w in wanted):
+                continue
+            values = sorted({v for w in wanted if w is not None for v in (w if isinstance(w, set) else [w])})
+            codes = {v: i for i, v in enumerate(values)}
+            incidence = np.zeros((len(values) + 1, len(self.rules)), dtype=bool)
+            for r, w in enumerate(wanted):
+                if w is None:
+                    incidence[:, r] = True
+                else:
+                    incidence[[codes[v] for v in (w if isinstance(w, set) else [w])], r] = True
+            self.scopes[dimension] = (pd.Index(values), incidence)
+
+    @staticmethod
+    def validate(rule: Dict, position: int) -> Dict:
+        rule = dict(rule)
+        rule.setdefault('id', f"rule-{position}")
+        if 'ticker' in rule:
+            rule['tickers'] = [rule.pop('ticker')]
+        if rule.get('tickers') is not None:
+            rule['tickers'] = {str(t).upper() for t in rule['tickers']}
+        for dimension in ('sector', 'industry'):
+            wanted = rule.get(dimension)
+            if isinstance(wanted, (list, tuple, set)) and all(isinstance(v, str) for v in wanted):
+                rule[dimension] = set(wanted)
+            elif wanted is not None and not isinstance(wanted, str):
+                raise ValueError(f"Rule {rule['id']}: {dimension} must be a name or a list of names")
+        rule.setdefault('trigger', 'edge')
+        rule['new_entrant'] = bool(rule.get('new_entrant', False))
+        rule['when'] = [tuple(c) for c in rule.get('when', [])]
+        if rule['trigger'] not in TRIGGERS:
+            raise ValueError(f"Rule {rule['id']}: trigger must be one of {TRIGGERS}")
+        if not rule['when'] and not rule['new_entrant']:
+            raise ValueError(f"Rule {rule['id']}: needs at least one 'when' condition or new_entrant")
+        for condition in rule['when']:
+            if len(condition) != 3 or condition[1] not in OPERATORS:
+                raise ValueError(f"Rule {rule['id']}: condition {list(condition)} must be [metric, op, value] "
+                                 f"with op in {OPERATORS}")
+            try:
+                float(condition[2])
+            except (TypeError, ValueError):
+                raise ValueError(f"Rule {rule['id']}: threshold {condition[2]!r} is not a number")
+        return rule
+
+    def conditions(self, snapshot: pd.DataFrame) -> np.ndarray:
+        """(rows, conditions) truth table from one searchsorted per metric/operator group"""
+        n_conditions = len(self.condition_rule)
+        result = np.zeros((len(snapshot), n_conditions), dtype=bool)
+        for (metric, op), (thresholds, condition_ids) in self.groups.items():
+            if metric not in snapshot.columns:
+                print(f"Warning: Metric {metric!r} is not in the snapshot", file=sys.stderr)
+                continue
+            values = pd.to_numeric(snapshot[metric], errors='coerce').to_numpy(dtype=float)
+            k = np.arange(len(thresholds))[None, :]
+            left = np.searchsorted(thresholds, values, side='left')[:, None]
+            right = np.searchsorted(thresholds, values, side='right')[:, None]
+            if op == '<':       # value < t  <=>  t sorted after every threshold <= value
+                hits = k >= right
+            elif op == '<=':
+                hits = k >= left
+            elif op == '>':
+                hits = k < left
+            elif op == '>=':
+                hits = k < right
+            else:
+                hits = (k >= left) & (k < right)
+            result[:, condition_ids] = hits & ~np.isnan(values)[:, None]
+        return result
+
+    def scope(self, snapshot: pd.DataFrame) -> np.ndarray:
+        """(rows, rules) mask of which rows each rule looks at"""
+        mask = np.ones((len(snapshot), len(self.rules)), dtype=bool)
+        for dimension, (values, incidence) in self.scopes.items():
+            column = snapshot[SCOPE_COLUMNS[dimension]].fillna('').astype(str)
+            if dimension == 'tickers':
+                column = column.str.upper()
+            mask &= incidence[values.get_indexer(column)]
+        return mask
+
+    def evaluate(self, snapshot: pd.DataFrame, previous_tickers: Optional[set] = None) -> np.ndarray:
+        """(rows, rules) level truth: every condition holds, in scope, entrant if required"""
+        conditions = self.conditions(snapshot)
+        fired = np.ones((len(snapshot), len(self.rules)), dtype=bool)
+        # AND each rule's contiguous run of conditions; rules without any stay True
+        has_conditions = np.bincount(self.condition_rule, minlength=len(self.rules)) > 0
+        if has_conditions.any():
+            fired[:, has_conditions] = np.logical_and.reduceat(conditions, self.rule_starts[has_conditions], axis=1)
+        fired &= self.scope(snapshot)
+        if self.new_entrant.any():
+            entrant = ~snapshot['Ticker'].isin(previous_tickers or set()).to_numpy()
+            fired &= ~self.new_entrant[None, :] | entrant[:, None]
+        return fired
+
+
+def fire_alerts(rules: CompiledRules, snapshot: pd.DataFrame,
+                previous: Optional[pd.DataFrame] = None) -> List[Dict]:
+    """Alerts for today's snapshot; edge rules drop rows that already held yesterday"""
+    previous_tickers = set(previous['Ticker']) if previous is not None else set()
+    today = rules.evaluate(snapshot, previous_tickers)
+
+    if previous is not None and len(previous) and rules.edge.any():
+        # Yesterday's entrant status is irrelevant: today's entrants were absent yesterday
+        yesterday = rules.evaluate(previous)
+        held = pd.DataFrame(yesterday, index=previous['Ticker']).groupby(level=0).any()
+        held = held.reindex(snapshot['Ticker'], fill_value=False).to_numpy(dtype=bool)
+        today &= ~(rules.edge[None, :] & held)
+
+    alerts = []
+    cols, rows = np.nonzero(today.T)
+    tickers = snapshot['Ticker'].to_numpy()
+    companies = snapshot['Company'].to_numpy() if 'Company' in snapshot.columns else np.full(len(snapshot), None)
+    columns = {metric: snapshot[metric].to_numpy() for metric in snapshot.columns}
+    for row, col in zip(rows.tolist(), cols.tolist()):
+        rule = rules.rules[col]
+        alerts.append({
+            'rule': rule['id'],
+            'ticker': tickers[row],
+            'company': companies[row],
+            'values': {metric: to_json_number(columns[metric][row]) if metric in columns else None
+                       for metric, _, _ in rule['when']},
+            'trigger': rule['trigger'],
+        })
+    return alerts
+
+
+def to_json_number(value) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if np.isnan(value) else value
+
+
+def load_rules(path: Path) -> List[Dict]:
+    rules = json.loads(Path(path).read_text(encoding='utf-8'))
+    if not isinstance(rules, list):
+        raise ValueError("Rules file must contain a JSON list of rules")
+    return rules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate alert rules against a snapshot")
+    parser.add_argument("--rules", type=Path, required=True, help="JSON list of rules")
+    parser.add_argument("--date", help="Snapshot date (default: newest)")
+    parser.add_argument("--out", type=Path, default=Path("alerts.json"))
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    args = parser.parse_args()
+
+    try:
+        rules = CompiledRules(load_rules(args.rules))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    dates = list_snapshot_dates(args.data_dir)
+    date = args.date or (dates[-1] if dates else None)
+    if date not in dates:
+        print(f"Error: No snapshot for {date}", file=sys.stderr)
+        sys.exit(1)
+    earlier = [d for d in dates if d < date]
+    previous_date = earlier[-1] if earlier else None
+
+    started = time.perf_counter()
+    snapshot = load_snapshot(date, args.data_dir)
+    previous = load_snapshot(previous_date, args.data_dir) if previous_date else None
+    alerts = fire_alerts(rules, snapshot, previous)
+
+    args.out.write_text(json.dumps({
+        'date': date,
+        'previous_date': previous_date,
+        'rules': len(rules.rules),
+        'alerts': alerts,
+    }, indent=2), encoding='utf-8')
+    print(f"{len(alerts)} alert(s) from {len(rules.rules)} rules on {date} "
+          f"in {(time.perf_counter() - started) * 1000:.0f}ms -> {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
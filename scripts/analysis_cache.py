@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+LLM Analysis Cache
+Persistent, content-addressed store of per-ticker analyses for the PR
+reviewer. An entry's key hashes the ticker, snapshot date, model and the
+metrics that go into the prompt, so a rerun for the same day finds every
+analysis without calling the API, while changed inputs miss. The newest
+entry for a ticker lets a carried-over name (or one whose metrics moved)
+keep its `description` and refresh only the day-specific fields.
+
+The cache is one JSON file committed with the summaries (under
+public/data/summary/cache/) so it survives between workflow runs. Entries
+are pruned by the day they were written, not their snapshot date, so a
+backfill of old dates keeps what it analyzed until it resumes.
+"""
+
+import hashlib
+import json
+from datetime import date as Date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+CACHE_PATH = Path("public/data/summary/cache/analyses.json")
+CACHE_VERSION = 1
+KEEP_DAYS = 30     # days an entry is kept after it was written; older entries are pruned on save
+
+
+def metrics_hash(metrics: Dict[str, str]) -> str:
+    """Stable hash of the prompt-relevant metrics"""
+    payload = json.dumps(metrics, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def cache_key(ticker: str, date: str, model: str, metrics_digest: str) -> str:
+    payload = json.dumps([ticker, date, model, metrics_digest], separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:20]
+
+
+def utc_today() -> Date:
+    return datetime.now(timezone.utc).date()
+
+
+class AnalysisCache:
+    """Entries keyed by cache_key; each remembers its ticker and date for cross-day lookups"""
+
+    def __init__(self, path: Path = CACHE_PATH):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: Path = CACHE_PATH) -> 'AnalysisCache':
+        """Cache from disk; an unreadable or other-version file starts empty"""
+        cache = cls(path)
+        try:
+            data = json.loads(cache.path.read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError):
+            return cache
+        if data.get('version') == CACHE_VERSION:
+            cache.entries = data.get('entries', {})
+        return cache
+
+    def get(self, ticker: str, date: str, model: str, metrics_digest: str) -> Optional[Dict[str, str]]:
+        """Analysis for exactly these inputs, or None"""
+        entry = self.entries.get(cache_key(ticker, date, model, metrics_digest))
+        return dict(entry['analysis']) if entry else None
+
+    def latest(self, ticker: str, date: str) -> Optional[Dict[str, str]]:
+        """Most recent analysis of `ticker` on or before `date`, whatever its inputs"""
+        best = None
+        for entry in self.entries.values():
+            if entry['ticker'] == ticker and entry['date'] <= date and (best is None or entry['date'] > best['date']):
+                best = entry
+        return dict(best['analysis']) if best else None
+
+    def put(self, ticker: str, date: str, model: str, metrics_digest: str, analysis: Dict[str, str]) -> None:
+        self.entries[cache_key(ticker, date, model, metrics_digest)] = {
+            'ticker': ticker,
+            'date': date,
+            'model': model,
+            'metrics': metrics_digest,
+            'analysis': dict(analysis),
+            'written': utc_today().isoformat(),
+        }
+        self.dirty = True
+
+    def prune(self, keep_days: int = KEEP_DAYS, today: Optional[Date] = None) -> int:
+        """Drop entries written more than `keep_days` days before today; returns how many.
+
+        Entries from before write days were recorded count from their snapshot date.
+        """
+        cutoff = ((today or utc_today()) - timedelta(days=keep_days)).isoformat()
+        stale = [k for k, e in self.entries.items() if e.get('written', e['date']) < cutoff]
+        for key in stale:
+            del self.entries[key]
+        self.dirty |= bool(stale)
+        return len(stale)
+
+    def save(self) -> bool:
+        """Atomically write the cache if anything changed; returns whether it wrote"""
+        if not self.dirty:
+            return False
+        self.prune()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+        tmp.write_text(json.dumps({'version': CACHE_VERSION, 'entries': self.entries},
+                                  separators=(',', ':'), sort_keys=True), encoding='utf-8')
+        tmp.replace(self.path)
+        self.dirty = False
+        return True
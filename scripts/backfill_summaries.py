@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Summary Backfill
+Analyzes every dated snapshot in public/data/ that has no summary/<date>.json
+yet. It runs outside any PR: no git, no comments, latest.json untouched.
+
+Dates are processed oldest first, a few at a time, and all of their requests
+share one RequestBudget (requests in flight and requests started per minute)
+so the backfill stays inside the API's rate limits however many dates run
+at once. Each date's summary is written atomically as soon as every one of
+its tickers is analyzed, and a checkpoint file records each date's outcome.
+An interrupted run therefore resumes where it stopped: finished dates have
+their summary, and tickers analyzed before the interruption come back from
+the analysis cache. Dates that keep failing are skipped after
+--max-attempts runs unless --retry-failed is given.
+
+Usage: python scripts/backfill_summaries.py [--jobs 2] [--rpm 20] [--limit N] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from openrouter_pr_review import OpenRouterPRReviewer, RequestBudget
+from review_telemetry import format_summary_table
+
+CHECKPOINT_NAME = "summary/cache/backfill.json"
+CHECKPOINT_VERSION = 1
+MAX_ATTEMPTS = 3
+
+
+def missing_dates(data_dir: Path) -> List[str]:
+    """Snapshot dates (oldest first) without a summary/<date>.json"""
+    summary_dir = Path(data_dir) / "summary"
+    return sorted(
+        csv.stem for csv in Path(data_dir).glob("????-??-??.csv")
+        if not (summary_dir / f"{csv.stem}.json").exists()
+    )
+
+
+def load_checkpoint(path: Path) -> Dict[str, Dict]:
+    """Per-date outcomes from earlier runs; unreadable or other-version files start empty"""
+    try:
+        data = json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data.get('dates', {}) if data.get('version') == CHECKPOINT_VERSION else {}
+
+
+def save_checkpoint(path: Path, dates: Dict[str, Dict]) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    tmp.write_text(json.dumps({'version': CHECKPOINT_VERSION, 'dates': dates}, indent=2, sort_keys=True),
+                   encoding='utf-8')
+    tmp.replace(path)
+
+
+def pending_dates(data_dir: Path, checkpoint: Dict[str, Dict], max_attempts: int = MAX_ATTEMPTS,
+                  retry_failed: bool = False) -> List[str]:
+    """Missing dates, less those that already failed `max_attempts` times"""
+    return [
+        date for date in missing_dates(data_dir)
+        if retry_failed or checkpoint.get(date, {}).get('attempts', 0) < max_attempts
+    ]
+
+
+class Backfill:
+    """Runs missing dates through one reviewer, checkpointing after each"""
+
+    def __init__(self, reviewer: OpenRouterPRReviewer, checkpoint_path: Path, jobs: int = 2):
+        self.reviewer = reviewer
+        self.checkpoint_path = Path(checkpoint_path)
+        self.checkpoint = load_checkpoint(self.checkpoint_path)
+        self.jobs = jobs
+
+    def record(self, date: str, status: str, **fields) -> None:
+        previous = self.checkpoint.get(date, {})
+        self.checkpoint[date] = {
+            'status': status,
+            'attempts': previous.get('attempts', 0) + (status != 'done'),
+            'updated_at': datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            **fields,
+        }
+        save_checkpoint(self.checkpoint_path, self.checkpoint)
+
+    async def run_date(self, date: str) -> bool:
+        """Analyze one date and write its summary only if every ticker came back"""
+        started = time.perf_counter()
+        _, tickers = await asyncio.to_thread(self.reviewer.get_top_tickers, None, date)
+        if not tickers:
+            self.record(date, 'failed', error="Could not read tickers from snapshot")
+            return False
+
+        try:
+            results, _ = await self.reviewer.analyze_stocks_cached(tickers, date)
+        except Exception as e:
+            self.record(date, 'failed', error=f"{type(e).__name__}: {e}"[:300])
+            return False
+
+        missing = [td['ticker'] for td in tickers if td['ticker'] not in results]
+        if missing:
+            # Returned tickers are in the analysis cache; the next run asks only for these
+            self.record(date, 'incomplete', analyzed=len(results), missing=missing)
+            print(f"{date}: {len(missing)} of {len(tickers)} ticker(s) missing; summary not written",
+                  file=sys.stderr)
+            return False
+
+        stock_analyses = [{'ticker': td['ticker'], 'name': td['name'], 'analysis': results[td['ticker']]}
+                          for td in tickers]
+        if not self.reviewer.save_summaries(date, stock_analyses, update_latest=False):
+            self.record(date, 'failed', error="Could not write summary")
+            return False
+        self.record(date, 'done', analyzed=len(results))
+        print(f"{date}: summary written in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        return True
+
+    async def run(self, dates: List[str], budget: Optional[RequestBudget] = None) -> Dict[str, bool]:
+        """Process `dates` at most `jobs` at a time under one request budget"""
+        self.reviewer.budget = budget or RequestBudget(self.reviewer.MAX_CONCURRENCY)
+        slots = asyncio.Semaphore(self.jobs)
+
+        async def one(date):
+            async with slots:
+                return await self.run_date(date)
+
+        outcomes = await asyncio.gather(*(one(date) for date in dates))
+        return dict(zip(dates, outcomes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze snapshot dates that have no summary yet")
+    parser.add_argument("--data-dir", type=Path, default=OpenRouterPRReviewer.DATA_DIR)
+    parser.add_argument("--checkpoint", type=Path, help=f"Default: <data-dir>/{CHECKPOINT_NAME}")
+    parser.add_argument("--jobs", type=int, default=2, help="Dates analyzed at once")
+    parser.add_argument("--concurrency", type=int, default=OpenRouterPRReviewer.MAX_CONCURRENCY,
+                        help="Requests in flight across all dates")
+    parser.add_argument("--rpm", type=float, default=20, help="Requests started per minute across all dates")
+    parser.add_argument("--limit", type=int, help="Only the oldest N pending dates")
+    parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+    parser.add_argument("--retry-failed", action="store_true", help="Include dates past --max-attempts")
+    parser.add_argument("--dry-run", action="store_true", help="List pending dates and exit")
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or args.data_dir / CHECKPOINT_NAME
+    dates = pending_dates(args.data_dir, load_checkpoint(checkpoint_path), args.max_attempts, args.retry_failed)
+    if args.limit is not None:
+        dates = dates[:args.limit]
+    print(f"{len(dates)} date(s) to backfill", file=sys.stderr)
+    if args.dry_run or not dates:
+        print("\n".join(dates))
+        return
+
+    reviewer = OpenRouterPRReviewer(require_pr=False)
+    reviewer.data_dir = args.data_dir
+    backfill = Backfill(reviewer, checkpoint_path, jobs=args.jobs)
+
+    async def run():
+        return await backfill.run(dates, RequestBudget(args.concurrency, args.rpm))
+
+    started = time.perf_counter()
+    outcomes = asyncio.run(run())
+    reviewer.telemetry.write()
+    done = sum(outcomes.values())
+    print(f"Backfilled {done} of {len(dates)} date(s) in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    if reviewer.telemetry.records:
+        print(format_summary_table(reviewer.telemetry.summary()), file=sys.stderr)
+    sys.exit(0 if done == len(dates) else 1)
+
+
+if __name__ == "__main__":
+    main()
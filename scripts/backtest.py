@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Snapshot Backtest
+Simulates top-N / score-threshold portfolios over the stored daily snapshots
+and compares them with holding the whole screen. Every step works on the full
+dates x tickers matrix at once; there is no per-day Python loop.
+
+Usage: python scripts/backtest.py [--top-n 5] [--min-score 90] [--rebalance 5] [--cost-bps 10]
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import date as Date
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from price_adjustments import adjust_history
+from snapshot_history import DATA_DIR, build_panel, load_history
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def load_panels(data_dir=DATA_DIR) -> Dict[str, pd.DataFrame]:
+    """Load aligned Price, Investor_Score and published-rank panels"""
+    history = adjust_history(load_history(data_dir, columns=['Price', 'Investor_Score']), data_dir)
+    # Row position in the published CSV is the screener's own tie-break order
+    history['Rank'] = history.groupby('Date').cumcount()
+    return {
+        'prices': build_panel(history, 'Price'),
+        'scores': build_panel(history, 'Investor_Score'),
+        'ranks': build_panel(history, 'Rank'),
+    }
+
+
+def forward_returns(prices: np.ndarray) -> np.ndarray:
+    """Return from each snapshot to the next; NaN when either price is missing"""
+    fwd = np.full_like(prices, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fwd[:-1] = prices[1:] / prices[:-1] - 1
+    return fwd
+
+
+def select_portfolio(scores: np.ndarray, ranks: Optional[np.ndarray] = None,
+                     top_n: Optional[int] = None, min_score: Optional[float] = None) -> np.ndarray:
+    """Equal target weights for the names passing the rule on each date.
+
+    Names are ordered by score, then by published rank, then by column; the
+    top_n best (and/or those scoring at least min_score) are selected.
+    """
+    valid = ~np.isnan(scores)
+    selected = valid.copy()
+    if min_score is not None:
+        selected &= np.where(valid, scores, -np.inf) >= min_score
+    if top_n is not None:
+        tie_break = np.nan_to_num(ranks, nan=scores.shape[1]) if ranks is not None else 0
+        key = np.where(valid, scores, -np.inf) * 1e6 - tie_break
+        order = np.argsort(-key, axis=1, kind='stable')
+        position = np.empty_like(order)
+        np.put_along_axis(position, order, np.arange(scores.shape[1])[None, :], axis=1)
+        selected &= position < top_n
+
+    counts = selected.sum(axis=1, keepdims=True)
+    return np.divide(selected, counts, out=np.zeros(scores.shape), where=counts > 0)
+
+
+def hold_between_rebalances(targets: np.ndarray, fwd: np.ndarray, every: int) -> np.ndarray:
+    """Start-of-period weights when trading only every `every` snapshots.
+
+    Between rebalances positions drift with their own returns. A held name
+    that drops out of the screen has no observable price, so it is carried at
+    a zero return until the next rebalance.
+    """
+    T = targets.shape[0]
+    block_start = (np.arange(T) // every) * every
+    growth = np.log1p(np.nan_to_num(fwd, nan=0.0))
+    cum = np.vstack([np.zeros((1, growth.shape[1])), np.cumsum(growth, axis=0)])
+    # cumulative growth from the rebalance date up to the start of period t
+    drift = np.exp(cum[np.arange(T)] - cum[block_start])
+    weights = targets[block_start] * drift
+    totals = weights.sum(axis=1, keepdims=True)
+    return np.divide(weights, totals, out=np.zeros_like(weights), where=totals > 0)
+
+
+def turnover(weights: np.ndarray, fwd: np.ndarray) -> np.ndarray:
+    """One-way turnover needed to reach each period's weights from the drifted previous ones"""
+    gross = weights * (1 + np.nan_to_num(fwd, nan=0.0))
+    totals = gross.sum(axis=1, keepdims=True)
+    drifted = np.divide(gross, totals, out=np.zeros_like(gross), where=totals > 0)
+    previous = np.vstack([np.zeros((1, weights.shape[1])), drifted[:-1]])
+    # uninvested days hold cash, so moving into or out of the market counts too
+    cash_change = np.abs(previous.sum(axis=1) - weights.sum(axis=1))
+    return 0.5 * (np.abs(weights - previous).sum(axis=1) + cash_change)
+
+
+def max_drawdown(equity: np.ndarray) -> float:
+    """Largest peak-to-trough decline of an equity curve"""
+    peaks = np.maximum.accumulate(equity)
+    return float((equity / peaks - 1).min())
+
+
+def summarize(period_returns: np.ndarray, dates: pd.Index) -> Dict[str, float]:
+    """Total/annualized return, volatility, Sharpe and drawdown of a return series"""
+    equity = np.cumprod(1 + period_returns)
+    years = (Date.fromisoformat(dates[-1]) - Date.fromisoformat(dates[0])).days / 365.25
+    total = float(equity[-1] - 1) if len(equity) else 0.0
+    vol = float(period_returns.std(ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR)) if len(period_returns) > 1 else 0.0
+    mean = float(period_returns.mean() * TRADING_DAYS_PER_YEAR) if len(period_returns) else 0.0
+    return {
+        'total_return': total,
+        'annualized_return': float((1 + total) ** (1 / years) - 1) if years > 0 else 0.0,
+        'annualized_volatility': vol,
+        'sharpe': mean / vol if vol > 0 else 0.0,
+        'max_drawdown': max_drawdown(np.concatenate([[1.0], equity])),
+    }
+
+
+def run_backtest(prices: pd.DataFrame, scores: pd.DataFrame, ranks: Optional[pd.DataFrame] = None,
+                 top_n: Optional[int] = 5, min_score: Optional[float] = None,
+                 rebalance_every: int = 1, cost_bps: float = 0.0) -> Dict:
+    """Backtest a selection rule against the equal-weight whole-screen benchmark"""
+    price_values = prices.to_numpy(dtype=float)
+    score_values = scores.reindex_like(prices).to_numpy(dtype=float)
+    rank_values = ranks.reindex_like(prices).to_numpy(dtype=float) if ranks is not None else None
+
+    fwd = forward_returns(price_values)
+    realized = np.nan_to_num(fwd, nan=0.0)
+
+    targets = select_portfolio(score_values, rank_values, top_n, min_score)
+    weights = hold_between_rebalances(targets, fwd, max(int(rebalance_every), 1))
+    trades = turnover(weights, fwd)
+    strategy = (weights * realized).sum(axis=1) - trades * cost_bps / 10000
+
+    screen = select_portfolio(score_values)
+    benchmark = (screen * realized).sum(axis=1)
+
+    # The last snapshot has no forward return yet
+    periods = slice(0, len(prices.index) - 1)
+    strategy, benchmark, trades = strategy[periods], benchmark[periods], trades[periods]
+    held = weights[periods] > 0
+    observed = held & ~np.isnan(fwd[periods])
+
+    return {
+        'periods': int(len(strategy)),
+        'start': prices.index[0],
+        'end': prices.index[-1],
+        'strategy': summarize(strategy, prices.index),
+        'benchmark': summarize(benchmark, prices.index),
+        'hit_rate_vs_benchmark': float((strategy > benchmark).mean()) if len(strategy) else 0.0,
+        'hit_rate_picks': float((fwd[periods][observed] > 0).mean()) if observed.any() else 0.0,
+        'avg_turnover': float(trades.mean()) if len(trades) else 0.0,
+        'avg_holdings': float(held.sum(axis=1).mean()) if len(strategy) else 0.0,
+        'dropout_rate': float(1 - observed.sum() / held.sum()) if held.any() else 0.0,
+    }
+
+
+def format_report(result: Dict) -> str:
+    """Render a side-by-side strategy vs benchmark table"""
+    lines = [
+        f"Backtest {result['start']} -> {result['end']} ({result['periods']} periods)",
+        f"{'':<24}{'strategy':>12}{'screen':>12}",
+    ]
+    for key in ['total_return', 'annualized_return', 'annualized_volatility', 'max_drawdown']:
+        lines.append(f"{key:<24}{result['strategy'][key]:>12.2%}{result['benchmark'][key]:>12.2%}")
+    lines.append(f"{'sharpe':<24}{result['strategy']['sharpe']:>12.2f}{result['benchmark']['sharpe']:>12.2f}")
+    lines.extend([
+        f"hit rate vs screen:     {result['hit_rate_vs_benchmark']:.1%}",
+        f"hit rate of picks:      {result['hit_rate_picks']:.1%}",
+        f"avg turnover/period:    {result['avg_turnover']:.1%}",
+        f"avg holdings:           {result['avg_holdings']:.1f}",
+        f"held names dropped out: {result['dropout_rate']:.1%}",
+    ])
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest Investor_Score portfolios over stored snapshots")
+    parser.add_argument("--top-n", type=int, default=5, help="Hold the N best-scoring names (0 = no limit)")
+    parser.add_argument("--min-score", type=float, help="Only hold names scoring at least this much")
+    parser.add_argument("--rebalance", type=int, default=1, help="Rebalance every N snapshots")
+    parser.add_argument("--cost-bps", type=float, default=0.0, help="Cost per unit of one-way turnover")
+    parser.add_argument("--json", action="store_true", help="Print the raw result as JSON")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    panels = load_panels()
+    loaded = time.perf_counter()
+    result = run_backtest(
+        panels['prices'], panels['scores'], panels['ranks'],
+        top_n=args.top_n or None, min_score=args.min_score,
+        rebalance_every=args.rebalance, cost_bps=args.cost_bps,
+    )
+    finished = time.perf_counter()
+
+    print(json.dumps(result, indent=2) if args.json else format_report(result))
+    print(f"Loaded history in {(loaded - started) * 1000:.0f}ms, "
+          f"backtest ran in {(finished - loaded) * 1000:.1f}ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
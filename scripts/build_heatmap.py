@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Heatmap Builder
+Precomputes what HeatmapView otherwise derives in the browser on every date
+change: per-date Sector/Industry aggregates (count, market cap, cap-weighted
+change, mean Investor_Score) and a squarified treemap layout keyed by ticker.
+Aggregates for the whole history come from one grouped pass; a date is only
+re-laid out when its snapshot is newer than its heatmap file.
+
+Usage: python scripts/build_heatmap.py [--date YYYY-MM-DD] [--force]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from snapshot_history import DATA_DIR, list_snapshot_dates, load_history
+
+HEATMAP_DIR = DATA_DIR / "heatmap"
+GROUP_COLUMNS = {'sector': 'Sector', 'industry': 'Industry'}
+COLUMNS = ['Company', 'Sector', 'Industry', 'Market Cap', 'Change', 'Investor_Score']
+
+# Layout canvas; rects are stored in these units and scale to any viewport
+LAYOUT_WIDTH = 1200
+LAYOUT_HEIGHT = 800
+COORD_DECIMALS = 2
+
+
+def worst_ratio(row_sum: float, row_max: float, row_min: float, side: float) -> float:
+    """Worst aspect ratio of a row laid along `side` (Bruls et al. 2000)"""
+    side2, sum2 = side * side, row_sum * row_sum
+    return max(side2 * row_max / sum2, sum2 / (side2 * row_min))
+
+
+def squarify(values: Sequence[float], x: float, y: float, width: float, height: float) -> np.ndarray:
+    """Squarified treemap rects (n, 4 as x, y, w, h) for values sorted in descending order.
+
+    Rows are grown while the worst aspect ratio improves, then laid along the
+    shorter side of the remaining rectangle. Non-positive values get no area.
+    """
+    values = np.asarray(values, dtype=float)
+    rects = np.zeros((len(values), 4))
+    rects[:, 0], rects[:, 1] = x, y
+    positive = np.flatnonzero(values > 0)
+    total = values[positive].sum()
+    if total <= 0 or width <= 0 or height <= 0:
+        return rects
+    areas = (values[positive] * (width * height / total)).tolist()
+
+    start = 0
+    while start < len(areas):
+        side = min(width, height)
+        end = start + 1
+        row_sum = areas[start]
+        current = worst_ratio(row_sum, areas[start], areas[start], side)
+        while end < len(areas):
+            candidate = worst_ratio(row_sum + areas[end], areas[start], areas[end], side)
+            if candidate > current:
+                break
+            row_sum += areas[end]
+            current = candidate
+            end += 1
+
+        rows = positive[start:end]
+        lengths = np.array(areas[start:end])
+        if width >= height:
+            # Column on the left spanning the full height
+            thickness = row_sum / height
+            lengths /= thickness
+            rects[rows] = np.column_stack([np.full(len(rows), x), y + np.cumsum(lengths) - lengths,
+                                           np.full(len(rows), thickness), lengths])
+            x, width = x + thickness, width - thickness
+        else:
+            # Row along the top spanning the full width
+            thickness = row_sum / width
+            lengths /= thickness
+            rects[rows] = np.column_stack([x + np.cumsum(lengths) - lengths, np.full(len(rows), y),
+                                           lengths, np.full(len(rows), thickness)])
+            y, height = y + thickness, height - thickness
+        start = end
+    return rects
+
+
+def group_aggregates(history: pd.DataFrame, column: str) -> pd.DataFrame:
+    """Per Date/group count, market cap, cap-weighted change and mean score in one pass"""
+    cap = history['Market Cap'].where(history['Market Cap'] > 0, 0.0).fillna(0.0)
+    frame = pd.DataFrame({
+        'Date': history['Date'],
+        'name': history[column].fillna('Other'),
+        'market_cap': cap,
+        'cap_change': (history['Change'] * cap).where(history['Change'].notna(), 0.0),
+        'cap_with_change': cap.where(history['Change'].notna(), 0.0),
+        'score': history['Investor_Score'],
+    })
+    grouped = frame.groupby(['Date', 'name'], sort=False).agg(
+        count=('market_cap', 'size'),
+        market_cap=('market_cap', 'sum'),
+        cap_change=('cap_change', 'sum'),
+        cap_with_change=('cap_with_change', 'sum'),
+        mean_score=('score', 'mean'),
+    )
+    grouped['change'] = np.divide(grouped['cap_change'], grouped['cap_with_change'],
+                                  out=np.full(len(grouped), np.nan),
+                                  where=grouped['cap_with_change'].to_numpy() > 0)
+    return grouped.drop(columns=['cap_change', 'cap_with_change']).reset_index()
+
+
+def rounded(value: float, decimals: int) -> Optional[float]:
+    return None if pd.isna(value) else round(float(value), decimals)
+
+
+def build_layout(snapshot: pd.DataFrame, aggregates: pd.DataFrame, column: str) -> Dict:
+    """Groups sized by market cap, then tickers squarified inside their group"""
+    aggregates = aggregates.sort_values(['market_cap', 'name'], ascending=[False, True])
+    group_rects = squarify(aggregates['market_cap'].to_numpy(), 0, 0, LAYOUT_WIDTH, LAYOUT_HEIGHT)
+
+    names = snapshot[column].fillna('Other').to_numpy()
+    caps = snapshot['Market Cap'].where(snapshot['Market Cap'] > 0, 0.0).fillna(0.0).to_numpy()
+    tickers = snapshot['Ticker'].to_numpy()
+    order = np.lexsort((tickers, -caps))
+
+    tile_rects = np.zeros((len(snapshot), 4))
+    groups = []
+    for name, count, market_cap, change, mean_score, rect in zip(
+            aggregates['name'], aggregates['count'], aggregates['market_cap'],
+            aggregates['change'], aggregates['mean_score'], group_rects):
+        members = order[names[order] == name]
+        tile_rects[members] = squarify(caps[members], *rect)
+        groups.append({
+            'name': name,
+            'count': int(count),
+            'market_cap': rounded(market_cap, 0),
+            'change': rounded(change, 6),
+            'mean_score': rounded(mean_score, 2),
+            'rect': np.round(rect, COORD_DECIMALS).tolist(),
+        })
+
+    placed = (tile_rects[:, 2] > 0) & (tile_rects[:, 3] > 0)
+    tiles = dict(zip(tickers[placed].tolist(), np.round(tile_rects[placed], COORD_DECIMALS).tolist()))
+    return {'groups': groups, 'tiles': tiles}
+
+
+def build_heatmap(snapshot: pd.DataFrame, aggregates: Dict[str, pd.DataFrame]) -> Dict:
+    """Heatmap document for one date; `aggregates` holds that date's rows per grouping"""
+    stocks = {
+        ticker: {'change': rounded(change, 6), 'market_cap': rounded(cap, 0), 'score': rounded(score, 2)}
+        for ticker, change, cap, score in zip(snapshot['Ticker'], snapshot['Change'],
+                                              snapshot['Market Cap'], snapshot['Investor_Score'])
+    }
+    document = {'width': LAYOUT_WIDTH, 'height': LAYOUT_HEIGHT, 'stocks': stocks}
+    for key, column in GROUP_COLUMNS.items():
+        document[key] = build_layout(snapshot, aggregates[key], column)
+    return document
+
+
+def stale_dates(dates: Sequence[str], data_dir: Path, out_dir: Path) -> List[str]:
+    """Dates whose snapshot is newer than their heatmap file (or that have none)"""
+    stale = []
+    for date in dates:
+        target = out_dir / f"{date}.json"
+        if not target.exists() or target.stat().st_mtime < (data_dir / f"{date}.csv").stat().st_mtime:
+            stale.append(date)
+    return stale
+
+
+def build_all(dates: Sequence[str], data_dir: Path = DATA_DIR, out_dir: Path = HEATMAP_DIR) -> int:
+    """Write heatmap JSON for the given dates; returns the number written"""
+    if not dates:
+        return 0
+    history = load_history(data_dir, columns=COLUMNS, dates=dates)
+    aggregates = {key: group_aggregates(history, column) for key, column in GROUP_COLUMNS.items()}
+    agg_by_date = {key: dict(tuple(frame.groupby('Date', sort=False))) for key, frame in aggregates.items()}
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for date, snapshot in history.groupby('Date', sort=True):
+        document = build_heatmap(snapshot, {key: agg_by_date[key][date] for key in GROUP_COLUMNS})
+        document['date'] = date
+        tmp = out_dir / f"{date}.json.tmp"
+        tmp.write_text(json.dumps(document, separators=(',', ':')), encoding='utf-8')
+        tmp.replace(out_dir / f"{date}.json")
+        written += 1
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute heatmap aggregates and treemap layouts")
+    parser.add_argument("--date", action="append", help="Only build these dates (repeatable)")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the heatmap is up to date")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    out_dir = args.data_dir / "heatmap"
+    dates = args.date or list_snapshot_dates(args.data_dir)
+    missing = [d for d in dates if not (args.data_dir / f"{d}.csv").exists()]
+    if missing:
+        print(f"Error: No snapshot for {', '.join(missing)}", file=sys.stderr)
+        sys.exit(1)
+    if not args.force:
+        dates = stale_dates(dates, args.data_dir, out_dir)
+
+    written = build_all(dates, args.data_dir, out_dir)
+    print(f"Wrote {written} heatmap file(s) to {out_dir} in {(time.perf_counter() - started) * 1000:.0f}ms",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
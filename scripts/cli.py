@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Stock Screener CLI
+One entry point for the daily pipeline. Each subcommand imports its heavy
+modules (pandas, finvizfinance, requests) only when it runs, so --help and
+the calendar check start without them.
+
+  fetch      Fetch and merge the four finviz screens (raw TSV)
+  score      Filter, score, rank and sort a raw screen (snapshot TSV)
+  publish    Validate a dated snapshot, then update latest.csv and dates.csv
+  review     Run the OpenRouter PR review
+  calendar   Is the NYSE open today (exit 0) or closed (exit 1)?
+
+Usage:
+  python scripts/cli.py fetch | python scripts/cli.py score > public/data/YYYY-MM-DD.csv
+  python scripts/cli.py publish --date YYYY-MM-DD
+  python scripts/cli.py calendar [YYYY-MM-DD ...]
+"""
+
+import argparse
+import contextlib
+import shutil
+import sys
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "public" / "data"
+
+
+def output_stream(path):
+    """File to write, or stdout left open after the with block"""
+    return open(path, "w", encoding="utf-8", newline="") if path else contextlib.nullcontext(sys.stdout)
+
+
+def cmd_fetch(args) -> int:
+    from fin import fetch_table
+
+    table = fetch_table()
+    with output_stream(args.out) as out:
+        table.to_csv(out, sep="\t", index=False)
+    return 0
+
+
+def cmd_score(args) -> int:
+    import pandas as pd
+    from fin import score_table
+
+    table = pd.read_csv(args.input or sys.stdin, sep="\t")
+    if table.empty:
+        print("Error: No rows to score", file=sys.stderr)
+        return 1
+    scored = score_table(table, run_day=args.run_day, archive_dir=args.archive_dir)
+    with output_stream(args.out) as out:
+        scored.to_csv(out, sep="\t", index=False)
+    return 0
+
+
+def publish(date: str, data_dir: Path = DATA_DIR, validate: bool = True) -> bool:
+    """Copy a dated snapshot to latest.csv and list it in dates.csv, after the validation gate"""
+    snapshot = Path(data_dir) / f"{date}.csv"
+    if not snapshot.exists():
+        print(f"Error: No snapshot for {date}", file=sys.stderr)
+        return False
+    if validate:
+        from validate_snapshot import format_report, validate as validate_snapshot
+
+        report = validate_snapshot(date, Path(data_dir))
+        print(format_report(report))
+        if not report['ok']:
+            return False
+
+    shutil.copyfile(snapshot, Path(data_dir) / "latest.csv")
+    dates_file = Path(data_dir) / "dates.csv"
+    listed = dates_file.read_text(encoding="utf-8").split() if dates_file.exists() else []
+    if date not in listed:
+        with open(dates_file, "a", encoding="utf-8") as f:
+            f.write(f"{date}\n")
+    print(f"Published {date} as latest.csv", file=sys.stderr)
+    return True
+
+
+def cmd_publish(args) -> int:
+    date = args.date or today_eastern()
+    return 0 if publish(date, args.data_dir, validate=not args.skip_validate) else 1
+
+
+def cmd_review(args) -> int:
+    from openrouter_pr_review import OpenRouterPRReviewer
+
+    OpenRouterPRReviewer().run()
+    return 0
+
+
+def cmd_calendar(args) -> int:
+    if not args.dates:
+        from is_market_open import is_market_open
+
+        return 0 if is_market_open() else 1
+
+    from market_calendar import load_calendar
+
+    calendar = load_calendar()
+    open_days = 0
+    for value in args.dates:
+        try:
+            trading = calendar.is_trading_day(value)
+            close = calendar.early_close(value)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        open_days += trading
+        print(f"{value}\t{'open' if trading else 'closed'}" + (f"\tearly close {close}" if close else ""))
+    return 0 if open_days == len(args.dates) else 1
+
+
+def today_eastern() -> str:
+    from datetime import datetime
+    from zoneinfo import ZoneInfo
+
+    return datetime.now(ZoneInfo('America/New_York')).date().isoformat()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli.py", description="Stock screener pipeline")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    fetch = commands.add_parser("fetch", help="Fetch and merge the finviz screens (raw TSV)")
+    fetch.add_argument("--out", type=Path, help="Write here instead of stdout")
+    fetch.set_defaults(handler=cmd_fetch)
+
+    score = commands.add_parser("score", help="Filter, score, rank and sort a raw screen")
+    score.add_argument("--input", type=Path, help="Raw TSV from `fetch` (default: stdin)")
+    score.add_argument("--out", type=Path, help="Write here instead of stdout")
+    score.add_argument("--run-day", help="Run_Day stamp (default: today, US Eastern)")
+    score.add_argument("--archive-dir", type=Path, help="Also archive the raw, pre-filter table here")
+    score.set_defaults(handler=cmd_score)
+
+    publish_cmd = commands.add_parser("publish", help="Validate a snapshot and make it latest.csv")
+    publish_cmd.add_argument("--date", help="Snapshot date (default: today, US Eastern)")
+    publish_cmd.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    publish_cmd.add_argument("--skip-validate", action="store_true", help="Publish without the anomaly gate")
+    publish_cmd.set_defaults(handler=cmd_publish)
+
+    review = commands.add_parser("review", help="Run the OpenRouter PR review (needs API env vars)")
+    review.set_defaults(handler=cmd_review)
+
+    calendar = commands.add_parser("calendar", help="Exit 0 when the NYSE is open today, 1 when closed")
+    calendar.add_argument("dates", nargs="*", help="Check these dates (YYYY-MM-DD) instead of today")
+    calendar.set_defaults(handler=cmd_calendar)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
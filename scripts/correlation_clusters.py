@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Correlation Clusters
+Diversifies the top-N picks: names are clustered by the correlation of
+their snapshot-to-snapshot returns, and the top N by screen order are taken
+with at most k per cluster, so five gold miners that move together count as
+one bet.
+
+Correlations are pairwise-complete (each pair uses only the days both names
+were in the screen) and computed for all pairs at once with matrix products.
+Names that only just entered the screen share few returns with anything, so
+each pair's correlation is shrunk toward a prior (same industry 0.6, same
+sector 0.3, otherwise 0) with weight overlap / (overlap + PRIOR_OBSERVATIONS).
+Clustering is average-linkage agglomerative on 1 - correlation, stopped once
+the closest clusters are further apart than max_distance (default: average
+correlation below 0.5).
+
+Usage: python scripts/correlation_clusters.py [--date YYYY-MM-DD] [--top-n 5] [--max-per-cluster 1]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from price_adjustments import adjust_history
+from snapshot_history import DATA_DIR, build_panel, list_snapshot_dates, load_history, read_snapshot
+
+LOOKBACK = 60          # snapshots of price history used for correlations
+PRIOR_OBSERVATIONS = 20   # overlap at which a pair is trusted half sample, half prior
+INDUSTRY_CORRELATION = 0.6
+SECTOR_CORRELATION = 0.3
+MAX_DISTANCE = 0.5     # 1 - average correlation at which clusters stop merging
+MAX_PER_CLUSTER = 1
+
+
+def snapshot_returns(prices: np.ndarray) -> np.ndarray:
+    """Simple returns between consecutive snapshots; NaN unless both days are observed"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return prices[1:] / prices[:-1] - 1
+
+
+def pairwise_correlation(returns: np.ndarray, min_overlap: int = 2) -> Tuple[np.ndarray, np.ndarray]:
+    """Pearson correlation of every column pair over the rows both observe.
+
+    Returns (corr, overlap); corr is NaN where the overlap is under
+    `min_overlap` or either side is constant over it.
+    """
+    observed = ~np.isnan(returns)
+    mask = observed.astype(float)
+    x = np.where(observed, returns, 0.0)
+
+    overlap = mask.T @ mask
+    sums = x.T @ mask                 # sums[i, j]: sum of i's returns on days j is observed too
+    squares = (x * x).T @ mask
+    products = x.T @ x
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = products - sums * sums.T / overlap
+        var_i = squares - sums ** 2 / overlap
+        var_j = var_i.T
+        corr = cov / np.sqrt(var_i * var_j)
+    valid = (overlap >= max(min_overlap, 2)) & (var_i > 0) & (var_j > 0)
+    corr = np.where(valid, np.clip(corr, -1.0, 1.0), np.nan)
+    np.fill_diagonal(corr, 1.0)
+    return corr, overlap
+
+
+def average_linkage_clusters(distance: np.ndarray, max_distance: float = MAX_DISTANCE) -> np.ndarray:
+    """Cluster label per item (0.., in order of first appearance).
+
+    Repeatedly merges the two closest clusters, updating distances with the
+    Lance-Williams average-linkage rule, until the closest pair is further
+    apart than `max_distance`.
+    """
+    n = len(distance)
+    d = np.array(distance, dtype=float)
+    np.fill_diagonal(d, np.inf)
+    sizes = np.ones(n)
+    labels = np.arange(n)
+    for _ in range(n - 1):
+        a, b = divmod(int(np.argmin(d)), n)
+        if not d[a, b] <= max_distance:
+            break
+        a, b = min(a, b), max(a, b)
+        merged = (sizes[a] * d[a] + sizes[b] * d[b]) / (sizes[a] + sizes[b])
+        d[a], d[:, a] = merged, merged
+        d[b], d[:, b] = np.inf, np.inf
+        d[a, a] = np.inf
+        sizes[a] += sizes[b]
+        labels[labels == b] = a
+    _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    return np.argsort(np.argsort(first))[inverse]
+
+
+def prior_correlation(sectors: Optional[Sequence] = None, industries: Optional[Sequence] = None,
+                      n: Optional[int] = None) -> np.ndarray:
+    """Assumed correlation of each pair before any returns are seen"""
+    n = n if n is not None else len(sectors if sectors is not None else industries)
+    prior = np.zeros((n, n))
+    for labels, value in ((sectors, SECTOR_CORRELATION), (industries, INDUSTRY_CORRELATION)):
+        if labels is None:
+            continue
+        labels = pd.Series(list(labels))
+        codes = labels.astype('category').cat.codes.to_numpy()
+        same = (codes[:, None] == codes[None, :]) & (codes[:, None] >= 0)
+        prior = np.where(same, value, prior)
+    np.fill_diagonal(prior, 1.0)
+    return prior
+
+
+def shrink_correlation(corr: np.ndarray, overlap: np.ndarray, prior: np.ndarray,
+                       prior_observations: float = PRIOR_OBSERVATIONS) -> np.ndarray:
+    """Blend each pair's sample correlation toward the prior by its overlap"""
+    trust = np.where(np.isnan(corr), 0.0, overlap / (overlap + prior_observations))
+    return trust * np.nan_to_num(corr) + (1 - trust) * prior
+
+
+def correlation_clusters(prices: np.ndarray, sectors: Optional[Sequence] = None,
+                         industries: Optional[Sequence] = None,
+                         max_distance: float = MAX_DISTANCE) -> np.ndarray:
+    """Cluster labels for the columns of a dates x tickers price panel"""
+    corr, overlap = pairwise_correlation(snapshot_returns(prices))
+    blended = shrink_correlation(corr, overlap, prior_correlation(sectors, industries, n=prices.shape[1]))
+    return average_linkage_clusters(1.0 - blended, max_distance)
+
+
+def diversified_top(ranked: Sequence[str], clusters: Sequence[int], n: int,
+                    max_per_cluster: int = MAX_PER_CLUSTER) -> List[int]:
+    """Indexes into `ranked` (best first) of the top n with at most k per cluster.
+
+    When the clusters cannot fill n, the best skipped names fill the rest.
+    """
+    taken, skipped, counts = [], [], {}
+    for i, cluster in enumerate(clusters):
+        if len(taken) == n:
+            break
+        if counts.get(cluster, 0) < max_per_cluster:
+            counts[cluster] = counts.get(cluster, 0) + 1
+            taken.append(i)
+        else:
+            skipped.append(i)
+    return sorted(taken + skipped[:n - len(taken)])
+
+
+def load_price_panel(tickers: Sequence[str], data_dir=DATA_DIR, date: Optional[str] = None,
+                     lookback: int = LOOKBACK) -> np.ndarray:
+    """dates x tickers Price panel of the `lookback` snapshots up to `date`, columns in `tickers` order"""
+    dates = [d for d in list_snapshot_dates(data_dir) if date is None or d <= date][-lookback:]
+    history = adjust_history(load_history(data_dir, columns=['Price'], dates=dates), data_dir)
+    history = history[history['Ticker'].isin(set(tickers))]
+    if history.empty:
+        return np.full((len(dates), len(tickers)), np.nan)
+    return build_panel(history, 'Price', dates=dates, tickers=list(tickers)).to_numpy()
+
+
+def diversify_screen(screen: pd.DataFrame, n: int, data_dir=DATA_DIR, date: Optional[str] = None,
+                     max_per_cluster: int = MAX_PER_CLUSTER, lookback: int = LOOKBACK) -> pd.DataFrame:
+    """The first n rows of a sorted screen, at most `max_per_cluster` per correlation cluster.
+
+    Adds a `Cluster` column (labels over the whole screen).
+    """
+    tickers = screen['Ticker'].tolist()
+    clusters = correlation_clusters(load_price_panel(tickers, data_dir, date, lookback),
+                                    screen.get('Sector'), screen.get('Industry'))
+    picked = diversified_top(tickers, clusters, n, max_per_cluster)
+    return screen.assign(Cluster=clusters).iloc[picked]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Top-N of the screen with at most k names per correlation cluster")
+    parser.add_argument("--date", help="Snapshot date (default: newest)")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--max-per-cluster", type=int, default=MAX_PER_CLUSTER)
+    parser.add_argument("--lookback", type=int, default=LOOKBACK)
+    args = parser.parse_args()
+
+    date = args.date or list_snapshot_dates(args.data_dir)[-1]
+    screen = read_snapshot(date, args.data_dir, columns=['Ticker', 'Company', 'Sector', 'Industry', 'Investor_Score'])
+    started = time.perf_counter()
+    prices = load_price_panel(screen['Ticker'].tolist(), args.data_dir, date, args.lookback)
+    loaded = time.perf_counter()
+    clusters = correlation_clusters(prices, screen['Sector'], screen['Industry'])
+    picked = diversified_top(screen['Ticker'].tolist(), clusters, args.top_n, args.max_per_cluster)
+    finished = time.perf_counter()
+
+    screen = screen.assign(Cluster=clusters)
+    print(f"{date}: {len(screen)} names in {clusters.max() + 1} clusters")
+    print("straight top-N:")
+    for row in screen.head(args.top_n).itertuples(index=False):
+        print(f"  {row.Ticker:<6} score {row.Investor_Score:>3}  cluster {row.Cluster:<4} {row.Industry}")
+    print(f"diversified (max {args.max_per_cluster} per cluster):")
+    for row in screen.iloc[picked].itertuples(index=False):
+        print(f"  {row.Ticker:<6} score {row.Investor_Score:>3}  cluster {row.Cluster:<4} {row.Industry}")
+    print(f"Loaded {prices.shape[0]} snapshots in {(loaded - started) * 1000:.0f}ms, "
+          f"clustered in {(finished - loaded) * 1000:.1f}ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
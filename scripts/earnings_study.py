@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Earnings Event Study
+How screened names behave around their earnings. finviz's `Earnings` stamp
+("Nov 04/a": month, day, and whether the report is before the open or after
+the close) carries no year, so each stamp is dated to the year that puts it
+closest to the snapshot it was read from. Every distinct (ticker, earnings
+date) in the history is an event; its event day is the first snapshot that
+can reflect the report (the earnings date for /b, the next session for /a).
+
+Windows of -pre..+post snapshots around all events are gathered from the
+dates x tickers panels with one fancy-indexing step. Price windows become
+returns from the last close before the event; other metrics (Investor_Score,
+EPS estimates) become changes from that same close. Average, median and
+dispersion paths are then aggregated per sector and for the whole screen.
+
+Usage: python scripts/earnings_study.py [--pre 5] [--post 10] [--metrics Price Investor_Score] [--json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from price_adjustments import adjust_history
+from snapshot_history import DATA_DIR, build_panel, load_history
+
+MAX_STAMP_DISTANCE_DAYS = 200   # a stamp further than this from its snapshot is treated as bad data
+MAX_EVENT_LAG_DAYS = 4          # event day must be a snapshot within this many days of the report
+ALL_SECTORS = 'All'
+STAMP_PATTERN = r'^\s*([A-Za-z]{3})\s+(\d{1,2})\s*/\s*([ab])\s*$'
+
+
+def parse_earnings_stamps(stamps: pd.Series, as_of: pd.Series) -> pd.DataFrame:
+    """Earnings date and timing ('a' after close, 'b' before open) for each stamp.
+
+    The year is whichever of the snapshot's year -1, 0 or +1 lands closest to
+    the snapshot date. Unparseable or implausibly distant stamps give NaT.
+    """
+    parts = stamps.astype(str).str.extract(STAMP_PATTERN)
+    as_of = pd.to_datetime(as_of).reset_index(drop=True)
+    parts.index = as_of.index
+    month_day = parts[0].str.title() + ' ' + parts[1].str.zfill(2)
+
+    best = pd.Series(pd.NaT, index=as_of.index, dtype='datetime64[ns]')
+    distance = pd.Series(np.inf, index=as_of.index)
+    for shift in (-1, 0, 1):
+        years = (as_of.dt.year + shift).astype(str)
+        candidate = pd.to_datetime(month_day + ' ' + years, format='%b %d %Y', errors='coerce')
+        gap = (candidate - as_of).dt.days.abs().astype(float).fillna(np.inf)
+        closer = gap < distance
+        best[closer], distance[closer] = candidate[closer], gap[closer]
+
+    best[distance > MAX_STAMP_DISTANCE_DAYS] = pd.NaT
+    return pd.DataFrame({'earnings_date': best.to_numpy(), 'timing': parts[2].to_numpy()})
+
+
+def find_events(history: pd.DataFrame) -> pd.DataFrame:
+    """Distinct (Ticker, earnings_date) events with timing and the ticker's latest sector"""
+    stamps = parse_earnings_stamps(history['Earnings'], history['Date'])
+    events = pd.DataFrame({
+        'Ticker': history['Ticker'].to_numpy(),
+        'earnings_date': stamps['earnings_date'],
+        'timing': stamps['timing'],
+    }).dropna()
+    events = events.drop_duplicates(['Ticker', 'earnings_date'], keep='last')
+
+    if 'Sector' in history.columns:
+        sectors = history.dropna(subset=['Sector']).drop_duplicates('Ticker', keep='last')
+        events['Sector'] = events['Ticker'].map(sectors.set_index('Ticker')['Sector'])
+    else:
+        events['Sector'] = np.nan
+    events['Sector'] = events['Sector'].fillna('Unknown')
+    return events.sort_values(['earnings_date', 'Ticker']).reset_index(drop=True)
+
+
+def event_positions(events: pd.DataFrame, dates: Sequence[str]) -> np.ndarray:
+    """Row of each event's event day in `dates`, -1 when no snapshot covers it.
+
+    After-close reports first show in the next snapshot, before-open reports
+    in that day's own.
+    """
+    snapshot_days = pd.to_datetime(pd.Index(dates)).to_numpy()
+    earnings = events['earnings_date'].to_numpy(dtype='datetime64[ns]')
+    after_close = (events['timing'] == 'a').to_numpy()
+    rows = np.where(after_close,
+                    np.searchsorted(snapshot_days, earnings, side='right'),
+                    np.searchsorted(snapshot_days, earnings, side='left'))
+
+    inside = (rows < len(snapshot_days)) & (earnings >= snapshot_days[0])
+    lag = np.full(len(rows), np.inf)
+    lag[inside] = (snapshot_days[rows[inside]] - earnings[inside]) / np.timedelta64(1, 'D')
+    return np.where(inside & (lag <= MAX_EVENT_LAG_DAYS), rows, -1)
+
+
+def event_windows(values: np.ndarray, rows: np.ndarray, cols: np.ndarray,
+                  pre: int, post: int, kind: str = 'return') -> np.ndarray:
+    """events x offsets (-pre..post) paths relative to the snapshot before the event.
+
+    kind 'return' gives value / base - 1, 'change' gives value - base, where
+    base is the value at offset -1. Cells outside the history, or where the
+    ticker was not in the screen, are NaN.
+    """
+    offsets = np.arange(-pre, post + 1)
+    index = rows[:, None] + offsets[None, :]
+    inside = (index >= 0) & (index < values.shape[0])
+    window = np.where(inside, values[np.clip(index, 0, values.shape[0] - 1), cols[:, None]], np.nan)
+
+    base_index = rows - 1
+    base = np.where(base_index >= 0, values[np.clip(base_index, 0, None), cols], np.nan)[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return window / base - 1 if kind == 'return' else window - base
+
+
+def sector_paths(windows: np.ndarray, sectors: Sequence[str], offsets: np.ndarray) -> pd.DataFrame:
+    """Mean, median, standard deviation and count per (sector, offset), plus an 'All' row per offset"""
+    frame = pd.DataFrame(windows, columns=offsets)
+    frame['Sector'] = list(sectors)
+    long = frame.melt(id_vars='Sector', var_name='offset', value_name='value').dropna(subset=['value'])
+    long = pd.concat([long, long.assign(Sector=ALL_SECTORS)], ignore_index=True)
+    paths = long.groupby(['Sector', 'offset'])['value'].agg(['mean', 'median', 'std', 'count'])
+    return paths.reset_index()
+
+
+def run_study(history: pd.DataFrame, metrics: Sequence[str] = ('Price', 'Investor_Score'),
+              pre: int = 5, post: int = 10) -> Dict:
+    """Events and per-sector paths for each metric"""
+    events = find_events(history)
+    dates = sorted(history['Date'].unique())
+    tickers = sorted(history['Ticker'].unique())
+    rows = event_positions(events, dates)
+    events = events.assign(row=rows)[rows >= 0].reset_index(drop=True)
+    cols = pd.Index(tickers).get_indexer(events['Ticker'])
+    offsets = np.arange(-pre, post + 1)
+
+    paths = {}
+    for metric in metrics:
+        values = build_panel(history, metric, dates=dates, tickers=tickers).to_numpy()
+        kind = 'return' if metric == 'Price' else 'change'
+        windows = event_windows(values, events['row'].to_numpy(), cols, pre, post, kind)
+        paths[metric] = sector_paths(windows, events['Sector'], offsets)
+    return {'events': events, 'paths': paths, 'dates': dates, 'offsets': offsets}
+
+
+def format_report(result: Dict, offsets: Optional[List[int]] = None) -> str:
+    """Mean (and std) per sector at a few offsets, one table per metric"""
+    events = result['events']
+    offsets = offsets or [o for o in (-5, -1, 0, 1, 2, 5, 10) if o in result['offsets']]
+    lines = [f"{len(events)} earnings events, {events['Ticker'].nunique()} tickers, "
+             f"{result['dates'][0]} -> {result['dates'][-1]}"]
+    counts = events['Sector'].value_counts()
+    for metric, paths in result['paths'].items():
+        percent = metric == 'Price'
+        lines.extend(["", f"{metric} ({'return' if percent else 'change'} from the close before the event; mean ± std)",
+                      f"{'Sector':<26}{'events':>7}" + "".join(f"{o:>+16d}" for o in offsets)])
+        table = paths.set_index(['Sector', 'offset'])
+        sectors = [ALL_SECTORS] + sorted(s for s in table.index.get_level_values(0).unique() if s != ALL_SECTORS)
+        for sector in sectors:
+            cells = []
+            for offset in offsets:
+                if (sector, offset) not in table.index:
+                    cells.append(f"{'-':>16}")
+                    continue
+                mean, std = table.loc[(sector, offset), ['mean', 'std']]
+                std = 0.0 if pd.isna(std) else std
+                cells.append(f"{mean:>+8.2%} ±{std:>6.2%}" if percent else f"{mean:>+8.2f} ±{std:>6.2f}")
+            n = len(events) if sector == ALL_SECTORS else counts.get(sector, 0)
+            lines.append(f"{sector[:25]:<26}{n:>7}" + "".join(cells))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Earnings event study over the stored snapshots")
+    parser.add_argument("--pre", type=int, default=5, help="Snapshots before the event day")
+    parser.add_argument("--post", type=int, default=10, help="Snapshots after the event day")
+    parser.add_argument("--metrics", nargs="+", default=['Price', 'Investor_Score'],
+                        help="Price gives returns; other columns give changes")
+    parser.add_argument("--json", action="store_true", help="Print the paths as JSON")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    history = adjust_history(load_history(DATA_DIR, columns=['Earnings', 'Sector', *args.metrics]))
+    loaded = time.perf_counter()
+    result = run_study(history, args.metrics, args.pre, args.post)
+    finished = time.perf_counter()
+
+    if args.json:
+        print(json.dumps({metric: paths.to_dict(orient='records') for metric, paths in result['paths'].items()},
+                         indent=2, default=float))
+    else:
+        print(format_report(result))
+    print(f"Loaded history in {(loaded - started) * 1000:.0f}ms, "
+          f"{len(result['events'])} events studied in {(finished - loaded) * 1000:.0f}ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Cross-Sectional Factor Regression (Fama-MacBeth)
+Which published metrics predict the next-period return among screened
+names? For every snapshot date, the forward return of each name is
+regressed on its metrics, z-scored across that date's screen (and clipped at
+±3 so a few extreme PEGs cannot dominate). All dates are solved at once:
+masked normal equations are stacked into a dates x K x K batch and solved
+together, with no per-date loop. A name enters a date's regression only when
+its return and every metric are present (or, with --fill-missing, its
+missing metrics are set to the cross-sectional mean).
+
+The per-date coefficients are then averaged over time; t-stats use their
+time-series standard error, Newey-West adjusted for overlapping horizons.
+Coefficients on Investor_Score's own metrics are turned into suggested point
+multipliers for its rules.
+
+Usage: python scripts/factor_regression.py [--horizon 1] [--fill-missing] [--rules-out rules.json] [--json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from investor_score import DEFAULT_RULES
+from price_adjustments import adjust_history
+from snapshot_history import DATA_DIR, build_panel, load_history
+
+FACTORS = ['PEG', 'ROE', 'ROIC', 'Gross M', 'Oper M', 'Profit M',
+           'EPS This Y', 'EPS Next Y', 'EPS Next 5Y', 'RSI', 'SMA20', 'SMA50', 'SMA200']
+Z_CLIP = 3.0
+MIN_EXTRA_OBSERVATIONS = 10     # a date needs at least K + 1 + this many names
+MULTIPLIER_STEP = 0.25
+
+
+def forward_returns(prices: np.ndarray, horizon: int = 1) -> np.ndarray:
+    """Return from each snapshot to the one `horizon` snapshots later; NaN when either is missing"""
+    fwd = np.full_like(prices, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fwd[:-horizon] = prices[horizon:] / prices[:-horizon] - 1
+    return fwd
+
+
+def cross_sectional_zscores(values: np.ndarray, clip: float = Z_CLIP) -> np.ndarray:
+    """z-score dates x names x factors values across names, per date and factor; NaN stays NaN"""
+    present = ~np.isnan(values)
+    counts = present.sum(axis=1, keepdims=True)
+    filled = np.where(present, values, 0.0)
+    mean = np.divide(filled.sum(axis=1, keepdims=True), counts,
+                     out=np.zeros(counts.shape), where=counts > 0)
+    centered = np.where(present, values - mean, 0.0)
+    std = np.sqrt(np.divide((centered ** 2).sum(axis=1, keepdims=True), counts - 1,
+                            out=np.zeros(counts.shape), where=counts > 1))
+    z = np.divide(centered, std, out=np.zeros(values.shape), where=std > 0)
+    return np.where(present, np.clip(z, -clip, clip), np.nan)
+
+
+def batched_least_squares(z: np.ndarray, returns: np.ndarray, mask: np.ndarray, min_obs: int):
+    """Per-date OLS of returns on [1, z] over the masked names, solved as one batch.
+
+    Returns (coefficients dates x (1 + K), observations per date, R² per
+    date, usable dates). Dates with fewer than `min_obs` names are not
+    usable and get NaN coefficients. Rank-deficient dates (a factor constant
+    across the screen) are solved with the pseudo-inverse.
+    """
+    T, N, K = z.shape
+    design = np.concatenate([np.ones((T, N, 1)), np.nan_to_num(z)], axis=2)
+    design = np.where(mask[..., None], design, 0.0)
+    target = np.where(mask, returns, 0.0)
+
+    xtx = np.einsum('tnk,tnj->tkj', design, design)
+    xty = np.einsum('tnk,tn->tk', design, target)
+    observations = mask.sum(axis=1)
+    usable = observations >= min_obs
+
+    coefs = np.full((T, K + 1), np.nan)
+    if usable.any():
+        coefs[usable] = (np.linalg.pinv(xtx[usable]) @ xty[usable][..., None])[..., 0]
+
+    fitted = np.einsum('tnk,tk->tn', design, np.nan_to_num(coefs))
+    mean = np.divide(target.sum(axis=1), observations, out=np.zeros(T), where=observations > 0)
+    ss_res = np.where(mask, (target - fitted) ** 2, 0).sum(axis=1)
+    ss_tot = np.where(mask, (target - mean[:, None]) ** 2, 0).sum(axis=1)
+    r2 = np.divide(ss_tot - ss_res, ss_tot, out=np.full(T, np.nan), where=usable & (ss_tot > 0))
+    return coefs, observations, r2, usable
+
+
+def newey_west_se(series: np.ndarray, lags: int = 0) -> np.ndarray:
+    """Standard error of the column means of a dates x K series, Bartlett-weighted for `lags`"""
+    n = series.shape[0]
+    centered = series - series.mean(axis=0)
+    variance = (centered ** 2).sum(axis=0) / n
+    for lag in range(1, min(lags, n - 1) + 1):
+        weight = 1 - lag / (lags + 1)
+        variance = variance + 2 * weight * (centered[lag:] * centered[:-lag]).sum(axis=0) / n
+    return np.sqrt(np.maximum(variance, 0) / max(n - 1, 1))
+
+
+def fama_macbeth(coefs: np.ndarray, usable: np.ndarray, names: Sequence[str], lags: int = 0) -> pd.DataFrame:
+    """Time-series mean, standard error, t-stat and share of positive dates per coefficient"""
+    series = coefs[usable]
+    mean = series.mean(axis=0)
+    se = newey_west_se(series, lags)
+    return pd.DataFrame({
+        'factor': list(names),
+        'coef': mean,
+        'std_err': se,
+        't_stat': np.divide(mean, se, out=np.full(len(mean), np.nan), where=se > 0),
+        'positive_share': (series > 0).mean(axis=0),
+    })
+
+
+def suggest_rules(summary: pd.DataFrame, rules: Dict[str, Dict] = DEFAULT_RULES,
+                  step: float = MULTIPLIER_STEP) -> Dict[str, Dict]:
+    """Investor_Score rules with points rescaled by each metric's Fama-MacBeth t-stat.
+
+    A metric's t-stat is signed by its rule's direction (PEG: lower is
+    better), floored at zero, and normalized so the multipliers average 1,
+    which keeps the total available points unchanged. Metrics missing from
+    the regression keep their points.
+    """
+    t_stats = summary.set_index('factor')['t_stat']
+    effective = {}
+    for metric, rule in rules.items():
+        if metric in t_stats.index and np.isfinite(t_stats[metric]):
+            sign = -1.0 if rule.get('lower_is_better') else 1.0
+            effective[metric] = max(sign * t_stats[metric], 0.0)
+    average = np.mean(list(effective.values())) if effective else 0.0
+
+    suggested = {}
+    for metric, rule in rules.items():
+        multiplier = 1.0
+        if metric in effective and average > 0:
+            multiplier = round(effective[metric] / average / step) * step
+        suggested[metric] = {**rule, 'points': tuple(float(p * multiplier) for p in rule['points']),
+                             'multiplier': multiplier}
+    return suggested
+
+
+def load_factor_panels(data_dir=DATA_DIR, factors: Sequence[str] = FACTORS) -> Dict:
+    """Price and factor panels aligned on dates x tickers"""
+    history = adjust_history(load_history(data_dir, columns=['Price', *factors]), data_dir)
+    prices = build_panel(history, 'Price')
+    align = dict(dates=list(prices.index), tickers=list(prices.columns))
+    return {
+        'dates': align['dates'],
+        'tickers': align['tickers'],
+        'prices': prices.to_numpy(),
+        'factors': np.stack([build_panel(history, f, **align).to_numpy() for f in factors], axis=2),
+    }
+
+
+def run_regression(prices: np.ndarray, factor_values: np.ndarray, factors: Sequence[str],
+                   horizon: int = 1, fill_missing: bool = False, lags: Optional[int] = None,
+                   min_obs: Optional[int] = None) -> Dict:
+    """Fama-MacBeth over a dates x names price panel and dates x names x K factor panel"""
+    returns = forward_returns(prices, horizon)
+    z = cross_sectional_zscores(np.where(np.isnan(returns)[..., None], np.nan, factor_values))
+    present = ~np.isnan(z)
+    mask = ~np.isnan(returns) & (present.any(axis=2) if fill_missing else present.all(axis=2))
+    if fill_missing:
+        z = np.where(mask[..., None] & ~present, 0.0, z)
+
+    min_obs = min_obs or len(factors) + 1 + MIN_EXTRA_OBSERVATIONS
+    coefs, observations, r2, usable = batched_least_squares(z, returns, mask, min_obs)
+    lags = horizon - 1 if lags is None else lags
+    names = ['Intercept', *factors]
+    summary = fama_macbeth(coefs, usable, names, lags) if usable.any() else pd.DataFrame(
+        {'factor': names, 'coef': np.nan, 'std_err': np.nan, 't_stat': np.nan, 'positive_share': np.nan})
+    return {
+        'summary': summary,
+        'coefficients': coefs,
+        'usable_dates': int(usable.sum()),
+        'avg_observations': float(observations[usable].mean()) if usable.any() else 0.0,
+        'avg_r2': float(np.nanmean(r2[usable])) if usable.any() else float('nan'),
+        'horizon': horizon,
+        'lags': lags,
+    }
+
+
+def format_report(result: Dict, rules: Optional[Dict[str, Dict]] = None) -> str:
+    lines = [
+        f"Fama-MacBeth: {result['usable_dates']} dates, ~{result['avg_observations']:.0f} names/date, "
+        f"horizon {result['horizon']}, Newey-West lags {result['lags']}, avg R² {result['avg_r2']:.3f}",
+        f"{'factor':<14}{'coef':>10}{'std err':>10}{'t':>8}{'% > 0':>8}",
+    ]
+    for row in result['summary'].itertuples(index=False):
+        flag = ' *' if abs(row.t_stat) >= 1.96 else ''
+        lines.append(f"{row.factor:<14}{row.coef:>+10.4%}{row.std_err:>10.4%}{row.t_stat:>8.2f}"
+                     f"{row.positive_share:>8.0%}{flag}")
+    lines.append("coef = next-period return per cross-sectional SD of the metric; * |t| >= 1.96")
+    if rules:
+        lines.extend(["", "Suggested Investor_Score points (multiplier x current):"])
+        for metric, rule in rules.items():
+            points = ', '.join(f"{p:g}" for p in rule['points'])
+            lines.append(f"  {metric:<12} x{rule['multiplier']:<5g} ({points})")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fama-MacBeth regression of forward returns on published metrics")
+    parser.add_argument("--factors", nargs="+", default=FACTORS)
+    parser.add_argument("--horizon", type=int, default=1, help="Forward return over this many snapshots")
+    parser.add_argument("--lags", type=int, help="Newey-West lags (default: horizon - 1)")
+    parser.add_argument("--fill-missing", action="store_true",
+                        help="Set a missing metric to the date's mean instead of dropping the name")
+    parser.add_argument("--rules-out", help="Write the suggested Investor_Score rules here as JSON")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    panels = load_factor_panels(DATA_DIR, args.factors)
+    loaded = time.perf_counter()
+    result = run_regression(panels['prices'], panels['factors'], args.factors,
+                            horizon=args.horizon, fill_missing=args.fill_missing, lags=args.lags)
+    rules = suggest_rules(result['summary'])
+    finished = time.perf_counter()
+
+    if args.json:
+        print(json.dumps({
+            'summary': result['summary'].to_dict(orient='records'),
+            **{k: result[k] for k in ('usable_dates', 'avg_observations', 'avg_r2', 'horizon', 'lags')},
+            'suggested_rules': rules,
+        }, indent=2))
+    else:
+        print(format_report(result, rules))
+    if args.rules_out:
+        with open(args.rules_out, 'w', encoding='utf-8') as f:
+            json.dump(rules, f, indent=2)
+    print(f"Loaded history in {(loaded - started) * 1000:.0f}ms, "
+          f"regressions ran in {(finished - loaded) * 1000:.1f}ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,84 +1,90 @@
+"""
+Stock Screener Pipeline
+Fetches the four finviz screens, merges them, applies the factor filters and
+Investor Score, ranks and sorts the screen. Each stage is a function so the
+CLI (cli.py) and tests can call them; running this file prints the finished
+screen as TSV, as before.
+
+With --archive-dir, the normalized table from before the filters drop any
+rows is archived as well (raw_archive.py).
+
+Usage: python scripts/fin.py [--archive-dir public/data/raw] > public/data/YYYY-MM-DD.csv
+"""
+
+import argparse
 import pandas as pd
-import json
 import sys
 import warnings
 import os
-from finvizfinance.screener.financial import Financial
-from finvizfinance.screener.overview import Overview
-from finvizfinance.screener.valuation import Valuation
-from finvizfinance.screener.technical import Technical
+from contextlib import redirect_stdout
 from datetime import datetime
 from zoneinfo import ZoneInfo
-
-# Suppress warnings and logs from finvizfinance
-warnings.filterwarnings("ignore")
-
-# Save original stdout for later
-original_stdout = sys.stdout
-
-try:
-    # Apply custom filters
-    filters = {
-        "Market Cap.": "+Small (over $300mln)",
-        "Average Volume": "Over 100K",
-        "Price": "Over $15",
-        "50-Day Simple Moving Average": "Price above SMA50",
-        "200-Day Simple Moving Average": "Price above SMA200",
-        "InstitutionalOwnership": "Over 20%",
-        "EPS growththis year": "Positive (>0%)",
-        "EPS growthnext year": "Positive (>0%)",
-        "EPS growthpast 5 years": "Positive (>0%)",
-        "EPS growthnext 5 years": "Positive (>0%)",
-        "EPS growthqtr over qtr": "High (>25%)",
-        "Sales growthpast 5 years": "Positive (>0%)",
-        "Sales growthqtr over qtr": "Positive (>0%)",
-    }
-
-    # Redirect stdout to suppress finvizfinance progress messages
-    print("Fetching financial data...", file=sys.stderr)
-    sys.stdout = open(os.devnull, 'w')
-    financial = Financial()
-    financial.set_filter(filters_dict=filters)
-    financial_data = financial.screener_view()
-    sys.stdout = original_stdout
-
-    print("Fetching overview data...", file=sys.stderr)
-    sys.stdout = open(os.devnull, 'w')
-    overview = Overview()
-    overview.set_filter(filters_dict=filters)
-    overview_data = overview.screener_view()
-    sys.stdout = original_stdout
-
-    print("Fetching valuation data...", file=sys.stderr)
-    sys.stdout = open(os.devnull, 'w')
-    valuation = Valuation()
-    valuation.set_filter(filters_dict=filters)
-    valuation_data = valuation.screener_view()
-    sys.stdout = original_stdout
-
-    print("Fetching technical data...", file=sys.stderr)
-    sys.stdout = open(os.devnull, 'w')
-    technical = Technical()
-    technical.set_filter(filters_dict=filters)
-    technical_data = technical.screener_view()
-    sys.stdout = original_stdout
-
-    print("Processing data...", file=sys.stderr)
-
-    # Merge tables
-    all_table = (
-        financial_data.merge(
-            overview_data.drop(columns=["Market Cap", "Price", "Change", "Volume"]),
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from percentile_ranks import add_percentile_ranks, sort_screen
+from raw_archive import write_archive
+
+# Finviz screener filters shared by all four views
+FILTERS = {
+    "Market Cap.": "+Small (over $300mln)",
+    "Average Volume": "Over 100K",
+    "Price": "Over $15",
+    "50-Day Simple Moving Average": "Price above SMA50",
+    "200-Day Simple Moving Average": "Price above SMA200",
+    "InstitutionalOwnership": "Over 20%",
+    "EPS growththis year": "Positive (>0%)",
+    "EPS growthnext year": "Positive (>0%)",
+    "EPS growthpast 5 years": "Positive (>0%)",
+    "EPS growthnext 5 years": "Positive (>0%)",
+    "EPS growthqtr over qtr": "High (>25%)",
+    "Sales growthpast 5 years": "Positive (>0%)",
+    "Sales growthqtr over qtr": "Positive (>0%)",
+}
+
+SCREENS = ("financial", "overview", "valuation", "technical")
+
+PERCENT_COLUMNS = ["EPS This Y", "EPS Next Y", "EPS Past 5Y", "EPS Next 5Y", "Sales Past 5Y"]
+
+
+def fetch_screen(name: str, filters: Dict[str, str] = FILTERS) -> pd.DataFrame:
+    """One finviz screener view; finvizfinance is imported only here"""
+    from finvizfinance.screener.financial import Financial
+    from finvizfinance.screener.overview import Overview
+    from finvizfinance.screener.valuation import Valuation
+    from finvizfinance.screener.technical import Technical
+
+    screener = {"financial": Financial, "overview": Overview,
+                "valuation": Valuation, "technical": Technical}[name]()
+    print(f"Fetching {name} data...", file=sys.stderr)
+    # Suppress warnings and finvizfinance progress messages
+    with warnings.catch_warnings(), open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        warnings.simplefilter("ignore")
+        screener.set_filter(filters_dict=filters)
+        return screener.screener_view()
+
+
+def fetch_screens(filters: Dict[str, str] = FILTERS) -> Dict[str, pd.DataFrame]:
+    return {name: fetch_screen(name, filters) for name in SCREENS}
+
+
+def merge_screens(financial: pd.DataFrame, overview: pd.DataFrame,
+                  technical: pd.DataFrame, valuation: pd.DataFrame) -> pd.DataFrame:
+    """Join the views on Ticker, keeping the financial view's shared columns"""
+    return (
+        financial.merge(
+            overview.drop(columns=["Market Cap", "Price", "Change", "Volume"]),
             on="Ticker",
             how="left",
         )
         .merge(
-            technical_data.drop(columns=["Price", "Change", "Volume"]),
+            technical.drop(columns=["Price", "Change", "Volume"]),
             on="Ticker",
             how="left",
         )
         .merge(
-            valuation_data.drop(
+            valuation.drop(
                 columns=["Market Cap", "Price", "Change", "Volume", "P/E"]
             ),
             on="Ticker",
@@ -86,6 +92,20 @@ try:
         )
     )
 
+
+def fetch_table(filters: Dict[str, str] = FILTERS) -> pd.DataFrame:
+    """Fetch and merge the four views (the raw, unscored screen)"""
+    return merge_screens(**fetch_screens(filters))
+
+
+def percent_to_fraction(column: pd.Series) -> pd.Series:
+    return column.astype(str).str.replace("%", "").astype(float) / 100
+
+
+def add_factor_filters(all_table: pd.DataFrame) -> pd.DataFrame:
+    """Add the "True"/"False" factor filter columns and convert percent columns"""
+    all_table = all_table.copy()
+
     # FACTOR FILTER #1
     all_table["Price_Over_15"] = all_table["Price"].apply(
         lambda x: "True" if x >= 15 else "False"
@@ -124,107 +144,95 @@ try:
         lambda x: "True" if x >= -0.2 else "False"
     )
 
-    # FACTOR FILTER #8
-    all_table["EPS This Y"] = (
-        all_table["EPS This Y"].astype(str).str.replace("%", "").astype(float) / 100
-    )
-    all_table["EPS_This_Y_Positive"] = all_table["EPS This Y"].apply(
-        lambda x: "True" if x >= 0 else "False"
-    )
+    # FACTOR FILTERS #8-#12
+    for column, flag in zip(PERCENT_COLUMNS, [
+        "EPS_This_Y_Positive", "EPS_Next_Y_Positive", "EPS_Past_5Y_Positive",
+        "EPS_Next_5Y_Positive", "Sales_Past_5Y_Positive",
+    ]):
+        all_table[column] = percent_to_fraction(all_table[column])
+        all_table[flag] = all_table[column].apply(lambda x: "True" if x >= 0 else "False")
 
-    # FACTOR FILTER #9
-    all_table["EPS Next Y"] = (
-        all_table["EPS Next Y"].astype(str).str.replace("%", "").astype(float) / 100
-    )
-    all_table["EPS_Next_Y_Positive"] = all_table["EPS Next Y"].apply(
-        lambda x: "True" if x >= 0 else "False"
-    )
+    # FACTOR FILTER #13
+    all_table["Change from Open"] = percent_to_fraction(all_table["Change from Open"])
+    return all_table
+
+
+def calculate_investor_score(row) -> int:
+    score = 0
+
+    # PEG ratio score (lower is better)
+    if not pd.isna(row["PEG"]):
+        if row["PEG"] > 0 and row["PEG"] < 1:
+            score += 30
+        elif row["PEG"] >= 1 and row["PEG"] < 2:
+            score += 20
+        elif row["PEG"] >= 2:
+            score += 10
+
+    # ROE score (higher is better)
+    if not pd.isna(row["ROE"]):
+        if row["ROE"] > 0.2:  # Over 20%
+            score += 30
+        elif row["ROE"] > 0.1:  # Over 10%
+            score += 20
+        elif row["ROE"] > 0:  # Positive
+            score += 10
+
+    # Profit margin score (higher is better)
+    if not pd.isna(row["Profit M"]):
+        if row["Profit M"] > 0.2:  # Over 20%
+            score += 20
+        elif row["Profit M"] > 0.1:  # Over 10%
+            score += 15
+        elif row["Profit M"] > 0:  # Positive
+            score += 10
+
+    # Future growth score (higher is better)
+    if not pd.isna(row["EPS Next 5Y"]):
+        if row["EPS Next 5Y"] > 0.3:  # Over 30%
+            score += 20
+        elif row["EPS Next 5Y"] > 0.2:  # Over 20%
+            score += 15
+        elif row["EPS Next 5Y"] > 0.1:  # Over 10%
+            score += 10
+
+    return score
+
+
+def add_investor_score(all_table: pd.DataFrame) -> pd.DataFrame:
+    all_table = all_table.copy()
+    # Handle NaN values in the scored columns first
+    for column in ["PEG", "ROE", "Profit M", "EPS Next 5Y"]:
+        all_table[column] = pd.to_numeric(all_table[column], errors="coerce")
+    all_table["Investor_Score"] = all_table.apply(calculate_investor_score, axis=1)
+    return all_table
 
-    # FACTOR FILTER #10
-    all_table["EPS Past 5Y"] = (
-        all_table["EPS Past 5Y"].astype(str).str.replace("%", "").astype(float) / 100
-    )
-    all_table["EPS_Past_5Y_Positive"] = all_table["EPS Past 5Y"].apply(
-        lambda x: "True" if x >= 0 else "False"
-    )
 
-    # FACTOR FILTER #11
-    all_table["EPS Next 5Y"] = (
-        all_table["EPS Next 5Y"].astype(str).str.replace("%", "").astype(float) / 100
-    )
-    all_table["EPS_Next_5Y_Positive"] = all_table["EPS Next 5Y"].apply(
-        lambda x: "True" if x >= 0 else "False"
-    )
+def normalize_table(all_table: pd.DataFrame, run_day: str = None) -> pd.DataFrame:
+    """Merged raw screen -> factor flags, numeric columns, Run_Day and Investor Score (no rows dropped)"""
+    all_table = add_factor_filters(all_table)
 
-    # FACTOR FILTER #12
-    all_table["Sales Past 5Y"] = (
-        all_table["Sales Past 5Y"].astype(str).str.replace("%", "").astype(float) / 100
-    )
-    all_table["Sales_Past_5Y_Positive"] = all_table["Sales Past 5Y"].apply(
-        lambda x: "True" if x >= 0 else "False"
-    )
+    # Run Day Stamp (use NYSE/Eastern timezone for consistency)
+    all_table["Run_Day"] = run_day or datetime.now(ZoneInfo('America/New_York')).date().isoformat()
 
-    # FACTOR FILTER #13
-    all_table["Change from Open"] = (
-        all_table["Change from Open"].astype(str).str.replace("%", "").astype(float)
-        / 100
-    )
+    return add_investor_score(all_table)
 
-    # Run Day Stamp (use NYSE/Eastern timezone for consistency)
-    eastern = ZoneInfo('America/New_York')
-    all_table["Run_Day"] = datetime.now(eastern).date().isoformat()
-
-    # Create an Investor Score column for better sorting
-    # First, let's handle NaN values in relevant columns
-    all_table["PEG"] = pd.to_numeric(all_table["PEG"], errors="coerce")
-    all_table["ROE"] = pd.to_numeric(all_table["ROE"], errors="coerce")
-    all_table["Profit M"] = pd.to_numeric(all_table["Profit M"], errors="coerce")
-    all_table["EPS Next 5Y"] = pd.to_numeric(all_table["EPS Next 5Y"], errors="coerce")
-
-    # Create a function to calculate investor score
-    def calculate_investor_score(row):
-        score = 0
-
-        # PEG ratio score (lower is better)
-        if not pd.isna(row["PEG"]):
-            if row["PEG"] > 0 and row["PEG"] < 1:
-                score += 30
-            elif row["PEG"] >= 1 and row["PEG"] < 2:
-                score += 20
-            elif row["PEG"] >= 2:
-                score += 10
-
-        # ROE score (higher is better)
-        if not pd.isna(row["ROE"]):
-            if row["ROE"] > 0.2:  # Over 20%
-                score += 30
-            elif row["ROE"] > 0.1:  # Over 10%
-                score += 20
-            elif row["ROE"] > 0:  # Positive
-                score += 10
-
-        # Profit margin score (higher is better)
-        if not pd.isna(row["Profit M"]):
-            if row["Profit M"] > 0.2:  # Over 20%
-                score += 20
-            elif row["Profit M"] > 0.1:  # Over 10%
-                score += 15
-            elif row["Profit M"] > 0:  # Positive
-                score += 10
-
-        # Future growth score (higher is better)
-        if not pd.isna(row["EPS Next 5Y"]):
-            if row["EPS Next 5Y"] > 0.3:  # Over 30%
-                score += 20
-            elif row["EPS Next 5Y"] > 0.2:  # Over 20%
-                score += 15
-            elif row["EPS Next 5Y"] > 0.1:  # Over 10%
-                score += 10
-
-        return score
-
-    # Calculate and add investor score
-    all_table["Investor_Score"] = all_table.apply(calculate_investor_score, axis=1)
+
+def score_table(all_table: pd.DataFrame, run_day: str = None,
+                archive_dir: Optional[Path] = None) -> pd.DataFrame:
+    """Merged raw screen -> filtered, scored, ranked and sorted snapshot
+
+    With `archive_dir`, the normalized table is archived there before any
+    rows are dropped (see raw_archive.py).
+    """
+    all_table = normalize_table(all_table, run_day)
+    if archive_dir is not None:
+        archive_started = time.perf_counter()
+        path = write_archive(all_table, all_table["Run_Day"].iloc[0], archive_dir)
+        print(
+            f"Archived {len(all_table)} raw rows to {path} in {(time.perf_counter() - archive_started) * 1000:.0f}ms",
+            file=sys.stderr,
+        )
 
     # Remove records if not meeting FACTOR FILTER criteria 2, 6, 7
     all_table = all_table.loc[
@@ -233,14 +241,38 @@ try:
         & (all_table["Pct_Below_High_Under_20%"] == "True")
     ]
 
-    # Sort the table by Investor Score (descending)
-    all_table = all_table.sort_values(by="Investor_Score", ascending=False)
+    # Percentile ranks across the screen and within Sector/Industry
+    rank_started = time.perf_counter()
+    all_table = add_percentile_ranks(all_table)
+    print(
+        f"Ranked {len(all_table)} tickers in {(time.perf_counter() - rank_started) * 1000:.0f}ms",
+        file=sys.stderr,
+    )
+
+    # Sort the table by Investor Score (descending), Composite_Pct breaks ties
+    return sort_screen(all_table)
+
+
+def run_screen(filters: Dict[str, str] = FILTERS, archive_dir: Optional[Path] = None) -> pd.DataFrame:
+    """The whole daily pipeline: fetch, merge and score"""
+    table = fetch_table(filters)
+    print("Processing data...", file=sys.stderr)
+    return score_table(table, archive_dir=archive_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the daily screen and print it as TSV")
+    parser.add_argument("--archive-dir", type=Path,
+                        help="Also archive the raw, pre-filter table here (e.g. public/data/raw)")
+    args = parser.parse_args()
+    try:
+        all_table = run_screen(archive_dir=args.archive_dir)
+        # Output CSV to stdout
+        all_table.to_csv(sys.stdout, sep="\t", index=False)
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
 
-    # Output CSV to stdout
-    all_table.to_csv(sys.stdout, sep="\t", index=False)
 
-except Exception as e:
-    # Reset stdout in case of error
-    sys.stdout = original_stdout
-    print(f"Error: {str(e)}", file=sys.stderr)
-    sys.exit(1)
+if __name__ == "__main__":
+    main()
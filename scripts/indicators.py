@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Technical Indicators
+Computes SMA/EMA, RSI, volatility, momentum and drawdown from the stored
+daily Price history for every ticker at once. Windowed indicators use
+cumulative sums and strided windows over the dates x tickers panel;
+recursive ones (EMA, RSI) step all tickers together. Days a ticker was out of
+the screen are NaN: windows need enough observed days, and EMA/RSI simply
+skip the gap. A saved state lets a new day be appended without recomputing
+the history.
+
+Usage: python scripts/indicators.py [--state indicators_state.json] [--all]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from price_adjustments import adjust_history, load_adjustments
+from snapshot_history import DATA_DIR, build_panel, list_snapshot_dates, load_history
+
+TRADING_DAYS_PER_YEAR = 252
+
+# (name, kind, window); windowed kinds need at least MIN_COVERAGE of the window observed
+DEFAULT_SPECS = [
+    ('sma_20', 'sma', 20),
+    ('sma_50', 'sma', 50),
+    ('ema_12', 'ema', 12),
+    ('ema_26', 'ema', 26),
+    ('rsi_14', 'rsi', 14),
+    ('vol_20', 'volatility', 20),
+    ('mom_20', 'momentum', 20),
+    ('mom_60', 'momentum', 60),
+    ('dd_60', 'drawdown', 60),
+    ('dd_max', 'drawdown', None),
+]
+MIN_COVERAGE = 0.8
+
+
+def window_sums(values: np.ndarray, window: int):
+    """Trailing-window sums and observation counts via cumulative sums"""
+    observed = ~np.isnan(values)
+    zero_pad = np.zeros((1, values.shape[1]))
+    csum = np.vstack([zero_pad, np.cumsum(np.where(observed, values, 0.0), axis=0)])
+    ccount = np.vstack([zero_pad, np.cumsum(observed, axis=0)])
+    start = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+    return csum[1:] - csum[start], ccount[1:] - ccount[start]
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    sums, counts = window_sums(values, window)
+    enough = counts >= np.ceil(window * MIN_COVERAGE)
+    return np.divide(sums, counts, out=np.full(values.shape, np.nan), where=enough)
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Sample std from sums of x and x² (values are small returns, so this is stable)"""
+    sums, counts = window_sums(values, window)
+    squares, _ = window_sums(values ** 2, window)
+    enough = (counts >= np.ceil(window * MIN_COVERAGE)) & (counts > 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = (squares - sums ** 2 / counts) / (counts - 1)
+    return np.where(enough, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing nan-max over strided windows (leading rows use a shorter window)"""
+    padded = np.vstack([np.full((window - 1, values.shape[1]), -np.inf), np.nan_to_num(values, nan=-np.inf)])
+    result = sliding_window_view(padded, window, axis=0).max(axis=-1)
+    return np.where(np.isinf(result), np.nan, result)
+
+
+def snapshot_returns(prices: np.ndarray) -> np.ndarray:
+    returns = np.full(prices.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns[1:] = prices[1:] / prices[:-1] - 1
+    return returns
+
+
+class RecursiveState:
+    """Per-ticker EMA/RSI state advanced one snapshot at a time for all tickers"""
+
+    def __init__(self, specs, n_tickers: int):
+        self.specs = [(name, kind, window) for name, kind, window in specs if kind in ('ema', 'rsi')]
+        self.last_price = np.full(n_tickers, np.nan)
+        self.values = {name: np.full(n_tickers, np.nan) for name, _, _ in self.specs}
+        self.gains = {name: np.full(n_tickers, np.nan) for name, kind, _ in self.specs if kind == 'rsi'}
+        self.losses = {name: np.full(n_tickers, np.nan) for name, kind, _ in self.specs if kind == 'rsi'}
+        self.counts = {name: np.zeros(n_tickers) for name, _, _ in self.specs}
+
+    def grow(self, n_tickers: int) -> None:
+        """Add columns for tickers that entered the screen"""
+        extra = n_tickers - len(self.last_price)
+        if extra <= 0:
+            return
+        pad = lambda a, fill: np.concatenate([a, np.full(extra, fill)])
+        self.last_price = pad(self.last_price, np.nan)
+        for store, fill in ((self.values, np.nan), (self.gains, np.nan), (self.losses, np.nan), (self.counts, 0.0)):
+            for name in store:
+                store[name] = pad(store[name], fill)
+
+    def step(self, prices: np.ndarray) -> Dict[str, np.ndarray]:
+        """Advance with one day's prices; returns that day's EMA/RSI values"""
+        seen = ~np.isnan(prices)
+        change = prices - self.last_price
+        has_change = seen & ~np.isnan(change)
+        out = {}
+        for name, kind, window in self.specs:
+            if kind == 'ema':
+                alpha = 2 / (window + 1)
+                previous = self.values[name]
+                updated = np.where(np.isnan(previous), prices, previous + alpha * (prices - previous))
+                self.values[name] = np.where(seen, updated, previous)
+                self.counts[name] = self.counts[name] + seen
+                ready = seen & (self.counts[name] >= window)
+            else:
+                alpha = 1 / window  # Wilder smoothing
+                gain, loss = np.maximum(change, 0), np.maximum(-change, 0)
+                for store, x in ((self.gains, gain), (self.losses, loss)):
+                    previous = store[name]
+                    updated = np.where(np.isnan(previous), x, previous + alpha * (x - previous))
+                    store[name] = np.where(has_change, updated, previous)
+                self.counts[name] = self.counts[name] + has_change
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    rsi = 100 - 100 / (1 + self.gains[name] / self.losses[name])
+                self.values[name] = np.where(self.losses[name] == 0, 100.0, rsi)
+                ready = seen & (self.counts[name] >= window)
+            out[name] = np.where(ready, self.values[name], np.nan)
+        self.last_price = np.where(seen, prices, self.last_price)
+        return out
+
+    def to_json(self) -> Dict:
+        encode = lambda a: [None if np.isnan(v) else float(v) for v in a]
+        return {
+            'last_price': encode(self.last_price),
+            'values': {k: encode(v) for k, v in self.values.items()},
+            'gains': {k: encode(v) for k, v in self.gains.items()},
+            'losses': {k: encode(v) for k, v in self.losses.items()},
+            'counts': {k: v.tolist() for k, v in self.counts.items()},
+        }
+
+    def load_json(self, data: Dict) -> None:
+        decode = lambda a: np.array([np.nan if v is None else v for v in a], dtype=float)
+        self.last_price = decode(data['last_price'])
+        self.values = {k: decode(v) for k, v in data['values'].items()}
+        self.gains = {k: decode(v) for k, v in data['gains'].items()}
+        self.losses = {k: decode(v) for k, v in data['losses'].items()}
+        self.counts = {k: np.array(v, dtype=float) for k, v in data['counts'].items()}
+
+
+class IndicatorEngine:
+    """Computes indicator panels and keeps just enough tail to append new days"""
+
+    def __init__(self, specs=DEFAULT_SPECS):
+        self.specs = list(specs)
+        self.tail_length = max([w for _, kind, w in self.specs if kind != 'ema' and w] + [1]) + 1
+        self.tickers: List[str] = []
+        self.dates: List[str] = []
+        self.tail = np.empty((0, 0))
+        self.running_max = np.empty(0)
+        self.recursive = RecursiveState(self.specs, 0)
+
+    def windowed(self, prices: np.ndarray, running_max: np.ndarray) -> Dict[str, np.ndarray]:
+        """All non-recursive indicators for every row of a price panel"""
+        returns = snapshot_returns(prices)
+        out = {}
+        for name, kind, window in self.specs:
+            if kind == 'sma':
+                out[name] = rolling_mean(prices, window)
+            elif kind == 'volatility':
+                out[name] = rolling_std(returns, window) * np.sqrt(TRADING_DAYS_PER_YEAR)
+            elif kind == 'momentum':
+                past = np.full(prices.shape, np.nan)
+                past[window:] = prices[:-window]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    out[name] = prices / past - 1
+            elif kind == 'drawdown':
+                peak = running_max if window is None else rolling_max(prices, window)
+                out[name] = prices / peak - 1
+        return out
+
+    def compute(self, prices: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """Full-history panels; also primes the state for later appends"""
+        values = prices.to_numpy(dtype=float)
+        self.tickers, self.dates = list(prices.columns), list(prices.index)
+        running_max = np.fmax.accumulate(values, axis=0)
+        panels = self.windowed(values, running_max)
+
+        self.recursive = RecursiveState(self.specs, len(self.tickers))
+        steps = [self.recursive.step(row) for row in values]
+        for name, _, _ in self.recursive.specs:
+            panels[name] = np.vstack([s[name] for s in steps]) if steps else np.empty(values.shape)
+
+        self.tail = values[-self.tail_length:]
+        self.running_max = running_max[-1] if len(values) else np.full(len(self.tickers), np.nan)
+        return {
+            name: pd.DataFrame(panels[name], index=prices.index, columns=prices.columns)
+            for name, _, _ in self.specs
+        }
+
+    def append(self, date: str, prices: pd.Series) -> pd.DataFrame:
+        """Indicators for one new day, using only the retained tail and state"""
+        if self.dates and date <= self.dates[-1]:
+            raise ValueError(f"{date} is not after the last processed date {self.dates[-1]}")
+        new = [t for t in prices.index if t not in set(self.tickers)]
+        if new:
+            self.tickers += new
+            self.tail = np.hstack([self.tail.reshape(len(self.tail), -1), np.full((len(self.tail), len(new)), np.nan)])
+            self.running_max = np.concatenate([self.running_max, np.full(len(new), np.nan)])
+            self.recursive.grow(len(self.tickers))
+
+        row = prices.reindex(self.tickers).to_numpy(dtype=float)
+        self.tail = np.vstack([self.tail, row[None]])[-self.tail_length:]
+        self.running_max = np.fmax(self.running_max, row)
+        self.dates.append(date)
+
+        windowed = self.windowed(self.tail, np.tile(self.running_max, (len(self.tail), 1)))
+        values = {name: panel[-1] for name, panel in windowed.items()}
+        values.update(self.recursive.step(row))
+        return pd.DataFrame({name: values[name] for name, _, _ in self.specs}, index=self.tickers)
+
+    def save(self, path: Path) -> None:
+        state = {
+            'specs': self.specs,
+            'tickers': self.tickers,
+            'dates': self.dates,
+            'tail': [[None if np.isnan(v) else float(v) for v in row] for row in self.tail],
+            'running_max': [None if np.isnan(v) else float(v) for v in self.running_max],
+            'recursive': self.recursive.to_json(),
+        }
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        tmp.write_text(json.dumps(state, separators=(',', ':')), encoding='utf-8')
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'IndicatorEngine':
+        state = json.loads(path.read_text(encoding='utf-8'))
+        engine = cls([tuple(spec) for spec in state['specs']])
+        engine.tickers, engine.dates = state['tickers'], state['dates']
+        engine.tail = np.array([[np.nan if v is None else v for v in row] for row in state['tail']], dtype=float)
+        engine.tail = engine.tail.reshape(len(state['tail']), len(engine.tickers))
+        engine.running_max = np.array([np.nan if v is None else v for v in state['running_max']], dtype=float)
+        engine.recursive = RecursiveState(engine.specs, len(engine.tickers))
+        engine.recursive.load_json(state['recursive'])
+        return engine
+
+
+def long_table(panels: Dict[str, pd.DataFrame], dates: Optional[List[str]] = None) -> pd.DataFrame:
+    """Stack indicator panels into Date/Ticker rows, keeping only observed cells"""
+    frames = {name: panel.loc[dates] if dates else panel for name, panel in panels.items()}
+    stacked = pd.concat({name: panel.stack(future_stack=True) for name, panel in frames.items()}, axis=1)
+    stacked.index.names = ['Date', 'Ticker']
+    return stacked.dropna(how='all').reset_index()
+
+
+def full_table(data_dir: Path = DATA_DIR, all_dates: bool = False) -> Tuple[IndicatorEngine, pd.DataFrame]:
+    """Engine computed over the whole adjusted history, and the newest day's (or every day's) rows.
+
+    Rows are limited to tickers in that day's snapshot: a name that left the
+    screen keeps valid windowed values for a while.
+    """
+    engine = IndicatorEngine()
+    history = adjust_history(load_history(data_dir, columns=['Price']), data_dir)
+    panels = engine.compute(build_panel(history, 'Price'))
+    table = long_table(panels, None if all_dates else [engine.dates[-1]])
+    return engine, table.merge(history[['Date', 'Ticker']], on=['Date', 'Ticker'])
+
+
+def append_table(engine: IndicatorEngine, data_dir: Path, pending: List[str]) -> Optional[pd.DataFrame]:
+    """Append the pending days to the engine; rows of the newest day's tickers, or None without new days"""
+    history = load_history(data_dir, columns=['Price'], dates=pending)
+    frames = [
+        engine.append(date, rows.set_index('Ticker')['Price']).assign(Date=date)
+        for date, rows in history.groupby('Date', sort=True)
+    ]
+    if not frames:
+        return None
+    latest = frames[-1].rename_axis('Ticker').reset_index()
+    latest = latest[latest['Ticker'].isin(history.loc[history['Date'] == pending[-1], 'Ticker'])]
+    latest = latest.sort_values('Ticker', ignore_index=True)
+    return latest[['Date', 'Ticker', *[name for name, _, _ in engine.specs]]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute technical indicators from stored snapshot prices")
+    parser.add_argument("--state", type=Path, help="Engine state file; new days are appended incrementally")
+    parser.add_argument("--all", action="store_true", help="Output every date instead of only the newest")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    dates = list_snapshot_dates(DATA_DIR)
+    engine = IndicatorEngine.load(args.state) if args.state and args.state.exists() else None
+    # A split after the saved state rescales the history the state was built from
+    adjustments = load_adjustments(DATA_DIR)
+    if engine and engine.dates and adjustments.splits_after(engine.dates[-1]):
+        print("Split since the saved state; recomputing from the adjusted history", file=sys.stderr)
+        engine = None
+
+    if engine and not args.all and engine.dates and set(engine.dates) <= set(dates):
+        pending = [d for d in dates if d > engine.dates[-1]]
+        table = append_table(engine, DATA_DIR, pending)
+        if table is None:
+            print(f"State already covers {engine.dates[-1]}; nothing to append", file=sys.stderr)
+            return
+        mode = f"appended {len(pending)} day(s)"
+    else:
+        engine, table = full_table(DATA_DIR, all_dates=args.all)
+        mode = f"computed {len(engine.dates)} days"
+
+    if args.state:
+        engine.save(args.state)
+    table.to_csv(sys.stdout, sep="\t", index=False)
+    print(f"Indicators {mode} in {(time.perf_counter() - started) * 1000:.0f}ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
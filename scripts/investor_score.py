@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Investor Score Rules
+Vectorized, parameterized form of fin.py's calculate_investor_score so the
+same bucket scoring can be applied to whole tables or dates x tickers panels
+with alternative thresholds and point weights.
+"""
+
+from typing import Dict
+
+import numpy as np
+
+# Each metric is scored by the bucket its value falls into.
+# Higher-is-better: bucket = number of cuts strictly below the value.
+# Lower-is-better (PEG): 0 when value <= cuts[0], otherwise the number of
+# cuts <= value, so (0, 1) -> 1, [1, 2) -> 2, [2, inf) -> 3.
+DEFAULT_RULES = {
+    'PEG': {'cuts': (0.0, 1.0, 2.0), 'points': (0, 30, 20, 10), 'lower_is_better': True},
+    'ROE': {'cuts': (0.0, 0.1, 0.2), 'points': (0, 10, 20, 30)},
+    'Profit M': {'cuts': (0.0, 0.1, 0.2), 'points': (0, 10, 15, 20)},
+    'EPS Next 5Y': {'cuts': (0.1, 0.2, 0.3), 'points': (0, 10, 15, 20)},
+}
+
+
+def score_buckets(values: np.ndarray, cuts, lower_is_better: bool = False) -> np.ndarray:
+    """Bucket index for every value; NaN always lands in bucket 0"""
+    values = np.asarray(values, dtype=float)
+    cuts = np.asarray(cuts, dtype=float)
+    if lower_is_better:
+        buckets = np.where(values > cuts[0], np.searchsorted(cuts, values, side='right'), 0)
+    else:
+        buckets = np.searchsorted(cuts, values, side='left')
+    return np.where(np.isnan(values), 0, buckets).astype(np.int8)
+
+
+def score_metric(values: np.ndarray, rule: Dict) -> np.ndarray:
+    """Points awarded by one metric rule"""
+    buckets = score_buckets(values, rule['cuts'], rule.get('lower_is_better', False))
+    return np.asarray(rule['points'], dtype=float)[buckets]
+
+
+def investor_score(columns: Dict[str, np.ndarray], rules: Dict[str, Dict] = DEFAULT_RULES) -> np.ndarray:
+    """Sum of per-metric points; `columns` maps metric name to an array of any shape"""
+    total = None
+    for metric, rule in rules.items():
+        points = score_metric(columns[metric], rule)
+        total = points if total is None else total + points
+    return total
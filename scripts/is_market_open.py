@@ -3,31 +3,32 @@
 Check if the US stock market (NYSE) is open today.
 Exits with code 0 if market is open, code 1 if closed.
 Uses US Eastern timezone to determine "today".
+Looks the date up in the generated NYSE table (see market_calendar.py)
+rather than importing pandas_market_calendars.
 """
 import sys
 from datetime import datetime
 from zoneinfo import ZoneInfo
-import pandas_market_calendars as mcal
+from market_calendar import load_calendar
 
 def is_market_open():
     """Check if NYSE is open today (based on US Eastern time)"""
     try:
-        # Get NYSE calendar
-        nyse = mcal.get_calendar('NYSE')
+        # Get NYSE calendar table
+        nyse = load_calendar()
 
         # Get today's date in US Eastern timezone (NYSE timezone)
         eastern = ZoneInfo('America/New_York')
         today = datetime.now(eastern).date()
 
-        # Get valid trading days for today
-        schedule = nyse.valid_days(start_date=today, end_date=today)
-
-        # If schedule is empty, market is closed
-        if len(schedule) == 0:
+        # Not a trading day: weekend or holiday
+        if not nyse.is_trading_day(today):
             print(f"Market is CLOSED on {today} ET (weekend or holiday)", file=sys.stderr)
             return False
         else:
-            print(f"Market is OPEN on {today} ET", file=sys.stderr)
+            early_close = nyse.early_close(today)
+            note = f" (early close {early_close} ET)" if early_close else ""
+            print(f"Market is OPEN on {today} ET{note}", file=sys.stderr)
             return True
 
     except Exception as e:
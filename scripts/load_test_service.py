@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Screener Service Load Test
+Fires a mix of lookups at the screener HTTP service from concurrent workers
+and reports p50/p99 latency per endpoint. Starts an in-process server when
+no --url is given.
+
+Usage: python scripts/load_test_service.py [--url http://127.0.0.1:8765] [--requests 2000]
+"""
+
+import argparse
+import http.client
+import json
+import math
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from urllib.parse import quote, urlparse
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted sample list"""
+    if not samples:
+        return float('nan')
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def build_paths(base_url: str) -> List[tuple]:
+    """Build (label, path) pairs from the tickers/sectors the service reports"""
+    stocks = fetch_json(base_url, "/stocks?page_size=500&fields=Ticker,Sector,Industry")["results"]
+    tickers = [s['Ticker'] for s in stocks]
+    sectors = sorted({s['Sector'] for s in stocks if s['Sector']})
+    industries = sorted({s['Industry'] for s in stocks if s['Industry']})
+    metrics = ['Investor_Score', 'PEG', 'ROE', 'Market Cap', 'RSI']
+
+    paths = []
+    for ticker in tickers:
+        paths.append(("ticker", f"/stocks/{quote(ticker)}"))
+        paths.append(("history", f"/history/{quote(ticker)}"))
+    for sector in sectors:
+        paths.append(("sector", f"/sectors/{quote(sector)}?page_size=20"))
+    for industry in industries:
+        paths.append(("industry", f"/industries/{quote(industry)}?page_size=20"))
+    for metric in metrics:
+        paths.append(("top", f"/top?metric={quote(metric)}&n=25"))
+    paths.append(("range", "/range?metric=Investor_Score&min=80&max=100&page_size=20"))
+    paths.append(("range", "/range?metric=PEG&min=0&max=1&page_size=20"))
+    return paths
+
+
+def fetch_json(base_url: str, path: str) -> Dict:
+    """One-off GET used for discovery"""
+    url = urlparse(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=10)
+    try:
+        conn.request("GET", path)
+        return json.loads(conn.getresponse().read())
+    finally:
+        conn.close()
+
+
+def run_load(base_url: str, paths: List[tuple], total: int, concurrency: int) -> Dict[str, List[float]]:
+    """Issue `total` requests over keep-alive connections; return latencies (ms) by label"""
+    url = urlparse(base_url)
+    latencies: Dict[str, List[float]] = {}
+    errors = 0
+    lock = threading.Lock()
+    per_worker = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+
+    def worker(count: int, seed: int):
+        nonlocal errors
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection(url.hostname, url.port, timeout=10)
+        local: Dict[str, List[float]] = {}
+        local_errors = 0
+        for _ in range(count):
+            label, path = rng.choice(paths)
+            started = time.perf_counter()
+            try:
+                conn.request("GET", path)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    local_errors += 1
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(url.hostname, url.port, timeout=10)
+                continue
+            local.setdefault(label, []).append((time.perf_counter() - started) * 1000)
+        conn.close()
+        with lock:
+            errors += local_errors
+            for label, samples in local.items():
+                latencies.setdefault(label, []).extend(samples)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i, count in enumerate(per_worker):
+            pool.submit(worker, count, i)
+
+    if errors:
+        print(f"Warning: {errors} requests failed", file=sys.stderr)
+    return latencies
+
+
+def format_report(latencies: Dict[str, List[float]], elapsed: float) -> str:
+    """Render a latency table with an overall row"""
+    everything = [s for samples in latencies.values() for s in samples]
+    lines = [f"{'endpoint':<10} {'count':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}"]
+    for label in sorted(latencies) + ['all']:
+        samples = everything if label == 'all' else latencies[label]
+        if not samples:
+            lines.append(f"{label:<10} {0:>7} {'n/a':>8} {'n/a':>8} {'n/a':>8}")
+            continue
+        lines.append(
+            f"{label:<10} {len(samples):>7} {percentile(samples, 50):>8.2f} "
+            f"{percentile(samples, 99):>8.2f} {max(samples):>8.2f}"
+        )
+    lines.append(f"throughput: {len(everything) / elapsed:.0f} req/s over {elapsed:.2f}s")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the screener HTTP service")
+    parser.add_argument("--url", help="Base URL of a running service (default: start one in-process)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    if not base_url:
+        from screener_service import ScreenerStore, create_server
+
+        store = ScreenerStore()
+        store.load()
+        server = create_server(store, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        paths = build_paths(base_url)
+        started = time.perf_counter()
+        latencies = run_load(base_url, paths, args.requests, args.concurrency)
+        print(format_report(latencies, time.perf_counter() - started))
+    finally:
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+NYSE Trading Calendar
+Answers trading-day questions from a generated table (nyse_calendar.json)
+instead of importing pandas_market_calendars and pandas. The table lists
+the weekday closures and early closes for a span of years; every other
+weekday in the span is a trading day. Single dates are set lookups and
+range queries bisect a sorted list of trading-day ordinals.
+
+Regenerate the table (needs pandas_market_calendars) with:
+  python scripts/market_calendar.py --generate [--start 2000] [--end 2035]
+"""
+
+import argparse
+import json
+import sys
+from bisect import bisect_left, bisect_right
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+CALENDAR_PATH = Path(__file__).resolve().parent / "nyse_calendar.json"
+TABLE_VERSION = 1
+
+DateLike = Union[date, str]
+
+
+def to_date(value: DateLike) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+class TradingCalendar:
+    """Trading days, holidays and early closes between `start` and `end`"""
+
+    def __init__(self, start: date, end: date, holidays: List[date], early_closes: Dict[date, str]):
+        self.start, self.end = start, end
+        self.holidays = frozenset(holidays)
+        self.early_closes = dict(early_closes)
+        self._ordinals: Optional[List[int]] = None
+
+    @classmethod
+    def from_table(cls, table: Dict) -> 'TradingCalendar':
+        if table.get('version') != TABLE_VERSION:
+            raise ValueError(f"Unsupported calendar table version {table.get('version')}")
+        return cls(
+            date.fromisoformat(table['start']),
+            date.fromisoformat(table['end']),
+            [date.fromisoformat(d) for d in table['holidays']],
+            {date.fromisoformat(d): t for d, t in table['early_closes'].items()},
+        )
+
+    def covers(self, day: DateLike) -> bool:
+        return self.start <= to_date(day) <= self.end
+
+    def _check(self, day: date) -> date:
+        if not self.start <= day <= self.end:
+            raise ValueError(f"{day} is outside the calendar table ({self.start} to {self.end}); regenerate it")
+        return day
+
+    def is_trading_day(self, day: DateLike) -> bool:
+        """O(1): a weekday in the table's span that is not a closure"""
+        day = self._check(to_date(day))
+        return day.weekday() < 5 and day not in self.holidays
+
+    def is_holiday(self, day: DateLike) -> bool:
+        """Weekday closure (holidays and special closings such as national days of mourning)"""
+        return self._check(to_date(day)) in self.holidays
+
+    def early_close(self, day: DateLike) -> Optional[str]:
+        """Local close time ("13:00") on an early-close day, else None"""
+        return self.early_closes.get(self._check(to_date(day)))
+
+    @property
+    def ordinals(self) -> List[int]:
+        """Sorted ordinals of every trading day, built on first range query"""
+        if self._ordinals is None:
+            first, last = self.start.toordinal(), self.end.toordinal()
+            closed = {d.toordinal() for d in self.holidays}
+            # date.fromordinal(1) is a Monday, so (ordinal - 1) % 7 is the weekday
+            self._ordinals = [o for o in range(first, last + 1) if (o - 1) % 7 < 5 and o not in closed]
+        return self._ordinals
+
+    def trading_days(self, start: DateLike, end: DateLike) -> List[date]:
+        """Trading days in [start, end], found by bisection"""
+        lo = bisect_left(self.ordinals, self._check(to_date(start)).toordinal())
+        hi = bisect_right(self.ordinals, self._check(to_date(end)).toordinal())
+        return [date.fromordinal(o) for o in self.ordinals[lo:hi]]
+
+    def count_trading_days(self, start: DateLike, end: DateLike) -> int:
+        lo = bisect_left(self.ordinals, self._check(to_date(start)).toordinal())
+        hi = bisect_right(self.ordinals, self._check(to_date(end)).toordinal())
+        return max(hi - lo, 0)
+
+    def next_trading_day(self, day: DateLike) -> date:
+        """First trading day strictly after `day`"""
+        i = bisect_right(self.ordinals, self._check(to_date(day)).toordinal())
+        if i == len(self.ordinals):
+            raise ValueError(f"No trading day after {day} in the calendar table")
+        return date.fromordinal(self.ordinals[i])
+
+    def previous_trading_day(self, day: DateLike) -> date:
+        """Last trading day strictly before `day`"""
+        i = bisect_left(self.ordinals, self._check(to_date(day)).toordinal())
+        if i == 0:
+            raise ValueError(f"No trading day before {day} in the calendar table")
+        return date.fromordinal(self.ordinals[i - 1])
+
+
+@lru_cache(maxsize=None)
+def load_calendar(path: Path = CALENDAR_PATH) -> TradingCalendar:
+    """Parse the generated table once per process"""
+    return TradingCalendar.from_table(json.loads(Path(path).read_text(encoding='utf-8')))
+
+
+def generate_table(start_year: int, end_year: int) -> Dict:
+    """Build the table from pandas_market_calendars (imported only here)"""
+    import pandas as pd
+    import pandas_market_calendars as mcal
+
+    nyse = mcal.get_calendar('NYSE')
+    start, end = date(start_year, 1, 1), date(end_year, 12, 31)
+    schedule = nyse.schedule(start_date=start.isoformat(), end_date=end.isoformat())
+
+    sessions = {d.date() for d in schedule.index}
+    weekdays = pd.bdate_range(start, end)
+    holidays = sorted(d.date().isoformat() for d in weekdays if d.date() not in sessions)
+
+    closes = schedule['market_close'].dt.tz_convert(nyse.tz)
+    early = nyse.early_closes(schedule)
+    early_closes = {d.date().isoformat(): closes.loc[d].strftime('%H:%M') for d in early.index}
+
+    return {
+        'version': TABLE_VERSION,
+        'source': f"pandas_market_calendars {getattr(mcal, '__version__', 'unknown')} (NYSE)",
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'holidays': holidays,
+        'early_closes': early_closes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NYSE trading calendar table")
+    parser.add_argument("--generate", action="store_true", help="Regenerate the table from pandas_market_calendars")
+    parser.add_argument("--start", type=int, default=2000, help="First year (with --generate)")
+    parser.add_argument("--end", type=int, default=2035, help="Last year (with --generate)")
+    parser.add_argument("--out", type=Path, default=CALENDAR_PATH)
+    parser.add_argument("dates", nargs="*", help="Dates to check (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    if args.generate:
+        table = generate_table(args.start, args.end)
+        args.out.write_text(json.dumps(table, indent=1) + "\n", encoding='utf-8')
+        print(f"Wrote {len(table['holidays'])} closures and {len(table['early_closes'])} early closes "
+              f"({table['start']} to {table['end']}) to {args.out}", file=sys.stderr)
+        return
+
+    calendar = load_calendar(args.out)
+    for value in args.dates:
+        day = to_date(value)
+        status = 'trading day' if calendar.is_trading_day(day) else 'closed'
+        close = calendar.early_close(day)
+        print(f"{day}\t{status}" + (f"\tearly close {close}" if close else ""))
+
+
+if __name__ == "__main__":
+    main()
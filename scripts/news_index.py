@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+News Near-Duplicate Index
+A ticker that stays in the top 5 gets the same events in its `latest_news`
+day after day, reworded a little each time. Every news item (a bullet, or a
+sentence of an unbulleted paragraph) is fingerprinted with MinHash over its
+content words, with dates, month names and stopwords dropped because the
+model rewrites those freely. Fingerprints from the last LOOKBACK_DAYS are
+banded into an LSH table per ticker, so checking a new item only compares it
+with the few earlier items that share a band, well under a millisecond.
+
+save_summaries uses it to collapse (or flag) repeated items before writing,
+and the reviewer skips the news lookup for a ticker whose last lookup
+turned up nothing new, until QUIET_RECHECK_DAYS have passed.
+
+The index is one JSON file committed with the analysis cache (under
+public/data/summary/cache/); --rebuild replays the stored summaries.
+
+Usage: python scripts/news_index.py [--rebuild] [--summary-dir public/data/summary]
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+import zlib
+from datetime import date as Date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+SUMMARY_DIR = Path("public/data/summary")
+NEWS_INDEX_PATH = SUMMARY_DIR / "cache" / "news_index.json"
+INDEX_VERSION = 1
+
+NUM_PERM = 128
+BANDS = 64                  # rows per band = NUM_PERM / BANDS; candidates from Jaccard ~0.13 up
+DUPLICATE_THRESHOLD = 0.35  # estimated Jaccard of content words at which items are the same event
+LOOKBACK_DAYS = 14
+QUIET_RECHECK_DAYS = 3
+MIN_ITEM_CHARS = 20
+
+MERSENNE = (1 << 31) - 1
+_rng = np.random.default_rng(20260101)          # fixed: fingerprints are persisted
+PERM_A = _rng.integers(1, MERSENNE, NUM_PERM, dtype=np.uint64)
+PERM_B = _rng.integers(0, MERSENNE, NUM_PERM, dtype=np.uint64)
+
+COLLAPSED_PREFIX = "Earlier news still current"
+STOPWORDS = set("""
+a an and are as at be been by company for from has have in into is it its of on or over per than that the their
+this to was were which while with after amid before during via vs also including new
+""".split())
+MONTHS = set("""
+jan feb mar apr may jun jul aug sep sept oct nov dec january february march april june july august september
+october november december
+""".split())
+TOKEN_PATTERN = re.compile(r"[a-z0-9$%]+(?:[.,'][a-z0-9]+)*")
+DATE_TOKEN = re.compile(r"(?:19|20)\d\d(?:-[0-9x]{2})*|\d{1,2}")
+ITEM_SPLIT = re.compile(r"\n+|•|(?<=[.!?])\s+(?=[A-Z])")
+
+
+def split_items(text: Optional[str]) -> List[str]:
+    """News items of a latest_news field: bullets, or sentences when it is one paragraph"""
+    items = [part.strip(" -*\t") for part in ITEM_SPLIT.split(text or '')]
+    return [item for item in items if len(item) >= MIN_ITEM_CHARS and not item.startswith(COLLAPSED_PREFIX)]
+
+
+def content_words(item: str) -> Set[str]:
+    words = TOKEN_PATTERN.findall(item.lower().replace('’', "'"))
+    words = (w[:-2] if w.endswith("'s") else w for w in words)
+    return {w for w in words if w not in STOPWORDS and w not in MONTHS and not DATE_TOKEN.fullmatch(w)}
+
+
+def minhash(item: str) -> np.ndarray:
+    """NUM_PERM uint32 MinHash signature of an item's content words"""
+    words = content_words(item) or {item.lower()}
+    hashes = np.fromiter((zlib.crc32(w.encode('utf-8')) for w in words), dtype=np.uint64, count=len(words))
+    hashes %= np.uint64(MERSENNE)
+    values = (PERM_A[:, None] * hashes[None, :] + PERM_B[:, None]) % np.uint64(MERSENNE)
+    return values.min(axis=1).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray) -> List[bytes]:
+    return [band.tobytes() for band in signature.reshape(BANDS, -1)]
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.mean(a == b))
+
+
+def days_between(earlier: str, later: str) -> int:
+    return (Date.fromisoformat(later) - Date.fromisoformat(earlier)).days
+
+
+class NewsIndex:
+    """Per-ticker MinHash fingerprints of recent news items with LSH buckets"""
+
+    def __init__(self, path: Path = NEWS_INDEX_PATH):
+        self.path = Path(path)
+        # ticker -> {'checked': date of last lookup, 'novel': last lookup with a new item,
+        #            'entries': [[first seen, last seen, signature], ...]}
+        self.tickers: Dict[str, Dict] = {}
+        self.buckets: Dict[Tuple[str, int, bytes], List[List]] = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: Path = NEWS_INDEX_PATH) -> 'NewsIndex':
+        """Index from disk; an unreadable or other-version file starts empty"""
+        index = cls(path)
+        try:
+            data = json.loads(index.path.read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError):
+            return index
+        if data.get('version') != INDEX_VERSION:
+            return index
+        for ticker, info in data.get('tickers', {}).items():
+            entries = [[first, last, np.frombuffer(bytes.fromhex(sig), dtype=np.uint32)]
+                       for first, last, sig in info['entries']]
+            index.tickers[ticker] = {**info, 'entries': entries}
+            for entry in entries:
+                index._bucket(ticker, entry)
+        return index
+
+    def _bucket(self, ticker: str, entry: List) -> None:
+        for band, key in enumerate(band_keys(entry[2])):
+            self.buckets.setdefault((ticker, band, key), []).append(entry)
+
+    def match(self, ticker: str, item: str, date: str,
+              signature: Optional[np.ndarray] = None) -> Optional[List]:
+        """The most similar earlier entry (first seen before `date`, seen within LOOKBACK_DAYS), or None"""
+        signature = minhash(item) if signature is None else signature
+        best, best_score = None, DUPLICATE_THRESHOLD
+        seen = set()
+        for band, key in enumerate(band_keys(signature)):
+            for entry in self.buckets.get((ticker, band, key), ()):
+                if id(entry) in seen or entry[0] >= date or days_between(entry[1], date) > LOOKBACK_DAYS:
+                    continue
+                seen.add(id(entry))
+                score = similarity(signature, entry[2])
+                if score >= best_score:
+                    best, best_score = entry, score
+        return best
+
+    def add(self, ticker: str, date: str, text: Optional[str], looked_up: bool = True) -> Dict[str, object]:
+        """Index one analysis's news; returns its items split into new and repeated.
+
+        Repeats refresh the earlier entry's last-seen date instead of adding
+        a copy. Re-adding a date replaces what that date added before.
+        `looked_up` is False when the news was carried over without asking.
+        """
+        info = self.tickers.setdefault(ticker, {'checked': None, 'novel': None, 'entries': []})
+        if any(entry[0] == date for entry in info['entries']):
+            info['entries'] = [entry for entry in info['entries'] if entry[0] != date]
+            self._rebuild_buckets()
+
+        items = split_items(text)
+        fresh, repeated = [], []
+        for item in items:
+            signature = minhash(item)
+            earlier = self.match(ticker, item, date, signature)
+            if earlier is not None:
+                earlier[1] = max(earlier[1], date)
+                repeated.append((item, earlier[0]))
+            else:
+                entry = [date, date, signature]
+                info['entries'].append(entry)
+                self._bucket(ticker, entry)
+                fresh.append(item)
+
+        # An empty field (a failed analysis) says nothing about whether the news moved
+        if looked_up and items:
+            info['checked'] = max(info['checked'] or date, date)
+            if fresh:
+                info['novel'] = max(info['novel'] or date, date)
+        self.dirty = True
+        return {'fresh': fresh, 'repeated': repeated}
+
+    def needs_news(self, ticker: str, date: str) -> bool:
+        """Whether to ask for fresh news: always, unless the last lookup found only repeats recently"""
+        info = self.tickers.get(ticker)
+        if not info or not info.get('checked') or info['checked'] >= date:
+            return True
+        if info.get('novel') == info['checked']:
+            return True
+        return days_between(info['checked'], date) >= QUIET_RECHECK_DAYS
+
+    def _rebuild_buckets(self) -> None:
+        self.buckets = {}
+        for ticker, info in self.tickers.items():
+            for entry in info['entries']:
+                self._bucket(ticker, entry)
+
+    def prune(self, newest: str) -> int:
+        """Drop entries not seen within LOOKBACK_DAYS of `newest`, and tickers left with nothing recent"""
+        cutoff = (Date.fromisoformat(newest) - timedelta(days=LOOKBACK_DAYS)).isoformat()
+        dropped = 0
+        for ticker, info in list(self.tickers.items()):
+            kept = [entry for entry in info['entries'] if entry[1] >= cutoff]
+            dropped += len(info['entries']) - len(kept)
+            info['entries'] = kept
+            if not kept and (info.get('checked') or '') < cutoff:
+                del self.tickers[ticker]
+        if dropped:
+            self._rebuild_buckets()
+            self.dirty = True
+        return dropped
+
+    def save(self) -> bool:
+        """Atomically write the index if anything changed; returns whether it wrote"""
+        if not self.dirty:
+            return False
+        newest = max((e[1] for info in self.tickers.values() for e in info['entries']), default=None)
+        if newest:
+            self.prune(newest)
+        tickers = {
+            ticker: {**info, 'entries': [[first, last, sig.tobytes().hex()] for first, last, sig in info['entries']]}
+            for ticker, info in sorted(self.tickers.items())
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+        tmp.write_text(json.dumps({'version': INDEX_VERSION, 'tickers': tickers}, separators=(',', ':')),
+                       encoding='utf-8')
+        tmp.replace(self.path)
+        self.dirty = False
+        return True
+
+
+def collapse_news(result: Dict[str, object], mode: str = 'collapse') -> Optional[str]:
+    """latest_news text rebuilt from NewsIndex.add's result, or None to keep the original.
+
+    'collapse' keeps the new items and sums up the repeats in one line;
+    'flag' keeps every item and marks the repeats.
+    """
+    repeated = result['repeated']
+    if not repeated or mode not in ('collapse', 'flag'):
+        return None
+    if mode == 'flag':
+        return "\n".join([f"• {item}" for item in result['fresh']] +
+                         [f"• (repeat, first reported {first}) {item}" for item, first in repeated])
+    first = min(first for _, first in repeated)
+    return "\n".join([f"• {item}" for item in result['fresh']] +
+                     [f"• {COLLAPSED_PREFIX}: {len(repeated)} item(s) first reported since {first}."])
+
+
+def list_summary_dates(summary_dir: Path) -> List[str]:
+    return sorted(path.stem for path in Path(summary_dir).glob("????-??-??.json"))
+
+
+def rebuild_index(summary_dir: Path = SUMMARY_DIR, path: Optional[Path] = None) -> Tuple[NewsIndex, Dict[str, int]]:
+    """Replay every stored summary in date order; returns the index and item counts"""
+    index = NewsIndex(path or Path(summary_dir) / "cache" / NEWS_INDEX_PATH.name)
+    counts = {'items': 0, 'repeated': 0}
+    for date in list_summary_dates(summary_dir):
+        summary = json.loads((Path(summary_dir) / f"{date}.json").read_text(encoding='utf-8'))
+        for stock in summary.get('top_stocks', []):
+            result = index.add(stock['ticker'], date, stock.get('latest_news'))
+            counts['items'] += len(result['fresh']) + len(result['repeated'])
+            counts['repeated'] += len(result['repeated'])
+    return index, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MinHash/LSH index of recent summary news items")
+    parser.add_argument("--summary-dir", type=Path, default=SUMMARY_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="Replay every stored summary into a new index")
+    args = parser.parse_args()
+
+    path = args.summary_dir / "cache" / NEWS_INDEX_PATH.name
+    if args.rebuild:
+        started = time.perf_counter()
+        index, counts = rebuild_index(args.summary_dir, path)
+        elapsed = time.perf_counter() - started
+        index.save()
+        share = counts['repeated'] / counts['items'] if counts['items'] else 0.0
+        print(f"Indexed {counts['items']} news items, {counts['repeated']} ({share:.0%}) repeated an item "
+              f"from the previous {LOOKBACK_DAYS} days", file=sys.stderr)
+        print(f"Rebuilt in {elapsed * 1000:.0f}ms ({elapsed / max(counts['items'], 1) * 1e6:.0f}µs per item)",
+              file=sys.stderr)
+        return
+
+    index = NewsIndex.load(path)
+    for ticker, info in sorted(index.tickers.items()):
+        print(f"{ticker:<6} {len(info['entries']):>3} item(s)  last lookup {info['checked']}  "
+              f"last new item {info['novel']}")
+
+
+if __name__ == "__main__":
+    main()
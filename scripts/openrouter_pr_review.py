@@ -2,21 +2,160 @@
 """
 OpenRouter PR Review Script
 Replaces claude-code-action with OpenRouter API for automated PR reviews
+
+The top-N tickers are analyzed in batches sized by BatchSizer (grown while
+responses come back fast and complete, halved on truncation) with a bounded
+number of requests in flight. Tickers a response leaves out are re-asked on
+their own instead of the whole batch failing.
+
+Completions are streamed (server-sent events) over a pooled session, and
+IncrementalObjectParser hands over each ticker's analysis as soon as its
+object closes, so a stream that stalls still yields the tickers it got to.
 """
 
+import asyncio
+import contextlib
 import json
 import os
 import re
 import subprocess
 import sys
 import time
+from collections import Counter, deque
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
 import requests
 
+from analysis_cache import CACHE_PATH, AnalysisCache, metrics_hash
+from correlation_clusters import MAX_PER_CLUSTER, diversify_screen
+from news_index import NEWS_INDEX_PATH, NewsIndex, collapse_news
+from review_telemetry import TELEMETRY_PATH, ReviewTelemetry, format_summary_table
+from summary_history import update_history
+
+
+class BatchSizer:
+    """Additive-increase / multiplicative-decrease batch size for analysis requests"""
+
+    def __init__(self, initial: int = 5, minimum: int = 1, maximum: int = 8, target_seconds: float = 45.0):
+        self.size = max(minimum, min(initial, maximum))
+        self.minimum, self.maximum = minimum, maximum
+        self.target_seconds = target_seconds
+
+    def record(self, batch_size: int, seconds: float, missing: int, truncated: bool) -> int:
+        """Update from one finished batch; returns the new size"""
+        if truncated:
+            self.size = max(self.minimum, min(self.size, batch_size // 2))
+        elif missing or seconds > self.target_seconds:
+            self.size = max(self.minimum, self.size - 1)
+        elif seconds < self.target_seconds / 2 and batch_size >= self.size:
+            self.size = min(self.maximum, self.size + 1)
+        return self.size
+
+
+class RequestBudget:
+    """Shared cap on analysis requests: at most `concurrency` in flight and
+    `per_minute` started per rolling minute. One budget can span several
+    analyze_stocks_async calls on the same event loop (the backfill runs
+    many dates under one).
+    """
+
+    def __init__(self, concurrency: int = 3, per_minute: Optional[float] = None):
+        self.slots = asyncio.Semaphore(concurrency)
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self.next_start = 0.0
+
+    async def __aenter__(self):
+        await self.slots.acquire()
+        now = time.monotonic()
+        start = max(now, self.next_start)
+        self.next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.slots.release()
+
+
+class StreamStalled(requests.exceptions.RequestException):
+    """No new content arrived within STALL_TIMEOUT (keep-alive comments do not count)"""
+
+
+class StreamCorrupted(requests.exceptions.RequestException):
+    """An SSE data line was cut off or is not JSON"""
+
+
+class IncrementalObjectParser:
+    """Emits the members of the first top-level JSON object as they complete.
+
+    Text before the opening brace (prose, a ```json fence) is skipped. A
+    member is emitted when its object value closes, or at the following
+    comma / closing brace for scalar values; each one is parsed on its own
+    (after `clean`, e.g. citation stripping), and members that do not parse
+    are skipped for the full-text fallback to handle.
+    """
+
+    def __init__(self, clean=None):
+        self.clean = clean or (lambda text: text)
+        self.text = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.member_start: Optional[int] = None
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, object]]:
+        """Add text; returns the (key, value) members completed by it"""
+        self.text += chunk
+        members = []
+        text = self.text
+        while self.pos < len(text) and not self.done:
+            ch, i = text[self.pos], self.pos
+            self.pos += 1
+            if self.depth == 0:
+                if ch == '{':
+                    self.depth, self.member_start = 1, i + 1
+                continue
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in '{[':
+                self.depth += 1
+            elif ch in '}]':
+                self.depth -= 1
+                if self.depth == 1 and ch == '}' and self.member_start is not None:
+                    members += self.member(self.member_start, i + 1)
+                    self.member_start = None
+                elif self.depth == 0:
+                    if self.member_start is not None:
+                        members += self.member(self.member_start, i)
+                    self.done = True
+            elif ch == ',' and self.depth == 1:
+                if self.member_start is not None:
+                    members += self.member(self.member_start, i)
+                self.member_start = i + 1
+        return members
+
+    def member(self, start: int, end: int) -> List[Tuple[str, object]]:
+        snippet = self.text[start:end].strip()
+        if not snippet:
+            return []
+        try:
+            parsed = json.loads("{" + self.clean(snippet) + "}")
+        except json.JSONDecodeError:
+            return []
+        return list(parsed.items())
+
 
 class OpenRouterPRReviewer:
     """Handles PR review using OpenRouter API"""
@@ -25,7 +164,25 @@ class OpenRouterPRReviewer:
     API_URL = "https://openrouter.ai/api/v1/chat/completions"
     DEFAULT_MODEL_NAME = "anthropic/claude-haiku-4.5:online"
     MAX_TOKENS = 4096
-    REQUEST_TIMEOUT = 120
+    REQUEST_TIMEOUT = 120     # whole stream
+    CONNECT_TIMEOUT = 10
+    STALL_TIMEOUT = 30        # longest gap between content deltas
+
+    # Analysis scheduling
+    DEFAULT_TOP_N = 5
+    DEFAULT_MAX_PER_CLUSTER = MAX_PER_CLUSTER  # names per return-correlation cluster; 0 disables
+    INITIAL_BATCH_SIZE = 5
+    MAX_BATCH_SIZE = 8
+    MAX_CONCURRENCY = 3
+    TARGET_BATCH_SECONDS = 45.0
+    MAX_TICKER_ATTEMPTS = 3
+    ANALYSIS_FIELDS = ["description", "latest_news", "why_selected"]
+    REFRESH_FIELDS = ["latest_news", "why_selected"]   # asked again when a cached description is reused
+    PROMPT_METRICS = ['name', 'pe', 'peg', 'roe', 'roic', 'profit_margin',
+                      'eps_this_y', 'eps_next_y', 'eps_next_5y', 'investor_score']
+
+    # Snapshots and summaries
+    DATA_DIR = Path("public/data")
 
     # CSV Column Configuration
     REQUIRED_COLUMNS = [
@@ -55,14 +212,30 @@ class OpenRouterPRReviewer:
         '52W Low': 'low_52w',
     }
 
-    def __init__(self):
+    def __init__(self, require_pr: bool = True):
         self.openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
         self.github_token = os.getenv("GITHUB_TOKEN")
         self.pr_number = os.getenv("PR_NUMBER")
         self.repo = os.getenv("GITHUB_REPOSITORY")
         self.model_name = os.getenv("OPENROUTER_MODEL", self.DEFAULT_MODEL_NAME)
-
-        if not all([self.openrouter_api_key, self.github_token, self.pr_number, self.repo]):
+        self.api_url = os.getenv("OPENROUTER_API_URL", self.API_URL)
+        self.top_n = int(os.getenv("REVIEW_TOP_N", self.DEFAULT_TOP_N))
+        self.max_per_cluster = int(os.getenv("REVIEW_MAX_PER_CLUSTER", self.DEFAULT_MAX_PER_CLUSTER))
+        self.cache = AnalysisCache.load(Path(os.getenv("ANALYSIS_CACHE", CACHE_PATH)))
+        self.cache_stats: Optional[Dict[str, int]] = None
+        self.news_index = NewsIndex.load(Path(os.getenv("NEWS_INDEX", NEWS_INDEX_PATH)))
+        self.news_mode = os.getenv("REVIEW_NEWS_DEDUP", "collapse")   # collapse, flag or off
+        self.news_carried: set = set()
+        self.news_stats: Optional[Dict[str, int]] = None
+        self.session = self.create_session()
+        self.telemetry = ReviewTelemetry(Path(os.getenv("REVIEW_TELEMETRY", TELEMETRY_PATH)))
+        self.data_dir = Path(os.getenv("REVIEW_DATA_DIR", self.DATA_DIR))
+        self.budget: Optional[RequestBudget] = None
+
+        required = [self.openrouter_api_key]
+        if require_pr:
+            required += [self.github_token, self.pr_number, self.repo]
+        if not all(required):
             print("Error: Missing required environment variables", file=sys.stderr)
             sys.exit(1)
 
@@ -86,9 +259,14 @@ class OpenRouterPRReviewer:
         2. Strip ```json ... ``` or ``` ... ``` markdown code fences
         3. Locate the outermost { ... } braces and parse that substring
         """
+        return OpenRouterPRReviewer.extract_json_with_strategy(response)[0]
+
+    @staticmethod
+    def extract_json_with_strategy(response: str) -> Tuple[dict, str]:
+        """extract_json_from_response plus the strategy that worked: direct, code_fence or braces"""
         # Strategy 1: direct parse
         try:
-            return json.loads(response)
+            return json.loads(response), "direct"
         except json.JSONDecodeError:
             pass
 
@@ -96,7 +274,7 @@ class OpenRouterPRReviewer:
         code_fence = re.search(r'```(?:json)?\s*(\{[\s\S]*?\})\s*```', response)
         if code_fence:
             try:
-                return json.loads(code_fence.group(1))
+                return json.loads(code_fence.group(1)), "code_fence"
             except json.JSONDecodeError:
                 pass
 
@@ -105,7 +283,7 @@ class OpenRouterPRReviewer:
         last_brace = response.rfind('}')
         if first_brace != -1 and last_brace > first_brace:
             try:
-                return json.loads(response[first_brace:last_brace + 1])
+                return json.loads(response[first_brace:last_brace + 1]), "braces"
             except json.JSONDecodeError:
                 pass
 
@@ -134,6 +312,29 @@ class OpenRouterPRReviewer:
 
     def call_openrouter(self, messages: List[Dict], max_retries: int = 3) -> str:
         """Make API call to OpenRouter with configured model + web search + retry logic"""
+        return self.complete(messages, max_retries)["content"]
+
+    def create_session(self) -> requests.Session:
+        """Pooled keep-alive session, one connection per concurrent request"""
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.MAX_CONCURRENCY)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def complete(self, messages: List[Dict], max_retries: int = 3, on_member=None,
+                 record: Optional[Dict] = None) -> Dict:
+        """Streamed chat completion with retries.
+
+        Returns content, finish_reason, usage, the top-level JSON members
+        parsed while streaming (`objects`) and timings (time to first byte,
+        to the first complete member, total). `on_member(key, value)` is
+        called as each member completes. A stream that stalls or times out
+        after some members arrived, or sends an unreadable event, returns them
+        with finish_reason "stalled" instead of retrying; one that produced
+        nothing is retried.
+        Each retry's reason is appended to `record["retries"]` when given.
+        """
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.openrouter_api_key}",
@@ -145,46 +346,124 @@ class OpenRouterPRReviewer:
             "model": self.model_name,
             "messages": messages,
             "max_tokens": self.MAX_TOKENS,
+            "stream": True,
         }
+        session = getattr(self, "session", None) or self.create_session()
 
         for attempt in range(max_retries):
+            started = time.monotonic()
+            result = {"content": "", "finish_reason": None, "usage": {}, "objects": {},
+                      "timings": {"ttfb": None, "first_object": None, "total": None}}
             try:
-                response = requests.post(
-                    self.API_URL,
+                with session.post(
+                    self.api_url,
                     headers=headers,
                     json=data,
-                    timeout=self.REQUEST_TIMEOUT
-                )
-                response.raise_for_status()
-                result = response.json()
-                return result["choices"][0]["message"]["content"]
+                    stream=True,
+                    timeout=(self.CONNECT_TIMEOUT, self.STALL_TIMEOUT)
+                ) as response:
+                    response.raise_for_status()
+                    self.read_completion(response, result, started, on_member)
+                result["timings"]["total"] = time.monotonic() - started
+                return result
             except requests.exceptions.RequestException as e:
+                result["timings"]["total"] = time.monotonic() - started
+                if result["objects"]:
+                    print(f"Stream interrupted after {len(result['objects'])} result(s): {e}", file=sys.stderr)
+                    result["finish_reason"] = "stalled"
+                    return result
                 if attempt < max_retries - 1:
                     wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
                     print(f"API call failed (attempt {attempt + 1}/{max_retries}): {e}", file=sys.stderr)
                     print(f"Retrying in {wait_time}s...", file=sys.stderr)
+                    if record is not None:
+                        record["retries"].append({"attempt": attempt + 1, "reason": f"{type(e).__name__}: {e}"[:300],
+                                                  "after": round(result["timings"]["total"], 3)})
                     time.sleep(wait_time)
                 else:
                     print(f"Error calling OpenRouter API after {max_retries} attempts: {e}", file=sys.stderr)
                     raise
 
-    def get_top_tickers(self) -> tuple[Optional[str], List[Dict]]:
-        """Read CSV file and get top 5 tickers using pandas"""
+    def read_completion(self, response: requests.Response, result: Dict, started: float, on_member=None) -> None:
+        """Fill `result` from an SSE stream (or a plain JSON body when the server does not stream)"""
+        timings = result["timings"]
+        parser = IncrementalObjectParser(self.clean_citations)
+
+        def add_content(text: str) -> None:
+            result["content"] += text
+            for key, value in parser.feed(text):
+                result["objects"][key] = value
+                if timings["first_object"] is None:
+                    timings["first_object"] = time.monotonic() - started
+                if on_member:
+                    on_member(key, value)
+
+        if "text/event-stream" not in response.headers.get("Content-Type", ""):
+            body = response.json()
+            timings["ttfb"] = time.monotonic() - started
+            choice = body["choices"][0]
+            add_content(choice["message"]["content"] or "")
+            result["finish_reason"] = choice.get("finish_reason")
+            result["usage"] = body.get("usage", {})
+            return
+
+        response.encoding = "utf-8"
+        last_progress = started
+        for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+            now = time.monotonic()
+            if timings["ttfb"] is None:
+                timings["ttfb"] = now - started
+            if now - last_progress > self.STALL_TIMEOUT:
+                raise StreamStalled(f"No content for {now - last_progress:.0f}s")
+            if now - started > self.REQUEST_TIMEOUT:
+                raise StreamStalled(f"Stream still open after {self.REQUEST_TIMEOUT}s")
+            # Blank separators and ": keep-alive" comments carry no data
+            if not line or not line.startswith("data:"):
+                continue
+            payload = line[5:].strip()
+            if payload == "[DONE]":
+                continue  # read to the end so the connection goes back to the pool
+            try:
+                chunk = json.loads(payload)
+            except json.JSONDecodeError as e:
+                raise StreamCorrupted(f"Unreadable stream event ({e}): {payload[:80]}") from e
+            if "error" in chunk:
+                raise requests.exceptions.RequestException(f"Stream error: {chunk['error']}")
+            result["usage"] = chunk.get("usage") or result["usage"]
+            for choice in chunk.get("choices", [])[:1]:
+                delta = (choice.get("delta") or {}).get("content")
+                if delta:
+                    last_progress = now
+                    add_content(delta)
+                result["finish_reason"] = choice.get("finish_reason") or result["finish_reason"]
+
+    def get_top_tickers(self, top_n: Optional[int] = None,
+                        date: Optional[str] = None) -> tuple[Optional[str], List[Dict]]:
+        """Read CSV file and get the top N tickers (default REVIEW_TOP_N or 5) using pandas
+
+        Reads the newest dated CSV, or the one for `date` when given.
+        """
         try:
-            data_dir = Path("public/data")
+            data_dir = getattr(self, 'data_dir', self.DATA_DIR)
             if not data_dir.exists():
-                print("Error: public/data directory not found", file=sys.stderr)
+                print(f"Error: {data_dir} directory not found", file=sys.stderr)
                 return None, []
 
-            # Find dated CSV file
-            csv_files = list(data_dir.glob("????-??-??.csv"))
-            if not csv_files:
-                print("Error: No dated CSV file found", file=sys.stderr)
-                return None, []
-
-            # Get the most recent one
-            dated_csv = sorted(csv_files)[-1]
-            date = dated_csv.stem
+            if date:
+                dated_csv = data_dir / f"{date}.csv"
+                if not dated_csv.exists():
+                    print(f"Error: No CSV file for {date}", file=sys.stderr)
+                    return None, []
+            else:
+                # Find dated CSV file
+                csv_files = list(data_dir.glob("????-??-??.csv"))
+                if not csv_files:
+                    print("Error: No dated CSV file found", file=sys.stderr)
+                    return None, []
+
+                # Get the most recent one
+                dated_csv = sorted(csv_files)[-1]
+                date = dated_csv.stem
 
             # Read CSV with pandas
             df = pd.read_csv(dated_csv, sep='\t')
@@ -199,16 +478,43 @@ class OpenRouterPRReviewer:
                 print(f"Error: Missing required columns: {missing_cols}", file=sys.stderr)
                 return None, []
 
-            # Get top 5 rows and convert to list of dicts
-            tickers = [self.row_to_dict(row) for _, row in df.head(5).iterrows()]
+            # Get top N rows and convert to list of dicts
+            top_n = top_n or getattr(self, 'top_n', self.DEFAULT_TOP_N)
+            top = self.diversify(df, top_n, data_dir, date)
+            tickers = [self.row_to_dict(row) for _, row in top.iterrows()]
 
             return date, tickers
         except Exception as e:
             print(f"Error reading CSV: {e}", file=sys.stderr)
             return None, []
 
-    def build_batch_analysis_prompt(self, tickers_data: List[Dict[str, str]], current_date: str) -> str:
-        """Build batched analysis prompt for all stocks in one request"""
+    def diversify(self, df: pd.DataFrame, top_n: int, data_dir: Path, date: str) -> pd.DataFrame:
+        """Top N rows with at most max_per_cluster names per return-correlation cluster.
+
+        Falls back to the plain top N when disabled or when the history cannot be read.
+        """
+        max_per_cluster = getattr(self, 'max_per_cluster', self.DEFAULT_MAX_PER_CLUSTER)
+        if max_per_cluster <= 0:
+            return df.head(top_n)
+        try:
+            top = diversify_screen(df, top_n, data_dir, date, max_per_cluster)
+        except Exception as e:
+            print(f"Warning: correlation clustering failed, using the plain top {top_n}: {e}", file=sys.stderr)
+            return df.head(top_n)
+        dropped = sorted(set(df['Ticker'].head(top_n)) - set(top['Ticker']))
+        if dropped:
+            added = [t for t in top['Ticker'] if t not in set(df['Ticker'].head(top_n))]
+            print(f"Diversified top {top_n}: dropped {', '.join(dropped)} "
+                  f"(correlated with a higher pick), added {', '.join(added)}", file=sys.stderr)
+        return top.drop(columns='Cluster')
+
+    def build_batch_analysis_prompt(self, tickers_data: List[Dict[str, str]], current_date: str,
+                                    fields: Optional[List[str]] = None) -> str:
+        """Build batched analysis prompt for all stocks in one request.
+
+        `fields` limits the requested keys (default: all ANALYSIS_FIELDS).
+        """
+        fields = fields or self.ANALYSIS_FIELDS
         stocks_info = []
         for ticker_data in tickers_data:
             ticker = ticker_data['ticker']
@@ -235,6 +541,17 @@ class OpenRouterPRReviewer:
 
         tickers_list = ", ".join(td['ticker'] for td in tickers_data)
 
+        first = tickers_data[0]
+        examples = {
+            "description": "• What the company does and its industry\\n• Market cap and size classification\\n• Key competitive advantage or market position",
+            "latest_news": "• [Date] Specific recent event or announcement\\n• [Date] Earnings result or financial update\\n• [Date] Strategic or operational development",
+            "why_selected": f"• Valuation: P/E={first.get('pe','N/A')}, PEG={first.get('peg','N/A')} — is this reasonable?\\n• Profitability: ROE={first.get('roe','N/A')}%, Profit Margin={first.get('profit_margin','N/A')}% — are margins strong?\\n• Growth: EPS next 5Y={first.get('eps_next_5y','N/A')}% — is growth outlook positive?\\n• Quality: Investor Score={first.get('investor_score','N/A')}/100 — overall quality assessment",
+        }
+        example_fields = ",\n".join(f'    "{field}": "{examples[field]}"' for field in fields)
+        next_fields = ", ".join(f'"{field}": "..."' for field in fields)
+        quoted = [f'"{field}"' for field in fields]
+        required_fields = " and ".join(quoted) if len(quoted) <= 2 else f"{', '.join(quoted[:-1])}, and {quoted[-1]}"
+
         return f"""You are a financial analyst. Use web search to research the following {len(tickers_data)} stocks and return a structured JSON analysis.
 
 Date: {current_date}
@@ -249,22 +566,52 @@ Start your response with {{ and end with }}.
 Required JSON structure (replace TICKER with actual ticker symbols, e.g. AAPL, MSFT):
 {{
   "{tickers_data[0]['ticker']}": {{
-    "description": "• What the company does and its industry\\n• Market cap and size classification\\n• Key competitive advantage or market position",
-    "latest_news": "• [Date] Specific recent event or announcement\\n• [Date] Earnings result or financial update\\n• [Date] Strategic or operational development",
-    "why_selected": "• Valuation: P/E={tickers_data[0].get('pe','N/A')}, PEG={tickers_data[0].get('peg','N/A')} — is this reasonable?\\n• Profitability: ROE={tickers_data[0].get('roe','N/A')}%, Profit Margin={tickers_data[0].get('profit_margin','N/A')}% — are margins strong?\\n• Growth: EPS next 5Y={tickers_data[0].get('eps_next_5y','N/A')}% — is growth outlook positive?\\n• Quality: Investor Score={tickers_data[0].get('investor_score','N/A')}/100 — overall quality assessment"
+{example_fields}
   }},
-  "NEXT_TICKER": {{ "description": "...", "latest_news": "...", "why_selected": "..." }},
+  "NEXT_TICKER": {{ {next_fields} }},
   ...repeat for all {len(tickers_data)} tickers...
 }}
 
 Rules:
 - ALL {len(tickers_data)} tickers must appear in the JSON: {tickers_list}
-- Every ticker must have non-empty "description", "latest_news", and "why_selected" strings
+- Every ticker must have non-empty {required_fields} strings
 - Use actual data from web search — include specific numbers, dates, and facts
 - Do NOT include <cite>, citation markers, URLs, or source references anywhere in the values
 - Each field should use bullet points starting with •
 - Output the raw JSON object only — no text outside the braces"""
 
+    def parse_batch_response(self, response: str, tickers: List[str],
+                             fields: Optional[List[str]] = None,
+                             record: Optional[Dict] = None) -> Dict[str, Dict[str, str]]:
+        """Cleaned analyses for the requested tickers found in a response.
+
+        Raises json.JSONDecodeError when no JSON object can be extracted;
+        tickers missing from the object are simply absent from the result.
+        """
+        # Strip citation tags from the raw response BEFORE JSON parsing —
+        # the :online model can embed <cite> tags inside JSON strings,
+        # making them unparseable. clean_citations is also applied per-field
+        # below for any residual tags.
+        response = self.clean_citations(response)
+        all_analyses, strategy = self.extract_json_with_strategy(response)
+        if record is not None:
+            record["parse"] = strategy
+        return self.clean_analyses(all_analyses, tickers, fields)
+
+    def clean_analyses(self, all_analyses: Dict, tickers: List[str],
+                       fields: Optional[List[str]] = None) -> Dict[str, Dict[str, str]]:
+        """Requested tickers' analyses with citation tags removed from every field"""
+        result = {}
+        for ticker in tickers:
+            analysis = all_analyses.get(ticker)
+            if isinstance(analysis, dict):
+                # Clean citation tags from all fields
+                result[ticker] = {
+                    key: self.clean_citations(str(analysis.get(key, "")))
+                    for key in fields or self.ANALYSIS_FIELDS
+                }
+        return result
+
     def analyze_stocks_batch(self, tickers_data: List[Dict[str, str]]) -> Dict[str, Dict[str, str]]:
         """Analyze all stocks in a single batched API call using OpenRouter with web search"""
         tickers_list = [td['ticker'] for td in tickers_data]
@@ -276,36 +623,11 @@ Rules:
 
         try:
             response = self.call_openrouter(messages)
-
-            # Strip citation tags from the raw response BEFORE JSON parsing —
-            # the :online model can embed <cite> tags inside JSON strings,
-            # making them unparseable. clean_citations is also applied per-field
-            # below for any residual tags.
-            response = self.clean_citations(response)
             print(f"Raw response preview: {response[:500]}", file=sys.stderr)
 
             # Parse JSON response - use robust extraction to handle markdown-wrapped responses
             try:
-                all_analyses = self.extract_json_from_response(response)
-
-                # Process and clean each stock's analysis
-                result = {}
-                for ticker_data in tickers_data:
-                    ticker = ticker_data['ticker']
-
-                    if ticker in all_analyses:
-                        analysis = all_analyses[ticker]
-                        # Clean citation tags from all fields
-                        result[ticker] = {
-                            key: self.clean_citations(analysis.get(key, ""))
-                            for key in ["description", "latest_news", "why_selected"]
-                        }
-                    else:
-                        print(f"Warning: No analysis found for {ticker} in response", file=sys.stderr)
-                        result[ticker] = self.create_error_analysis(f"Analysis not returned for {ticker}")
-
-                return result
-
+                result = self.parse_batch_response(response, tickers_list)
             except json.JSONDecodeError as e:
                 print(f"Warning: Could not parse JSON response: {e}", file=sys.stderr)
                 print(f"Response was: {response[:1000]}", file=sys.stderr)
@@ -314,6 +636,11 @@ Rules:
                     td['ticker']: self.create_error_analysis("Analysis unavailable - JSON parse error")
                     for td in tickers_data
                 }
+            for ticker in tickers_list:
+                if ticker not in result:
+                    print(f"Warning: No analysis found for {ticker} in response", file=sys.stderr)
+                    result[ticker] = self.create_error_analysis(f"Analysis not returned for {ticker}")
+            return result
         except Exception as e:
             print(f"Error in batch analysis: {e}", file=sys.stderr)
             # Return error analysis for all tickers
@@ -322,8 +649,233 @@ Rules:
                 for td in tickers_data
             }
 
-    def save_summaries(self, date: str, stock_analyses: List[Dict]) -> bool:
-        """Generate and save summary JSON files"""
+    def request_batch(self, batch: List[Dict[str, str]], current_date: str,
+                      fields: Optional[List[str]] = None,
+                      queued_at: Optional[float] = None) -> Tuple[Dict[str, Dict[str, str]], bool]:
+        """One blocking analysis request; returns (analyses found, truncated).
+
+        Writes a telemetry record for the request whether or not it succeeds.
+        """
+        tickers = [td['ticker'] for td in batch]
+        telemetry = getattr(self, "telemetry", None)
+        record = telemetry.new_record(date=current_date, model=getattr(self, "model_name", None),
+                                      tickers=tickers, fields=list(fields or self.ANALYSIS_FIELDS)) \
+            if telemetry else {"retries": []}
+        started = time.monotonic()
+        record["queue_wait"] = started - queued_at if queued_at is not None else 0.0
+        try:
+            prompt = self.build_batch_analysis_prompt(batch, current_date, fields)
+            completion = self.complete([{"role": "user", "content": prompt}], record=record)
+            timings = completion.get("timings", {})
+            usage = completion.get("usage") or {}
+            record.update(ttfb=timings.get("ttfb"), first_result=timings.get("first_object"),
+                          latency=timings.get("total"), finish_reason=completion.get("finish_reason"),
+                          prompt_tokens=usage.get("prompt_tokens"), completion_tokens=usage.get("completion_tokens"),
+                          cost=usage.get("cost"))
+            if timings.get("first_object") is not None:
+                print(f"First result for {tickers[0]}.. after {timings['first_object']:.1f}s "
+                      f"(first byte {timings['ttfb']:.1f}s, total {timings['total']:.1f}s)", file=sys.stderr)
+            truncated = completion.get("finish_reason") == "length"
+            try:
+                found = self.parse_batch_response(completion["content"] or "", tickers, fields, record)
+            except json.JSONDecodeError:
+                # Keep whatever members completed while streaming; a cut-off
+                # object is the usual cause, so treat it like a length stop
+                found = self.clean_analyses(completion.get("objects", {}), tickers, fields)
+                record["parse"] = "streamed" if found else "failed"
+                print(f"Warning: Could not parse JSON response for {', '.join(tickers)}; "
+                      f"kept {len(found)} streamed result(s)", file=sys.stderr)
+                truncated = completion.get("finish_reason") != "stalled"
+            record["returned"] = len(found)
+            return found, truncated
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"[:300]
+            record["latency"] = time.monotonic() - started
+            raise
+        finally:
+            if telemetry:
+                telemetry.add(record)
+
+    async def analyze_stocks_async(self, tickers_data: List[Dict[str, str]],
+                                   sizer: Optional[BatchSizer] = None,
+                                   fields: Optional[Dict[str, List[str]]] = None,
+                                   current_date: Optional[str] = None,
+                                   calls: Optional[Counter] = None) -> Dict[str, Dict[str, str]]:
+        """Analyze every ticker with adaptive batches and bounded concurrency.
+
+        Batches are cut from a queue at the sizer's current size, at most
+        MAX_CONCURRENCY run at once (each in a worker thread), and tickers a
+        batch did not return go back to the front of the queue until they
+        have been asked MAX_TICKER_ATTEMPTS times. `fields` maps a ticker to
+        the keys to ask for (default: all); a batch only mixes tickers that
+        need the same keys. Requests also wait on `self.budget` when one is
+        set, and each is counted in `calls["requests"]`.
+        """
+        sizer = sizer or BatchSizer(self.INITIAL_BATCH_SIZE, maximum=self.MAX_BATCH_SIZE,
+                                    target_seconds=self.TARGET_BATCH_SECONDS)
+        current_date = current_date or datetime.now().strftime("%Y-%m-%d")
+        fields = fields or {}
+        wanted = lambda td: tuple(fields.get(td['ticker'], self.ANALYSIS_FIELDS))  # noqa: E731
+        pending = deque(sorted(tickers_data, key=lambda td: len(wanted(td)), reverse=True))
+        attempts = Counter()
+        results: Dict[str, Dict[str, str]] = {}
+        in_flight = {}
+        calls = Counter() if calls is None else calls
+        budget = getattr(self, 'budget', None)
+
+        enqueued = {td['ticker']: time.monotonic() for td in tickers_data}
+
+        async def timed(batch, keys):
+            queued_at = min(enqueued[td['ticker']] for td in batch)
+            async with budget or contextlib.nullcontext():
+                started = time.perf_counter()
+                found, truncated = await asyncio.to_thread(self.request_batch, batch, current_date,
+                                                           list(keys), queued_at)
+                return found, truncated, time.perf_counter() - started
+
+        while pending or in_flight:
+            while pending and len(in_flight) < self.MAX_CONCURRENCY:
+                keys = wanted(pending[0])
+                batch = []
+                while pending and len(batch) < sizer.size and wanted(pending[0]) == keys:
+                    batch.append(pending.popleft())
+                print(f"Requesting batch of {len(batch)}: {', '.join(td['ticker'] for td in batch)}",
+                      file=sys.stderr)
+                calls["requests"] += 1
+                in_flight[asyncio.ensure_future(timed(batch, keys))] = batch
+
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                batch = in_flight.pop(task)
+                try:
+                    found, truncated, seconds = task.result()
+                except Exception as e:
+                    print(f"Error in batch analysis: {e}", file=sys.stderr)
+                    found, truncated, seconds = {}, False, float("inf")
+                results.update(found)
+                missing = [td for td in batch if td['ticker'] not in found]
+                size = sizer.record(len(batch), seconds, len(missing), truncated)
+                print(f"Batch of {len(batch)} returned {len(found)} in {seconds:.1f}s"
+                      f"{' (truncated)' if truncated else ''}; next batch size {size}", file=sys.stderr)
+                for td in reversed(missing):
+                    attempts[td['ticker']] += 1
+                    if attempts[td['ticker']] < self.MAX_TICKER_ATTEMPTS:
+                        enqueued[td['ticker']] = time.monotonic()
+                        pending.appendleft(td)
+                    else:
+                        print(f"Warning: No analysis for {td['ticker']} after {attempts[td['ticker']]} attempts",
+                              file=sys.stderr)
+        return results
+
+    def prompt_metrics(self, ticker_data: Dict[str, str]) -> Dict[str, str]:
+        return {key: ticker_data.get(key, 'N/A') for key in self.PROMPT_METRICS}
+
+    async def analyze_stocks_cached(self, tickers_data: List[Dict[str, str]],
+                                    date: str) -> Tuple[Dict[str, Dict[str, str]], Dict[str, int]]:
+        """(analyses that came back, cache stats) for one snapshot date.
+
+        Served from the analysis cache where possible: an exact hit (same
+        snapshot date, model and metrics) costs nothing, and a ticker with
+        any earlier analysis keeps its description and asks only for
+        REFRESH_FIELDS. When the news index says its last lookup found only
+        repeats, it keeps that news too and asks only for why_selected.
+        Tickers that never came back are left out.
+        """
+        cache = getattr(self, 'cache', None) or AnalysisCache.load(CACHE_PATH)
+        news_index = getattr(self, 'news_index', None)
+        model = getattr(self, 'model_name', self.DEFAULT_MODEL_NAME)
+        digests = {td['ticker']: metrics_hash(self.prompt_metrics(td)) for td in tickers_data}
+
+        results, reused, carried, fields = {}, {}, {}, {}
+        for td in tickers_data:
+            ticker = td['ticker']
+            cached = cache.get(ticker, date, model, digests[ticker])
+            if cached:
+                results[ticker] = cached
+                continue
+            previous = cache.latest(ticker, date)
+            if previous and previous.get('description'):
+                reused[ticker] = previous['description']
+                fields[ticker] = self.REFRESH_FIELDS
+                if news_index and previous.get('latest_news') and not news_index.needs_news(ticker, date):
+                    carried[ticker] = previous['latest_news']
+                    fields[ticker] = [f for f in self.REFRESH_FIELDS if f != 'latest_news']
+        pending = [td for td in tickers_data if td['ticker'] not in results]
+
+        calls = Counter()
+        if pending:
+            fresh = await self.analyze_stocks_async(pending, fields=fields, current_date=date, calls=calls)
+            for ticker, analysis in fresh.items():
+                if ticker in carried:
+                    analysis = {"latest_news": carried[ticker], **analysis}
+                if ticker in reused:
+                    analysis = {"description": reused[ticker], **analysis}
+                results[ticker] = analysis
+                cache.put(ticker, date, model, digests[ticker], analysis)
+            cache.save()
+
+        hits = len(tickers_data) - len(pending)
+        stats = {
+            'hits': hits,
+            'refreshed': len(reused),
+            'misses': len(pending) - len(reused),
+            'news_carried': len(carried),
+            'api_calls': calls["requests"],
+            # what a cold run would have spent on the cached tickers
+            'calls_saved': -(-hits // self.INITIAL_BATCH_SIZE),
+        }
+        self.news_carried = set(carried)
+        print(f"Analysis cache ({date}): {hits} hit(s), {len(reused)} description(s) reused, "
+              f"{len(carried)} news lookup(s) skipped, {stats['misses']} miss(es); "
+              f"{stats['api_calls']} API call(s), ~{stats['calls_saved']} saved", file=sys.stderr)
+        return results, stats
+
+    def analyze_stocks(self, tickers_data: List[Dict[str, str]], date: Optional[str] = None) -> Dict[str, Dict[str, str]]:
+        """Analyses for every ticker; ones that never came back get the placeholder"""
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        results, self.cache_stats = asyncio.run(self.analyze_stocks_cached(tickers_data, date))
+        return {
+            td['ticker']: results.get(td['ticker']) or self.create_error_analysis(
+                f"Analysis not returned for {td['ticker']}")
+            for td in tickers_data
+        }
+
+    @staticmethod
+    def write_json_atomic(path: Path, data: Dict) -> None:
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        tmp.replace(path)
+
+    def dedupe_news(self, date: str, stock_analyses: List[Dict]) -> List[Dict]:
+        """Stock analyses with latest_news items reported in the last few days collapsed or flagged.
+
+        Every analysis's news is added to the news index on the way (the
+        index is saved with the summaries).
+        """
+        index = getattr(self, 'news_index', None)
+        if index is None:
+            return stock_analyses
+        mode = getattr(self, 'news_mode', 'collapse')
+        carried = getattr(self, 'news_carried', set())
+        stats = Counter()
+        deduped = []
+        for stock in stock_analyses:
+            analysis = stock['analysis']
+            result = index.add(stock['ticker'], date, analysis.get('latest_news'),
+                               looked_up=stock['ticker'] not in carried)
+            stats['items'] += len(result['fresh']) + len(result['repeated'])
+            stats['repeated'] += len(result['repeated'])
+            news = collapse_news(result, mode)
+            deduped.append(stock if news is None else {**stock, 'analysis': {**analysis, 'latest_news': news}})
+        self.news_stats = {**stats, 'mode': mode, 'carried': len(carried)}
+        print(f"News index ({date}): {stats['repeated']} of {stats['items']} item(s) repeated earlier news "
+              f"({mode})", file=sys.stderr)
+        return deduped
+
+    def save_summaries(self, date: str, stock_analyses: List[Dict], update_latest: bool = True) -> bool:
+        """Generate and save summary JSON files (atomically, so readers never see a partial file)"""
+        stock_analyses = self.dedupe_news(date, stock_analyses)
         summary_data = {
             "date": date,
             "updated_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
@@ -335,25 +887,34 @@ Rules:
 
         try:
             # Create summary directory
-            summary_dir = Path("public/data/summary")
+            summary_dir = getattr(self, 'data_dir', self.DATA_DIR) / "summary"
             summary_dir.mkdir(parents=True, exist_ok=True)
 
             # Save dated and latest JSON
-            dated_file = summary_dir / f"{date}.json"
-            latest_file = summary_dir / "latest.json"
-
-            with open(dated_file, 'w', encoding='utf-8') as f:
-                json.dump(summary_data, f, indent=2)
-
-            with open(latest_file, 'w', encoding='utf-8') as f:
-                json.dump(summary_data, f, indent=2)
+            self.write_json_atomic(summary_dir / f"{date}.json", summary_data)
+            if update_latest:
+                self.write_json_atomic(summary_dir / "latest.json", summary_data)
 
             print(f"Saved summaries to {summary_dir}/", file=sys.stderr)
-            return True
         except Exception as e:
             print(f"Error saving summaries: {e}", file=sys.stderr)
             return False
 
+        news_index = getattr(self, 'news_index', None)
+        if news_index is not None:
+            try:
+                news_index.save()
+            except OSError as e:
+                print(f"Warning: Could not save news index: {e}", file=sys.stderr)
+
+        try:
+            # The per-ticker index can always be rebuilt, so a failure here is only a warning
+            written = update_history(summary_dir, date, summary_data['top_stocks'])
+            print(f"Updated summary history index ({len(written)} file(s))", file=sys.stderr)
+        except Exception as e:
+            print(f"Warning: Could not update summary history index: {e}", file=sys.stderr)
+        return True
+
     def commit_and_push(self, date: str) -> bool:
         """Commit and push summary files"""
         try:
@@ -436,6 +997,32 @@ Rules:
                 ""
             ])
 
+        stats = getattr(self, 'cache_stats', None)
+        if stats:
+            comment_parts.extend([
+                f"♻️ **Analysis Cache:** {stats['hits']} hit(s), {stats['refreshed']} description(s) reused, "
+                f"{stats['api_calls']} API call(s) made, ~{stats['calls_saved']} saved",
+                ""
+            ])
+
+        news = getattr(self, 'news_stats', None)
+        if news and news['items']:
+            action = {'collapse': 'collapsed', 'flag': 'flagged'}.get(news['mode'], 'kept')
+            comment_parts.extend([
+                f"📰 **News Dedup:** {news['repeated']} of {news['items']} news item(s) repeated earlier "
+                f"summaries ({action}), {news['carried']} news lookup(s) skipped",
+                ""
+            ])
+
+        telemetry = getattr(self, 'telemetry', None)
+        if telemetry and telemetry.records:
+            comment_parts.extend([
+                "⏱️ **Reviewer Telemetry**",
+                "",
+                format_summary_table(telemetry.summary()),
+                ""
+            ])
+
         comment_parts.extend([
             "💾 **Summary Files**",
             f"- Saved to `public/data/summary/{date}.json`",
@@ -448,7 +1035,7 @@ Rules:
         """Main review process"""
         print("Starting OpenRouter PR Review...", file=sys.stderr)
 
-        # Step 1: Get top 5 tickers
+        # Step 1: Get top N tickers
         date, tickers = self.get_top_tickers()
         if not date or not tickers:
             self.post_pr_comment("❌ **Error**: Could not extract ticker data from CSV")
@@ -456,8 +1043,9 @@ Rules:
 
         print(f"Analyzing top {len(tickers)} tickers for {date}", file=sys.stderr)
 
-        # Step 2: Analyze all tickers in a single batched API call
-        batch_analyses = self.analyze_stocks_batch(tickers)
+        # Step 2: Analyze the tickers in adaptive, concurrent batches
+        batch_analyses = self.analyze_stocks(tickers, date)
+        self.telemetry.write()
 
         # Convert to the expected format
         stock_analyses = []
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Percentile Ranks
+Adds percentile ranks for every numeric metric across the whole screen and
+within each Sector/Industry, plus a composite rank that breaks the frequent
+Investor_Score ties deterministically. Each rank family is a single grouped
+rank call over all metrics at once, so there are no per-group Python loops.
+
+Usage: python scripts/percentile_ranks.py   (benchmarks the full stored history)
+"""
+
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from snapshot_history import DATA_DIR, TEXT_COLUMNS, load_history, parse_metric
+
+GROUP_COLUMNS = ['Sector', 'Industry']
+
+# Inputs to the composite, matching the Investor_Score metrics and their
+# direction. Lower-is-better metrics only rank their positive values; zero or
+# negative PEG is treated like a missing one, as Investor_Score does.
+COMPOSITE_METRICS = {
+    'PEG': 'lower',
+    'ROE': 'higher',
+    'Profit M': 'higher',
+    'EPS Next 5Y': 'higher',
+}
+
+RANK_DECIMALS = 4
+
+
+def numeric_metrics(df: pd.DataFrame, exclude: Sequence[str] = ()) -> pd.DataFrame:
+    """Float view of every metric column; text and True/False flag columns are skipped"""
+    metrics = {}
+    for col in df.columns:
+        if col in TEXT_COLUMNS or col in exclude or col.endswith('_Pct'):
+            continue
+        values = df[col] if df[col].dtype != object else parse_metric(df[col])
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values) and values.notna().any():
+            metrics[col] = values.astype(float)
+    return pd.DataFrame(metrics, index=df.index)
+
+
+def group_ranks(values: pd.DataFrame, keys: List[pd.Series]) -> pd.DataFrame:
+    """Percentile rank (0, 1] of every column within each key group; NaN stays NaN"""
+    if not keys:
+        return values.rank(pct=True)
+    return values.groupby(keys, sort=False).rank(pct=True)
+
+
+def composite_rank(values: pd.DataFrame, by: List[pd.Series],
+                   directions: Dict[str, str] = COMPOSITE_METRICS) -> pd.Series:
+    """Mean directional percentile of the composite metrics; missing counts as worst"""
+    oriented = {}
+    for metric, direction in directions.items():
+        if metric not in values:
+            continue
+        column = values[metric]
+        oriented[metric] = -column.where(column > 0) if direction == 'lower' else column
+    ranks = group_ranks(pd.DataFrame(oriented, index=values.index), by)
+    return ranks.fillna(0.0).mean(axis=1) if len(ranks.columns) else pd.Series(np.nan, index=values.index)
+
+
+def add_percentile_ranks(df: pd.DataFrame, by: Optional[Sequence[str]] = None,
+                         groups: Sequence[str] = GROUP_COLUMNS) -> pd.DataFrame:
+    """Return df with <metric>_Pct, <metric>_<Group>_Pct and Composite_Pct columns.
+
+    `by` names columns that define separate cross-sections (e.g. ['Date'] for
+    the stored history); ranks never mix rows from different cross-sections.
+    """
+    by = list(by or [])
+    values = numeric_metrics(df, exclude=by)
+    base_keys = [df[col] for col in by]
+
+    ranked = [group_ranks(values, base_keys).add_suffix('_Pct')]
+    for group in groups:
+        if group in df.columns:
+            ranked.append(group_ranks(values, base_keys + [df[group]]).add_suffix(f'_{group}_Pct'))
+    ranked.append(composite_rank(values, base_keys).rename('Composite_Pct').to_frame())
+
+    ranks = pd.concat(ranked, axis=1).round(RANK_DECIMALS)
+    return pd.concat([df.drop(columns=ranks.columns, errors='ignore'), ranks], axis=1)
+
+
+def sort_screen(df: pd.DataFrame) -> pd.DataFrame:
+    """Investor_Score first, Composite_Pct to break ties, Ticker for a stable order"""
+    return df.sort_values(by=['Investor_Score', 'Composite_Pct', 'Ticker'],
+                          ascending=[False, False, True], kind='mergesort')
+
+
+def main():
+    started = time.perf_counter()
+    history = load_history(DATA_DIR)
+    loaded = time.perf_counter()
+    ranked = add_percentile_ranks(history, by=['Date'])
+    finished = time.perf_counter()
+
+    added = len(ranked.columns) - len(history.columns)
+    print(f"Loaded {len(history)} rows over {history['Date'].nunique()} snapshots in {(loaded - started) * 1000:.0f}ms",
+          file=sys.stderr)
+    print(f"Added {added} rank columns in {(finished - loaded) * 1000:.0f}ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
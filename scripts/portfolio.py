@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Portfolio Builder
+Weights the top of the current screen using the return covariance of the
+daily Price history in public/data. Covariance is estimated pairwise over
+overlapping days and shrunk toward a constant-correlation target, more so
+for pairs with little shared history. Minimum-variance and risk-parity
+weights are solved for several top-N sizes at once as stacked (batched)
+linear systems.
+
+Usage: python scripts/portfolio.py [--top-n 10] [--lookback 60] [--json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from price_adjustments import adjust_history
+from snapshot_history import DATA_DIR, build_panel, list_snapshot_dates, load_history
+
+PRIOR_OBSERVATIONS = 20   # overlap at which a pair is trusted half sample, half target
+MIN_EIGENVALUE = 1e-10
+
+
+def snapshot_returns(prices: np.ndarray) -> np.ndarray:
+    """Simple returns between consecutive snapshots; NaN unless both days are observed"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return prices[1:] / prices[:-1] - 1
+
+
+def pairwise_covariance(returns: np.ndarray):
+    """Covariance over each pair's overlapping observations.
+
+    Returns (cov, overlap) where overlap[i, j] counts the days both i and j
+    have a return. Pairs with fewer than two shared days get NaN.
+    """
+    observed = ~np.isnan(returns)
+    counts = observed.sum(axis=0)
+    means = np.divide(np.where(observed, returns, 0).sum(axis=0), counts,
+                      out=np.zeros(returns.shape[1]), where=counts > 0)
+    centered = np.where(observed, returns - means, 0.0)
+    mask = observed.astype(float)
+    overlap = mask.T @ mask
+    cov = np.divide(centered.T @ centered, overlap - 1,
+                    out=np.full(overlap.shape, np.nan), where=overlap > 1)
+    return cov, overlap
+
+
+def shrink_covariance(cov: np.ndarray, overlap: np.ndarray,
+                      prior_observations: float = PRIOR_OBSERVATIONS) -> np.ndarray:
+    """Blend the pairwise sample toward a constant-correlation target.
+
+    Each entry is weighted overlap / (overlap + prior_observations), so pairs
+    that rarely traded together lean on the target. Names without a usable
+    variance take the cross-sectional median. The result is made positive
+    definite by clipping eigenvalues.
+    """
+    n = cov.shape[0]
+    variances = np.diag(cov).copy()
+    fallback = np.nanmedian(variances) if np.isfinite(variances).any() else 1e-4
+    variances = np.where(np.isfinite(variances) & (variances > 0), variances, fallback)
+    vols = np.sqrt(variances)
+
+    corr = cov / np.outer(vols, vols)
+    off_diagonal = ~np.eye(n, dtype=bool) & np.isfinite(corr) & (overlap > 1)
+    mean_corr = float(np.average(corr[off_diagonal], weights=overlap[off_diagonal])) if off_diagonal.any() else 0.0
+
+    target = mean_corr * np.outer(vols, vols)
+    np.fill_diagonal(target, variances)
+
+    trust = np.where(np.isfinite(cov), overlap / (overlap + prior_observations), 0.0)
+    np.fill_diagonal(trust, np.where(np.isfinite(np.diag(cov)), np.diag(trust), 0.0))
+    shrunk = trust * np.nan_to_num(cov) + (1 - trust) * target
+    shrunk = (shrunk + shrunk.T) / 2
+
+    eigenvalues, eigenvectors = np.linalg.eigh(shrunk)
+    floor = max(MIN_EIGENVALUE, eigenvalues.max() * 1e-8)
+    return (eigenvectors * np.maximum(eigenvalues, floor)) @ eigenvectors.T
+
+
+def stack_subsets(cov: np.ndarray, masks: np.ndarray) -> np.ndarray:
+    """(B, n, n) stack where asset i outside subset b is decoupled with unit variance"""
+    inside = masks[:, :, None] & masks[:, None, :]
+    stack = np.where(inside, cov[None], 0.0)
+    idx = np.arange(cov.shape[0])
+    stack[:, idx, idx] = np.where(masks, np.diag(cov)[None], 1.0)
+    return stack
+
+
+def min_variance_weights(cov: np.ndarray, masks: np.ndarray, long_only: bool = True) -> np.ndarray:
+    """Minimum-variance weights for each boolean subset row of masks.
+
+    Solves Σw ∝ 1 for every subset in one batched call; for long-only
+    portfolios, assets with negative weight are dropped and the batch is
+    re-solved until every subset is non-negative.
+    """
+    active = masks.copy()
+    for _ in range(cov.shape[0]):
+        raw = np.linalg.solve(stack_subsets(cov, active), active.astype(float)[:, :, None])[:, :, 0]
+        raw = np.where(active, raw, 0.0)
+        weights = raw / raw.sum(axis=1, keepdims=True)
+        negative = active & (weights < 0)
+        if not long_only or not negative.any():
+            return weights
+        # drop only the most negative name per subset, then re-solve
+        worst = np.argmin(np.where(negative, weights, np.inf), axis=1)
+        rows = np.flatnonzero(negative.any(axis=1))
+        active[rows, worst[rows]] = False
+    return weights
+
+
+def risk_parity_weights(cov: np.ndarray, masks: np.ndarray, tol: float = 1e-10,
+                        max_iter: int = 100) -> np.ndarray:
+    """Equal-risk-contribution weights for each subset via batched Newton steps.
+
+    Minimizes ½ yᵀΣy − Σ b log y (Spinu 2013) whose optimum, normalized, gives
+    w_i (Σw)_i equal for all i in the subset.
+    """
+    stack = stack_subsets(cov, masks)
+    budget = np.where(masks, 1.0 / masks.sum(axis=1, keepdims=True), 1.0)
+    y = budget / np.sqrt(np.einsum('bi,bij,bj->b', budget, stack, budget))[:, None]
+
+    for _ in range(max_iter):
+        sigma_y = np.einsum('bij,bj->bi', stack, y)
+        gradient = sigma_y - budget / y
+        if np.abs(gradient).max() < tol:
+            break
+        hessian = stack + np.einsum('bi,ij->bij', budget / y ** 2, np.eye(cov.shape[0]))
+        step = np.linalg.solve(hessian, gradient[:, :, None])[:, :, 0]
+        # halve steps that would leave the positive orthant
+        scale = np.ones((len(y), 1))
+        while ((y - scale * step) <= 0).any():
+            bad = ((y - scale * step) <= 0).any(axis=1)
+            scale[bad] /= 2
+        y = y - scale * step
+
+    weights = np.where(masks, y, 0.0)
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def risk_contributions(cov: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Fraction of portfolio variance contributed by each asset"""
+    marginal = weights * (cov @ weights)
+    return marginal / marginal.sum()
+
+
+def build_portfolios(tickers: Sequence[str], prices: pd.DataFrame, sizes: Sequence[int],
+                     lookback: Optional[int] = None) -> Dict[int, pd.DataFrame]:
+    """Weights for the top `size` tickers (in screen order) for every size at once"""
+    window = prices.iloc[-(lookback + 1):] if lookback else prices
+    panel = window.reindex(columns=list(tickers)).to_numpy(dtype=float)
+    cov, overlap = pairwise_covariance(snapshot_returns(panel))
+    cov = shrink_covariance(cov, overlap)
+
+    sizes = sorted({min(size, len(tickers)) for size in sizes})
+    masks = np.arange(len(tickers))[None, :] < np.array(sizes)[:, None]
+    min_var = min_variance_weights(cov, masks)
+    parity = risk_parity_weights(cov, masks)
+
+    portfolios = {}
+    for row, size in enumerate(sizes):
+        names = list(tickers[:size])
+        portfolios[size] = pd.DataFrame({
+            'Ticker': names,
+            'Observations': np.diag(overlap)[:size].astype(int),
+            'Volatility': np.sqrt(np.diag(cov)[:size] * 252),
+            'MinVar_Weight': min_var[row, :size],
+            'RiskParity_Weight': parity[row, :size],
+            'RiskParity_Contribution': risk_contributions(cov[:size, :size], parity[row, :size]),
+        })
+    return portfolios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build min-variance / risk-parity weights for the top of the screen")
+    parser.add_argument("--top-n", type=int, nargs='+', default=[5, 10, 25])
+    parser.add_argument("--lookback", type=int, default=60, help="Snapshots of history to use (0 = all)")
+    parser.add_argument("--date", help="Screen date to weight (default: newest snapshot)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    dates = list_snapshot_dates(DATA_DIR)
+    date = args.date or dates[-1]
+    history = adjust_history(load_history(DATA_DIR, columns=['Price'], dates=[d for d in dates if d <= date]))
+    screen = history.loc[history['Date'] == date, 'Ticker'].tolist()
+    if not screen:
+        print(f"Error: No snapshot for {date}", file=sys.stderr)
+        sys.exit(1)
+    prices = build_panel(history, 'Price')
+    loaded = time.perf_counter()
+
+    portfolios = build_portfolios(screen, prices, args.top_n, args.lookback or None)
+    solved = time.perf_counter()
+
+    if args.json:
+        print(json.dumps({
+            'date': date,
+            'portfolios': {str(size): df.to_dict(orient='records') for size, df in portfolios.items()},
+        }, indent=2))
+    else:
+        for size, df in portfolios.items():
+            print(f"Top {size} ({date})")
+            print(df.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+            print()
+    print(f"Loaded history in {(loaded - started) * 1000:.0f}ms, "
+          f"solved {len(portfolios)} portfolios in {(solved - loaded) * 1000:.1f}ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
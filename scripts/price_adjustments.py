@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Price Adjustments
+Finds stock splits in the stored daily Price history and serves
+split-adjusted prices. The snapshots are unadjusted, so a 10-for-1 split
+reads as a 90% crash in every chart, indicator and backtest built on them.
+
+A split shows up as a price jump at a common ratio while Market Cap stays
+continuous: the implied share count (Market Cap / Price) moves by the ratio
+and the price by its inverse (at least halfway: a share issuance with a flat
+price is not a split). All consecutive observations of every ticker
+in the dates x tickers panel are checked at once against every ratio.
+
+The table of detected splits is kept in public/data/adjustments.json with
+the last observed price and market cap per ticker, so each new day is
+checked against that carried state without rereading the history. Adjusted
+prices keep the latest price as published and scale earlier ones by
+1 / ratio for every later split.
+
+Usage: python scripts/price_adjustments.py [--rebuild]
+"""
+
+import argparse
+import json
+import sys
+import time
+from fractions import Fraction
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from snapshot_history import DATA_DIR, build_panel, list_snapshot_dates, load_history
+
+ADJUSTMENTS_FILE = "adjustments.json"
+TABLE_VERSION = 1
+
+# New shares per old share: forward splits and their reverse-split reciprocals
+FORWARD_RATIOS = [5 / 4, 4 / 3, 3 / 2, 2, 5 / 2, 3, 4, 5, 6, 7, 8, 10, 12, 15, 20, 25, 30, 40, 50]
+SPLIT_RATIOS = np.array(FORWARD_RATIOS + [1 / r for r in FORWARD_RATIOS])
+SHARE_TOLERANCE = 0.05          # |log| distance of the implied share-count move from the ratio
+PRICE_TOLERANCE = np.log(1.5)   # |log| distance of the price move from 1 / ratio (the market still moves)
+
+
+def detect_splits(prices: np.ndarray, caps: np.ndarray,
+                  ratios: np.ndarray = SPLIT_RATIOS) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Splits in a dates x tickers panel, comparing each observation with the ticker's previous one.
+
+    Only cells with both a price and a market cap count as observations, so
+    gaps while a ticker was out of the screen are bridged. Returns (rows,
+    cols, previous rows, ratios) of the matches.
+    """
+    observed = (prices > 0) & (caps > 0)          # False for NaN as well
+    steps = np.arange(len(prices))[:, None]
+    last = np.maximum.accumulate(np.where(observed, steps, -1), axis=0)
+    previous = np.vstack([np.full((1, prices.shape[1]), -1), last[:-1]])
+
+    rows, cols = np.nonzero(observed & (previous >= 0))
+    before = previous[rows, cols]
+    price_move = np.log(prices[rows, cols] / prices[before, cols])
+    share_move = np.log(caps[rows, cols] / caps[before, cols]) - price_move
+
+    log_ratios = np.log(ratios)
+    error = np.abs(share_move[:, None] - log_ratios[None, :])
+    best = error.argmin(axis=1) if len(rows) else np.zeros(0, dtype=int)
+    # The price must land nearer the split ratio than no move at all
+    price_error = np.abs(price_move + log_ratios[best])
+    matched = ((error[np.arange(len(best)), best] <= SHARE_TOLERANCE)
+               & (price_error <= np.minimum(PRICE_TOLERANCE, np.abs(log_ratios[best]) / 2)))
+    return rows[matched], cols[matched], before[matched], ratios[best[matched]]
+
+
+def ratio_label(ratio: float) -> str:
+    """'10:1' for a 10-for-1 split, '1:8' for a 1-for-8 reverse split"""
+    fraction = Fraction(ratio).limit_denominator(10)
+    return f"{fraction.numerator}:{fraction.denominator}"
+
+
+class AdjustmentTable:
+    """Detected splits plus the per-ticker state needed to check the next day"""
+
+    def __init__(self):
+        self.through: Optional[str] = None
+        self.splits: List[Dict] = []
+        self.last: Dict[str, List] = {}     # ticker -> [date, price, market cap]
+
+    @classmethod
+    def load(cls, path: Path) -> 'AdjustmentTable':
+        data = json.loads(Path(path).read_text(encoding='utf-8'))
+        if data.get('version') != TABLE_VERSION:
+            raise ValueError(f"unsupported adjustments version {data.get('version')}")
+        table = cls()
+        table.through, table.splits, table.last = data['through'], data['splits'], data['last']
+        return table
+
+    def save(self, path: Path) -> None:
+        data = {'version': TABLE_VERSION, 'through': self.through, 'splits': self.splits, 'last': self.last}
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        tmp.write_text(json.dumps(data, indent=1), encoding='utf-8')
+        tmp.replace(path)
+
+    def update(self, history: pd.DataFrame) -> List[Dict]:
+        """Check the days of a Date/Ticker/Price/Market Cap history newer than `through`.
+
+        Returns the splits found; they are also added to the table.
+        """
+        if self.through is not None:
+            history = history[history['Date'] > self.through]
+        if history.empty:
+            return []
+        dates = sorted(history['Date'].unique())
+        tickers = sorted(history['Ticker'].unique())
+        carried = [self.last.get(t, [None, np.nan, np.nan]) for t in tickers]
+
+        # Row 0 carries each ticker's last observation from before these days
+        prices = np.vstack([[c[1] for c in carried], build_panel(history, 'Price', dates, tickers).to_numpy()])
+        caps = np.vstack([[c[2] for c in carried], build_panel(history, 'Market Cap', dates, tickers).to_numpy()])
+        prices, caps = prices.astype(float), caps.astype(float)
+        days = [None, *dates]
+
+        found = []
+        for row, col, before, ratio in zip(*detect_splits(prices, caps)):
+            ticker = tickers[col]
+            found.append({
+                'date': days[row],
+                'ticker': ticker,
+                'ratio': float(ratio),
+                'label': ratio_label(ratio),
+                'previous_date': days[before] or carried[col][0],
+                'price_before': float(prices[before, col]),
+                'price_after': float(prices[row, col]),
+            })
+        self.splits = sorted(self.splits + found, key=lambda s: (s['date'], s['ticker']))
+
+        observed = (prices > 0) & (caps > 0)
+        latest = np.maximum.accumulate(np.where(observed, np.arange(len(days))[:, None], -1), axis=0)[-1]
+        for col in np.nonzero(latest > 0)[0]:
+            row = latest[col]
+            self.last[tickers[col]] = [days[row], float(prices[row, col]), float(caps[row, col])]
+        self.through = dates[-1]
+        return found
+
+    def splits_after(self, date: str) -> List[Dict]:
+        return [s for s in self.splits if s['date'] > date]
+
+    def adjust(self, history: pd.DataFrame, column: str = 'Price') -> pd.Series:
+        """Split-adjusted copy of one price column of a long Date/Ticker history"""
+        adjusted = history[column].astype(float).copy()
+        for split in self.splits:
+            before = (history['Ticker'] == split['ticker']) & (history['Date'] < split['date'])
+            adjusted[before] /= split['ratio']
+        return adjusted
+
+
+def update_table(table: AdjustmentTable, data_dir: Union[str, Path] = DATA_DIR) -> List[Dict]:
+    """Bring a table up to the newest snapshot in data_dir; returns the new splits"""
+    pending = [d for d in list_snapshot_dates(data_dir) if table.through is None or d > table.through]
+    if not pending:
+        return []
+    return table.update(load_history(data_dir, columns=['Price', 'Market Cap'], dates=pending))
+
+
+def load_adjustments(data_dir: Union[str, Path] = DATA_DIR) -> AdjustmentTable:
+    """The saved table for data_dir, brought up to date in memory when snapshots are newer"""
+    path = Path(data_dir) / ADJUSTMENTS_FILE
+    table = AdjustmentTable()
+    if path.exists():
+        try:
+            table = AdjustmentTable.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: Rebuilding unreadable {path}: {e}", file=sys.stderr)
+    update_table(table, data_dir)
+    return table
+
+
+def adjust_history(history: pd.DataFrame, data_dir: Union[str, Path] = DATA_DIR,
+                   columns: Sequence[str] = ('Price',)) -> pd.DataFrame:
+    """Copy of a long history with the given price columns split-adjusted"""
+    table = load_adjustments(data_dir)
+    if not table.splits:
+        return history
+    return history.assign(**{c: table.adjust(history, c) for c in columns if c in history.columns})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect stock splits in the stored snapshots")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="Recheck the whole history instead of new days")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    path = args.data_dir / ADJUSTMENTS_FILE
+    table = AdjustmentTable.load(path) if path.exists() and not args.rebuild else AdjustmentTable()
+    previous = table.through
+    found = update_table(table, args.data_dir)
+    table.save(path)
+
+    for split in found:
+        print(f"{split['date']} {split['ticker']:<6} {split['label']:>5}  "
+              f"{split['price_before']:.2f} ({split['previous_date']}) -> {split['price_after']:.2f}")
+    span = f"after {previous}" if previous else "in the full history"
+    print(f"{len(found)} new split(s) {span}, {len(table.splits)} in the table, through {table.through} "
+          f"({(time.perf_counter() - started) * 1000:.0f}ms)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Raw Screen Archive
+The merged, normalized screen from before score_table drops the rows that
+fail the Market Cap / 52W filters, kept per day so later rescoring, new
+filters and backtests can see the excluded tickers too.
+
+Each day is one compressed NumPy archive, public/data/raw/YYYY-MM-DD.npz,
+laid out by column: numeric columns as their own arrays, text columns
+dictionary-encoded (small integer codes into a sorted array of distinct
+values, -1 for missing). No pickled objects, and reading a few columns only
+decompresses those, so replaying a screen that needs a handful of columns
+over every archived day costs a fraction of loading them all (which
+decompresses every array and takes seconds for a year of days).
+
+Usage: python scripts/raw_archive.py [--dir public/data/raw] [--columns Ticker "Market Cap" ...]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from snapshot_history import DATA_DIR
+
+RAW_DIR = DATA_DIR / "raw"
+ARCHIVE_VERSION = 1
+
+
+def code_dtype(n: int) -> np.dtype:
+    """Smallest signed integer dtype that holds codes 0..n-1 and -1"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def encode_column(column: pd.Series) -> dict:
+    """Arrays that store one column: {'values': ...} or {'codes': ..., 'categories': ...}"""
+    if pd.api.types.is_bool_dtype(column) or pd.api.types.is_numeric_dtype(column):
+        return {'values': column.to_numpy()}
+    text = column.astype(object).where(column.notna(), None)
+    categories = np.array(sorted({str(v) for v in text if v is not None}), dtype=str)
+    codes = np.full(len(text), -1, dtype=code_dtype(len(categories)))
+    present = text.notna().to_numpy()
+    codes[present] = np.searchsorted(categories, text[present].astype(str).to_numpy())
+    return {'codes': codes, 'categories': categories}
+
+
+def decode_column(archive, index: int) -> np.ndarray:
+    if f"c{index}.values" in archive.files:
+        return archive[f"c{index}.values"]
+    codes = archive[f"c{index}.codes"]
+    categories = archive[f"c{index}.categories"].astype(object)
+    values = np.empty(len(codes), dtype=object)
+    present = codes >= 0
+    values[present] = categories[codes[present]]
+    values[~present] = np.nan
+    return values
+
+
+def write_archive(table: pd.DataFrame, date: str, out_dir: Path = RAW_DIR) -> Path:
+    """Write one day's raw table atomically; returns the archive path"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    arrays = {
+        'version': np.array(ARCHIVE_VERSION),
+        'columns': np.array(list(map(str, table.columns)), dtype=str),
+    }
+    for index, name in enumerate(table.columns):
+        for part, array in encode_column(table[name]).items():
+            arrays[f"c{index}.{part}"] = array
+
+    path = out_dir / f"{date}.npz"
+    tmp = out_dir / f"{date}.tmp.npz"
+    np.savez_compressed(tmp, **arrays)
+    tmp.replace(path)
+    return path
+
+
+def read_archive(path: Path, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """One archived day as a DataFrame, optionally only some columns"""
+    with np.load(path, allow_pickle=False) as archive:
+        if int(archive['version']) != ARCHIVE_VERSION:
+            raise ValueError(f"{path} was written by archive version {int(archive['version'])}")
+        names = list(archive['columns'])
+        wanted = names if columns is None else [c for c in columns if c in names]
+        return pd.DataFrame({name: decode_column(archive, names.index(name)) for name in wanted},
+                            columns=wanted)
+
+
+def list_archive_dates(archive_dir: Path = RAW_DIR) -> List[str]:
+    return sorted(path.stem for path in Path(archive_dir).glob("????-??-??.npz"))
+
+
+def load_archive_history(archive_dir: Path = RAW_DIR, columns: Optional[Iterable[str]] = None,
+                         dates: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Long table (Date + columns) of every archived day, or just `dates`"""
+    columns = None if columns is None else list(columns)
+    dates = list_archive_dates(archive_dir) if dates is None else sorted(dates)
+    frames = []
+    for date in dates:
+        frame = read_archive(Path(archive_dir) / f"{date}.npz", columns)
+        frame.insert(0, 'Date', date)
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=['Date', *(columns or [])])
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read the archived raw screens")
+    parser.add_argument("--dir", type=Path, default=RAW_DIR)
+    parser.add_argument("--columns", nargs="+", help="Only these columns (default: all)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    history = load_archive_history(args.dir, args.columns)
+    if history.empty:
+        print(f"No archives in {args.dir}", file=sys.stderr)
+        sys.exit(1)
+    days = history['Date'].nunique()
+    print(f"{days} day(s), {len(history)} rows, {history.shape[1] - 1} column(s)")
+    print(f"Loaded in {(time.perf_counter() - started) * 1000:.0f}ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
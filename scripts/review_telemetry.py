@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+PR Reviewer Telemetry
+One record per analysis request: queue wait, time to first byte and to the
+first complete ticker, total latency, prompt/completion tokens from the
+API's `usage`, retries with their reasons and which JSON-parse strategy
+produced the result. Records are appended to a JSONL log committed with the
+summaries so cost and latency can be trended across days; `summarize`
+aggregates a run for the PR comment.
+
+Usage: python scripts/review_telemetry.py [--log PATH] [--days 30]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+TELEMETRY_PATH = Path("public/data/summary/telemetry.jsonl")
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile; None for no values"""
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+class ReviewTelemetry:
+    """Collects request records for one reviewer run (thread-safe)"""
+
+    def __init__(self, path: Path = TELEMETRY_PATH, run_id: Optional[str] = None):
+        self.path = Path(path)
+        self.run_id = run_id or f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{os.getpid()}"
+        self.records: List[Dict] = []
+        self.lock = threading.Lock()
+
+    def new_record(self, **fields) -> Dict:
+        """Blank record for one request; fill it in and pass it to `add`"""
+        return {
+            'run_id': self.run_id,
+            'queue_wait': None,
+            'ttfb': None,
+            'first_result': None,
+            'latency': None,
+            'prompt_tokens': None,
+            'completion_tokens': None,
+            'cost': None,
+            'retries': [],
+            'finish_reason': None,
+            'parse': None,
+            'returned': 0,
+            'error': None,
+            **fields,
+        }
+
+    def add(self, record: Dict) -> None:
+        record = {k: round(v, 3) if isinstance(v, float) else v for k, v in record.items()}
+        with self.lock:
+            self.records.append(record)
+
+    def write(self) -> bool:
+        """Append this run's records to the JSONL log"""
+        if not self.records:
+            return False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in self.records:
+                f.write(json.dumps(record, separators=(',', ':')) + "\n")
+        return True
+
+    def summary(self) -> Dict:
+        return summarize(self.records)
+
+
+def summarize(records: Iterable[Dict]) -> Dict:
+    """Totals and latency percentiles over request records"""
+    records = list(records)
+    latencies = [r['latency'] for r in records]
+    return {
+        'requests': len(records),
+        'failed': sum(1 for r in records if r.get('error')),
+        'retries': sum(len(r.get('retries') or []) for r in records),
+        'retry_reasons': dict(Counter(retry['reason'].split(':')[0]
+                                      for r in records for retry in r.get('retries') or [])),
+        'prompt_tokens': sum(r.get('prompt_tokens') or 0 for r in records),
+        'completion_tokens': sum(r.get('completion_tokens') or 0 for r in records),
+        'cost': round(sum(r.get('cost') or 0 for r in records), 6),
+        'latency_p50': percentile(latencies, 50),
+        'latency_p95': percentile(latencies, 95),
+        'ttfb_p50': percentile([r.get('ttfb') for r in records], 50),
+        'first_result_p50': percentile([r.get('first_result') for r in records], 50),
+        'queue_wait_max': max((r.get('queue_wait') or 0 for r in records), default=0),
+        'parse': dict(Counter(r.get('parse') or 'none' for r in records)),
+    }
+
+
+def format_seconds(value: Optional[float]) -> str:
+    return "n/a" if value is None else f"{value:.1f}s"
+
+
+def format_summary_table(summary: Dict) -> str:
+    """Markdown table for the PR comment"""
+    parse = ", ".join(f"{k} {v}" for k, v in sorted(summary['parse'].items())) or "n/a"
+    reasons = ", ".join(f"{k} {v}" for k, v in sorted(summary['retry_reasons'].items()))
+    rows = [
+        ("Requests", f"{summary['requests']} ({summary['failed']} failed)"),
+        ("Retries", f"{summary['retries']}" + (f" ({reasons})" if reasons else "")),
+        ("Tokens (prompt / completion)", f"{summary['prompt_tokens']:,} / {summary['completion_tokens']:,}"),
+        ("Latency p50 / p95", f"{format_seconds(summary['latency_p50'])} / {format_seconds(summary['latency_p95'])}"),
+        ("First byte / first result (p50)",
+         f"{format_seconds(summary['ttfb_p50'])} / {format_seconds(summary['first_result_p50'])}"),
+        ("Longest queue wait", format_seconds(summary['queue_wait_max'])),
+        ("JSON parse", parse),
+    ]
+    if summary['cost']:
+        rows.insert(3, ("Cost", f"${summary['cost']:.4f}"))
+    return "\n".join(["| Metric | Value |", "|---|---|", *[f"| {name} | {value} |" for name, value in rows]])
+
+
+def load_records(path: Path = TELEMETRY_PATH) -> List[Dict]:
+    try:
+        lines = Path(path).read_text(encoding='utf-8').splitlines()
+    except OSError:
+        return []
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trend reviewer cost and latency from the telemetry log")
+    parser.add_argument("--log", type=Path, default=TELEMETRY_PATH)
+    parser.add_argument("--days", type=int, default=30, help="Most recent snapshot dates to show")
+    args = parser.parse_args()
+
+    by_date: Dict[str, List[Dict]] = {}
+    for record in load_records(args.log):
+        by_date.setdefault(record.get('date', '?'), []).append(record)
+    if not by_date:
+        print(f"No telemetry in {args.log}", file=sys.stderr)
+        sys.exit(1)
+
+    print("date\trequests\tretries\tprompt_tokens\tcompletion_tokens\tlatency_p50\tlatency_p95")
+    for date in sorted(by_date)[-args.days:]:
+        s = summarize(by_date[date])
+        print(f"{date}\t{s['requests']}\t{s['retries']}\t{s['prompt_tokens']}\t{s['completion_tokens']}\t"
+              f"{format_seconds(s['latency_p50'])}\t{format_seconds(s['latency_p95'])}")
+
+
+if __name__ == "__main__":
+    main()
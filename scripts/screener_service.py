@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Screener HTTP Service
+Read-only JSON API over the screener snapshots kept in memory as columnar
+tables with hash indexes (Ticker/Sector/Industry) and sorted indexes on every
+numeric metric. Reloads automatically when a new snapshot lands.
+
+Usage: python scripts/screener_service.py [--port 8765] [--data-dir public/data]
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+import numpy as np
+import pandas as pd
+
+from price_adjustments import load_adjustments
+from snapshot_history import DATA_DIR, list_snapshot_dates, load_history
+
+HASH_INDEX_COLUMNS = ['Ticker', 'Sector', 'Industry']
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class ColumnarTable:
+    """Immutable column store for one snapshot with lookup indexes"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.size = len(df)
+        self.column_names = list(df.columns)
+        arrays = {col: df[col].to_numpy() for col in df.columns}
+        self.numeric_columns = [col for col, arr in arrays.items() if arr.dtype.kind in 'iuf']
+
+        # Python-object column lists (NaN -> None) so serializing a row is plain indexing
+        self.values: Dict[str, list] = {}
+        for col, arr in arrays.items():
+            values = arr.tolist()
+            for row in np.flatnonzero(pd.isna(arr)).tolist():
+                values[row] = None
+            self.values[col] = values
+
+        # Hash indexes: normalized key -> row ids (in snapshot order)
+        self.hash_indexes: Dict[str, Dict[str, np.ndarray]] = {}
+        for col in HASH_INDEX_COLUMNS:
+            if col in arrays:
+                groups: Dict[str, List[int]] = {}
+                for row, value in enumerate(self.values[col]):
+                    groups.setdefault('' if value is None else str(value).lower(), []).append(row)
+                self.hash_indexes[col] = {key: np.array(rows) for key, rows in groups.items()}
+
+        # Sorted indexes: ascending row order and matching values, NaNs excluded
+        self.sorted_indexes: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for col in self.numeric_columns:
+            values = arrays[col].astype(float)
+            valid = np.flatnonzero(~np.isnan(values))
+            order = valid[np.argsort(values[valid], kind='stable')]
+            self.sorted_indexes[col] = (order, values[order])
+
+    def lookup(self, column: str, value: str) -> np.ndarray:
+        """Row ids whose column equals value (case-insensitive)"""
+        index = self.hash_indexes.get(column)
+        if index is None:
+            raise KeyError(column)
+        return index.get(str(value).lower(), np.empty(0, dtype=np.intp))
+
+    def value_range(self, column: str, low: Optional[float] = None,
+                    high: Optional[float] = None) -> np.ndarray:
+        """Row ids with low <= column <= high, ordered by value ascending"""
+        order, values = self.sorted_indexes[column]
+        start = 0 if low is None else np.searchsorted(values, low, side='left')
+        stop = len(values) if high is None else np.searchsorted(values, high, side='right')
+        return order[start:stop]
+
+    def top(self, column: str, n: int, ascending: bool = False) -> np.ndarray:
+        """Row ids of the n best rows by column (descending unless ascending)"""
+        order, _ = self.sorted_indexes[column]
+        return order[:n] if ascending else order[::-1][:n]
+
+    def records(self, rows: np.ndarray, fields: Optional[List[str]] = None) -> List[Dict]:
+        """Materialize rows as JSON-safe dicts"""
+        columns = [(field, self.values[field]) for field in fields or self.column_names]
+        return [{field: values[row] for field, values in columns} for row in rows.tolist()]
+
+
+class ScreenerStore:
+    """Holds the loaded tables and swaps them atomically on reload"""
+
+    def __init__(self, data_dir: Path = DATA_DIR):
+        self.data_dir = Path(data_dir)
+        self.lock = threading.Lock()
+        self.signature = None
+        self.dates: List[str] = []
+        self.tables: Dict[str, ColumnarTable] = {}
+        self.history: Optional[ColumnarTable] = None
+        self.loaded_at = None
+
+    def current_signature(self) -> Tuple:
+        """Cheap fingerprint of the data dir: snapshot dates plus newest mtime"""
+        dates = list_snapshot_dates(self.data_dir)
+        newest = self.data_dir / f"{dates[-1]}.csv" if dates else None
+        return tuple(dates), newest.stat().st_mtime_ns if newest else None
+
+    def load(self) -> None:
+        """Build every table from disk, then publish them in one assignment"""
+        started = time.perf_counter()
+        signature = self.current_signature()
+        history = load_history(self.data_dir, dates=signature[0])
+
+        tables = {
+            date: ColumnarTable(snapshot.drop(columns='Date'))
+            for date, snapshot in history.groupby('Date', sort=True)
+        }
+        history = history.assign(Adj_Price=load_adjustments(self.data_dir).adjust(history))
+        history_table = ColumnarTable(history.sort_values('Date', kind='stable'))
+
+        with self.lock:
+            self.dates = sorted(tables)
+            self.tables = tables
+            self.history = history_table
+            self.signature = signature
+            self.loaded_at = time.time()
+
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"Loaded {len(tables)} snapshots ({len(history)} rows) in {elapsed:.0f}ms", file=sys.stderr)
+
+    def reload_if_changed(self) -> bool:
+        """Reload when a snapshot was added or the newest one was rewritten"""
+        if self.current_signature() == self.signature:
+            return False
+        self.load()
+        return True
+
+    def watch(self, interval: float = 5.0) -> threading.Thread:
+        """Poll the data dir in a daemon thread and hot-reload on change"""
+        def poll():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    print(f"Warning: Reload failed, keeping previous data: {e}", file=sys.stderr)
+
+        thread = threading.Thread(target=poll, name="snapshot-watcher", daemon=True)
+        thread.start()
+        return thread
+
+    def table(self, date: Optional[str] = None) -> Tuple[str, ColumnarTable]:
+        """Return (date, table) for the requested date, defaulting to the newest"""
+        tables = self.tables  # single read so a concurrent reload can't mix versions
+        if not tables:
+            raise LookupError("No snapshots loaded")
+        date = date or max(tables)
+        if date not in tables:
+            raise LookupError(f"No snapshot for {date}")
+        return date, tables[date]
+
+
+class ScreenerRequestHandler(BaseHTTPRequestHandler):
+    """Routes GET requests to store queries and writes JSON responses"""
+
+    store: ScreenerStore = None
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body are separate writes
+
+    def log_message(self, format, *args):
+        """Silence per-request access logs"""
+
+    def send_json(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [unquote(p) for p in url.path.strip('/').split('/') if p]
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            status, payload = self.route(parts, params)
+        except (KeyError, ValueError) as e:  # KeyError first: it subclasses LookupError
+            status, payload = 400, {"error": f"Bad request: {e}"}
+        except LookupError as e:
+            status, payload = 404, {"error": str(e)}
+        self.send_json(status, payload)
+
+    def route(self, parts: List[str], params: Dict[str, str]) -> Tuple[int, Dict]:
+        store = self.store
+        if not parts or parts == ['health']:
+            return 200, {"status": "ok", "dates": len(store.dates),
+                         "latest": store.dates[-1] if store.dates else None,
+                         "loaded_at": store.loaded_at}
+        if parts == ['dates']:
+            return 200, {"dates": store.dates}
+
+        head, rest = parts[0], parts[1:]
+        if head == 'history' and len(rest) == 1:
+            return 200, self.history(rest[0].upper(), params)
+
+        date, table = store.table(params.get('date'))
+        fields = params['fields'].split(',') if params.get('fields') else None
+        if fields:
+            unknown = set(fields) - set(table.column_names)
+            if unknown:
+                raise KeyError(f"unknown fields {sorted(unknown)}")
+
+        if head == 'stocks' and not rest:
+            rows = np.arange(table.size)
+        elif head == 'stocks' and len(rest) == 1:
+            rows = table.lookup('Ticker', rest[0])
+            if len(rows) == 0:
+                raise LookupError(f"{rest[0].upper()} not in snapshot {date}")
+            return 200, {"date": date, "result": table.records(rows, fields)[0]}
+        elif head in ('sectors', 'industries') and len(rest) == 1:
+            rows = table.lookup('Sector' if head == 'sectors' else 'Industry', rest[0])
+        elif head == 'range' and not rest:
+            metric = self.metric(table, params)
+            low = float(params['min']) if 'min' in params else None
+            high = float(params['max']) if 'max' in params else None
+            rows = table.value_range(metric, low, high)
+        elif head == 'top' and not rest:
+            metric = self.metric(table, params)
+            n = min(max(int(params.get('n', 10)), 1), MAX_PAGE_SIZE)
+            ascending = params.get('order', 'desc') == 'asc'
+            rows = table.top(metric, n, ascending)
+            return 200, {"date": date, "metric": metric, "results": table.records(rows, fields)}
+        else:
+            raise LookupError(f"Unknown endpoint /{'/'.join(parts)}")
+
+        return 200, {"date": date, **self.paginate(table, rows, params, fields)}
+
+    @staticmethod
+    def metric(table: ColumnarTable, params: Dict[str, str]) -> str:
+        metric = params.get('metric', 'Investor_Score')
+        if metric not in table.sorted_indexes:
+            raise KeyError(f"'{metric}' is not a numeric metric")
+        return metric
+
+    @staticmethod
+    def paginate(table: ColumnarTable, rows: np.ndarray, params: Dict[str, str],
+                 fields: Optional[List[str]]) -> Dict:
+        page = max(int(params.get('page', 1)), 1)
+        page_size = min(max(int(params.get('page_size', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        start = (page - 1) * page_size
+        return {
+            "total": int(len(rows)),
+            "page": page,
+            "page_size": page_size,
+            "results": table.records(rows[start:start + page_size], fields),
+        }
+
+    def history(self, ticker: str, params: Dict[str, str]) -> Dict:
+        table = self.store.history
+        rows = table.lookup('Ticker', ticker) if table else []
+        if len(rows) == 0:
+            raise LookupError(f"{ticker} has no history")
+        fields = params['fields'].split(',') if params.get('fields') else ['Price', 'Investor_Score']
+        unknown = set(fields) - set(table.column_names)
+        if unknown:
+            raise KeyError(f"unknown fields {sorted(unknown)}")
+        return {"ticker": ticker, "results": table.records(rows, ['Date', *fields])}
+
+
+def create_server(store: ScreenerStore, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """Bind a threaded HTTP server backed by the given store"""
+    handler = type("BoundScreenerRequestHandler", (ScreenerRequestHandler,), {"store": store})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve screener snapshots as a JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--reload-interval", type=float, default=5.0,
+                        help="Seconds between checks for new snapshots (0 disables)")
+    args = parser.parse_args()
+
+    store = ScreenerStore(args.data_dir)
+    store.load()
+    if args.reload_interval > 0:
+        store.watch(args.reload_interval)
+
+    server = create_server(store, args.host, args.port)
+    print(f"Serving screener API on http://{args.host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
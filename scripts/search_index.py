@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Search Index
+Builds a static, sharded search index over Ticker, Company, Industry and
+Sector for every stored snapshot, so "every date Kinross appeared" is a few
+small file reads instead of downloading every CSV.
+
+Layout under public/data/search/:
+  manifest.json     dates list, doc count and a content hash per shard
+  docs.json         [ticker, company, sector, industry, date ranges] per doc;
+                    ranges are [first, last] runs of indexes into `dates`
+  grams/<c>.json    trigram -> sorted doc ids, sharded by the trigram's
+                    first character
+
+Substring queries of three or more characters intersect trigram postings
+and verify the candidates; shorter queries match ticker/word prefixes
+against docs.json. Updates only read snapshots newer than the manifest and
+rewrite only the shards whose content changed.
+
+Usage: python scripts/search_index.py [--rebuild] [--query TEXT]
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from snapshot_history import DATA_DIR, list_snapshot_dates, load_history
+
+SEARCH_DIR = DATA_DIR / "search"
+INDEX_VERSION = 1
+FIELDS = ['Ticker', 'Company', 'Sector', 'Industry']
+GRAM = 3
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse punctuation to single spaces"""
+    return re.sub(r'[^a-z0-9]+', ' ', str(text).lower()).strip()
+
+
+def trigrams(text: str) -> set:
+    text = normalize_text(text)
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def shard_key(gram: str) -> str:
+    """Shard file name for a gram: its first character, '_' for a space"""
+    return '_' if gram[0] == ' ' else gram[0]
+
+
+def add_to_ranges(ranges: List[List[int]], index: int) -> None:
+    """Append a date index, extending the last run when it is consecutive"""
+    if ranges and ranges[-1][1] == index - 1:
+        ranges[-1][1] = index
+    elif not ranges or ranges[-1][1] < index:
+        ranges.append([index, index])
+
+
+def expand_ranges(ranges: Iterable[Sequence[int]], dates: Sequence[str]) -> List[str]:
+    return [dates[i] for start, end in ranges for i in range(start, end + 1)]
+
+
+class SearchIndex:
+    """In-memory form of the static index; load/save read and write the shards"""
+
+    def __init__(self):
+        self.dates: List[str] = []
+        self.docs: List[List] = []        # [ticker, company, sector, industry, ranges]
+        self.doc_ids: Dict[str, int] = {}
+        self.grams: Dict[str, List[int]] = {}
+        self.shard_hashes: Dict[str, str] = {}
+
+    def add_snapshots(self, history) -> int:
+        """Merge a long table of new snapshots (Date, Ticker, Company, ...); returns dates added"""
+        new_dates = sorted(set(history['Date']))
+        if self.dates and new_dates and new_dates[0] <= self.dates[-1]:
+            raise ValueError(f"{new_dates[0]} is not after the last indexed date {self.dates[-1]}")
+        offset = len(self.dates)
+        self.dates.extend(new_dates)
+        date_index = {date: offset + i for i, date in enumerate(new_dates)}
+
+        rows = history[['Date', *FIELDS]].sort_values('Date', kind='mergesort')
+        for date, ticker, company, sector, industry in rows.itertuples(index=False):
+            text = ['' if not isinstance(v, str) else v for v in (company, sector, industry)]
+            doc_id = self.doc_ids.get(ticker)
+            if doc_id is None:
+                doc_id = self.doc_ids[ticker] = len(self.docs)
+                self.docs.append([ticker, *text, []])
+            else:
+                # The newest non-empty name wins, so renames become searchable
+                doc = self.docs[doc_id]
+                doc[1:4] = [new or old for new, old in zip(text, doc[1:4])]
+            add_to_ranges(self.docs[doc_id][4], date_index[date])
+        self.rebuild_grams()
+        return len(new_dates)
+
+    def rebuild_grams(self) -> None:
+        postings = defaultdict(set)
+        for doc_id, doc in enumerate(self.docs):
+            for field in doc[:4]:
+                for gram in trigrams(field):
+                    postings[gram].add(doc_id)
+        self.grams = {gram: sorted(ids) for gram, ids in sorted(postings.items())}
+
+    def shards(self) -> Dict[str, Dict[str, List[int]]]:
+        shards = defaultdict(dict)
+        for gram, ids in self.grams.items():
+            shards[shard_key(gram)][gram] = ids
+        return shards
+
+    def save(self, out_dir: Path = SEARCH_DIR) -> List[str]:
+        """Write changed shards, docs and manifest; returns the files written"""
+        gram_dir = out_dir / "grams"
+        gram_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+
+        hashes = {}
+        for key, shard in self.shards().items():
+            payload = json.dumps(shard, separators=(',', ':'))
+            hashes[key] = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+            if self.shard_hashes.get(key) != hashes[key] or not (gram_dir / f"{key}.json").exists():
+                write_atomic(gram_dir / f"{key}.json", payload)
+                written.append(f"grams/{key}.json")
+        for key in set(self.shard_hashes) - set(hashes):
+            (gram_dir / f"{key}.json").unlink(missing_ok=True)
+        self.shard_hashes = hashes
+
+        write_atomic(out_dir / "docs.json", json.dumps(self.docs, separators=(',', ':')))
+        manifest = {
+            'version': INDEX_VERSION,
+            'dates': self.dates,
+            'docs': len(self.docs),
+            'shards': self.shard_hashes,
+        }
+        write_atomic(out_dir / "manifest.json", json.dumps(manifest, separators=(',', ':')))
+        return written + ['docs.json', 'manifest.json']
+
+    @classmethod
+    def load(cls, out_dir: Path = SEARCH_DIR, with_grams: bool = True) -> Optional['SearchIndex']:
+        """Index from disk, or None when missing or written by another version"""
+        try:
+            manifest = json.loads((out_dir / "manifest.json").read_text(encoding='utf-8'))
+            docs = json.loads((out_dir / "docs.json").read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError):
+            return None
+        if manifest.get('version') != INDEX_VERSION:
+            return None
+        index = cls()
+        index.dates, index.docs = manifest['dates'], docs
+        index.doc_ids = {doc[0]: i for i, doc in enumerate(docs)}
+        index.shard_hashes = manifest['shards']
+        if with_grams:
+            for key in index.shard_hashes:
+                index.grams.update(json.loads((out_dir / "grams" / f"{key}.json").read_text(encoding='utf-8')))
+        return index
+
+    def candidates(self, query: str) -> Iterable[int]:
+        """Doc ids that may contain the query; exact for short queries"""
+        grams = trigrams(query)
+        if not grams:
+            return range(len(self.docs))
+        postings = sorted((self.grams.get(g, []) for g in grams), key=len)
+        result = set(postings[0])
+        for ids in postings[1:]:
+            result.intersection_update(ids)
+            if not result:
+                break
+        return result
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """Docs whose fields contain the query, best matches first.
+
+        Order: exact ticker, ticker prefix, word prefix in any field, then
+        plain substring; ties go to the most recently seen ticker.
+        """
+        needle = normalize_text(query)
+        if not needle:
+            return []
+        scored = []
+        for doc_id in self.candidates(needle):
+            doc = self.docs[doc_id]
+            fields = [normalize_text(f) for f in doc[:4]]
+            if fields[0] == needle:
+                tier = 0
+            elif fields[0].startswith(needle):
+                tier = 1
+            elif any(f.startswith(needle) or f' {needle}' in f for f in fields):
+                tier = 2
+            elif len(needle) >= GRAM and any(needle in f for f in fields):
+                tier = 3
+            else:
+                continue
+            scored.append((tier, -doc[4][-1][1], doc[0], doc_id))
+        scored.sort()
+        return [self.describe(doc_id) for *_, doc_id in scored[:limit]]
+
+    def describe(self, doc_id: int) -> Dict:
+        ticker, company, sector, industry, ranges = self.docs[doc_id]
+        return {
+            'Ticker': ticker,
+            'Company': company,
+            'Sector': sector,
+            'Industry': industry,
+            'dates': expand_ranges(ranges, self.dates),
+        }
+
+
+def write_atomic(path: Path, payload: str) -> None:
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    tmp.write_text(payload, encoding='utf-8')
+    tmp.replace(path)
+
+
+def update_index(data_dir: Path = DATA_DIR, out_dir: Optional[Path] = None,
+                 rebuild: bool = False) -> Tuple[SearchIndex, int, List[str]]:
+    """Bring the on-disk index up to date; returns (index, dates added, files written)"""
+    out_dir = out_dir or Path(data_dir) / "search"
+    dates = list_snapshot_dates(data_dir)
+    index = None if rebuild else SearchIndex.load(out_dir, with_grams=False)
+    if index is not None and not set(index.dates) <= set(dates):
+        index = None  # a snapshot was removed: start over
+    if index is None:
+        index = SearchIndex()
+
+    pending = [d for d in dates if not index.dates or d > index.dates[-1]]
+    if index.dates and len(pending) + len(index.dates) != len(dates):
+        index, pending = SearchIndex(), dates  # a date was backfilled in the middle
+    if not pending:
+        return index, 0, []
+    added = index.add_snapshots(load_history(data_dir, columns=FIELDS[1:], dates=pending))
+    return index, added, index.save(out_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the static ticker/company search index")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the existing index")
+    parser.add_argument("--query", help="Search the index instead of updating it")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.query:
+        index = SearchIndex.load(args.data_dir / "search")
+        if index is None:
+            print("Error: No search index; run without --query first", file=sys.stderr)
+            sys.exit(1)
+        for hit in index.search(args.query, args.limit):
+            dates = hit['dates']
+            print(f"{hit['Ticker']}\t{hit['Company']}\t{hit['Industry']}\t{len(dates)} dates\t{dates[0]}..{dates[-1]}")
+        print(f"Searched in {(time.perf_counter() - started) * 1000:.1f}ms", file=sys.stderr)
+        return
+
+    index, added, written = update_index(args.data_dir, rebuild=args.rebuild)
+    print(f"Indexed {added} new date(s), {len(index.docs)} tickers; wrote {len(written)} file(s) "
+          f"in {(time.perf_counter() - started) * 1000:.0f}ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
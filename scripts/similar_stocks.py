@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Similar Stocks
+Finds each ticker's closest peers by fundamentals (valuation, profitability
+and growth) and writes the top-k into a compact sidecar next to the
+snapshot. Metrics are robust-standardized and clipped; distances use only
+the metrics both tickers report, computed in row blocks with matrix products
+so the full universe fits in memory and runs in seconds.
+
+Usage: python scripts/similar_stocks.py [--date YYYY-MM-DD] [-k 10]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from snapshot_history import DATA_DIR, list_snapshot_dates, load_snapshot
+
+FEATURES = [
+    # valuation
+    'P/E', 'PEG', 'P/S',
+    # profitability
+    'ROE', 'ROIC', 'Gross M', 'Oper M', 'Profit M',
+    # growth
+    'EPS This Y', 'EPS Next Y', 'EPS Past 5Y', 'EPS Next 5Y', 'Sales Past 5Y',
+]
+
+DEFAULT_K = 10
+CLIP_Z = 3.0
+MIN_SHARED_FEATURES = 0.5   # fraction of features both tickers must report
+BLOCK_SIZE = 1024
+DISTANCE_DECIMALS = 3
+
+
+def standardize(values: np.ndarray) -> np.ndarray:
+    """Robust z-scores per column (median / scaled MAD), clipped to ±CLIP_Z; NaN stays NaN"""
+    median = np.nanmedian(values, axis=0)
+    mad = np.nanmedian(np.abs(values - median), axis=0) * 1.4826
+    std = np.nanstd(values, axis=0)
+    scale = np.where(mad > 0, mad, np.where(std > 0, std, 1.0))
+    return np.clip((values - median) / scale, -CLIP_Z, CLIP_Z)
+
+
+def mean_squared_distances(left: np.ndarray, right: np.ndarray, n_features: int,
+                           min_shared: int) -> np.ndarray:
+    """Mean squared distance over shared features between two packed row sets.
+
+    Rows are packed as [x², m, x, m] (left) and [m, x², −2x, m] (right) with
+    missing entries zeroed, so one product yields
+    Σ m_j x_i² + Σ m_i x_j² − 2 Σ x_i x_j and a second the shared count.
+    Pairs sharing fewer than min_shared features are inf.
+    """
+    f = n_features
+    sq = left[:, :3 * f] @ right[:, :3 * f].T
+    shared = left[:, 3 * f:] @ right[:, 3 * f:].T
+    np.maximum(sq, 0.0, out=sq)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sq /= shared
+    sq[shared < min_shared] = np.inf
+    return sq
+
+
+def pack_rows(z: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Left/right packings of standardized rows for mean_squared_distances"""
+    mask = (~np.isnan(z)).astype(np.float32)
+    values = np.nan_to_num(z).astype(np.float32)
+    squares = values * values
+    return (np.hstack([squares, mask, values, mask]),
+            np.hstack([mask, squares, -2 * values, mask]))
+
+
+def nearest_neighbors(features: np.ndarray, k: int = DEFAULT_K, block_size: int = BLOCK_SIZE,
+                      min_shared_fraction: float = MIN_SHARED_FEATURES) -> Tuple[np.ndarray, np.ndarray]:
+    """Indices and distances (n, k) of each row's k nearest other rows.
+
+    Missing neighbours (too few shared features) are index -1, distance inf.
+    """
+    z = standardize(np.asarray(features, dtype=float))
+    left, right = pack_rows(z)
+    n = len(z)
+    k = min(k, max(n - 1, 0))
+    min_shared = max(1, int(np.ceil(z.shape[1] * min_shared_fraction)))
+
+    indices = np.full((n, k), -1, dtype=np.int64)
+    distances = np.full((n, k), np.inf)
+    if k == 0:
+        return indices, distances
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        dist = mean_squared_distances(left[start:stop], right, z.shape[1], min_shared)
+        dist[np.arange(stop - start), np.arange(start, stop)] = np.inf
+        top = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        top_dist = np.take_along_axis(dist, top, axis=1)
+        order = np.lexsort((top, top_dist), axis=1)
+        indices[start:stop] = np.take_along_axis(top, order, axis=1)
+        distances[start:stop] = np.sqrt(np.take_along_axis(top_dist, order, axis=1))
+    indices[np.isinf(distances)] = -1
+    return indices, distances
+
+
+def build_similar(snapshot: pd.DataFrame, k: int = DEFAULT_K,
+                  features: Sequence[str] = FEATURES) -> Dict:
+    """Sidecar document for a normalized snapshot: ticker -> [[peer, distance], ...] nearest first"""
+    available = [f for f in features if f in snapshot.columns]
+    tickers = snapshot['Ticker'].tolist()
+    indices, distances = nearest_neighbors(snapshot[available].to_numpy(dtype=float), k)
+    rounded = np.round(distances, DISTANCE_DECIMALS).tolist()
+    neighbors = {
+        ticker: [[tickers[j], d] for j, d in zip(row, dist) if j >= 0]
+        for ticker, row, dist in zip(tickers, indices.tolist(), rounded)
+    }
+    return {'k': k, 'features': available, 'neighbors': neighbors}
+
+
+def write_similar(date: str, k: int = DEFAULT_K, data_dir: Path = DATA_DIR,
+                  out_dir: Optional[Path] = None) -> Path:
+    out_dir = out_dir or Path(data_dir) / "similar"
+    document = build_similar(load_snapshot(date, data_dir), k)
+    document['date'] = date
+    out_dir.mkdir(parents=True, exist_ok=True)
+    target = out_dir / f"{date}.json"
+    tmp = out_dir / f"{date}.json.tmp"
+    tmp.write_text(json.dumps(document, separators=(',', ':')), encoding='utf-8')
+    tmp.replace(target)
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write each ticker's nearest peers by fundamentals")
+    parser.add_argument("--date", action="append", help="Snapshot date(s) (default: newest)")
+    parser.add_argument("--all", action="store_true", help="Build every stored snapshot")
+    parser.add_argument("-k", type=int, default=DEFAULT_K)
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    args = parser.parse_args()
+
+    dates = list_snapshot_dates(args.data_dir) if args.all else (args.date or list_snapshot_dates(args.data_dir)[-1:])
+    if not dates:
+        print("Error: No snapshots found", file=sys.stderr)
+        sys.exit(1)
+
+    started = time.perf_counter()
+    for date in dates:
+        try:
+            write_similar(date, args.k, args.data_dir)
+        except FileNotFoundError:
+            print(f"Error: No snapshot for {date}", file=sys.stderr)
+            sys.exit(1)
+    print(f"Wrote {len(dates)} similar-stock file(s) to {args.data_dir / 'similar'} "
+          f"in {(time.perf_counter() - started) * 1000:.0f}ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
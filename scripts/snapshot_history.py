@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Snapshot History Loader
+Loads the dated screener CSVs in public/data into a long table and
+dates x tickers panels for the analysis tools
+"""
+
+import sys
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+import pandas as pd
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "public" / "data"
+SNAPSHOT_GLOB = "????-??-??.csv"
+
+# finviz renamed some headers over time; map old names to the current ones
+COLUMN_ALIASES = {
+    'Fwd P/E': 'Forward P/E',
+}
+
+TEXT_COLUMNS = ['Date', 'Ticker', 'Company', 'Sector', 'Industry', 'Country', 'Earnings', 'Run_Day']
+
+
+def list_snapshot_dates(data_dir: Union[str, Path] = DATA_DIR) -> List[str]:
+    """Return the sorted YYYY-MM-DD dates that have a snapshot CSV"""
+    return sorted(path.stem for path in Path(data_dir).glob(SNAPSHOT_GLOB))
+
+
+def parse_metric(values: pd.Series) -> pd.Series:
+    """Coerce a text metric column to floats; "17.53%" becomes 0.1753, "-" becomes NaN"""
+    as_text = values.astype(str)
+    is_pct = as_text.str.endswith('%')
+    numbers = pd.to_numeric(as_text.str.rstrip('%'), errors='coerce')
+    return numbers.where(~is_pct, numbers / 100)
+
+
+def normalize_snapshot(df: pd.DataFrame) -> pd.DataFrame:
+    """Apply header aliases and coerce text-typed metric columns to floats.
+
+    Percent strings such as ROIC's "17.53%" become fractions (0.1753) so every
+    metric uses the same scale as the rest of the snapshot.
+    """
+    df = df.rename(columns=COLUMN_ALIASES)
+    for col in df.columns:
+        if col in TEXT_COLUMNS or df[col].dtype != object:
+            continue
+        df[col] = parse_metric(df[col])
+    key = ['Date', 'Ticker'] if 'Date' in df.columns else ['Ticker']
+    return df.drop_duplicates(subset=key, keep='first').reset_index(drop=True)
+
+
+def read_snapshot(date: str, data_dir: Union[str, Path] = DATA_DIR,
+                  columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a dated snapshot (or 'latest') as published, without normalizing"""
+    usecols = None if columns is None else (lambda c: COLUMN_ALIASES.get(c, c) in columns)
+    df = pd.read_csv(Path(data_dir) / f"{date}.csv", sep='\t', usecols=usecols)
+    return df.rename(columns=COLUMN_ALIASES)
+
+
+def load_snapshot(date: str, data_dir: Union[str, Path] = DATA_DIR) -> pd.DataFrame:
+    """Load and normalize a single dated snapshot (or 'latest')"""
+    return normalize_snapshot(read_snapshot(date, data_dir))
+
+
+def load_history(data_dir: Union[str, Path] = DATA_DIR,
+                 columns: Optional[Iterable[str]] = None,
+                 dates: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Concatenate snapshots into one long table with a leading Date column.
+
+    Columns missing from an older snapshot are filled with NaN rather than
+    dropped, so a header change never removes a whole day from the history.
+    Normalization runs once over the concatenated table.
+    """
+    dates = list(dates) if dates is not None else list_snapshot_dates(data_dir)
+    wanted = None if columns is None else ['Ticker', *[c for c in columns if c != 'Ticker']]
+
+    frames = []
+    for date in dates:
+        try:
+            df = read_snapshot(date, data_dir, wanted)
+        except (OSError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+            print(f"Warning: Skipping snapshot {date}: {e}", file=sys.stderr)
+            continue
+        if wanted is not None:
+            df = df.reindex(columns=wanted)
+        df.insert(0, 'Date', date)
+        frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(columns=['Date', *(wanted or ['Ticker'])])
+    return normalize_snapshot(pd.concat(frames, ignore_index=True))
+
+
+def build_panel(history: pd.DataFrame, column: str,
+                dates: Optional[List[str]] = None,
+                tickers: Optional[List[str]] = None) -> pd.DataFrame:
+    """Pivot one metric of the long history into a dates x tickers frame.
+
+    Cells are NaN on days the ticker was not in the screen.
+    """
+    panel = history.pivot(index='Date', columns='Ticker', values=column).sort_index()
+    panel.columns.name = None
+    panel.index.name = None
+    if dates is not None or tickers is not None:
+        panel = panel.reindex(index=dates if dates is not None else panel.index,
+                              columns=tickers if tickers is not None else panel.columns)
+    return panel.astype(float)
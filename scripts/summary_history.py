@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Summary History Index
+Every past LLM analysis of a ticker in one small request, instead of
+downloading each summary/<date>.json.
+
+Layout under public/data/summary/history/:
+  manifest.json   fields, dates -> tickers analyzed that day, and a content
+                  hash per shard (for cache busting)
+  <c>.json.gz     ticker -> [[date, description, latest_news, why_selected], ...]
+                  oldest first, for tickers starting with character <c>;
+                  compact JSON, gzipped with a fixed mtime so unchanged
+                  shards stay byte-identical
+
+save_summaries adds each day incrementally: only the shards of that day's
+tickers (and of tickers a re-run of the same day dropped) are rewritten.
+Placeholder analyses (nothing but an error description) are not indexed.
+
+Usage: python scripts/summary_history.py [--rebuild] [--ticker TICKER]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SUMMARY_DIR = Path("public/data/summary")
+INDEX_VERSION = 1
+FIELDS = ['date', 'description', 'latest_news', 'why_selected']
+
+
+def shard_key(ticker: str) -> str:
+    """Shard for a ticker: its first character, '_' when not alphanumeric"""
+    first = ticker[:1].upper()
+    return first if first.isalnum() else '_'
+
+
+def is_placeholder(analysis: Dict) -> bool:
+    return not analysis.get('latest_news') and not analysis.get('why_selected')
+
+
+def write_atomic(path: Path, payload: bytes) -> None:
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    tmp.write_bytes(payload)
+    tmp.replace(path)
+
+
+class SummaryHistory:
+    """Manifest plus lazily loaded shards; save writes only what changed"""
+
+    def __init__(self, out_dir: Path):
+        self.out_dir = Path(out_dir)
+        self.dates: Dict[str, List[str]] = {}
+        self.shard_hashes: Dict[str, str] = {}
+        self.shards: Dict[str, Dict[str, List[List[str]]]] = {}
+        self.dirty: set = set()
+
+    @classmethod
+    def load(cls, out_dir: Path) -> 'SummaryHistory':
+        """Index from disk; missing or other-version indexes start empty"""
+        history = cls(out_dir)
+        try:
+            manifest = json.loads((history.out_dir / "manifest.json").read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError):
+            return history
+        if manifest.get('version') == INDEX_VERSION:
+            history.dates = manifest['dates']
+            history.shard_hashes = manifest['shards']
+        return history
+
+    def shard(self, key: str) -> Dict[str, List[List[str]]]:
+        if key not in self.shards:
+            self.shards[key] = {}
+            if key in self.shard_hashes:
+                path = self.out_dir / f"{key}.json.gz"
+                self.shards[key] = json.loads(gzip.decompress(path.read_bytes()))
+        return self.shards[key]
+
+    def ticker(self, ticker: str) -> List[Dict[str, str]]:
+        """All indexed analyses of `ticker`, oldest first"""
+        return [dict(zip(FIELDS, row)) for row in self.shard(shard_key(ticker)).get(ticker, [])]
+
+    def add(self, date: str, top_stocks: List[Dict]) -> int:
+        """Index one day's summary, replacing an earlier index of the same day; returns entries added"""
+        for ticker in self.dates.pop(date, []):
+            key = shard_key(ticker)
+            rows = [row for row in self.shard(key).get(ticker, []) if row[0] != date]
+            if rows:
+                self.shards[key][ticker] = rows
+            else:
+                self.shards[key].pop(ticker, None)
+            self.dirty.add(key)
+
+        tickers = []
+        for stock in top_stocks:
+            if is_placeholder(stock):
+                continue
+            ticker = stock['ticker']
+            key = shard_key(ticker)
+            rows = self.shard(key).setdefault(ticker, [])
+            rows.append([date, *(stock.get(field, '') for field in FIELDS[1:])])
+            rows.sort(key=lambda row: row[0])
+            tickers.append(ticker)
+            self.dirty.add(key)
+        if tickers:
+            self.dates[date] = tickers
+        return len(tickers)
+
+    def save(self) -> List[str]:
+        """Write changed shards and the manifest; returns the files written"""
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        for key in sorted(self.dirty):
+            path = self.out_dir / f"{key}.json.gz"
+            shard = self.shards.get(key) or {}
+            if not shard:
+                path.unlink(missing_ok=True)
+                self.shard_hashes.pop(key, None)
+                continue
+            payload = json.dumps(shard, separators=(',', ':'), sort_keys=True).encode('utf-8')
+            digest = hashlib.sha1(payload).hexdigest()[:12]
+            if self.shard_hashes.get(key) != digest or not path.exists():
+                write_atomic(path, gzip.compress(payload, compresslevel=9, mtime=0))
+                written.append(path.name)
+            self.shard_hashes[key] = digest
+        self.dirty.clear()
+
+        manifest = {
+            'version': INDEX_VERSION,
+            'fields': FIELDS,
+            'dates': dict(sorted(self.dates.items())),
+            'shards': dict(sorted(self.shard_hashes.items())),
+        }
+        write_atomic(self.out_dir / "manifest.json", json.dumps(manifest, separators=(',', ':')).encode('utf-8'))
+        return written + ['manifest.json']
+
+
+def read_summary(path: Path) -> Optional[Dict]:
+    try:
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def update_history(summary_dir: Path, date: str, top_stocks: List[Dict]) -> List[str]:
+    """Add one day to the index under summary_dir/history; returns files written"""
+    history = SummaryHistory.load(Path(summary_dir) / "history")
+    history.add(date, top_stocks)
+    return history.save()
+
+
+def rebuild_history(summary_dir: Path = SUMMARY_DIR) -> SummaryHistory:
+    """Index every summary/<date>.json from scratch"""
+    out_dir = Path(summary_dir) / "history"
+    history = SummaryHistory(out_dir)
+    # Start from empty shards but keep the old hashes: unchanged shards are
+    # not rewritten and shards that end up empty are removed
+    history.shard_hashes = SummaryHistory.load(out_dir).shard_hashes
+    history.shards = {key: {} for key in history.shard_hashes}
+    history.dirty = set(history.shard_hashes)
+    for path in sorted(Path(summary_dir).glob("????-??-??.json")):
+        summary = read_summary(path)
+        if summary and summary.get('top_stocks'):
+            history.add(path.stem, summary['top_stocks'])
+    return history
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the per-ticker summary history index")
+    parser.add_argument("--summary-dir", type=Path, default=SUMMARY_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild from every summary/<date>.json")
+    parser.add_argument("--ticker", help="Print a ticker's analysis history instead")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.ticker:
+        for entry in SummaryHistory.load(args.summary_dir / "history").ticker(args.ticker.upper()):
+            print(f"{entry['date']}\t{entry['description'][:80]}")
+        print(f"Read in {(time.perf_counter() - started) * 1000:.1f}ms", file=sys.stderr)
+        return
+
+    if not args.rebuild:
+        parser.error("nothing to do: pass --rebuild or --ticker (save_summaries updates the index)")
+    history = rebuild_history(args.summary_dir)
+    written = history.save()
+    tickers = sum(len(history.shard(key)) for key in history.shard_hashes)
+    print(f"Indexed {len(history.dates)} date(s), {tickers} tickers; wrote {len(written)} file(s) "
+          f"in {(time.perf_counter() - started) * 1000:.0f}ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
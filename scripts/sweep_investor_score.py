@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Investor Score Parameter Sweep
+Evaluates threshold/weight combinations for the Investor_Score rules against
+the stored snapshot history, scoring each by forward-return metrics. The
+history panels are placed in shared memory once and read by a process pool;
+results stream to a JSONL file so an interrupted sweep resumes where it
+stopped. The file's first line records the settings the results depend on
+(top N and a digest of the panels), and a resume with other settings or
+data is refused rather than mixing results.
+
+Usage: python scripts/sweep_investor_score.py [--out investor_score_sweep.jsonl] [--workers 4]
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtest import forward_returns, select_portfolio
+from investor_score import DEFAULT_RULES, score_buckets
+from price_adjustments import adjust_history
+from snapshot_history import DATA_DIR, build_panel, load_history
+
+METRICS = list(DEFAULT_RULES)
+
+# Candidate cut sets per metric; the first entry is the rule fin.py uses today
+CUT_CHOICES = {
+    'PEG': [(0.0, 1.0, 2.0), (0.0, 0.75, 1.5), (0.0, 1.25, 2.5)],
+    'ROE': [(0.0, 0.1, 0.2), (0.0, 0.15, 0.3), (0.05, 0.1, 0.15)],
+    'Profit M': [(0.0, 0.1, 0.2), (0.0, 0.05, 0.15), (0.0, 0.15, 0.3)],
+    'EPS Next 5Y': [(0.1, 0.2, 0.3), (0.05, 0.15, 0.25), (0.15, 0.25, 0.35)],
+}
+
+# Multipliers applied to each metric's current points
+WEIGHT_CHOICES = [1.0, 0.5, 1.5]
+
+# Worker-side state, populated by attach_shared_panels
+_shared: Dict[str, object] = {}
+
+
+def parameter_grid() -> List[Tuple]:
+    """Every (cut index, weight index) pair per metric, in a stable order"""
+    per_metric = [
+        list(itertools.product(range(len(CUT_CHOICES[m])), range(len(WEIGHT_CHOICES))))
+        for m in METRICS
+    ]
+    return list(itertools.product(*per_metric))
+
+
+def describe(combo: Tuple) -> Dict[str, Dict]:
+    """Human-readable rules for a grid entry"""
+    rules = {}
+    for metric, (cut_idx, weight_idx) in zip(METRICS, combo):
+        weight = WEIGHT_CHOICES[weight_idx]
+        rules[metric] = {
+            'cuts': list(CUT_CHOICES[metric][cut_idx]),
+            'points': [p * weight for p in DEFAULT_RULES[metric]['points']],
+        }
+    return rules
+
+
+def share_panels(panels: Dict[str, np.ndarray]) -> Tuple[List[shared_memory.SharedMemory], Dict]:
+    """Copy panels into named shared memory blocks; return blocks and a picklable spec"""
+    blocks, spec = [], {}
+    for name, array in panels.items():
+        array = np.ascontiguousarray(array, dtype=np.float64)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        spec[name] = (block.name, array.shape)
+    return blocks, spec
+
+
+def attach_shared_panels(spec: Dict, top_n: int) -> None:
+    """Pool initializer: map the shared panels and precompute per-cut buckets"""
+    blocks, panels = [], {}
+    for name, (block_name, shape) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        panels[name] = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+
+    _shared.update(panels)
+    _shared['blocks'] = blocks  # keep mappings alive for the worker's lifetime
+    _shared['top_n'] = top_n
+    _shared['buckets'] = {
+        metric: [
+            score_buckets(panels[metric], cuts, DEFAULT_RULES[metric].get('lower_is_better', False))
+            for cuts in CUT_CHOICES[metric]
+        ]
+        for metric in METRICS
+    }
+    _shared['fwd_ranks'] = pd.DataFrame(panels['fwd']).rank(axis=1).to_numpy()
+    in_screen = ~np.isnan(panels['scores']) & ~np.isnan(panels['fwd'])
+    counts = in_screen.sum(axis=1)
+    _shared['screen_return'] = np.divide(np.where(in_screen, panels['fwd'], 0).sum(axis=1), counts,
+                                         out=np.zeros(len(counts)), where=counts > 0)
+
+
+def rank_correlation(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise Pearson correlation of two rank panels over cells present in both"""
+    both = ~np.isnan(a) & ~np.isnan(b)
+    n = both.sum(axis=1, keepdims=True)
+    safe_n = np.maximum(n, 1)
+    da = np.where(both, a - np.where(both, a, 0).sum(axis=1, keepdims=True) / safe_n, 0)
+    db = np.where(both, b - np.where(both, b, 0).sum(axis=1, keepdims=True) / safe_n, 0)
+    denom = np.sqrt((da ** 2).sum(axis=1) * (db ** 2).sum(axis=1))
+    return np.divide((da * db).sum(axis=1), denom, out=np.full(len(denom), np.nan),
+                     where=(denom > 0) & (n[:, 0] > 2))
+
+
+def evaluate(combo: Tuple) -> Dict:
+    """Score the whole history with one rule set and measure what it would have picked"""
+    fwd = _shared['fwd']
+    valid = ~np.isnan(_shared['scores'])
+
+    score = np.zeros(fwd.shape)
+    for metric, (cut_idx, weight_idx) in zip(METRICS, combo):
+        points = np.asarray(DEFAULT_RULES[metric]['points'], dtype=float) * WEIGHT_CHOICES[weight_idx]
+        score += points[_shared['buckets'][metric][cut_idx]]
+    score[~valid] = np.nan
+
+    # Periods with a realized forward return (all but the last snapshot)
+    periods = slice(0, fwd.shape[0] - 1)
+    weights = select_portfolio(score, _shared['ranks'], top_n=_shared['top_n'])[periods]
+    realized = np.nan_to_num(fwd[periods], nan=0.0)
+    picks = (weights * realized).sum(axis=1)
+    excess = picks - _shared['screen_return'][periods]
+
+    # Spearman IC per date between the score and the forward return
+    score_ranks = pd.DataFrame(np.where(np.isnan(fwd), np.nan, score)).rank(axis=1).to_numpy()[periods]
+    ic = rank_correlation(score_ranks, _shared['fwd_ranks'][periods])
+
+    return {
+        'mean_return': float(picks.mean()),
+        'mean_excess': float(excess.mean()),
+        'hit_rate': float((excess > 0).mean()),
+        'total_return': float(np.prod(1 + picks) - 1),
+        'mean_ic': float(np.nanmean(ic)) if np.isfinite(ic).any() else None,
+    }
+
+
+def evaluate_chunk(chunk: List[Tuple[int, Tuple]]) -> List[Dict]:
+    """Evaluate a batch of (combo id, combo) pairs inside a worker"""
+    return [{'id': combo_id, 'combo': list(map(list, combo)), **evaluate(combo)} for combo_id, combo in chunk]
+
+
+def drop_torn_tail(path: Path) -> None:
+    """Cut a partially written last line left behind by an interrupted run"""
+    if not path.exists():
+        return
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def sweep_settings(panels: Dict[str, np.ndarray], top_n: int) -> Dict:
+    """What every result depends on besides its combo: top N and the panel data"""
+    digest = hashlib.sha256()
+    for name in sorted(panels):
+        digest.update(name.encode('utf-8'))
+        digest.update(np.ascontiguousarray(panels[name], dtype=np.float64).tobytes())
+    return {'top_n': top_n, 'shape': list(panels['fwd'].shape), 'panels': digest.hexdigest()[:16]}
+
+
+def read_settings(path: Path) -> Optional[Dict]:
+    """Settings header of a results file, None when it has none"""
+    if not path.exists():
+        return None
+    with open(path, encoding='utf-8') as f:
+        try:
+            return json.loads(f.readline()).get('settings')
+        except json.JSONDecodeError:
+            return None
+
+
+def check_settings(path: Path, settings: Dict) -> None:
+    """Start a results file with its settings header, or check an existing one matches"""
+    if not path.exists() or path.stat().st_size == 0:
+        path.write_text(json.dumps({'settings': settings}) + "\n", encoding='utf-8')
+        return
+    existing = read_settings(path)
+    if existing != settings:
+        changed = sorted(k for k in settings if (existing or {}).get(k) != settings[k])
+        raise ValueError(f"{path} holds results for other settings ({', '.join(changed)} differ); "
+                         f"use another --out or remove it")
+
+
+def completed_ids(path: Path) -> set:
+    """Combo ids already present in a results file (a torn last line is ignored)"""
+    done = set()
+    if path.exists():
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)['id'])
+                except (json.JSONDecodeError, KeyError):
+                    continue
+    return done
+
+
+def chunked(items: List, size: int) -> Iterator[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def load_sweep_panels(data_dir=DATA_DIR) -> Dict[str, np.ndarray]:
+    """Metric, score, rank and forward-return panels aligned on dates x tickers (split-adjusted prices)"""
+    history = adjust_history(load_history(data_dir, columns=['Price', 'Investor_Score', *METRICS]), data_dir)
+    history['Rank'] = history.groupby('Date').cumcount()
+    prices = build_panel(history, 'Price')
+    align = dict(dates=list(prices.index), tickers=list(prices.columns))
+    panels = {metric: build_panel(history, metric, **align).to_numpy() for metric in METRICS}
+    panels['scores'] = build_panel(history, 'Investor_Score', **align).to_numpy()
+    panels['ranks'] = build_panel(history, 'Rank', **align).to_numpy()
+    panels['fwd'] = forward_returns(prices.to_numpy())
+    return panels
+
+
+def run_sweep(panels: Dict[str, np.ndarray], out_path: Path, workers: int = None,
+              top_n: int = 5, chunk_size: int = 64, limit: int = None) -> int:
+    """Evaluate every pending combo, appending results to out_path; return how many ran.
+
+    Raises ValueError when out_path holds results computed under other settings.
+    """
+    grid = parameter_grid()[:limit] if limit else parameter_grid()
+    drop_torn_tail(out_path)
+    check_settings(out_path, sweep_settings(panels, top_n))
+    done = completed_ids(out_path)
+    pending = [(i, combo) for i, combo in enumerate(grid) if i not in done]
+    if done:
+        print(f"Resuming: {len(done)} of {len(grid)} combos already evaluated", file=sys.stderr)
+    if not pending:
+        return 0
+
+    blocks, spec = share_panels(panels)
+    evaluated = 0
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach_shared_panels,
+                                 initargs=(spec, top_n)) as pool, \
+                open(out_path, 'a', encoding='utf-8') as out:
+            futures = {pool.submit(evaluate_chunk, chunk) for chunk in chunked(pending, chunk_size)}
+            try:
+                while futures:
+                    finished, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        for result in future.result():
+                            out.write(json.dumps(result) + "\n")
+                        evaluated += len(future.result())
+                    out.flush()
+                    print(f"\r{len(done) + evaluated}/{len(grid)} combos "
+                          f"({evaluated / (time.perf_counter() - started):.0f}/s)", end='', file=sys.stderr)
+            except KeyboardInterrupt:
+                for future in futures:
+                    future.cancel()
+                print(f"\nInterrupted; {evaluated} new results saved to {out_path}", file=sys.stderr)
+                raise
+        print(file=sys.stderr)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return evaluated
+
+
+def best_results(out_path: Path, key: str = 'mean_excess', n: int = 10) -> List[Dict]:
+    """Top n results by key, plus the current rule set (combo id 0) for reference"""
+    with open(out_path, encoding='utf-8') as f:
+        results = [r for r in (json.loads(line) for line in f if line.strip()) if 'id' in r]
+    ranked = sorted(results, key=lambda r: r[key] if r[key] is not None else float('-inf'), reverse=True)
+    return ranked[:n] + [r for r in results if r['id'] == 0 and r not in ranked[:n]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep Investor_Score thresholds and weights")
+    parser.add_argument("--out", type=Path, default=Path("investor_score_sweep.jsonl"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--limit", type=int, help="Only evaluate the first N combos")
+    parser.add_argument("--rank-by", default="mean_excess",
+                        choices=['mean_excess', 'mean_return', 'hit_rate', 'total_return', 'mean_ic'])
+    args = parser.parse_args()
+
+    panels = load_sweep_panels()
+    try:
+        run_sweep(panels, args.out, workers=args.workers, top_n=args.top_n, limit=args.limit)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"{'id':>6} {'excess':>9} {'return':>9} {'hit':>6} {'IC':>7}  rules")
+    for result in best_results(args.out, key=args.rank_by):
+        marker = " (current)" if result['id'] == 0 else ""
+        ic = f"{result['mean_ic']:.3f}" if result['mean_ic'] is not None else "n/a"
+        rules = "; ".join(
+            f"{m} cuts={r['cuts']} pts={r['points'][1:]}" for m, r in describe(tuple(map(tuple, result['combo']))).items()
+        )
+        print(f"{result['id']:>6} {result['mean_excess']:>9.4%} {result['mean_return']:>9.4%} "
+              f"{result['hit_rate']:>6.1%} {ic:>7}  {rules}{marker}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from alert_rules import CompiledRules, fire_alerts
+
+nan = np.nan
+
+
+def snapshot(rows):
+    return pd.DataFrame(rows, columns=['Ticker', 'Company', 'Industry', 'Sector', 'PEG', 'RSI', 'Investor_Score'])
+
+
+YESTERDAY = snapshot([
+    ['NVDA', 'NVIDIA', 'Semiconductors', 'Technology', 1.2, 72.0, 90],
+    ['MU', 'Micron', 'Semiconductors', 'Technology', 0.8, 65.0, 80],
+])
+TODAY = snapshot([
+    ['NVDA', 'NVIDIA', 'Semiconductors', 'Technology', 0.9, 75.0, 90],
+    ['MU', 'Micron', 'Semiconductors', 'Technology', 0.7, 71.0, 80],
+    ['KGC', 'Kinross', 'Gold', 'Basic Materials', nan, 50.0, 100],
+])
+
+
+class TestAlertRules:
+    """Tests for the compiled alert rule engine."""
+
+    def test_threshold_groups_match_direct_comparison(self):
+        rng = np.random.default_rng(2)
+        values = np.append(rng.uniform(0, 3, 40), [nan, 1.0])
+        thresholds = np.round(rng.uniform(0, 3, 25), 1).tolist() + [1.0]
+        frame = pd.DataFrame({'Ticker': [f"T{i}" for i in range(len(values))], 'PEG': values})
+        for op, compare in [('<', np.less), ('<=', np.less_equal), ('>', np.greater),
+                            ('>=', np.greater_equal), ('==', np.equal)]:
+            rules = CompiledRules([{'id': f"r{i}", 'when': [['PEG', op, t]]} for i, t in enumerate(thresholds)])
+            with np.errstate(invalid='ignore'):
+                expected = compare(values[:, None], np.array(thresholds)[None, :])
+            np.testing.assert_array_equal(rules.evaluate(frame), expected, err_msg=op)
+
+    def test_edge_trigger_only_fires_on_crossing(self):
+        rules = CompiledRules([
+            {'id': 'cheap', 'ticker': 'nvda', 'when': [['PEG', '<', 1]]},
+            {'id': 'hot', 'industry': 'Semiconductors', 'when': [['RSI', '>', 70]]},
+            {'id': 'hot-level', 'industry': 'Semiconductors', 'when': [['RSI', '>', 70]], 'trigger': 'level'},
+        ])
+        fired = {(a['rule'], a['ticker']) for a in fire_alerts(rules, TODAY, YESTERDAY)}
+        # NVDA was already above 70 yesterday, so only MU crosses for the edge rule
+        assert fired == {('cheap', 'NVDA'), ('hot', 'MU'), ('hot-level', 'NVDA'), ('hot-level', 'MU')}
+
+    def test_new_entrant_and_compound_rules(self):
+        rules = CompiledRules([
+            {'id': 'new-100', 'new_entrant': True, 'when': [['Investor_Score', '>=', 100]]},
+            {'id': 'new-any', 'new_entrant': True},
+            {'id': 'both', 'sector': 'Technology', 'when': [['PEG', '<', 1], ['RSI', '>', 70]]},
+        ])
+        alerts = fire_alerts(rules, TODAY, YESTERDAY)
+        assert [(a['rule'], a['ticker']) for a in alerts] == [
+            ('new-100', 'KGC'), ('new-any', 'KGC'), ('both', 'NVDA'), ('both', 'MU'),
+        ]
+        assert alerts[-1]['values'] == {'PEG': 0.7, 'RSI': 71.0}
+
+    def test_sector_and_industry_lists(self):
+        rules = CompiledRules([
+            {'id': 'either', 'sector': ['Technology', 'Basic Materials'], 'trigger': 'level',
+             'when': [['RSI', '>=', 50]]},
+            {'id': 'gold', 'industry': ['Gold'], 'trigger': 'level', 'when': [['RSI', '>=', 50]]},
+        ])
+        alerts = fire_alerts(rules, TODAY, YESTERDAY)
+        assert [(a['rule'], a['ticker']) for a in alerts] == [
+            ('either', 'NVDA'), ('either', 'MU'), ('either', 'KGC'), ('gold', 'KGC'),
+        ]
+        with pytest.raises(ValueError, match='sector'):
+            CompiledRules([{'id': 'bad', 'sector': 7, 'when': [['PEG', '<', 1]]}])
+
+    def test_first_snapshot_fires_everything_that_holds(self):
+        rules = CompiledRules([{'id': 'hot', 'when': [['RSI', '>', 70]]}])
+        assert len(fire_alerts(rules, TODAY)) == 2
+
+    def test_invalid_rules_are_rejected(self):
+        with pytest.raises(ValueError, match='op'):
+            CompiledRules([{'id': 'bad', 'when': [['PEG', '=>', 1]]}])
+        with pytest.raises(ValueError, match='number'):
+            CompiledRules([{'id': 'bad', 'when': [['PEG', '<', 'one']]}])
+        with pytest.raises(ValueError, match='condition'):
+            CompiledRules([{'id': 'empty'}])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,59 @@
+import pytest
+import json
+import sys
+from datetime import date
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from analysis_cache import AnalysisCache, metrics_hash
+
+ANALYSIS = {'description': 'd', 'latest_news': 'n', 'why_selected': 'w'}
+
+
+class TestAnalysisCache:
+    """Tests for the content-addressed reviewer analysis cache."""
+
+    def test_metrics_hash_is_order_independent(self):
+        assert metrics_hash({'pe': '10', 'peg': '1'}) == metrics_hash({'peg': '1', 'pe': '10'})
+        assert metrics_hash({'pe': '10'}) != metrics_hash({'pe': '11'})
+
+    def test_exact_and_latest_lookups(self, tmp_path):
+        cache = AnalysisCache(tmp_path / 'c.json')
+        cache.put('AAA', '2025-06-10', 'm', 'h1', ANALYSIS)
+        cache.put('AAA', '2025-06-11', 'm', 'h2', dict(ANALYSIS, description='newer'))
+
+        assert cache.get('AAA', '2025-06-10', 'm', 'h1') == ANALYSIS
+        assert cache.get('AAA', '2025-06-10', 'other-model', 'h1') is None
+        assert cache.get('AAA', '2025-06-11', 'm', 'h1') is None
+        assert cache.latest('AAA', '2025-06-12')['description'] == 'newer'
+        assert cache.latest('AAA', '2025-06-10') == ANALYSIS
+        assert cache.latest('AAA', '2025-06-09') is None
+
+    def test_save_roundtrip_and_prune(self, tmp_path):
+        path = tmp_path / 'cache' / 'c.json'
+        cache = AnalysisCache(path)
+        assert not cache.save()          # nothing to write
+        for day in range(1, 6):
+            cache.put('AAA', f'2025-06-0{day}', 'm', 'h', ANALYSIS)
+        assert cache.save()
+        assert not path.with_suffix('.json.tmp').exists()
+
+        loaded = AnalysisCache.load(path)
+        assert len(loaded.entries) == 5
+        assert loaded.prune(keep_days=2) == 0          # all written today, whatever their dates
+        for entry in loaded.entries.values():
+            entry['written'] = entry['date']
+        del entry['written']                           # from before write days were recorded
+        assert loaded.prune(keep_days=2, today=date(2025, 6, 5)) == 2
+        assert {e['date'] for e in loaded.entries.values()} == {'2025-06-03', '2025-06-04', '2025-06-05'}
+
+    def test_unreadable_or_old_version_starts_empty(self, tmp_path):
+        (tmp_path / 'bad.json').write_text('{not json')
+        (tmp_path / 'old.json').write_text(json.dumps({'version': 0, 'entries': {'k': {}}}))
+        assert AnalysisCache.load(tmp_path / 'bad.json').entries == {}
+        assert AnalysisCache.load(tmp_path / 'old.json').entries == {}
+        assert AnalysisCache.load(tmp_path / 'missing.json').entries == {}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(__file__))
+from analysis_cache import KEEP_DAYS  # noqa: E402
+from backfill_summaries import Backfill, load_checkpoint, missing_dates, pending_dates  # noqa: E402
+from openrouter_pr_review import OpenRouterPRReviewer, RequestBudget  # noqa: E402
+from test_openrouter_pr_review import StubEndpointTestCase  # noqa: E402
+
+
+def write_snapshot(data_dir: Path, date: str, tickers):
+    columns = {column: ['1'] * len(tickers) for column in OpenRouterPRReviewer.REQUIRED_COLUMNS}
+    columns.update(Ticker=tickers, Company=[f"{t} Corp" for t in tickers])
+    pd.DataFrame(columns).to_csv(data_dir / f"{date}.csv", sep='\t', index=False)
+
+
+class TestBackfill(StubEndpointTestCase):
+    """Backfill of missing summaries against the stub endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        self.data_dir = Path(self.tmp.name) / 'data'
+        (self.data_dir / 'summary').mkdir(parents=True)
+        for day, tickers in [('2025-06-10', ['AAA', 'BBB']), ('2025-06-11', ['BBB', 'CCC']),
+                             ('2025-06-12', ['AAA', 'CCC'])]:
+            write_snapshot(self.data_dir, day, tickers)
+        (self.data_dir / 'summary' / '2025-06-11.json').write_text('{}')
+        self.reviewer.data_dir = self.data_dir
+        self.checkpoint = self.data_dir / 'summary' / 'cache' / 'backfill.json'
+
+    def backfill(self, dates, budget=None):
+        backfill = Backfill(self.reviewer, self.checkpoint)
+        return asyncio.run(backfill.run(dates, budget))
+
+    def test_lists_missing_dates_oldest_first(self):
+        assert missing_dates(self.data_dir) == ['2025-06-10', '2025-06-12']
+
+    def test_writes_summaries_and_checkpoint(self):
+        outcomes = self.backfill(missing_dates(self.data_dir))
+
+        assert outcomes == {'2025-06-10': True, '2025-06-12': True}
+        summary = json.loads((self.data_dir / 'summary' / '2025-06-10.json').read_text())
+        assert [s['ticker'] for s in summary['top_stocks']] == ['AAA', 'BBB']
+        assert summary['top_stocks'][0]['description'] == 'AAA desc'
+        assert not (self.data_dir / 'summary' / 'latest.json').exists()
+        manifest = json.loads((self.data_dir / 'summary' / 'history' / 'manifest.json').read_text())
+        assert manifest['dates'] == {'2025-06-10': ['AAA', 'BBB'], '2025-06-12': ['AAA', 'CCC']}
+        assert not list((self.data_dir / 'summary').glob('*.tmp'))
+        assert {d: c['status'] for d, c in load_checkpoint(self.checkpoint).items()} == {
+            '2025-06-10': 'done', '2025-06-12': 'done'}
+        assert missing_dates(self.data_dir) == []
+
+    def test_incomplete_date_resumes_with_missing_tickers_only(self):
+        self.server.drop = {'BBB'}
+        self.reviewer.MAX_TICKER_ATTEMPTS = 1
+
+        assert self.backfill(['2025-06-10']) == {'2025-06-10': False}
+        assert not (self.data_dir / 'summary' / '2025-06-10.json').exists()
+        entry = load_checkpoint(self.checkpoint)['2025-06-10']
+        assert entry['status'] == 'incomplete' and entry['attempts'] == 1 and entry['missing'] == ['BBB']
+
+        self.server.requests.clear()
+        self.server.drop = set()
+        resumed = self.make_reviewer()      # new process: analysis cache read back from disk
+        resumed.data_dir = self.data_dir
+        assert asyncio.run(Backfill(resumed, self.checkpoint).run(['2025-06-10'])) == {'2025-06-10': True}
+        assert self.server.requests == [['BBB']]
+        assert load_checkpoint(self.checkpoint)['2025-06-10']['status'] == 'done'
+
+    def test_resume_keeps_backfilled_analyses_in_a_full_cache(self):
+        # Daily runs have already filled the cache with KEEP_DAYS newer snapshot dates
+        for day in range(KEEP_DAYS):
+            self.reviewer.cache.put('ZZZ', f'2025-07-{day + 1:02d}', 'm', 'h', {'description': 'z'})
+        self.reviewer.cache.save()
+        self.server.drop = {'BBB'}
+        self.reviewer.MAX_TICKER_ATTEMPTS = 1
+        assert self.backfill(['2025-06-10']) == {'2025-06-10': False}
+
+        self.server.requests.clear()
+        self.server.drop = set()
+        resumed = self.make_reviewer()
+        resumed.data_dir = self.data_dir
+        assert asyncio.run(Backfill(resumed, self.checkpoint).run(['2025-06-10'])) == {'2025-06-10': True}
+        assert self.server.requests == [['BBB']]
+
+    def test_gives_up_after_max_attempts(self):
+        checkpoint = {'2025-06-10': {'status': 'failed', 'attempts': 3}}
+        assert pending_dates(self.data_dir, checkpoint) == ['2025-06-12']
+        assert pending_dates(self.data_dir, checkpoint, retry_failed=True) == ['2025-06-10', '2025-06-12']
+
+    def test_budget_limits_rate_and_concurrency_across_dates(self):
+        self.server.delay = 0.05
+        self.reviewer.INITIAL_BATCH_SIZE = 1
+
+        async def run():
+            return await Backfill(self.reviewer, self.checkpoint, jobs=2).run(
+                missing_dates(self.data_dir), RequestBudget(concurrency=1, per_minute=600))
+
+        started = time.monotonic()
+        assert all(asyncio.run(run()).values())
+        assert len(self.server.requests) == 4
+        assert self.server.peak == 1
+        assert time.monotonic() - started >= 0.3      # 0.1s between request starts
+
+    def test_runs_without_pr_context(self):
+        env = {"OPENROUTER_API_KEY": "k", "GITHUB_TOKEN": "", "PR_NUMBER": "", "GITHUB_REPOSITORY": "",
+               "ANALYSIS_CACHE": os.path.join(self.tmp.name, "cache.json")}
+        with patch.dict(os.environ, env):
+            assert OpenRouterPRReviewer(require_pr=False).openrouter_api_key == "k"
+            with self.assertRaises(SystemExit):
+                OpenRouterPRReviewer()
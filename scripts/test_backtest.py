@@ -0,0 +1,83 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from backtest import (
+    forward_returns, hold_between_rebalances, max_drawdown, run_backtest, select_portfolio, turnover,
+)
+
+nan = np.nan
+
+
+class TestBacktestEngine:
+    """Tests for the vectorized backtest building blocks."""
+
+    def test_forward_returns_need_both_prices(self):
+        prices = np.array([[100.0, 10.0], [110.0, nan], [121.0, 12.0]])
+        fwd = forward_returns(prices)
+        assert fwd[0, 0] == pytest.approx(0.10)
+        assert np.isnan(fwd[0, 1]) and np.isnan(fwd[1, 1])
+        assert np.isnan(fwd[2]).all()
+
+    def test_top_n_uses_published_rank_for_ties(self):
+        scores = np.array([[100.0, 100.0, 90.0, nan]])
+        ranks = np.array([[1.0, 0.0, 2.0, nan]])
+        weights = select_portfolio(scores, ranks, top_n=1)
+        assert weights.tolist() == [[0.0, 1.0, 0.0, 0.0]]
+
+    def test_threshold_and_empty_days(self):
+        scores = np.array([[100.0, 80.0, 95.0], [50.0, nan, 60.0]])
+        weights = select_portfolio(scores, min_score=90)
+        assert weights[0].tolist() == [0.5, 0.0, 0.5]
+        assert weights[1].tolist() == [0.0, 0.0, 0.0]
+
+    def test_weights_drift_between_rebalances(self):
+        targets = np.array([[0.5, 0.5], [0.0, 1.0], [0.0, 1.0]])
+        fwd = np.array([[1.0, 0.0], [0.0, 0.0], [nan, nan]])
+        weights = hold_between_rebalances(targets, fwd, every=2)
+        # Day 1 keeps day 0's names; the winner doubled so it is now 2/3
+        assert weights[1] == pytest.approx([2 / 3, 1 / 3])
+        # Day 2 is a rebalance date
+        assert weights[2] == pytest.approx([0.0, 1.0])
+
+    def test_turnover_counts_one_way_trades(self):
+        weights = np.array([[1.0, 0.0], [0.0, 1.0]])
+        fwd = np.zeros((2, 2))
+        # Entering from cash is a full turn, as is switching names
+        assert turnover(weights, fwd).tolist() == [1.0, 1.0]
+
+    def test_max_drawdown(self):
+        assert max_drawdown(np.array([1.0, 1.2, 0.9, 1.3])) == pytest.approx(-0.25)
+
+    def test_run_backtest_beats_screen_when_top_name_wins(self):
+        dates = ['2026-01-02', '2026-01-05', '2026-01-06']
+        prices = pd.DataFrame({'A': [100.0, 110.0, 121.0], 'B': [50.0, 50.0, 50.0]}, index=dates)
+        scores = pd.DataFrame({'A': [100.0, 100.0, 100.0], 'B': [60.0, 60.0, 60.0]}, index=dates)
+
+        result = run_backtest(prices, scores, top_n=1)
+
+        assert result['periods'] == 2
+        assert result['strategy']['total_return'] == pytest.approx(0.21)
+        assert result['benchmark']['total_return'] == pytest.approx(1.05 * 1.05 - 1)
+        assert result['hit_rate_vs_benchmark'] == 1.0
+        assert result['hit_rate_picks'] == 1.0
+        assert result['strategy']['max_drawdown'] == 0.0
+
+    def test_costs_reduce_returns(self):
+        dates = ['2026-01-02', '2026-01-05', '2026-01-06']
+        prices = pd.DataFrame({'A': [100.0, 100.0, 100.0], 'B': [100.0, 100.0, 100.0]}, index=dates)
+        scores = pd.DataFrame({'A': [100.0, 50.0, 100.0], 'B': [50.0, 100.0, 50.0]}, index=dates)
+
+        free = run_backtest(prices, scores, top_n=1)
+        costly = run_backtest(prices, scores, top_n=1, cost_bps=100)
+
+        assert free['strategy']['total_return'] == 0.0
+        assert costly['strategy']['total_return'] < 0.0
+        assert costly['avg_turnover'] == pytest.approx(1.0)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
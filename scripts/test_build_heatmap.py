@@ -0,0 +1,82 @@
+import pytest
+import json
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from build_heatmap import LAYOUT_HEIGHT, LAYOUT_WIDTH, build_all, group_aggregates, squarify, stale_dates
+
+nan = np.nan
+
+
+def write_snapshot(data_dir, date, rows):
+    """Write a minimal tab-separated snapshot the way fin.py does."""
+    pd.DataFrame(rows).to_csv(data_dir / f"{date}.csv", sep='\t', index=False)
+
+
+class TestBuildHeatmap:
+    """Tests for the precomputed heatmap stage."""
+
+    def test_squarify_fills_rect_with_proportional_areas(self):
+        values = [6, 6, 4, 3, 2, 2, 1]
+        rects = squarify(values, 0, 0, 6, 4)
+        areas = rects[:, 2] * rects[:, 3]
+        np.testing.assert_allclose(areas, values)
+        assert (rects[:, 0] >= 0).all() and (rects[:, 0] + rects[:, 2] <= 6 + 1e-9).all()
+        assert (rects[:, 1] >= 0).all() and (rects[:, 1] + rects[:, 3] <= 4 + 1e-9).all()
+        # Bruls et al.'s example: the first row holds the two 6s side by side
+        np.testing.assert_allclose(rects[0], [0, 0, 3, 2])
+        np.testing.assert_allclose(rects[1], [0, 2, 3, 2])
+
+    def test_squarify_skips_missing_caps(self):
+        rects = squarify([5.0, 0.0], 10, 20, 4, 4)
+        np.testing.assert_allclose(rects, [[10, 20, 4, 4], [10, 20, 0, 0]])
+
+    def test_group_aggregates_weight_change_by_cap(self):
+        history = pd.DataFrame({
+            'Date': ['d1'] * 3,
+            'Ticker': ['A', 'B', 'C'],
+            'Sector': ['Tech', 'Tech', nan],
+            'Market Cap': [3e9, 1e9, 2e9],
+            'Change': [0.01, 0.05, nan],
+            'Investor_Score': [90, 70, 50],
+        })
+        agg = group_aggregates(history, 'Sector').set_index('name')
+        assert agg.loc['Tech', 'count'] == 2
+        assert agg.loc['Tech', 'change'] == pytest.approx(0.02)
+        assert agg.loc['Tech', 'mean_score'] == 80
+        assert np.isnan(agg.loc['Other', 'change'])
+
+    def test_build_all_writes_layout_per_date(self, tmp_path):
+        rows = [
+            {'Ticker': 'A', 'Company': 'A Inc', 'Sector': 'Tech', 'Industry': 'Chips',
+             'Market Cap': 3e9, 'Change': 0.01, 'Investor_Score': 90},
+            {'Ticker': 'B', 'Company': 'B Inc', 'Sector': 'Tech', 'Industry': 'Software',
+             'Market Cap': 1e9, 'Change': -0.02, 'Investor_Score': 70},
+            {'Ticker': 'C', 'Company': 'C Inc', 'Sector': 'Energy', 'Industry': 'Oil',
+             'Market Cap': 4e9, 'Change': 0.03, 'Investor_Score': 60},
+        ]
+        write_snapshot(tmp_path, '2026-01-02', rows)
+        out_dir = tmp_path / 'heatmap'
+
+        assert build_all(['2026-01-02'], tmp_path, out_dir) == 1
+        doc = json.loads((out_dir / '2026-01-02.json').read_text())
+
+        assert [g['name'] for g in doc['sector']['groups']] == ['Energy', 'Tech']
+        assert doc['sector']['groups'][1]['count'] == 2
+        assert set(doc['industry']['tiles']) == {'A', 'B', 'C'}
+        area = sum(w * h for _, _, w, h in doc['sector']['tiles'].values())
+        assert area == pytest.approx(LAYOUT_WIDTH * LAYOUT_HEIGHT, rel=1e-4)
+        # Tech's tiles sit inside Tech's rect
+        gx, gy, gw, gh = doc['sector']['groups'][1]['rect']
+        for ticker in ('A', 'B'):
+            x, y, w, h = doc['sector']['tiles'][ticker]
+            assert gx - 0.01 <= x and x + w <= gx + gw + 0.01
+            assert gy - 0.01 <= y and y + h <= gy + gh + 0.01
+        assert stale_dates(['2026-01-02'], tmp_path, out_dir) == []
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,101 @@
+import pytest
+import pandas as pd
+import subprocess
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from cli import main, output_stream, publish
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+
+
+def imported_modules(*argv):
+    """Modules loaded after running the CLI with argv in a fresh interpreter"""
+    code = ("import sys; sys.path.insert(0, {!r}); sys.argv = ['cli.py', *{!r}]; import cli\n"
+            "try:\n    cli.main()\nexcept SystemExit:\n    pass\n"
+            "print(' '.join(sys.modules))").format(SCRIPTS, list(argv))
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    return set(out.stdout.split())
+
+
+class TestLazyImports:
+    """--help and the calendar check must not pull in the heavy dependencies."""
+
+    @pytest.mark.parametrize('argv', [('--help',), ('calendar',), ('calendar', '2025-07-04')])
+    def test_no_heavy_imports(self, argv):
+        modules = imported_modules(*argv)
+        assert 'argparse' in modules
+        assert not {'pandas', 'numpy', 'requests', 'finvizfinance'} & modules
+
+
+class TestCalendarCommand:
+    def test_exit_codes(self, capsys):
+        assert main(['calendar', '2025-06-11']) == 0
+        assert main(['calendar', '2025-06-11', '2025-12-25']) == 1
+        out = capsys.readouterr().out
+        assert '2025-12-25\tclosed' in out
+
+    def test_outside_table(self):
+        assert main(['calendar', '2099-01-02']) == 2
+
+
+class TestScoreCommand:
+    def test_scores_raw_screen(self, tmp_path):
+        raw = pd.DataFrame({
+            'Ticker': ['AAA', 'BBB'],
+            'Company': ['A Corp', 'B Corp'],
+            'Sector': ['Tech', 'Tech'],
+            'Industry': ['Software', 'Software'],
+            'Market Cap': ['$900,000,000', '$100,000,000'],
+            'Price': [20.0, 30.0],
+            'Volume': [200000, 300000],
+            'SMA50': [0.1, 0.1], 'SMA200': [0.2, 0.2],
+            '52W Low': [0.5, 0.5], '52W High': [-0.1, -0.1],
+            'PEG': [0.5, 1.5], 'ROE': [0.25, 0.15], 'Profit M': [0.25, 0.15],
+            'EPS This Y': ['10%', '10%'], 'EPS Next Y': ['10%', '10%'], 'EPS Past 5Y': ['10%', '10%'],
+            'EPS Next 5Y': ['35%', '25%'], 'Sales Past 5Y': ['10%', '10%'], 'Change from Open': ['1%', '1%'],
+        })
+        raw.to_csv(tmp_path / 'raw.tsv', sep='\t', index=False)
+
+        assert main(['score', '--input', str(tmp_path / 'raw.tsv'), '--out', str(tmp_path / 'out.csv'),
+                     '--run-day', '2025-06-11']) == 0
+        scored = pd.read_csv(tmp_path / 'out.csv', sep='\t')
+        assert scored['Ticker'].tolist() == ['AAA']    # BBB is under $500m
+        assert scored['Investor_Score'].tolist() == [100]
+        assert scored['Run_Day'].tolist() == ['2025-06-11']
+
+    def test_stdout_stays_open(self):
+        with output_stream(None) as out:
+            assert out is sys.stdout
+        assert not sys.stdout.closed
+
+
+class TestPublish:
+    def write(self, path, tickers):
+        pd.DataFrame({'Ticker': tickers, 'Price': [10.0] * len(tickers)}).to_csv(path, sep='\t', index=False)
+
+    def test_updates_latest_and_dates(self, tmp_path):
+        self.write(tmp_path / '2025-06-11.csv', ['AAA', 'BBB'])
+        (tmp_path / 'dates.csv').write_text('2025-06-10\n')
+
+        assert publish('2025-06-11', tmp_path)
+        assert publish('2025-06-11', tmp_path)      # idempotent
+        assert (tmp_path / 'latest.csv').read_bytes() == (tmp_path / '2025-06-11.csv').read_bytes()
+        assert (tmp_path / 'dates.csv').read_text().split() == ['2025-06-10', '2025-06-11']
+
+    def test_missing_snapshot(self, tmp_path):
+        assert not publish('2025-06-11', tmp_path)
+        assert not (tmp_path / 'latest.csv').exists()
+
+    def test_blocked_by_validation(self, tmp_path):
+        self.write(tmp_path / '2025-06-10.csv', [f'T{i}' for i in range(20)])
+        self.write(tmp_path / '2025-06-11.csv', ['T0'])
+
+        assert not publish('2025-06-11', tmp_path)
+        assert not (tmp_path / 'latest.csv').exists()
+        assert publish('2025-06-11', tmp_path, validate=False)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,108 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from correlation_clusters import (
+    average_linkage_clusters, correlation_clusters, diversified_top, diversify_screen, pairwise_correlation,
+    prior_correlation, shrink_correlation,
+)
+
+nan = np.nan
+
+
+class TestCorrelation:
+    """Tests for the pairwise-complete correlation and its shrinkage."""
+
+    def test_matches_pandas_pairwise_complete(self):
+        rng = np.random.default_rng(0)
+        returns = rng.normal(size=(40, 6))
+        returns[:, 1] += returns[:, 0]
+        returns[rng.random(returns.shape) < 0.25] = nan
+        returns[:35, 5] = nan                     # only 5 days observed
+
+        corr, overlap = pairwise_correlation(returns, min_overlap=10)
+        expected = pd.DataFrame(returns).corr(min_periods=10).to_numpy()
+        off_diagonal = ~np.eye(6, dtype=bool)
+        np.testing.assert_allclose(corr[off_diagonal], expected[off_diagonal], atol=1e-10)
+        assert overlap[0, 0] == (~np.isnan(returns[:, 0])).sum()
+        assert np.isnan(corr[0, 5]) and corr[5, 5] == 1.0
+
+    def test_constant_series_has_no_correlation(self):
+        returns = np.array([[0.01, 0.0], [0.02, 0.0], [-0.01, 0.0]])
+        corr, _ = pairwise_correlation(returns)
+        assert np.isnan(corr[0, 1])
+
+    def test_prior_and_shrinkage(self):
+        prior = prior_correlation(['Tech', 'Tech', 'Tech', nan], ['Chips', 'Chips', 'Software', nan])
+        assert prior[0, 1] == 0.6 and prior[0, 2] == 0.3 and prior[0, 3] == 0.0
+        assert prior[3, 3] == 1.0
+
+        corr = np.array([[1.0, 0.0], [0.0, 1.0]])
+        overlap = np.array([[20.0, 20.0], [20.0, 20.0]])
+        blended = shrink_correlation(corr, overlap, np.array([[1.0, 0.6], [0.6, 1.0]]), prior_observations=20)
+        assert blended[0, 1] == pytest.approx(0.3)
+        unknown = shrink_correlation(np.array([[1.0, nan], [nan, 1.0]]), overlap, np.full((2, 2), 0.6))
+        assert unknown[0, 1] == pytest.approx(0.6)
+
+
+class TestClustering:
+    """Tests for average linkage and the diversified pick."""
+
+    def test_average_linkage_blocks(self):
+        distance = np.array([
+            [0.0, 0.1, 0.9, 0.9],
+            [0.1, 0.0, 0.9, 0.8],
+            [0.9, 0.9, 0.0, 0.2],
+            [0.9, 0.8, 0.2, 0.0],
+        ])
+        assert average_linkage_clusters(distance, 0.5).tolist() == [0, 0, 1, 1]
+        assert average_linkage_clusters(distance, 0.15).tolist() == [0, 0, 1, 2]
+        assert average_linkage_clusters(distance, 0.9).tolist() == [0, 0, 0, 0]
+
+    def test_average_not_single_linkage(self):
+        # 2 is close to 1 but far from 0: the average distance to {0, 1} is 0.55
+        distance = np.array([[0.0, 0.1, 1.0], [0.1, 0.0, 0.1], [1.0, 0.1, 0.0]])
+        assert average_linkage_clusters(distance, 0.5).tolist() == [0, 0, 1]
+
+    def test_diversified_top_caps_and_fills(self):
+        clusters = [0, 0, 1, 0, 2, 1]
+        assert diversified_top(list('abcdef'), clusters, 3) == [0, 2, 4]
+        assert diversified_top(list('abcdef'), clusters, 4, max_per_cluster=2) == [0, 1, 2, 4]
+        # Only three clusters: the best skipped name fills the fourth slot
+        assert diversified_top(list('abcdef'), clusters, 4) == [0, 1, 2, 4]
+
+    def test_comoving_prices_cluster(self):
+        rng = np.random.default_rng(2)
+        common = rng.normal(scale=0.02, size=(30, 1))
+        returns = np.hstack([common + rng.normal(scale=0.002, size=(30, 2)), rng.normal(scale=0.02, size=(30, 2))])
+        prices = 100 * np.vstack([np.ones((1, 4)), np.cumprod(1 + returns, axis=0)])
+        assert correlation_clusters(prices).tolist() == [0, 0, 1, 2]
+        # No shared history at all: same-industry names are grouped by the prior
+        assert correlation_clusters(np.full((5, 3), nan), industries=['Gold', 'Gold', 'Banks']).tolist() == [0, 0, 1]
+
+
+class TestDiversifyScreen:
+    def test_swaps_correlated_pick(self, tmp_path):
+        rng = np.random.default_rng(3)
+        dates = pd.bdate_range('2026-01-05', periods=25).strftime('%Y-%m-%d')
+        gold = np.cumprod(1 + rng.normal(scale=0.02, size=25))
+        walks = np.cumprod(1 + rng.normal(scale=0.02, size=(25, 2)), axis=0)
+        screen = pd.DataFrame({'Ticker': ['AAA', 'BBB', 'CCC', 'DDD'],
+                               'Sector': ['Basic Materials', 'Basic Materials', 'Technology', 'Healthcare'],
+                               'Investor_Score': [100, 95, 90, 85]})
+        for i, date in enumerate(dates):
+            prices = [gold[i] * 10, gold[i] * 20, walks[i, 0] * 30, walks[i, 1] * 40]
+            screen.assign(Price=prices).to_csv(tmp_path / f'{date}.csv', sep='\t', index=False)
+
+        top = diversify_screen(screen, 2, tmp_path, date=dates[-1])
+        assert top['Ticker'].tolist() == ['AAA', 'CCC']
+        assert top['Cluster'].nunique() == 2
+        # Before the history exists every name is its own cluster
+        assert diversify_screen(screen, 2, tmp_path, date='2025-12-31')['Ticker'].tolist() == ['AAA', 'BBB']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,103 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from earnings_study import (
+    event_positions, event_windows, find_events, format_report, parse_earnings_stamps, run_study, sector_paths,
+)
+
+nan = np.nan
+
+
+class TestEarningsStamps:
+    """Tests for dating the year-less finviz Earnings stamps."""
+
+    def test_year_is_closest_to_snapshot(self):
+        stamps = pd.Series(['Jan 05/b', 'Dec 20/a', 'Nov 04/a', 'Feb 29/b'])
+        as_of = pd.Series(['2025-12-20', '2026-01-03', '2025-10-30', '2024-03-01'])
+        parsed = parse_earnings_stamps(stamps, as_of)
+        assert parsed['earnings_date'].dt.strftime('%Y-%m-%d').tolist() == [
+            '2026-01-05', '2025-12-20', '2025-11-04', '2024-02-29']
+        assert parsed['timing'].tolist() == ['b', 'a', 'a', 'b']
+
+    def test_bad_stamps_give_nat(self):
+        parsed = parse_earnings_stamps(pd.Series(['-', None, 'Foo 12/a']), pd.Series(['2025-06-01'] * 3))
+        assert parsed['earnings_date'].isna().all()
+
+    def test_events_are_distinct_per_ticker_and_date(self):
+        history = pd.DataFrame({
+            'Date': ['2025-10-30', '2025-10-31', '2025-11-05', '2025-10-31'],
+            'Ticker': ['AAA', 'AAA', 'AAA', 'BBB'],
+            'Earnings': ['Nov 04/a', 'Nov 04/a', 'Feb 03/a', 'Oct 30/b'],
+            'Sector': ['Tech', 'Tech', 'Tech', nan],
+        })
+        events = find_events(history)
+        assert list(zip(events['Ticker'], events['earnings_date'].dt.strftime('%Y-%m-%d'))) == [
+            ('BBB', '2025-10-30'), ('AAA', '2025-11-04'), ('AAA', '2026-02-03')]
+        assert events['Sector'].tolist() == ['Unknown', 'Tech', 'Tech']
+
+
+class TestEventWindows:
+    """Tests for the event-day mapping and the vectorized window gather."""
+
+    def test_event_day_depends_on_timing(self):
+        dates = ['2025-11-03', '2025-11-04', '2025-11-05', '2025-11-14']
+        events = pd.DataFrame({
+            'earnings_date': pd.to_datetime(['2025-11-04', '2025-11-04', '2025-11-05', '2025-11-01', '2025-11-20']),
+            'timing': ['b', 'a', 'a', 'b', 'b'],
+        })
+        # Nov 05/a would first show on Nov 06, which is missing; the next snapshot is too late
+        assert event_positions(events, dates).tolist() == [1, 2, -1, -1, -1]
+
+    def test_windows_are_relative_to_the_prior_close(self):
+        values = np.array([[100.0, 10.0], [110.0, 11.0], [121.0, nan], [99.0, 12.0]])
+        windows = event_windows(values, rows=np.array([2, 1]), cols=np.array([0, 1]), pre=1, post=2)
+        assert windows[0, 0] == 0.0
+        assert windows[0, 1] == pytest.approx(0.10)
+        assert windows[0, 2] == pytest.approx(-0.10)
+        assert np.isnan(windows[0, 3])                 # past the end of the history
+        assert windows[1, :2].tolist() == [0.0, pytest.approx(0.1)]
+        assert np.isnan(windows[1, 2])                 # not in the screen that day
+
+        changes = event_windows(values, np.array([1]), np.array([0]), pre=1, post=0, kind='change')
+        assert changes.tolist() == [[0.0, 10.0]]
+
+    def test_sector_paths(self):
+        windows = np.array([[0.0, 0.1], [0.0, 0.3], [0.0, nan]])
+        paths = sector_paths(windows, ['Tech', 'Tech', 'Energy'], np.array([-1, 0])).set_index(['Sector', 'offset'])
+        assert paths.loc[('Tech', 0), 'mean'] == pytest.approx(0.2)
+        assert paths.loc[('Tech', 0), 'std'] == pytest.approx(np.std([0.1, 0.3], ddof=1))
+        assert paths.loc[('All', -1), 'count'] == 3
+        assert ('Energy', 0) not in paths.index
+
+
+class TestRunStudy:
+    def test_full_history(self):
+        dates = pd.bdate_range('2025-10-27', periods=10).strftime('%Y-%m-%d')
+        rows = []
+        for i, date in enumerate(dates):
+            rows.append([date, 'AAA', 'Nov 04/a', 'Tech', 100.0 * (1.1 if i >= 7 else 1.0), 80])
+            rows.append([date, 'BBB', 'Oct 30/b', 'Energy', 50.0 * (0.9 if i >= 3 else 1.0), 70 + 10 * (i >= 3)])
+        history = pd.DataFrame(rows, columns=['Date', 'Ticker', 'Earnings', 'Sector', 'Price', 'Investor_Score'])
+
+        result = run_study(history, pre=2, post=2)
+        events = result['events'].set_index('Ticker')
+        assert events['row'].to_dict() == {'AAA': 7, 'BBB': 3}
+
+        price = result['paths']['Price'].set_index(['Sector', 'offset'])
+        assert price.loc[('Tech', 0), 'mean'] == pytest.approx(0.10)
+        assert price.loc[('Energy', 0), 'mean'] == pytest.approx(-0.10)
+        assert price.loc[('All', 0), 'mean'] == pytest.approx(0.0)
+        score = result['paths']['Investor_Score'].set_index(['Sector', 'offset'])
+        assert score.loc[('Energy', 1), 'mean'] == 10
+
+        report = format_report(result)
+        assert report.startswith('2 earnings events, 2 tickers')
+        assert 'Energy' in report and '+10.00%' in report
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,102 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from factor_regression import (
+    batched_least_squares, cross_sectional_zscores, fama_macbeth, forward_returns, newey_west_se,
+    run_regression, suggest_rules,
+)
+from investor_score import DEFAULT_RULES
+
+nan = np.nan
+
+
+class TestFactorRegression:
+    """Tests for the batched Fama-MacBeth engine."""
+
+    def test_forward_returns_horizon(self):
+        prices = np.array([[100.0], [110.0], [121.0]])
+        assert forward_returns(prices, 2)[0, 0] == pytest.approx(0.21)
+        assert np.isnan(forward_returns(prices, 2)[1:]).all()
+
+    def test_zscores_ignore_missing_and_clip(self):
+        values = np.array([[[1.0], [2.0], [3.0], [nan]]])
+        z = cross_sectional_zscores(values)
+        assert z[0, :3, 0].tolist() == pytest.approx([-1.0, 0.0, 1.0])
+        assert np.isnan(z[0, 3, 0])
+        outlier = np.concatenate([np.zeros(30), [1000.0]])[None, :, None]
+        assert cross_sectional_zscores(outlier).max() == 3.0
+
+    def test_batched_solution_matches_per_date_lstsq(self):
+        rng = np.random.default_rng(0)
+        T, N, K = 6, 40, 3
+        z = rng.normal(size=(T, N, K))
+        returns = 0.01 + z @ np.array([0.02, -0.01, 0.0]) + rng.normal(scale=0.01, size=(T, N))
+        mask = rng.random((T, N)) > 0.2
+        mask[5, 10:] = False                 # too few names on the last date
+
+        coefs, observations, r2, usable = batched_least_squares(z, returns, mask, min_obs=15)
+        assert usable.tolist() == [True] * 5 + [False]
+        assert np.isnan(coefs[5]).all()
+        for t in range(5):
+            design = np.column_stack([np.ones(mask[t].sum()), z[t][mask[t]]])
+            expected, *_ = np.linalg.lstsq(design, returns[t][mask[t]], rcond=None)
+            assert coefs[t] == pytest.approx(expected)
+            residual = returns[t][mask[t]] - design @ expected
+            total = returns[t][mask[t]] - returns[t][mask[t]].mean()
+            assert r2[t] == pytest.approx(1 - residual @ residual / (total @ total))
+
+    def test_constant_factor_is_rank_deficient_not_fatal(self):
+        z = np.zeros((1, 20, 1))
+        returns = np.linspace(-0.01, 0.01, 20)[None, :]
+        coefs, _, _, usable = batched_least_squares(z, returns, np.ones((1, 20), bool), min_obs=5)
+        assert usable[0] and coefs[0].tolist() == pytest.approx([0.0, 0.0])
+
+    def test_fama_macbeth_t_stats(self):
+        coefs = np.array([[0.01, 1.0], [0.03, 3.0], [0.02, 2.0], [9.0, 9.0]])
+        usable = np.array([True, True, True, False])
+        summary = fama_macbeth(coefs, usable, ['Intercept', 'X']).set_index('factor')
+        assert summary.loc['X', 'coef'] == pytest.approx(2.0)
+        assert summary.loc['X', 'std_err'] == pytest.approx(np.std([1, 3, 2], ddof=1) / np.sqrt(3))
+        assert summary.loc['X', 't_stat'] == pytest.approx(2.0 / summary.loc['X', 'std_err'])
+        assert summary.loc['X', 'positive_share'] == 1.0
+        # Positively autocorrelated coefficients widen the Newey-West error
+        trending = np.array([[1.0], [2.0], [3.0], [4.0], [5.0], [6.0]])
+        assert newey_west_se(trending, lags=2)[0] > newey_west_se(trending, lags=0)[0]
+
+    def test_recovers_planted_factor(self):
+        rng = np.random.default_rng(1)
+        T, N = 40, 60
+        prices = np.full((T, N), 100.0)
+        signal = rng.normal(size=(T, N))
+        noise = rng.normal(size=(T, N))
+        for t in range(T - 1):
+            prices[t + 1] = prices[t] * (1 + 0.01 * signal[t] + 0.002 * rng.normal(size=N))
+        prices[rng.random((T, N)) < 0.05] = nan
+        factors = np.stack([signal, noise], axis=2)
+        factors[0, :5, 1] = nan
+
+        result = run_regression(prices, factors, ['Signal', 'Noise'])
+        summary = result['summary'].set_index('factor')
+        assert summary.loc['Signal', 't_stat'] > 10
+        assert abs(summary.loc['Noise', 't_stat']) < 3
+        assert result['usable_dates'] == T - 1
+
+        filled = run_regression(prices, factors, ['Signal', 'Noise'], fill_missing=True)
+        assert filled['avg_observations'] > result['avg_observations']
+
+    def test_suggested_rules_follow_t_stats(self):
+        summary = pd.DataFrame({'factor': ['PEG', 'ROE', 'Profit M', 'EPS Next 5Y'],
+                                't_stat': [-3.0, 1.0, 0.0, -2.0]})
+        rules = suggest_rules(summary)
+        # PEG's negative t is good (lower is better); effective t = 3, 1, 0, 0 -> mean 1
+        assert [rules[m]['multiplier'] for m in DEFAULT_RULES] == [3.0, 1.0, 0.0, 0.0]
+        assert rules['PEG']['points'] == (0.0, 90.0, 60.0, 30.0)
+        assert rules['PEG']['cuts'] == DEFAULT_RULES['PEG']['cuts']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -1,9 +1,13 @@
 import pytest
 import pandas as pd
 import sys
+import os
 from io import StringIO
 from unittest.mock import patch, MagicMock
 
+sys.path.insert(0, os.path.dirname(__file__))
+from fin import add_factor_filters, calculate_investor_score, merge_screens, score_table
+
 
 class TestStockScreener:
     """Tests for the stock screener script."""
@@ -100,44 +104,6 @@ class TestStockScreener:
             'EPS Next 5Y': 0.35  # Should score 20 (> 0.3)
         })
 
-        # Define the scoring function (extracted from the script)
-        def calculate_investor_score(row):
-            score = 0
-
-            if not pd.isna(row["PEG"]):
-                if row["PEG"] > 0 and row["PEG"] < 1:
-                    score += 30
-                elif row["PEG"] >= 1 and row["PEG"] < 2:
-                    score += 20
-                elif row["PEG"] >= 2:
-                    score += 10
-
-            if not pd.isna(row["ROE"]):
-                if row["ROE"] > 0.2:
-                    score += 30
-                elif row["ROE"] > 0.1:
-                    score += 20
-                elif row["ROE"] > 0:
-                    score += 10
-
-            if not pd.isna(row["Profit M"]):
-                if row["Profit M"] > 0.2:
-                    score += 20
-                elif row["Profit M"] > 0.1:
-                    score += 15
-                elif row["Profit M"] > 0:
-                    score += 10
-
-            if not pd.isna(row["EPS Next 5Y"]):
-                if row["EPS Next 5Y"] > 0.3:
-                    score += 20
-                elif row["EPS Next 5Y"] > 0.2:
-                    score += 15
-                elif row["EPS Next 5Y"] > 0.1:
-                    score += 10
-
-            return score
-
         score = calculate_investor_score(sample_row)
         assert score == 100, f"Expected score of 100, got {score}"
 
@@ -150,43 +116,6 @@ class TestStockScreener:
             'EPS Next 5Y': 0.25  # Should score 15
         })
 
-        def calculate_investor_score(row):
-            score = 0
-
-            if not pd.isna(row["PEG"]):
-                if row["PEG"] > 0 and row["PEG"] < 1:
-                    score += 30
-                elif row["PEG"] >= 1 and row["PEG"] < 2:
-                    score += 20
-                elif row["PEG"] >= 2:
-                    score += 10
-
-            if not pd.isna(row["ROE"]):
-                if row["ROE"] > 0.2:
-                    score += 30
-                elif row["ROE"] > 0.1:
-                    score += 20
-                elif row["ROE"] > 0:
-                    score += 10
-
-            if not pd.isna(row["Profit M"]):
-                if row["Profit M"] > 0.2:
-                    score += 20
-                elif row["Profit M"] > 0.1:
-                    score += 15
-                elif row["Profit M"] > 0:
-                    score += 10
-
-            if not pd.isna(row["EPS Next 5Y"]):
-                if row["EPS Next 5Y"] > 0.3:
-                    score += 20
-                elif row["EPS Next 5Y"] > 0.2:
-                    score += 15
-                elif row["EPS Next 5Y"] > 0.1:
-                    score += 10
-
-            return score
-
         score = calculate_investor_score(sample_row)
         assert score == 35, f"Expected score of 35, got {score}"
 
@@ -214,14 +143,12 @@ class TestStockScreener:
             '52W High': [-0.15, -0.25, -0.10]
         })
 
+        df['EPS This Y'] = df['Change from Open'] = '1%'
+        for column in ['EPS Next Y', 'EPS Past 5Y', 'EPS Next 5Y', 'Sales Past 5Y']:
+            df[column] = '1%'
+
         # Apply factor filters
-        df['Price_Over_15'] = df['Price'].apply(lambda x: 'True' if x >= 15 else 'False')
-        df['Market_Cap_Over_500m'] = df['Market Cap'].apply(lambda x: 'True' if x >= 500000000 else 'False')
-        df['Avg_Volume_Over_100k'] = df['Volume'].apply(lambda x: 'True' if x >= 100000 else 'False')
-        df['Price_Above_SMA50'] = df['SMA50'].apply(lambda x: 'True' if x >= 0 else 'False')
-        df['Price_Above_SMA200'] = df['SMA200'].apply(lambda x: 'True' if x >= 0 else 'False')
-        df['Pct_Above_Low_Over_30%'] = df['52W Low'].apply(lambda x: 'True' if x >= 0.3 else 'False')
-        df['Pct_Below_High_Under_20%'] = df['52W High'].apply(lambda x: 'True' if x >= -0.2 else 'False')
+        df = add_factor_filters(df)
 
         # Check first row (should pass all filters)
         assert df['Price_Over_15'].iloc[0] == 'True'
@@ -267,22 +194,8 @@ class TestStockScreener:
 
     def test_data_merge(self, sample_financial_data, sample_overview_data, sample_technical_data, sample_valuation_data):
         """Test merging of different data tables."""
-        merged = (
-            sample_financial_data.merge(
-                sample_overview_data.drop(columns=['Market Cap', 'Price', 'Change', 'Volume']),
-                on='Ticker',
-                how='left'
-            )
-            .merge(
-                sample_technical_data.drop(columns=['Price', 'Change', 'Volume']),
-                on='Ticker',
-                how='left'
-            )
-            .merge(
-                sample_valuation_data.drop(columns=['Market Cap', 'Price', 'Change', 'Volume', 'P/E']),
-                on='Ticker',
-                how='left'
-            )
+        merged = merge_screens(
+            sample_financial_data, sample_overview_data, sample_technical_data, sample_valuation_data
         )
 
         # Check that all tickers are present
@@ -299,6 +212,38 @@ class TestStockScreener:
         assert merged.columns.tolist().count('Price') == 1
         assert merged.columns.tolist().count('Market Cap') == 1
 
+    def test_score_table(self, sample_financial_data, sample_overview_data, sample_technical_data, sample_valuation_data):
+        """Test the full scoring stage on a merged screen."""
+        merged = merge_screens(
+            sample_financial_data, sample_overview_data, sample_technical_data, sample_valuation_data
+        )
+        scored = score_table(merged, run_day='2025-06-11')
+
+        assert set(scored['Run_Day']) == {'2025-06-11'}
+        assert scored['Market Cap'].dtype == float
+        assert scored.set_index('Ticker').loc['MSFT', 'EPS This Y'] == pytest.approx(0.18)
+        # AAPL: PEG 1.2 -> 20, ROE 1.5 -> 30, Profit M 0.25 -> 20, EPS Next 5Y 0.12 -> 10
+        assert scored.set_index('Ticker').loc['AAPL', 'Investor_Score'] == 80
+        assert scored['Investor_Score'].is_monotonic_decreasing
+        assert 'Composite_Pct' in scored.columns
+
+    def test_score_table_archives_pre_filter_rows(self, tmp_path, sample_financial_data, sample_overview_data,
+                                                  sample_technical_data, sample_valuation_data):
+        """The archive keeps the rows score_table filters out."""
+        from raw_archive import read_archive
+
+        technical = sample_technical_data.copy()
+        technical.loc[1, '52W Low'] = 0.10   # under 30% above the low: filtered out
+        merged = merge_screens(sample_financial_data, sample_overview_data, technical, sample_valuation_data)
+        scored = score_table(merged, run_day='2025-06-11', archive_dir=tmp_path)
+
+        raw = read_archive(tmp_path / '2025-06-11.npz')
+        assert len(scored) == 2 and len(raw) == 3
+        assert raw['Ticker'].tolist() == merged['Ticker'].tolist()
+        assert raw.loc[1, 'Pct_Above_Low_Over_30%'] == 'False'
+        assert raw['Market Cap'].dtype == float
+        assert 'Composite_Pct' not in raw.columns
+
 
 class TestExtractJsonFromResponse:
     """Tests for OpenRouterPRReviewer.extract_json_from_response"""
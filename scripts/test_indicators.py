@@ -0,0 +1,94 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from indicators import IndicatorEngine, append_table, full_table, rolling_max, rolling_mean, rolling_std
+
+nan = np.nan
+
+
+class TestIndicators:
+    """Tests for panel indicators and incremental appends."""
+
+    def test_rolling_mean_matches_pandas_with_gaps(self):
+        values = np.array([[1.0], [2.0], [nan], [4.0], [5.0], [6.0]])
+        expected = pd.DataFrame(values).rolling(5, min_periods=4).mean().to_numpy()
+        np.testing.assert_allclose(rolling_mean(values, 5), expected, equal_nan=True)
+
+    def test_rolling_std_and_max(self):
+        values = np.array([[0.01], [-0.02], [0.03], [nan], [0.00]])
+        expected = pd.DataFrame(values).rolling(3, min_periods=3).std().to_numpy()
+        np.testing.assert_allclose(rolling_std(values, 3), expected, equal_nan=True)
+        assert rolling_max(np.array([[1.0], [3.0], [nan], [2.0]]), 2)[:, 0].tolist()[1:] == [3.0, 3.0, 2.0]
+
+    def test_ema_and_rsi_skip_days_off_the_screen(self):
+        dates = ['d1', 'd2', 'd3', 'd4']
+        prices = pd.DataFrame({'A': [10.0, 11.0, nan, 12.0]}, index=dates)
+        panels = IndicatorEngine([('ema_2', 'ema', 2), ('rsi_2', 'rsi', 2)]).compute(prices)
+
+        # EMA: 10 -> 10 + 2/3 * 1 -> (gap) -> 32/3 + 2/3 * (12 - 32/3)
+        assert np.isnan(panels['ema_2'].loc['d1', 'A'])
+        assert panels['ema_2'].loc['d2', 'A'] == pytest.approx(32 / 3)
+        assert np.isnan(panels['ema_2'].loc['d3', 'A'])
+        assert panels['ema_2'].loc['d4', 'A'] == pytest.approx(32 / 3 + 2 / 3 * (12 - 32 / 3))
+        # Only gains so far: RSI saturates once two changes are seen
+        assert panels['rsi_2'].loc['d4', 'A'] == 100.0
+
+    def test_momentum_and_drawdown(self):
+        prices = pd.DataFrame({'A': [100.0, 120.0, 90.0]}, index=['d1', 'd2', 'd3'])
+        engine = IndicatorEngine([('mom_2', 'momentum', 2), ('dd_max', 'drawdown', None)])
+        panels = engine.compute(prices)
+        assert panels['mom_2'].loc['d3', 'A'] == pytest.approx(-0.1)
+        assert panels['dd_max'].loc['d3', 'A'] == pytest.approx(-0.25)
+
+    def test_append_matches_full_recompute(self, tmp_path):
+        rng = np.random.default_rng(0)
+        dates = [f"2026-01-{d:02d}" for d in range(1, 31)]
+        prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.02, (30, 3)), axis=0)),
+                              index=dates, columns=['A', 'B', 'C'])
+        prices.iloc[10:14, 1] = nan
+        prices.iloc[:20, 2] = nan  # C joins the screen late
+
+        full = IndicatorEngine().compute(prices)
+
+        engine = IndicatorEngine()
+        engine.compute(prices.iloc[:25, :2])
+        engine.save(tmp_path / 'state.json')
+        engine = IndicatorEngine.load(tmp_path / 'state.json')
+        for date in dates[25:]:
+            latest = engine.append(date, prices.loc[date].dropna())
+
+        for name, panel in full.items():
+            np.testing.assert_allclose(latest[name].reindex(panel.columns).to_numpy(),
+                                       panel.loc[dates[-1]].to_numpy(), equal_nan=True, err_msg=name)
+
+    def test_full_and_append_paths_output_the_same_rows(self, tmp_path):
+        rng = np.random.default_rng(1)
+        dates = [f"2026-02-{d:02d}" for d in range(1, 29)]
+        prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (28, 4)), axis=0))
+        for day, date in enumerate(dates):
+            tickers, values = ['A', 'B', 'C', 'D'], list(prices[day])
+            if day >= 26:      # D leaves the screen two days before the end
+                tickers, values = tickers[:3], values[:3]
+            if day == 27:      # and E joins on the last day
+                tickers, values = tickers + ['E'], values + [50.0]
+                engine, _ = full_table(tmp_path)
+            pd.DataFrame({'Ticker': tickers, 'Price': values}).to_csv(tmp_path / f"{date}.csv", sep='\t', index=False)
+
+        appended = append_table(engine, tmp_path, dates[-1:])
+        _, full = full_table(tmp_path)
+        assert full['Ticker'].tolist() == ['A', 'B', 'C', 'E']
+        pd.testing.assert_frame_equal(appended, full)
+
+    def test_append_rejects_old_dates(self):
+        engine = IndicatorEngine()
+        engine.compute(pd.DataFrame({'A': [1.0]}, index=['2026-01-02']))
+        with pytest.raises(ValueError):
+            engine.append('2026-01-02', pd.Series({'A': 1.0}))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,81 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from investor_score import DEFAULT_RULES, investor_score, score_buckets
+
+
+def calculate_investor_score(row):
+    """Row-wise reference copied from fin.py."""
+    score = 0
+
+    if not pd.isna(row["PEG"]):
+        if row["PEG"] > 0 and row["PEG"] < 1:
+            score += 30
+        elif row["PEG"] >= 1 and row["PEG"] < 2:
+            score += 20
+        elif row["PEG"] >= 2:
+            score += 10
+
+    if not pd.isna(row["ROE"]):
+        if row["ROE"] > 0.2:
+            score += 30
+        elif row["ROE"] > 0.1:
+            score += 20
+        elif row["ROE"] > 0:
+            score += 10
+
+    if not pd.isna(row["Profit M"]):
+        if row["Profit M"] > 0.2:
+            score += 20
+        elif row["Profit M"] > 0.1:
+            score += 15
+        elif row["Profit M"] > 0:
+            score += 10
+
+    if not pd.isna(row["EPS Next 5Y"]):
+        if row["EPS Next 5Y"] > 0.3:
+            score += 20
+        elif row["EPS Next 5Y"] > 0.2:
+            score += 15
+        elif row["EPS Next 5Y"] > 0.1:
+            score += 10
+
+    return score
+
+
+class TestInvestorScoreRules:
+    """Tests for the vectorized Investor_Score rules."""
+
+    def test_matches_row_function_on_boundaries(self):
+        """Every boundary value scores exactly like fin.py's row function."""
+        edges = [np.nan, -0.5, 0.0, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.5, 1.0, 1.5, 2.0, 3.0]
+        df = pd.DataFrame(
+            [(a, b, c, d) for a in edges for b in edges[:8] for c in edges[:8] for d in edges[:10]],
+            columns=['PEG', 'ROE', 'Profit M', 'EPS Next 5Y'],
+        )
+        expected = df.apply(calculate_investor_score, axis=1).to_numpy()
+        actual = investor_score({c: df[c].to_numpy() for c in df.columns})
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_peg_buckets(self):
+        """PEG is lower-is-better and non-positive PEG earns nothing."""
+        buckets = score_buckets(np.array([-1.0, 0.0, 0.5, 1.0, 1.99, 2.0, np.nan]),
+                                DEFAULT_RULES['PEG']['cuts'], lower_is_better=True)
+        assert buckets.tolist() == [0, 0, 1, 2, 2, 3, 0]
+
+    def test_works_on_panels(self):
+        """Rules apply elementwise to dates x tickers panels."""
+        panel = np.full((2, 3), np.nan)
+        panel[0, 0] = 0.5
+        score = investor_score({'PEG': panel, 'ROE': panel, 'Profit M': panel, 'EPS Next 5Y': panel})
+        assert score.shape == (2, 3)
+        assert score[0, 0] == 30 + 30 + 20 + 20
+        assert score[1, 2] == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -138,9 +138,9 @@ class TestIsMarketOpen:
 
     def test_error_handling_returns_true(self):
         """Test that on error, function returns True (fail-safe for manual override)."""
-        with patch('is_market_open.mcal.get_calendar') as mock_calendar:
-            # Simulate an error in getting the calendar
-            mock_calendar.side_effect = Exception("Calendar service unavailable")
+        with patch('is_market_open.load_calendar') as mock_calendar:
+            # Simulate an error in loading the calendar table
+            mock_calendar.side_effect = Exception("Calendar table unavailable")
 
             result = is_market_open()
 
@@ -190,6 +190,15 @@ class TestIsMarketOpen:
 
             assert result == True, "Market should be open on a regular Wednesday in 2026"
 
+    def test_date_outside_table_returns_true(self, eastern_tz):
+        """Test that a date past the generated table fails open like other errors."""
+        with patch('is_market_open.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2099, 6, 10, 15, 0, tzinfo=eastern_tz)
+
+            result = is_market_open()
+
+            assert result == True, "Should return True when the table needs regenerating"
+
     def test_prints_correct_status_messages(self, eastern_tz, capsys):
         """Test that correct status messages are printed to stderr."""
         with patch('is_market_open.datetime') as mock_datetime:
@@ -205,7 +214,7 @@ class TestIsMarketOpen:
 
 
 class TestMarketCalendarIntegration:
-    """Integration tests using actual pandas-market-calendars library."""
+    """Integration tests using the generated NYSE calendar table."""
 
     def test_known_2025_trading_days(self):
         """Test with known 2025 trading days using real calendar."""
@@ -0,0 +1,79 @@
+import pytest
+import subprocess
+import sys
+import os
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(__file__))
+from market_calendar import TradingCalendar, load_calendar
+
+
+class TestTradingCalendar:
+    """Tests for the generated NYSE calendar table lookups."""
+
+    @pytest.fixture
+    def calendar(self):
+        return load_calendar()
+
+    def test_single_date_checks(self, calendar):
+        assert calendar.is_trading_day('2025-06-11')
+        assert not calendar.is_trading_day('2025-06-14')      # Saturday
+        assert not calendar.is_trading_day(date(2025, 7, 4))
+        assert calendar.is_holiday('2025-01-09')               # national day of mourning
+        assert not calendar.is_holiday('2025-06-14')           # weekends are not holidays
+
+    def test_early_closes(self, calendar):
+        assert calendar.early_close('2025-07-03') == '13:00'
+        assert calendar.early_close('2025-11-28') == '13:00'
+        assert calendar.early_close('2025-06-11') is None
+
+    def test_range_queries(self, calendar):
+        days = calendar.trading_days('2025-12-22', '2026-01-05')
+        assert days[0] == date(2025, 12, 22)
+        assert date(2025, 12, 25) not in days and date(2026, 1, 1) not in days
+        assert calendar.count_trading_days('2025-12-22', '2026-01-05') == len(days) == 9
+        assert calendar.trading_days('2025-06-14', '2025-06-15') == []
+
+    def test_next_and_previous(self, calendar):
+        assert calendar.next_trading_day('2025-07-03') == date(2025, 7, 7)
+        assert calendar.previous_trading_day('2025-07-07') == date(2025, 7, 3)
+        assert calendar.next_trading_day('2025-06-13') == date(2025, 6, 16)
+
+    def test_outside_table_raises(self, calendar):
+        with pytest.raises(ValueError, match="outside the calendar table"):
+            calendar.is_trading_day('2099-01-02')
+        assert not calendar.covers('1999-12-31')
+
+    def test_table_version_checked(self):
+        with pytest.raises(ValueError, match="version"):
+            TradingCalendar.from_table({'version': 99})
+
+    def test_lookup_does_not_import_pandas(self):
+        code = ("import sys; sys.path.insert(0, {!r}); import market_calendar; "
+                "market_calendar.load_calendar().is_trading_day('2025-06-11'); "
+                "print('pandas' in sys.modules)").format(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        assert out.stdout.strip() == 'False'
+
+
+class TestParityWithMarketCalendars:
+    """The table must agree with pandas_market_calendars over its whole span."""
+
+    def test_matches_valid_days(self):
+        mcal = pytest.importorskip('pandas_market_calendars')
+        calendar = load_calendar()
+        nyse = mcal.get_calendar('NYSE')
+        expected = [d.date() for d in nyse.valid_days(calendar.start, calendar.end)]
+        assert calendar.trading_days(calendar.start, calendar.end) == expected
+
+    def test_matches_early_closes(self):
+        mcal = pytest.importorskip('pandas_market_calendars')
+        calendar = load_calendar()
+        nyse = mcal.get_calendar('NYSE')
+        schedule = nyse.schedule(start_date=calendar.start, end_date=calendar.end)
+        expected = {d.date() for d in nyse.early_closes(schedule).index}
+        assert set(calendar.early_closes) == expected
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
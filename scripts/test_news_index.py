@@ -0,0 +1,97 @@
+import pytest
+import json
+import numpy as np
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from news_index import (
+    COLLAPSED_PREFIX, NewsIndex, collapse_news, content_words, minhash, rebuild_index, similarity, split_items,
+)
+
+REPORTED = "2026-03-18: Micron reported second quarter fiscal 2026 results with record revenue of $9.3 billion."
+REWORDED = "Mar 18, 2026: Micron reported record second quarter fiscal 2026 revenue of $9.3 billion."
+UNRELATED = "Micron broke ground on its $100 billion New York megafab, with first output expected in 2030."
+
+
+class TestFingerprints:
+    """Tests for item splitting and the MinHash signatures."""
+
+    def test_split_bullets_and_sentences(self):
+        assert split_items("• First item is long enough here.\n• Second item is long enough too.") == [
+            "First item is long enough here.", "Second item is long enough too."]
+        assert split_items("Q3 beat with $0.78 EPS vs $0.68 expected. Revenue of $598M exceeded estimates.") == [
+            "Q3 beat with $0.78 EPS vs $0.68 expected.", "Revenue of $598M exceeded estimates."]
+        assert split_items(f"• {COLLAPSED_PREFIX}: 2 item(s) first reported since 2026-03-02.") == []
+        assert split_items(None) == [] and split_items("T1 news") == []
+
+    def test_dates_and_stopwords_are_not_content(self):
+        assert content_words("2026-03-18: Micron's Q2 results on Mar 18") == {'micron', 'q2', 'results'}
+
+    def test_signature_similarity_tracks_jaccard(self):
+        a, b = content_words(REPORTED), content_words(REWORDED)
+        jaccard = len(a & b) / len(a | b)
+        assert similarity(minhash(REPORTED), minhash(REWORDED)) == pytest.approx(jaccard, abs=0.15)
+        assert similarity(minhash(REPORTED), minhash(UNRELATED)) < 0.2
+        assert np.array_equal(minhash(REPORTED), minhash(REPORTED))
+
+
+class TestNewsIndex:
+    """Tests for near-duplicate lookups, lookback and the lookup schedule."""
+
+    def test_reworded_item_is_a_repeat(self, tmp_path):
+        index = NewsIndex(tmp_path / 'news.json')
+        assert index.add('MU', '2026-03-19', f"• {REPORTED}")['fresh'] == [REPORTED]
+        result = index.add('MU', '2026-03-20', f"• {REWORDED}\n• {UNRELATED}")
+        assert result == {'fresh': [UNRELATED], 'repeated': [(REWORDED, '2026-03-19')]}
+        # Other tickers and later lookbacks do not match
+        assert index.match('NVDA', REWORDED, '2026-03-21') is None
+        assert index.match('MU', REWORDED, '2026-04-30') is None
+
+    def test_same_day_rerun_replaces_that_day(self, tmp_path):
+        index = NewsIndex(tmp_path / 'news.json')
+        index.add('MU', '2026-03-19', REPORTED)
+        assert index.add('MU', '2026-03-19', REPORTED)['fresh'] == [REPORTED]
+        assert len(index.tickers['MU']['entries']) == 1
+
+    def test_quiet_news_is_rechecked_later(self, tmp_path):
+        index = NewsIndex(tmp_path / 'news.json')
+        assert index.needs_news('MU', '2026-03-19')
+        index.add('MU', '2026-03-19', REPORTED)
+        assert index.needs_news('MU', '2026-03-20')          # the last lookup found something new
+        index.add('MU', '2026-03-20', REWORDED)
+        assert not index.needs_news('MU', '2026-03-21')
+        index.add('MU', '2026-03-21', REWORDED, looked_up=False)
+        assert not index.needs_news('MU', '2026-03-22')
+        assert index.needs_news('MU', '2026-03-23')
+        index.add('MU', '2026-03-23', "")                    # a failed analysis changes nothing
+        assert index.tickers['MU']['checked'] == '2026-03-20'
+
+    def test_save_and_load(self, tmp_path):
+        index = NewsIndex(tmp_path / 'cache' / 'news.json')
+        index.add('MU', '2026-03-19', REPORTED)
+        assert index.save() and not index.save()
+        loaded = NewsIndex.load(tmp_path / 'cache' / 'news.json')
+        assert loaded.match('MU', REWORDED, '2026-03-20')[0] == '2026-03-19'
+        assert loaded.tickers['MU']['checked'] == '2026-03-19'
+        assert NewsIndex.load(tmp_path / 'missing.json').tickers == {}
+
+    def test_collapse_and_flag(self):
+        result = {'fresh': [UNRELATED], 'repeated': [(REWORDED, '2026-03-19')]}
+        assert collapse_news(result) == (f"• {UNRELATED}\n"
+                                         f"• {COLLAPSED_PREFIX}: 1 item(s) first reported since 2026-03-19.")
+        assert collapse_news(result, 'flag').endswith(f"• (repeat, first reported 2026-03-19) {REWORDED}")
+        assert collapse_news(result, 'off') is None
+        assert collapse_news({'fresh': [UNRELATED], 'repeated': []}) is None
+
+    def test_rebuild_from_summaries(self, tmp_path):
+        for date, news in [('2026-03-19', REPORTED), ('2026-03-20', f"{REWORDED} {UNRELATED}")]:
+            summary = {'date': date, 'top_stocks': [{'ticker': 'MU', 'latest_news': news}]}
+            (tmp_path / f'{date}.json').write_text(json.dumps(summary))
+        index, counts = rebuild_index(tmp_path)
+        assert counts == {'items': 3, 'repeated': 1}
+        assert index.path == tmp_path / 'cache' / 'news_index.json'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
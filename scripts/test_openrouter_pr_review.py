@@ -8,9 +8,16 @@ response-healing have been removed:
 """
 
 import json
+import os
+import re
 import sys
+import tempfile
+import threading
+import time
 import types
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 # ---------------------------------------------------------------------------
@@ -23,7 +30,9 @@ pd_stub.DataFrame = MagicMock()
 pd_stub.Series = MagicMock()
 sys.modules.setdefault("pandas", pd_stub)
 
-from openrouter_pr_review import OpenRouterPRReviewer as OpenRouterAnalyzer  # noqa: E402
+from openrouter_pr_review import (  # noqa: E402
+    BatchSizer, IncrementalObjectParser, OpenRouterPRReviewer as OpenRouterAnalyzer, StreamCorrupted, StreamStalled,
+)
 
 
 class TestCleanCitations(unittest.TestCase):
@@ -135,5 +144,385 @@ class TestCitationsBeforeJsonParsing(unittest.TestCase):
         assert "<cite" not in result["TSLA"]["description"]
 
 
+# ---------------------------------------------------------------------------
+# Local stub of the chat-completions endpoint
+# ---------------------------------------------------------------------------
+class StubCompletions(BaseHTTPRequestHandler):
+    """Answers analysis prompts for the tickers they list.
+
+    Server attributes steer it: `drop` tickers are left out the first time
+    they are asked, batches above `max_batch` come back cut off (at `cut`
+    characters, default half) with finish_reason "length", and every
+    request sleeps `delay` seconds. Streaming requests get server-sent
+    events of `piece`-character deltas; with `stall_after` set, the stream
+    sends only keep-alive comments after that many characters for `stall`
+    seconds before giving up, and with `garble_after` set it sends a cut-off
+    data line after that many characters and ends the stream. `news` is the
+    latest_news template.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["messages"][0]["content"]
+        tickers = re.search(r"Stocks to analyze: (.*)", prompt).group(1).split(", ")
+        with server.lock:
+            server.requests.append(tickers)
+            server.prompts.append((prompt, tickers))
+            server.connections.add(self.client_address)
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        time.sleep(server.delay)
+
+        answer = {
+            t: {"description": f"{t} desc", "latest_news": server.news.format(t=t), "why_selected": f"{t} why"}
+            for t in tickers
+            if not (t in server.drop and sum(t in r for r in server.requests) == 1)
+        }
+        content, finish = json.dumps(answer), "stop"
+        if len(tickers) > server.max_batch:
+            content, finish = content[:server.cut or len(content) // 2], "length"
+        usage = {"prompt_tokens": 10, "completion_tokens": 20}
+        try:
+            if body.get("stream") and server.stream:
+                self.stream(content, finish, usage)
+            else:
+                self.send_json({"choices": [{"message": {"content": content}, "finish_reason": finish}],
+                                "usage": usage})
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def send_json(self, payload):
+        payload = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_chunk(self, text):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def stream(self, content, finish, usage):
+        server = self.server
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.send_chunk(": OPENROUTER PROCESSING\n\n")
+        for i in range(0, len(content), server.piece):
+            if server.stall_after is not None and i >= server.stall_after:
+                deadline = time.monotonic() + server.stall
+                while time.monotonic() < deadline:
+                    self.send_chunk(": OPENROUTER PROCESSING\n\n")
+                    time.sleep(0.02)
+                self.close_connection = True
+                self.wfile.write(b"0\r\n\r\n")
+                return
+            if server.garble_after is not None and i >= server.garble_after:
+                self.send_chunk('data: {"choices": [{"delta": {"cont\n\n')
+                self.close_connection = True
+                self.wfile.write(b"0\r\n\r\n")
+                return
+            delta = {"choices": [{"delta": {"content": content[i:i + server.piece]}, "finish_reason": None}]}
+            self.send_chunk(f"data: {json.dumps(delta)}\n\n")
+            time.sleep(server.chunk_delay)
+        final = {"choices": [{"delta": {}, "finish_reason": finish}], "usage": usage}
+        self.send_chunk(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class StubEndpointTestCase(unittest.TestCase):
+    """Starts the stub endpoint and builds a reviewer pointed at it"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubCompletions)
+        self.server.lock = threading.Lock()
+        self.server.requests, self.server.prompts, self.server.active, self.server.peak = [], [], 0, 0
+        self.server.drop, self.server.max_batch, self.server.delay = set(), 100, 0.0
+        self.server.cut = None
+        self.server.stream, self.server.piece, self.server.chunk_delay = True, 40, 0.0
+        self.server.stall_after, self.server.stall = None, 0.0
+        self.server.garble_after = None
+        self.server.connections = set()
+        self.server.news = "{t} news"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.reviewer = self.make_reviewer()
+        self.tickers = [{"ticker": f"T{i}", "name": f"Company {i}"} for i in range(25)]
+
+    def make_reviewer(self):
+        env = {"OPENROUTER_API_KEY": "k", "GITHUB_TOKEN": "t", "PR_NUMBER": "1", "GITHUB_REPOSITORY": "o/r",
+               "OPENROUTER_API_URL": f"http://127.0.0.1:{self.server.server_port}/api/v1/chat/completions",
+               "ANALYSIS_CACHE": os.path.join(self.tmp.name, "cache.json"),
+               "REVIEW_TELEMETRY": os.path.join(self.tmp.name, "telemetry.jsonl"),
+               "NEWS_INDEX": os.path.join(self.tmp.name, "news_index.json")}
+        with patch.dict(os.environ, env):
+            return OpenRouterAnalyzer()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+
+class TestAdaptiveBatchedAnalysis(StubEndpointTestCase):
+    def test_covers_top_25(self):
+        result = self.reviewer.analyze_stocks(self.tickers)
+        assert list(result) == [t["ticker"] for t in self.tickers]
+        assert all(result[t]["description"] == f"{t} desc" for t in result)
+
+    def test_reasks_only_missing_tickers(self):
+        self.server.drop = {"T3", "T17"}
+        result = self.reviewer.analyze_stocks(self.tickers)
+
+        assert result["T3"]["latest_news"] == "T3 news"
+        asked = {}
+        for batch in self.server.requests:
+            for t in batch:
+                asked[t] = asked.get(t, 0) + 1
+        assert asked["T3"] == asked["T17"] == 2
+        assert all(n == 1 for t, n in asked.items() if t not in {"T3", "T17"})
+
+    def test_shrinks_batches_on_truncation(self):
+        self.server.max_batch = 2
+        result = self.reviewer.analyze_stocks(self.tickers[:10])
+
+        assert all(result[t["ticker"]]["description"].endswith("desc") for t in self.tickers[:10])
+        assert max(len(r) for r in self.server.requests[-3:]) <= 2
+
+    def test_placeholder_after_max_attempts(self):
+        self.server.max_batch, self.server.cut = 0, 20   # every response is cut off in the first object
+        self.reviewer.MAX_TICKER_ATTEMPTS = 2
+        result = self.reviewer.analyze_stocks(self.tickers[:2])
+        assert result["T0"]["description"] == "Analysis not returned for T0"
+
+    def test_bounded_concurrency(self):
+        self.server.delay = 0.05
+        self.reviewer.INITIAL_BATCH_SIZE = 2
+        self.reviewer.analyze_stocks(self.tickers)
+        assert 1 < self.server.peak <= self.reviewer.MAX_CONCURRENCY
+
+
+class TestAnalysisCache(StubEndpointTestCase):
+    """Cache reuse across reruns and days, against the same stub endpoint."""
+
+    def test_same_day_rerun_makes_no_calls(self):
+        first = self.reviewer.analyze_stocks(self.tickers[:7], "2025-06-11")
+        calls = len(self.server.requests)
+
+        rerun = self.make_reviewer()   # fresh process state, cache read back from disk
+        second = rerun.analyze_stocks(self.tickers[:7], "2025-06-11")
+
+        assert second == first
+        assert len(self.server.requests) == calls
+        assert rerun.cache_stats["hits"] == 7 and rerun.cache_stats["api_calls"] == 0
+        assert rerun.cache_stats["calls_saved"] >= 1
+
+    def test_next_day_reuses_description_only(self):
+        self.reviewer.analyze_stocks(self.tickers[:3], "2025-06-11")
+        self.server.requests.clear()
+        self.server.prompts = []
+
+        tomorrow = self.make_reviewer()
+        result = tomorrow.analyze_stocks(self.tickers[1:4], "2025-06-12")
+
+        assert sorted(t for r in self.server.requests for t in r) == ["T1", "T2", "T3"]
+        assert all('"description"' not in p for p, tickers in self.server.prompts if "T1" in tickers)
+        assert result["T1"]["description"] == "T1 desc"
+        assert tomorrow.cache_stats == {"hits": 0, "refreshed": 2, "misses": 1, "news_carried": 0,
+                                        "api_calls": tomorrow.cache_stats["api_calls"], "calls_saved": 0}
+
+    def test_changed_metrics_miss(self):
+        self.reviewer.analyze_stocks(self.tickers[:2], "2025-06-11")
+        changed = [dict(self.tickers[0], pe="12.5"), self.tickers[1]]
+        rerun = self.make_reviewer()
+        rerun.analyze_stocks(changed, "2025-06-11")
+        assert rerun.cache_stats["hits"] == 1 and rerun.cache_stats["refreshed"] == 1
+
+    def test_failed_analyses_are_not_cached(self):
+        self.server.max_batch, self.server.cut = 0, 20
+        self.reviewer.MAX_TICKER_ATTEMPTS = 1
+        self.reviewer.analyze_stocks(self.tickers[:2], "2025-06-11")
+        assert self.reviewer.cache.entries == {}
+
+
+class TestNewsDedup(StubEndpointTestCase):
+    """Repeated news collapsed at save time, and quiet news not asked for again."""
+
+    def review_day(self, date, tickers):
+        reviewer = self.make_reviewer()
+        reviewer.data_dir = Path(self.tmp.name)
+        analyses = reviewer.analyze_stocks(tickers, date)
+        stocks = [{'ticker': t['ticker'], 'name': t['name'], 'analysis': analyses[t['ticker']]} for t in tickers]
+        assert reviewer.save_summaries(date, stocks, update_latest=False)
+        summary = json.loads((Path(self.tmp.name) / "summary" / f"{date}.json").read_text())
+        return reviewer, {s['ticker']: s['latest_news'] for s in summary['top_stocks']}
+
+    def test_repeats_collapse_then_skip_lookup(self):
+        self.server.news = "• {t} reported record quarterly revenue of $5.1 billion on strong data center demand."
+        _, first = self.review_day("2025-06-11", self.tickers[:2])
+        assert first["T0"] == self.server.news.format(t="T0")
+
+        second_reviewer, second = self.review_day("2025-06-12", self.tickers[:2])
+        assert second["T0"] == "• Earlier news still current: 1 item(s) first reported since 2025-06-11."
+        assert second_reviewer.news_stats['repeated'] == 2
+        assert "2 of 2 news item(s) repeated" in second_reviewer.format_comment([], "2025-06-12")
+
+        self.server.prompts = []
+        third_reviewer, third = self.review_day("2025-06-13", self.tickers[:2])
+        assert third_reviewer.cache_stats['news_carried'] == 2
+        assert all('"latest_news"' not in p for p, _ in self.server.prompts)
+        assert third["T1"].startswith("• Earlier news still current")
+
+
+class TestStreaming(StubEndpointTestCase):
+    """SSE streaming, stall detection and the pooled session."""
+
+    def prompt(self, n):
+        batch = self.tickers[:n]
+        return [{"role": "user", "content": self.reviewer.build_batch_analysis_prompt(batch, "2025-06-11")}]
+
+    def test_members_arrive_before_stream_ends(self):
+        self.server.piece, self.server.chunk_delay = 20, 0.01
+        seen = []
+        result = self.reviewer.complete(self.prompt(3), on_member=lambda key, value: seen.append(key))
+
+        assert seen == ["T0", "T1", "T2"]
+        assert result["objects"]["T1"]["latest_news"] == "T1 news"
+        assert result["finish_reason"] == "stop"
+        assert result["usage"]["completion_tokens"] == 20
+        timings = result["timings"]
+        assert timings["ttfb"] <= timings["first_object"] < timings["total"]
+
+    def test_stall_returns_partial_results_early(self):
+        self.reviewer.STALL_TIMEOUT = 0.3
+        self.server.stall_after, self.server.stall = 120, 5.0   # room for one member per response
+        started = time.monotonic()
+        result = self.reviewer.analyze_stocks(self.tickers[:3], "2025-06-11")
+
+        assert [result[t]["description"] for t in ("T0", "T1", "T2")] == ["T0 desc", "T1 desc", "T2 desc"]
+        assert self.server.requests == [["T0", "T1", "T2"], ["T1", "T2"], ["T2"]]
+        assert time.monotonic() - started < 3
+
+    def test_stall_without_results_raises(self):
+        self.reviewer.STALL_TIMEOUT = 0.2
+        self.server.stall_after, self.server.stall = 0, 1.0
+        with self.assertRaises(StreamStalled):
+            self.reviewer.complete(self.prompt(2), max_retries=1)
+
+    def test_garbled_event_keeps_partial_results(self):
+        self.server.garble_after = 120                          # after the first member
+        result = self.reviewer.complete(self.prompt(3))
+        assert list(result["objects"]) == ["T0"]
+        assert result["finish_reason"] == "stalled"
+        assert len(self.server.requests) == 1
+
+    def test_garbled_event_without_results_is_retried(self):
+        self.server.garble_after = 0
+        with patch("openrouter_pr_review.time.sleep"), self.assertRaises(StreamCorrupted):
+            self.reviewer.complete(self.prompt(2), max_retries=2)
+        assert len(self.server.requests) == 2
+
+    def test_plain_json_response_still_works(self):
+        self.server.stream = False
+        result = self.reviewer.complete(self.prompt(2))
+        assert set(result["objects"]) == {"T0", "T1"}
+        assert json.loads(result["content"])["T0"]["why_selected"] == "T0 why"
+
+    def test_connections_are_reused(self):
+        self.reviewer.analyze_stocks(self.tickers, "2025-06-11")
+        assert len(self.server.requests) > self.reviewer.MAX_CONCURRENCY
+        assert len(self.server.connections) <= self.reviewer.MAX_CONCURRENCY
+
+
+class TestTelemetry(StubEndpointTestCase):
+    """One telemetry record per request, written to the JSONL log."""
+
+    def test_records_per_request(self):
+        self.server.max_batch, self.server.cut = 2, 20
+        self.reviewer.analyze_stocks(self.tickers[:6], "2025-06-11")
+        records = self.reviewer.telemetry.records
+
+        assert len(records) == len(self.server.requests)
+        assert all(r["prompt_tokens"] == 10 and r["completion_tokens"] == 20 for r in records)
+        assert all(r["date"] == "2025-06-11" and r["queue_wait"] >= 0 for r in records)
+        assert {r["parse"] for r in records} <= {"direct", "failed"}
+        assert sum(r["returned"] for r in records) == 6
+        truncated = [r for r in records if r["finish_reason"] == "length"]
+        assert truncated and all(r["parse"] == "failed" and r["returned"] == 0 for r in truncated)
+
+        summary = self.reviewer.telemetry.summary()
+        assert summary["requests"] == len(records)
+        assert summary["completion_tokens"] == 20 * len(records)
+        assert "| Tokens (prompt / completion) |" in self.reviewer.format_comment([], "2025-06-11")
+
+        assert self.reviewer.telemetry.write()
+        with open(self.reviewer.telemetry.path) as f:
+            assert [json.loads(line)["run_id"] for line in f] == [self.reviewer.telemetry.run_id] * len(records)
+
+    def test_retry_reasons_and_failures(self):
+        self.reviewer.STALL_TIMEOUT = 0.2
+        self.server.stall_after, self.server.stall = 0, 0.4
+        with patch("openrouter_pr_review.time.sleep"), self.assertRaises(StreamStalled):
+            self.reviewer.request_batch(self.tickers[:2], "2025-06-11")
+
+        record, = self.reviewer.telemetry.records
+        assert [r["attempt"] for r in record["retries"]] == [1, 2]
+        assert record["retries"][0]["reason"].startswith("StreamStalled")
+        assert record["error"].startswith("StreamStalled") and record["returned"] == 0
+        assert self.reviewer.telemetry.summary()["retry_reasons"] == {"StreamStalled": 2}
+
+
+class TestIncrementalObjectParser(unittest.TestCase):
+    def feed_chars(self, text, clean=None):
+        parser = IncrementalObjectParser(clean)
+        return [(i, member) for i, ch in enumerate(text) for member in parser.feed(ch)]
+
+    def test_emits_each_member_when_its_object_closes(self):
+        text = '{"A": {"x": "1"}, "B": {"x": "2"}}'
+        emitted = self.feed_chars(text)
+        assert [m for _, m in emitted] == [("A", {"x": "1"}), ("B", {"x": "2"})]
+        assert emitted[0][0] == text.index("}")       # A is out before B starts
+
+    def test_skips_prose_and_fences(self):
+        text = 'Here you go:\n```json\n{"A": {"x": "{not a brace}"}, "n": 3}\n```\nDone {"B": 1}'
+        assert [m for _, m in self.feed_chars(text)] == [("A", {"x": "{not a brace}"}), ("n", 3)]
+
+    def test_escaped_quotes_and_citations(self):
+        text = '{"A": {"x": "say \\"hi\\" <cite index="1">src</cite>"}}'
+        members = [m for _, m in self.feed_chars(text, OpenRouterAnalyzer.clean_citations)]
+        assert members == [("A", {"x": 'say "hi" src'})]
+
+    def test_truncated_stream_keeps_complete_members(self):
+        parser = IncrementalObjectParser()
+        members = parser.feed('{"A": {"x": "1"}, "B": {"x": "unfinish')
+        assert members == [("A", {"x": "1"})]
+
+
+class TestBatchSizer(unittest.TestCase):
+    def test_grows_when_fast_and_complete(self):
+        sizer = BatchSizer(initial=3, maximum=5, target_seconds=40)
+        assert sizer.record(3, 5.0, missing=0, truncated=False) == 4
+        assert sizer.record(4, 5.0, 0, False) == 5
+        assert sizer.record(5, 5.0, 0, False) == 5
+
+    def test_halves_on_truncation_and_shrinks_when_slow(self):
+        sizer = BatchSizer(initial=8, maximum=8, target_seconds=40)
+        assert sizer.record(8, 10.0, missing=3, truncated=True) == 4
+        assert sizer.record(4, 60.0, 0, False) == 3
+        assert sizer.record(3, 10.0, 1, False) == 2
+        assert sizer.record(1, 10.0, 1, True) == 1
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,53 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from percentile_ranks import add_percentile_ranks, sort_screen
+
+nan = np.nan
+
+
+class TestPercentileRanks:
+    """Tests for screen-wide and sector-relative percentile ranks."""
+
+    @pytest.fixture
+    def screen(self):
+        return pd.DataFrame({
+            'Ticker': ['A', 'B', 'C', 'D'],
+            'Sector': ['Tech', 'Tech', 'Energy', 'Energy'],
+            'Industry': ['Chips', 'Software', 'Oil', 'Oil'],
+            'ROE': [0.30, 0.10, 0.20, nan],
+            'ROIC': ['12.00%', '8.00%', '-', '20.00%'],
+            'PEG': [0.5, -1.0, 1.5, 2.5],
+            'Profit M': [0.2, 0.2, 0.1, 0.3],
+            'EPS Next 5Y': [0.2, 0.2, 0.2, 0.2],
+            'Investor_Score': [90, 90, 60, 90],
+            'Price_Over_15': ['True', 'True', 'True', 'False'],
+        })
+
+    def test_universe_and_group_ranks(self, screen):
+        ranked = add_percentile_ranks(screen)
+        assert ranked['ROE_Pct'].tolist()[:3] == [1.0, pytest.approx(1 / 3, abs=1e-4), pytest.approx(2 / 3, abs=1e-4)]
+        assert np.isnan(ranked.loc[3, 'ROE_Pct'])
+        assert ranked['ROE_Sector_Pct'].tolist()[:3] == [1.0, 0.5, 1.0]
+        np.testing.assert_allclose(ranked['ROIC_Pct'], [2 / 3, 1 / 3, nan, 1.0], atol=1e-4)
+        assert 'Price_Over_15_Pct' not in ranked.columns
+        assert ranked['ROE'].tolist()[:3] == [0.30, 0.10, 0.20]
+
+    def test_composite_breaks_score_ties(self, screen):
+        ranked = sort_screen(add_percentile_ranks(screen))
+        # A: best ROE and PEG; D: best margin but no ROE; B: negative PEG counts as missing
+        assert ranked['Ticker'].tolist() == ['A', 'D', 'B', 'C']
+
+    def test_cross_sections_do_not_mix(self, screen):
+        history = pd.concat([screen.assign(Date='2026-01-02'), screen.assign(Date='2026-01-05', ROE=screen['ROE'] * 10)])
+        ranked = add_percentile_ranks(history.reset_index(drop=True), by=['Date'])
+        np.testing.assert_allclose(ranked['ROE_Pct'][:4], ranked['ROE_Pct'][4:])
+        assert 'Date_Pct' not in ranked.columns
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,96 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from portfolio import (
+    build_portfolios, min_variance_weights, pairwise_covariance, risk_contributions,
+    risk_parity_weights, shrink_covariance, snapshot_returns,
+)
+
+
+class TestCovariance:
+    """Tests for pairwise covariance with missing history and shrinkage."""
+
+    def test_pairwise_matches_numpy_when_complete(self):
+        rng = np.random.default_rng(0)
+        returns = rng.normal(0, 0.01, size=(50, 4))
+        cov, overlap = pairwise_covariance(returns)
+        np.testing.assert_allclose(cov, np.cov(returns, rowvar=False))
+        assert (overlap == 50).all()
+
+    def test_pairs_without_overlap_are_nan(self):
+        returns = np.array([[0.01, np.nan], [0.02, np.nan], [np.nan, 0.01], [np.nan, 0.03]])
+        cov, overlap = pairwise_covariance(returns)
+        assert overlap[0, 1] == 0
+        assert np.isnan(cov[0, 1])
+        assert cov[0, 0] == pytest.approx(np.var([0.01, 0.02], ddof=1))
+
+    def test_shrunk_matrix_is_positive_definite(self):
+        rng = np.random.default_rng(1)
+        returns = rng.normal(0, 0.02, size=(30, 6))
+        returns[:25, 3] = np.nan   # short history
+        returns[:, 5] = np.nan     # no history at all
+        cov, overlap = pairwise_covariance(returns)
+        shrunk = shrink_covariance(cov, overlap)
+        assert np.isfinite(shrunk).all()
+        np.testing.assert_allclose(shrunk, shrunk.T)
+        assert np.linalg.eigvalsh(shrunk).min() > 0
+
+    def test_snapshot_returns_need_both_days(self):
+        prices = np.array([[10.0], [np.nan], [12.0], [13.2]])
+        returns = snapshot_returns(prices)
+        assert np.isnan(returns[:2, 0]).all()
+        assert returns[2, 0] == pytest.approx(0.1)
+
+
+class TestWeights:
+    """Tests for the batched portfolio solvers."""
+
+    cov = np.array([[0.04, 0.006, 0.0], [0.006, 0.09, 0.0], [0.0, 0.0, 0.01]])
+
+    def test_min_variance_diagonal_is_inverse_variance(self):
+        cov = np.diag([0.01, 0.04, 0.16])
+        weights = min_variance_weights(cov, np.array([[True, True, True]]))
+        inverse = 1 / np.diag(cov)
+        np.testing.assert_allclose(weights[0], inverse / inverse.sum())
+
+    def test_min_variance_long_only_drops_negative_weights(self):
+        # Highly correlated pair where the riskier leg would be shorted
+        cov = np.array([[0.01, 0.018], [0.018, 0.04]])
+        unconstrained = min_variance_weights(cov, np.array([[True, True]]), long_only=False)
+        assert unconstrained[0, 1] < 0
+        weights = min_variance_weights(cov, np.array([[True, True]]))
+        np.testing.assert_allclose(weights[0], [1.0, 0.0])
+
+    def test_batch_rows_match_individual_solves(self):
+        masks = np.array([[True, True, False], [True, True, True]])
+        batched = risk_parity_weights(self.cov, masks)
+        single = risk_parity_weights(self.cov[:2, :2], np.array([[True, True]]))
+        np.testing.assert_allclose(batched[0, :2], single[0], atol=1e-9)
+        assert batched[0, 2] == 0.0
+
+    def test_risk_parity_equalizes_contributions(self):
+        weights = risk_parity_weights(self.cov, np.array([[True, True, True]]))[0]
+        np.testing.assert_allclose(risk_contributions(self.cov, weights), [1 / 3] * 3, atol=1e-8)
+        assert weights.sum() == pytest.approx(1.0)
+
+    def test_build_portfolios_for_several_sizes(self):
+        rng = np.random.default_rng(2)
+        prices = pd.DataFrame(100 * np.cumprod(1 + rng.normal(0, 0.01, size=(40, 6)), axis=0),
+                              columns=list('ABCDEF'))
+        prices.iloc[:30, 4] = np.nan  # E joined the screen late
+        portfolios = build_portfolios(list('ABCDEF'), prices, sizes=[2, 4, 100], lookback=20)
+        assert sorted(portfolios) == [2, 4, 6]
+        for size, df in portfolios.items():
+            assert list(df['Ticker']) == list('ABCDEF')[:size]
+            assert df['MinVar_Weight'].sum() == pytest.approx(1.0)
+            assert df['RiskParity_Weight'].sum() == pytest.approx(1.0)
+            assert (df['MinVar_Weight'] >= 0).all()
+        assert portfolios[6].loc[4, 'Observations'] == 9
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,105 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from price_adjustments import (
+    ADJUSTMENTS_FILE, AdjustmentTable, adjust_history, detect_splits, load_adjustments, ratio_label, update_table,
+)
+from snapshot_history import load_history
+
+nan = np.nan
+
+
+class TestDetectSplits:
+    """Tests for the vectorized split check."""
+
+    def test_forward_and_reverse_splits(self):
+        prices = np.array([[1000.0, 2.0, 50.0],
+                           [1010.0, 2.1, 50.0],
+                           [101.5, 20.5, 33.0],
+                           [103.0, 21.0, 34.0]])
+        caps = np.array([[1e10, 1e8, 5e9],
+                         [1.01e10, 1.05e8, 5e9],
+                         [1.015e10, 1.02e8, 3.3e9],
+                         [1.03e10, 1.05e8, 3.4e9]])
+        rows, cols, before, ratios = detect_splits(prices, caps)
+        # The third name lost a third of its value: a crash, not a split
+        assert list(zip(rows, cols, before)) == [(2, 0, 1), (2, 1, 1)]
+        assert ratios.tolist() == pytest.approx([10.0, 0.1])
+
+    def test_gaps_are_bridged_and_need_a_market_cap(self):
+        prices = np.array([[300.0, 300.0], [nan, 310.0], [100.0, 100.0]])
+        caps = np.array([[3e9, 3e9], [nan, nan], [3.1e9, 3.1e9]])
+        rows, cols, before, ratios = detect_splits(prices, caps)
+        assert list(zip(rows, cols, before)) == [(2, 0, 0), (2, 1, 0)]
+        assert ratios.tolist() == pytest.approx([3.0, 3.0])
+
+    def test_share_issuance_with_flat_price_is_not_a_split(self):
+        prices = np.array([[200.0], [195.0]])
+        caps = np.array([[1e10], [1.22e10]])     # 25% more shares, price barely moved
+        assert len(detect_splits(prices, caps)[0]) == 0
+
+    def test_ratio_labels(self):
+        assert [ratio_label(r) for r in (10.0, 1.5, 1 / 8, 5 / 4)] == ['10:1', '3:2', '1:8', '5:4']
+
+
+def write_days(data_dir, days):
+    for date, rows in days.items():
+        pd.DataFrame(rows, columns=['Ticker', 'Price', 'Market Cap']).to_csv(
+            data_dir / f'{date}.csv', sep='\t', index=False)
+
+
+DAYS = {
+    '2026-04-13': [['NFLX', 1240.0, 5.3e11], ['AAPL', 200.0, 3e12]],
+    '2026-04-14': [['NFLX', 1250.0, 5.35e11], ['AAPL', 202.0, 3.03e12]],
+    '2026-04-15': [['NFLX', 126.0, 5.4e11], ['AAPL', 204.0, 3.06e12]],
+}
+
+
+class TestAdjustmentTable:
+    """Tests for the incremental table and adjusted series."""
+
+    def test_incremental_matches_rebuild(self, tmp_path):
+        write_days(tmp_path, {d: DAYS[d] for d in list(DAYS)[:2]})
+        table = AdjustmentTable()
+        assert update_table(table, tmp_path) == []
+        table.save(tmp_path / ADJUSTMENTS_FILE)
+
+        write_days(tmp_path, DAYS)
+        table = AdjustmentTable.load(tmp_path / ADJUSTMENTS_FILE)
+        found = update_table(table, tmp_path)
+        assert [(s['date'], s['ticker'], s['label'], s['previous_date']) for s in found] == [
+            ('2026-04-15', 'NFLX', '10:1', '2026-04-14')]
+        assert table.through == '2026-04-15'
+        assert table.last['NFLX'] == ['2026-04-15', 126.0, 5.4e11]
+
+        rebuilt = AdjustmentTable()
+        update_table(rebuilt, tmp_path)
+        assert rebuilt.splits == table.splits and rebuilt.last == table.last
+        assert update_table(table, tmp_path) == []
+
+    def test_adjusted_history(self, tmp_path):
+        write_days(tmp_path, DAYS)
+        history = load_history(tmp_path, columns=['Price'])
+        adjusted = adjust_history(history, tmp_path).set_index(['Date', 'Ticker'])['Price']
+        assert adjusted.xs('NFLX', level='Ticker').tolist() == [124.0, 125.0, 126.0]
+        assert adjusted.xs('AAPL', level='Ticker').tolist() == [200.0, 202.0, 204.0]
+        assert history.loc[history['Ticker'] == 'NFLX', 'Price'].iloc[0] == 1240.0   # input untouched
+
+    def test_stale_saved_table_is_brought_up_to_date(self, tmp_path):
+        write_days(tmp_path, {d: DAYS[d] for d in list(DAYS)[:2]})
+        table = AdjustmentTable()
+        update_table(table, tmp_path)
+        table.save(tmp_path / ADJUSTMENTS_FILE)
+        write_days(tmp_path, DAYS)
+
+        loaded = load_adjustments(tmp_path)
+        assert [s['ticker'] for s in loaded.splits] == ['NFLX']
+        assert AdjustmentTable.load(tmp_path / ADJUSTMENTS_FILE).through == '2026-04-14'   # not rewritten
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,69 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from raw_archive import code_dtype, list_archive_dates, load_archive_history, read_archive, write_archive
+
+
+def raw_table(tickers, caps):
+    return pd.DataFrame({
+        'Ticker': tickers,
+        'Company': [f'{t} Corp' for t in tickers],
+        'Sector': ['Technology', np.nan, 'Technology'][:len(tickers)],
+        'Market Cap': caps,
+        'Volume': np.arange(len(tickers), dtype='int64') * 1000,
+        'ROIC': ['17.53%', np.nan, '5%'][:len(tickers)],
+        'Market_Cap_Over_500m': ['True' if c >= 5e8 else 'False' for c in caps],
+    })
+
+
+class TestRawArchive:
+    """Tests for the columnar pre-filter screen archive."""
+
+    def test_code_dtype(self):
+        assert code_dtype(3) == np.int8
+        assert code_dtype(200) == np.int16
+        assert code_dtype(40000) == np.int32
+
+    def test_roundtrip(self, tmp_path):
+        table = raw_table(['AAA', 'BBB', 'CCC'], [9e8, 1e8, np.nan])
+        path = write_archive(table, '2025-06-11', tmp_path)
+
+        assert path == tmp_path / '2025-06-11.npz'
+        assert not list(tmp_path.glob('*.tmp.npz'))
+        loaded = read_archive(path)
+        pd.testing.assert_frame_equal(loaded, table, check_dtype=False)
+        assert loaded['Market Cap'].dtype == float and loaded['Volume'].dtype == 'int64'
+        assert pd.isna(loaded.loc[1, 'Sector'])
+
+    def test_text_is_dictionary_encoded(self, tmp_path):
+        write_archive(raw_table(['AAA', 'BBB', 'CCC'], [9e8, 1e8, 7e8]), '2025-06-11', tmp_path)
+        with np.load(tmp_path / '2025-06-11.npz', allow_pickle=False) as archive:
+            columns = list(archive['columns'])
+            index = columns.index('Market_Cap_Over_500m')
+            assert archive[f'c{index}.categories'].tolist() == ['False', 'True']
+            assert archive[f'c{index}.codes'].tolist() == [1, 0, 1]
+
+    def test_column_subset_and_history(self, tmp_path):
+        write_archive(raw_table(['AAA', 'BBB'], [9e8, 1e8]), '2025-06-10', tmp_path)
+        write_archive(raw_table(['AAA', 'CCC'], [9.5e8, 6e8]), '2025-06-11', tmp_path)
+
+        assert list_archive_dates(tmp_path) == ['2025-06-10', '2025-06-11']
+        assert read_archive(tmp_path / '2025-06-10.npz', ['Market Cap', 'Ticker', 'Missing']).columns.tolist() \
+            == ['Market Cap', 'Ticker']
+
+        history = load_archive_history(tmp_path, ['Ticker', 'Market Cap'])
+        assert history.columns.tolist() == ['Date', 'Ticker', 'Market Cap']
+        assert history['Ticker'].tolist() == ['AAA', 'BBB', 'AAA', 'CCC']
+        # Replaying a different filter sees the rows the published screen dropped
+        assert history.loc[history['Market Cap'] >= 5e8, 'Ticker'].tolist() == ['AAA', 'AAA', 'CCC']
+
+        assert load_archive_history(tmp_path, dates=['2025-06-11'])['Date'].unique().tolist() == ['2025-06-11']
+        assert load_archive_history(tmp_path / 'empty', ['Ticker']).columns.tolist() == ['Date', 'Ticker']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
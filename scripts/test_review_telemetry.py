@@ -0,0 +1,75 @@
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from review_telemetry import ReviewTelemetry, format_summary_table, load_records, percentile, summarize
+
+
+class TestPercentile:
+    def test_nearest_rank(self):
+        values = [5.0, 1.0, 3.0, 2.0, 4.0]
+        assert percentile(values, 50) == 3.0
+        assert percentile(values, 95) == 5.0
+        assert percentile(values, 0) == 1.0
+
+    def test_ignores_missing(self):
+        assert percentile([None, 2.0], 50) == 2.0
+        assert percentile([], 50) is None
+        assert percentile([None], 50) is None
+
+
+class TestReviewTelemetry:
+    def make(self, tmp_path):
+        telemetry = ReviewTelemetry(tmp_path / 'summary' / 'telemetry.jsonl', run_id='run')
+        telemetry.add(telemetry.new_record(date='2025-06-11', latency=1.23456, ttfb=0.5, prompt_tokens=100,
+                                           completion_tokens=50, cost=0.001, parse='direct', returned=5))
+        telemetry.add(telemetry.new_record(date='2025-06-11', latency=3.0, prompt_tokens=80,
+                                           retries=[{'attempt': 1, 'reason': 'ReadTimeout: slow'}],
+                                           error='StreamStalled: no data', parse='failed'))
+        return telemetry
+
+    def test_add_rounds_floats(self, tmp_path):
+        telemetry = self.make(tmp_path)
+        assert telemetry.records[0]['latency'] == 1.235
+        assert telemetry.records[0]['run_id'] == 'run'
+
+    def test_summary(self, tmp_path):
+        summary = self.make(tmp_path).summary()
+        assert summary['requests'] == 2 and summary['failed'] == 1
+        assert summary['retries'] == 1 and summary['retry_reasons'] == {'ReadTimeout': 1}
+        assert summary['prompt_tokens'] == 180 and summary['completion_tokens'] == 50
+        assert summary['latency_p50'] == 1.235 and summary['latency_p95'] == 3.0
+        assert summary['parse'] == {'direct': 1, 'failed': 1}
+
+    def test_summary_table(self, tmp_path):
+        table = format_summary_table(self.make(tmp_path).summary())
+        assert table.startswith('| Metric | Value |')
+        assert '| Requests | 2 (1 failed) |' in table
+        assert '| Retries | 1 (ReadTimeout 1) |' in table
+        assert '| Cost | $0.0010 |' in table
+        assert '| First byte / first result (p50) | 0.5s / n/a |' in table
+
+    def test_empty_summary(self):
+        summary = summarize([])
+        assert summary['requests'] == 0
+        assert '| Latency p50 / p95 | n/a / n/a |' in format_summary_table(summary)
+
+    def test_write_appends_jsonl(self, tmp_path):
+        telemetry = self.make(tmp_path)
+        assert telemetry.write()
+        assert telemetry.write()
+        records = load_records(telemetry.path)
+        assert len(records) == 4
+        assert records[1]['retries'][0]['reason'] == 'ReadTimeout: slow'
+        assert not ReviewTelemetry(tmp_path / 'other.jsonl').write()
+
+    def test_load_skips_bad_lines(self, tmp_path):
+        path = tmp_path / 'telemetry.jsonl'
+        path.write_text('{"date": "2025-06-11"}\n{not json\n')
+        assert load_records(path) == [{'date': '2025-06-11'}]
+        assert load_records(tmp_path / 'missing.jsonl') == []
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
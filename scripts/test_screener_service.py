@@ -0,0 +1,154 @@
+import pytest
+import http.client
+import json
+import threading
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from screener_service import ColumnarTable, ScreenerStore, create_server
+from load_test_service import format_report, percentile
+
+
+def write_snapshot(data_dir, date, rows):
+    pd.DataFrame(rows).to_csv(data_dir / f"{date}.csv", sep='\t', index=False)
+
+
+ROWS = [
+    {'Ticker': 'AAPL', 'Sector': 'Technology', 'Industry': 'Consumer Electronics', 'Price': 175.0, 'PEG': 1.5, 'Investor_Score': 80},
+    {'Ticker': 'MU', 'Sector': 'Technology', 'Industry': 'Semiconductors', 'Price': 90.0, 'PEG': 0.5, 'Investor_Score': 100},
+    {'Ticker': 'KGC', 'Sector': 'Basic Materials', 'Industry': 'Gold', 'Price': 20.0, 'PEG': None, 'Investor_Score': 90},
+    {'Ticker': 'NVDA', 'Sector': 'Technology', 'Industry': 'Semiconductors', 'Price': 130.0, 'PEG': 0.9, 'Investor_Score': 100},
+]
+
+
+class TestColumnarTable:
+    """Tests for the in-memory indexes."""
+
+    @pytest.fixture
+    def table(self):
+        return ColumnarTable(pd.DataFrame(ROWS))
+
+    def test_hash_lookup_is_case_insensitive(self, table):
+        rows = table.lookup('Sector', 'technology')
+        assert [r['Ticker'] for r in table.records(rows)] == ['AAPL', 'MU', 'NVDA']
+
+    def test_lookup_miss_returns_empty(self, table):
+        assert len(table.lookup('Ticker', 'TSLA')) == 0
+
+    def test_value_range_excludes_nan_and_is_sorted(self, table):
+        rows = table.value_range('PEG', 0.5, 1.5)
+        assert [r['Ticker'] for r in table.records(rows)] == ['MU', 'NVDA', 'AAPL']
+
+    def test_open_ended_range(self, table):
+        rows = table.value_range('Price', low=100)
+        assert [r['Ticker'] for r in table.records(rows)] == ['NVDA', 'AAPL']
+
+    def test_top_descending_and_ascending(self, table):
+        assert [r['Ticker'] for r in table.records(table.top('Price', 2))] == ['AAPL', 'NVDA']
+        assert [r['Ticker'] for r in table.records(table.top('Price', 1, ascending=True))] == ['KGC']
+
+    def test_records_are_json_safe(self, table):
+        record = table.records(table.lookup('Ticker', 'KGC'))[0]
+        assert record['PEG'] is None
+        json.dumps(record)
+
+
+class TestScreenerService:
+    """Tests for the HTTP endpoints and hot reload."""
+
+    @pytest.fixture
+    def data_dir(self, tmp_path):
+        write_snapshot(tmp_path, '2026-01-02', ROWS[:3])
+        write_snapshot(tmp_path, '2026-01-05', ROWS)
+        return tmp_path
+
+    @pytest.fixture
+    def server(self, data_dir):
+        store = ScreenerStore(data_dir)
+        store.load()
+        server = create_server(store, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        yield server
+        server.shutdown()
+        server.server_close()
+
+    def get(self, server, path):
+        conn = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=5)
+        conn.request('GET', path)
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+        conn.close()
+        return response.status, payload
+
+    def test_ticker_lookup_defaults_to_latest(self, server):
+        status, payload = self.get(server, '/stocks/nvda')
+        assert status == 200
+        assert payload['date'] == '2026-01-05'
+        assert payload['result']['Investor_Score'] == 100
+
+    def test_ticker_lookup_for_specific_date(self, server):
+        status, _ = self.get(server, '/stocks/NVDA?date=2026-01-02')
+        assert status == 404
+
+    def test_pagination(self, server):
+        status, payload = self.get(server, '/sectors/Technology?page=2&page_size=2&fields=Ticker')
+        assert status == 200
+        assert payload['total'] == 3
+        assert payload['results'] == [{'Ticker': 'NVDA'}]
+
+    def test_top_by_metric(self, server):
+        _, payload = self.get(server, '/top?metric=Price&n=2&fields=Ticker,Price')
+        assert [r['Ticker'] for r in payload['results']] == ['AAPL', 'NVDA']
+        _, payload = self.get(server, '/top?metric=Price&n=-5&fields=Ticker')
+        assert [r['Ticker'] for r in payload['results']] == ['AAPL']
+
+    def test_range_by_score(self, server):
+        _, payload = self.get(server, '/range?metric=Investor_Score&min=90&fields=Ticker')
+        assert [r['Ticker'] for r in payload['results']] == ['KGC', 'MU', 'NVDA']
+
+    def test_history(self, server):
+        _, payload = self.get(server, '/history/AAPL?fields=Price')
+        assert payload['results'] == [
+            {'Date': '2026-01-02', 'Price': 175.0},
+            {'Date': '2026-01-05', 'Price': 175.0},
+        ]
+        _, payload = self.get(server, '/history/AAPL?fields=Adj_Price')
+        assert [r['Adj_Price'] for r in payload['results']] == [175.0, 175.0]
+
+    def test_bad_metric_is_400(self, server):
+        status, payload = self.get(server, '/top?metric=Company')
+        assert status == 400
+        assert 'error' in payload
+
+    def test_hot_reload_picks_up_new_snapshot(self, server, data_dir):
+        store = server.RequestHandlerClass.store
+        assert store.reload_if_changed() is False
+
+        write_snapshot(data_dir, '2026-01-06', ROWS[1:2])
+        assert store.reload_if_changed() is True
+
+        _, payload = self.get(server, '/health')
+        assert payload['latest'] == '2026-01-06'
+        status, _ = self.get(server, '/stocks/AAPL')
+        assert status == 404
+
+
+class TestLoadTestReport:
+    """Tests for the latency percentile helper."""
+
+    def test_percentiles(self):
+        samples = list(range(1, 101))
+        assert percentile(samples, 50) == 50
+        assert percentile(samples, 99) == 99
+        assert percentile([5.0], 99) == 5.0
+
+    def test_report_shows_endpoints_without_samples(self):
+        report = format_report({'stocks': [1.0, 3.0], 'top': []}, elapsed=1.0)
+        assert report.splitlines()[2].split() == ['top', '0', 'n/a', 'n/a', 'n/a']
+        assert report.splitlines()[3].split()[:2] == ['all', '2']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
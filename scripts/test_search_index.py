@@ -0,0 +1,82 @@
+import pytest
+import json
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from search_index import SearchIndex, add_to_ranges, trigrams, update_index
+
+
+def write_snapshot(data_dir, date, rows):
+    """Write a minimal tab-separated snapshot the way fin.py does."""
+    pd.DataFrame(rows, columns=['Ticker', 'Company', 'Sector', 'Industry', 'Price']).to_csv(
+        data_dir / f"{date}.csv", sep='\t', index=False)
+
+
+KGC = ['KGC', 'Kinross Gold Corp', 'Basic Materials', 'Gold', 10.0]
+MU = ['MU', 'Micron Technology Inc', 'Technology', 'Semiconductors', 90.0]
+AMD = ['AMD', 'Advanced Micro Devices Inc', 'Technology', 'Semiconductors', 150.0]
+
+
+class TestSearchIndex:
+    """Tests for the sharded static search index."""
+
+    @pytest.fixture
+    def data_dir(self, tmp_path):
+        write_snapshot(tmp_path, '2026-01-02', [KGC, MU])
+        write_snapshot(tmp_path, '2026-01-05', [KGC])
+        write_snapshot(tmp_path, '2026-01-06', [MU, AMD])
+        write_snapshot(tmp_path, '2026-01-07', [KGC, MU, AMD])
+        return tmp_path
+
+    def test_ranges_compress_consecutive_dates(self):
+        ranges = []
+        for index in [0, 1, 3, 4, 5]:
+            add_to_ranges(ranges, index)
+        assert ranges == [[0, 1], [3, 5]]
+
+    def test_trigrams_ignore_case_and_punctuation(self):
+        assert trigrams('A.B-C') == {'a b', ' b ', 'b c'}
+
+    def test_substring_and_prefix_queries(self, data_dir):
+        update_index(data_dir)
+        index = SearchIndex.load(data_dir / 'search')
+
+        hits = index.search('kinross')
+        assert [h['Ticker'] for h in hits] == ['KGC']
+        assert hits[0]['dates'] == ['2026-01-02', '2026-01-05', '2026-01-07']
+
+        assert [h['Ticker'] for h in index.search('conduct')] == ['AMD', 'MU']
+        # Exact ticker beats the "mu" inside other words
+        assert index.search('mu')[0]['Ticker'] == 'MU'
+        assert [h['Ticker'] for h in index.search('a')] == ['AMD']
+        assert index.search('xyz') == []
+
+    def test_incremental_update_reads_only_new_dates(self, data_dir):
+        update_index(data_dir)
+        manifest = json.loads((data_dir / 'search' / 'manifest.json').read_text())
+        assert manifest['dates'][-1] == '2026-01-07'
+
+        _, added, written = update_index(data_dir)
+        assert (added, written) == (0, [])
+
+        write_snapshot(data_dir, '2026-01-08', [KGC])
+        index, added, written = update_index(data_dir)
+        assert added == 1
+        assert 'grams/k.json' not in written  # no posting changed
+        assert index.describe(index.doc_ids['KGC'])['dates'][-2:] == ['2026-01-07', '2026-01-08']
+
+        reloaded = SearchIndex.load(data_dir / 'search')
+        assert reloaded.search('kinross')[0]['dates'] == index.describe(index.doc_ids['KGC'])['dates']
+
+    def test_backfilled_date_triggers_full_rebuild(self, data_dir):
+        update_index(data_dir)
+        write_snapshot(data_dir, '2026-01-03', [AMD])
+        index, added, _ = update_index(data_dir)
+        assert added == 5
+        assert index.describe(index.doc_ids['AMD'])['dates'][0] == '2026-01-03'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,76 @@
+import pytest
+import json
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from snapshot_history import normalize_snapshot
+from similar_stocks import build_similar, nearest_neighbors, standardize, write_similar
+
+nan = np.nan
+
+
+def brute_force(features, k, min_shared):
+    """Reference kNN computed pair by pair."""
+    z = standardize(features)
+    result = []
+    for i in range(len(z)):
+        diff = z[i] - z
+        shared = (~np.isnan(diff)).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            dist = np.sqrt(np.nansum(diff ** 2, axis=1) / shared)
+        dist[shared < min_shared] = np.inf
+        dist[i] = np.inf
+        result.append(np.sort(dist)[:k])
+    return np.array(result)
+
+
+class TestSimilarStocks:
+    """Tests for the fundamentals nearest-neighbour index."""
+
+    def test_standardize_is_robust_and_clipped(self):
+        values = np.array([[1.0], [2.0], [3.0], [4.0], [1000.0], [nan]])
+        z = standardize(values)
+        assert z[2, 0] == 0.0
+        assert z[3, 0] == pytest.approx(1 / 1.4826)
+        assert z[4, 0] == 3.0
+        assert np.isnan(z[5, 0])
+
+    def test_blocked_distances_match_brute_force(self):
+        rng = np.random.default_rng(1)
+        features = rng.normal(size=(50, 6))
+        features[rng.random(features.shape) < 0.2] = nan
+        indices, distances = nearest_neighbors(features, k=4, block_size=7)
+        np.testing.assert_allclose(distances, brute_force(features, 4, 3), rtol=1e-4)
+        assert (indices != np.arange(50)[:, None]).all()
+
+    def test_rows_without_shared_metrics_have_no_neighbours(self):
+        features = np.array([[1.0, 2.0], [1.1, 2.1], [nan, nan], [5.0, 9.0]])
+        indices, distances = nearest_neighbors(features, k=2)
+        assert indices[2].tolist() == [-1, -1]
+        assert np.isinf(distances[2]).all()
+        assert indices[0, 0] == 1
+
+    def test_sidecar_lists_nearest_first(self, tmp_path):
+        snapshot = pd.DataFrame({
+            'Ticker': ['A', 'B', 'C', 'D'],
+            'P/E': [10.0, 11.0, 40.0, 41.0],
+            'ROE': [0.10, 0.11, 0.40, 0.39],
+            'ROIC': ['10.00%', '11.00%', '40.00%', '-'],
+        })
+        doc = build_similar(normalize_snapshot(snapshot), k=2)
+        assert doc['features'] == ['P/E', 'ROE', 'ROIC']
+        assert [peer for peer, _ in doc['neighbors']['A']][0] == 'B'
+        assert [peer for peer, _ in doc['neighbors']['D']][0] == 'C'
+
+        snapshot.to_csv(tmp_path / '2026-01-02.csv', sep='\t', index=False)
+        target = write_similar('2026-01-02', k=1, data_dir=tmp_path)
+        written = json.loads(target.read_text())
+        assert written['date'] == '2026-01-02'
+        assert written['neighbors']['C'] == [['D', pytest.approx(written['neighbors']['D'][0][1])]]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,63 @@
+import pytest
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from snapshot_history import build_panel, list_snapshot_dates, load_history, load_snapshot
+
+
+def write_snapshot(data_dir, date, rows, fwd_header='Forward P/E'):
+    """Write a minimal tab-separated snapshot the way fin.py does."""
+    df = pd.DataFrame(rows).rename(columns={'Forward P/E': fwd_header})
+    df.to_csv(data_dir / f"{date}.csv", sep='\t', index=False)
+
+
+class TestSnapshotHistory:
+    """Tests for the snapshot history loader."""
+
+    @pytest.fixture
+    def data_dir(self, tmp_path):
+        write_snapshot(tmp_path, '2026-01-02', [
+            {'Ticker': 'AAPL', 'Sector': 'Technology', 'Price': 100.0, 'ROIC': '12.50%', 'Forward P/E': 20.0},
+            {'Ticker': 'KGC', 'Sector': 'Basic Materials', 'Price': 20.0, 'ROIC': '8.00%', 'Forward P/E': '-'},
+        ], fwd_header='Fwd P/E')
+        write_snapshot(tmp_path, '2026-01-05', [
+            {'Ticker': 'AAPL', 'Sector': 'Technology', 'Price': 110.0, 'ROIC': '13.00%', 'Forward P/E': 21.0},
+            {'Ticker': 'MU', 'Sector': 'Technology', 'Price': 90.0, 'ROIC': '20.00%', 'Forward P/E': 15.0},
+        ])
+        (tmp_path / 'latest.csv').write_text('ignored')
+        return tmp_path
+
+    def test_lists_only_dated_snapshots(self, data_dir):
+        """latest.csv and other files are not treated as history."""
+        assert list_snapshot_dates(data_dir) == ['2026-01-02', '2026-01-05']
+
+    def test_percent_strings_become_fractions(self, data_dir):
+        """ROIC is published as '12.50%' and is normalized to 0.125."""
+        df = load_snapshot('2026-01-02', data_dir)
+        assert df.loc[df['Ticker'] == 'AAPL', 'ROIC'].iloc[0] == pytest.approx(0.125)
+
+    def test_header_aliases_are_merged(self, data_dir):
+        """The old 'Fwd P/E' header lands in the same column as 'Forward P/E'."""
+        history = load_history(data_dir)
+        assert 'Fwd P/E' not in history.columns
+        assert history['Forward P/E'].notna().sum() == 3  # '-' becomes NaN
+
+    def test_column_subset(self, data_dir):
+        """Requesting columns reads only those plus Date/Ticker."""
+        history = load_history(data_dir, columns=['Price'])
+        assert list(history.columns) == ['Date', 'Ticker', 'Price']
+        assert len(history) == 4
+
+    def test_panel_has_nan_when_ticker_absent(self, data_dir):
+        """Panels are dates x tickers with NaN for days outside the screen."""
+        panel = build_panel(load_history(data_dir, columns=['Price']), 'Price')
+        assert list(panel.index) == ['2026-01-02', '2026-01-05']
+        assert panel.loc['2026-01-05', 'AAPL'] == 110.0
+        assert pd.isna(panel.loc['2026-01-02', 'MU'])
+        assert pd.isna(panel.loc['2026-01-05', 'KGC'])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,88 @@
+import pytest
+import gzip
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from summary_history import SummaryHistory, rebuild_history, shard_key, update_history
+
+
+def stock(ticker, description='d'):
+    return {'ticker': ticker, 'description': f'{ticker} {description}',
+            'latest_news': f'{ticker} news', 'why_selected': f'{ticker} why'}
+
+
+PLACEHOLDER = {'ticker': 'ZZZ', 'description': 'Analysis unavailable', 'latest_news': '', 'why_selected': ''}
+
+
+def write_summary(summary_dir, date, stocks):
+    summary_dir.mkdir(parents=True, exist_ok=True)
+    (summary_dir / f'{date}.json').write_text(json.dumps({'date': date, 'top_stocks': stocks}, indent=2))
+
+
+class TestSummaryHistory:
+    """Tests for the sharded per-ticker summary history index."""
+
+    def test_shard_key(self):
+        assert shard_key('mu') == 'M'
+        assert shard_key('^VIX') == '_'
+
+    def test_incremental_update(self, tmp_path):
+        update_history(tmp_path, '2026-01-02', [stock('MU'), stock('AMD'), PLACEHOLDER])
+        written = update_history(tmp_path, '2026-01-05', [stock('MU', 'later')])
+
+        assert written == ['M.json.gz', 'manifest.json']      # AMD's shard untouched
+        history = SummaryHistory.load(tmp_path / 'history')
+        assert [e['date'] for e in history.ticker('MU')] == ['2026-01-02', '2026-01-05']
+        assert history.ticker('MU')[1]['description'] == 'MU later'
+        assert history.ticker('AMD')[0]['why_selected'] == 'AMD why'
+        assert history.ticker('ZZZ') == []
+        assert history.dates == {'2026-01-02': ['MU', 'AMD'], '2026-01-05': ['MU']}
+
+    def test_rerun_of_a_day_replaces_it(self, tmp_path):
+        update_history(tmp_path, '2026-01-02', [stock('MU'), stock('AMD')])
+        update_history(tmp_path, '2026-01-02', [stock('MU', 'again')])
+
+        history = SummaryHistory.load(tmp_path / 'history')
+        assert [e['description'] for e in history.ticker('MU')] == ['MU again']
+        assert history.ticker('AMD') == []
+        assert not (tmp_path / 'history' / 'A.json.gz').exists()
+
+    def test_shards_are_compact_and_deterministic(self, tmp_path):
+        update_history(tmp_path, '2026-01-02', [stock('MU')])
+        raw = (tmp_path / 'history' / 'M.json.gz').read_bytes()
+        assert json.loads(gzip.decompress(raw)) == {
+            'MU': [['2026-01-02', 'MU d', 'MU news', 'MU why']]}
+
+        update_history(tmp_path / 'again', '2026-01-02', [stock('MU')])
+        assert (tmp_path / 'again' / 'history' / 'M.json.gz').read_bytes() == raw
+
+    def test_rebuild_matches_incremental(self, tmp_path):
+        days = [('2026-01-02', [stock('MU'), stock('KGC')]), ('2026-01-05', [stock('KGC', 'x'), PLACEHOLDER]),
+                ('2026-01-06', [stock('MU', 'y')])]
+        for date, stocks in days:
+            write_summary(tmp_path / 'built', date, stocks)
+            update_history(tmp_path / 'incremental', date, stocks)
+        (tmp_path / 'built' / 'latest.json').write_text('{}')
+
+        history = rebuild_history(tmp_path / 'built')
+        assert sorted(history.save()) == ['K.json.gz', 'M.json.gz', 'manifest.json']
+        for name in ['K.json.gz', 'M.json.gz', 'manifest.json']:
+            assert ((tmp_path / 'built' / 'history' / name).read_bytes()
+                    == (tmp_path / 'incremental' / 'history' / name).read_bytes())
+
+        assert rebuild_history(tmp_path / 'built').save() == ['manifest.json']   # nothing changed
+
+    def test_rebuild_drops_removed_summaries(self, tmp_path):
+        write_summary(tmp_path, '2026-01-02', [stock('MU'), stock('AMD')])
+        rebuild_history(tmp_path).save()
+        write_summary(tmp_path, '2026-01-02', [stock('MU')])
+
+        rebuild_history(tmp_path).save()
+        assert not (tmp_path / 'history' / 'A.json.gz').exists()
+        assert SummaryHistory.load(tmp_path / 'history').shard_hashes.keys() == {'M'}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
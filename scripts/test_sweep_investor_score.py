@@ -0,0 +1,105 @@
+import pytest
+import json
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+import sweep_investor_score as sweep
+
+
+@pytest.fixture
+def panels():
+    """Four dates x three tickers where the high-ROE name always wins."""
+    nan = np.nan
+    prices = np.array([[10.0, 10.0, 10.0], [11.0, 10.0, 9.9], [12.1, 10.0, 9.8], [13.31, 10.0, nan]])
+    fwd = np.full_like(prices, nan)
+    fwd[:-1] = prices[1:] / prices[:-1] - 1
+    roe = np.array([[0.4, 0.12, 0.05]] * 4)
+    roe[3, 2] = nan
+    return {
+        'PEG': np.full((4, 3), 1.5),
+        'ROE': roe,
+        'Profit M': np.full((4, 3), 0.15),
+        'EPS Next 5Y': np.full((4, 3), 0.15),
+        'scores': np.where(np.isnan(prices), nan, 50.0),
+        'ranks': np.tile([0.0, 1.0, 2.0], (4, 1)),
+        'fwd': fwd,
+    }
+
+
+class TestParameterSweep:
+    """Tests for the Investor_Score parameter sweep."""
+
+    def test_grid_starts_with_current_rules(self):
+        grid = sweep.parameter_grid()
+        assert len(grid) == (3 * 3) ** 4
+        rules = sweep.describe(grid[0])
+        for metric, rule in sweep.DEFAULT_RULES.items():
+            assert rules[metric]['cuts'] == list(rule['cuts'])
+            assert rules[metric]['points'] == list(rule['points'])
+
+    def test_evaluate_in_process(self, panels):
+        blocks, spec = sweep.share_panels(panels)
+        try:
+            sweep.attach_shared_panels(spec, top_n=1)
+            result = sweep.evaluate(sweep.parameter_grid()[0])
+        finally:
+            sweep._shared.clear()
+            for block in blocks:
+                block.close()
+                block.unlink()
+        # Top-1 is the ROE winner, returning 10% per period
+        assert result['mean_return'] == pytest.approx(0.1, rel=1e-3)
+        assert result['mean_excess'] > 0
+        assert result['hit_rate'] == 1.0
+        assert result['mean_ic'] == pytest.approx(1.0)
+
+    def test_sweep_streams_and_resumes(self, panels, tmp_path):
+        out = tmp_path / 'sweep.jsonl'
+        assert sweep.run_sweep(panels, out, workers=2, top_n=1, chunk_size=4, limit=10) == 10
+        assert sweep.completed_ids(out) == set(range(10))
+
+        # Simulate an interrupted write, then resume with a bigger limit
+        with open(out, 'a') as f:
+            f.write('{"id": 99, "combo"')
+        assert sweep.run_sweep(panels, out, workers=2, top_n=1, chunk_size=4, limit=15) == 5
+        assert sweep.completed_ids(out) == set(range(15))
+
+    def test_resume_refuses_other_settings(self, panels, tmp_path):
+        out = tmp_path / 'sweep.jsonl'
+        assert sweep.run_sweep(panels, out, workers=1, top_n=1, limit=3) == 3
+        assert sweep.read_settings(out)['top_n'] == 1
+
+        with pytest.raises(ValueError, match='top_n'):
+            sweep.run_sweep(panels, out, workers=1, top_n=2, limit=5)
+        changed = dict(panels, fwd=panels['fwd'] * 2)
+        with pytest.raises(ValueError, match='panels'):
+            sweep.run_sweep(changed, out, workers=1, top_n=1, limit=5)
+        assert sweep.completed_ids(out) == {0, 1, 2}
+        assert [r['id'] for r in sweep.best_results(out, n=1)][-1] == 0
+
+    def test_best_results_include_current_rules(self, tmp_path):
+        out = tmp_path / 'sweep.jsonl'
+        rows = [{'id': i, 'combo': [], 'mean_excess': i / 100, 'mean_ic': None} for i in range(5)]
+        out.write_text("\n".join(json.dumps(r) for r in rows) + "\n")
+        best = sweep.best_results(out, n=2)
+        assert [r['id'] for r in best] == [4, 3, 0]
+
+    def test_loaded_forward_returns_are_split_adjusted(self, tmp_path):
+        # B splits 10:1 on the last day while its market cap stays continuous
+        days = {'2026-02-02': ([100.0, 50.0], [1e10, 5.0e9]),
+                '2026-02-03': ([101.0, 50.5], [1.01e10, 5.05e9]),
+                '2026-02-04': ([102.0, 5.1], [1.02e10, 5.1e9])}
+        for date, (prices, caps) in days.items():
+            pd.DataFrame({
+                'Ticker': ['A', 'B'], 'Price': prices, 'Market Cap': caps, 'Investor_Score': [60.0, 40.0],
+                'PEG': 1.0, 'ROE': 0.2, 'Profit M': 0.1, 'EPS Next 5Y': 0.2,
+            }).to_csv(tmp_path / f"{date}.csv", sep='\t', index=False)
+        panels = sweep.load_sweep_panels(tmp_path)
+        assert panels['fwd'][:2, 1] == pytest.approx([0.01, 51.0 / 50.5 - 1])
+        assert np.isnan(panels['fwd'][2]).all()
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,104 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from validate_snapshot import check_row_count, check_schema, validate
+
+DATES = [f"2026-01-{d:02d}" for d in range(5, 17)]
+
+
+def write_history(data_dir, overrides=None, drop_columns=(), rows=None):
+    """Twelve snapshots of ten steadily drifting tickers; the last one can be altered."""
+    rng = np.random.default_rng(3)
+    tickers = [f"T{i}" for i in range(10)]
+    for day, date in enumerate(DATES):
+        df = pd.DataFrame({
+            'Ticker': tickers,
+            'Market Cap': 1e9 * (1 + np.arange(10)) * (1 + 0.01 * day + rng.normal(0, 0.005, 10)),
+            'Price': 50 * (1 + 0.01 * day + rng.normal(0, 0.01, 10)),
+            'ROE': 0.2 + rng.normal(0, 0.002, 10),
+            'ROIC': [f"{v:.2f}%" for v in 15 + rng.normal(0, 0.1, 10)],
+            'RSI': 55 + rng.normal(0, 2, 10),
+        })
+        if date == DATES[-1]:
+            for (ticker, column), value in (overrides or {}).items():
+                df.loc[df['Ticker'] == ticker, column] = value
+            df = df.drop(columns=list(drop_columns))
+            if rows is not None:
+                df = df.head(rows)
+        df.to_csv(data_dir / f"{date}.csv", sep='\t', index=False)
+
+
+class TestValidateSnapshot:
+    """Tests for the pre-publish anomaly gate."""
+
+    def test_clean_history_passes(self, tmp_path):
+        write_history(tmp_path)
+        report = validate(DATES[-1], tmp_path)
+        assert report['ok']
+        assert [i for i in report['issues'] if i['severity'] == 'error'] == []
+
+    def test_hundredfold_market_cap_jump_blocks(self, tmp_path):
+        write_history(tmp_path, overrides={('T3', 'Market Cap'): 4e11})
+        report = validate(DATES[-1], tmp_path)
+        assert not report['ok']
+        errors = [i for i in report['issues'] if i['severity'] == 'error']
+        assert [(i['ticker'], i['column']) for i in errors] == [('T3', 'Market Cap')]
+
+    def test_rescaled_percentage_column_blocks(self, tmp_path):
+        write_history(tmp_path)
+        df = pd.read_csv(tmp_path / f"{DATES[-1]}.csv", sep='\t')
+        df['ROE'] = df['ROE'] * 100
+        df.to_csv(tmp_path / f"{DATES[-1]}.csv", sep='\t', index=False)
+        report = validate(DATES[-1], tmp_path)
+        assert not report['ok']
+        assert any(i['check'] == 'column_shift' and i['column'] == 'ROE' for i in report['issues'])
+
+    def test_missing_column_and_row_drop_block(self, tmp_path):
+        write_history(tmp_path, drop_columns=['RSI'], rows=4)
+        report = validate(DATES[-1], tmp_path)
+        checks = {i['check'] for i in report['issues'] if i['severity'] == 'error'}
+        assert checks == {'schema', 'row_count'}
+
+    def test_split_warns_but_price_only_corruption_blocks(self, tmp_path):
+        write_history(tmp_path)
+        df = pd.read_csv(tmp_path / f"{DATES[-1]}.csv", sep='\t')
+        df.loc[df['Ticker'] == 'T0', 'Price'] /= 10
+        # T5's price is quoted in cents: no split ratio moves the share count that far
+        df.loc[df['Ticker'] == 'T5', 'Price'] *= 100
+        df.to_csv(tmp_path / f"{DATES[-1]}.csv", sep='\t', index=False)
+        report = validate(DATES[-1], tmp_path)
+
+        errors = [(i['ticker'], i['column']) for i in report['issues'] if i['severity'] == 'error']
+        assert ('T0', 'Price') not in errors
+        assert errors == [('T5', 'Price')]
+        splits = [i for i in report['issues'] if i['check'] == 'split']
+        assert [(i['severity'], i['ticker'], i['ratio']) for i in splits] == [('warning', 'T0', 10.0)]
+        assert '10:1 split' in splits[0]['message']
+
+        df.loc[df['Ticker'] == 'T5', 'Price'] /= 100
+        df.to_csv(tmp_path / f"{DATES[-1]}.csv", sep='\t', index=False)
+        assert validate(DATES[-1], tmp_path)['ok']
+
+    def test_schema_and_row_count_helpers(self):
+        today = pd.DataFrame({'Ticker': ['A'], 'PEG': [np.nan], 'New': [1.0]})
+        previous = pd.DataFrame({'Ticker': ['A'], 'PEG': [1.2]})
+        issues = check_schema(['Ticker', 'PEG', 'New'], ['Ticker', 'PEG'], today, previous)
+        assert [(i['severity'], i['message'].split(':')[0]) for i in issues] == [
+            ('warning', 'New columns'), ('error', 'PEG is empty or no longer numeric'),
+        ]
+        assert check_row_count(100, 90) == []
+        assert check_row_count(0, 90)[0]['severity'] == 'error'
+
+    def test_first_snapshot_has_nothing_to_compare(self, tmp_path):
+        write_history(tmp_path)
+        assert validate(DATES[0], tmp_path) == {
+            'date': DATES[0], 'previous_date': None, 'issues': [], 'ok': True,
+        }
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Snapshot Validation Gate
+Checks a freshly written snapshot before it is published: schema and
+row-count drift against the previous day, and robust z-scores of each
+ticker's day-over-day changes against its own recent history. Prices,
+market caps and volumes are compared as log ratios; other metrics as level
+changes. Metrics are checked together on a dense dates x tickers x metrics
+array. A Price move at a split ratio whose implied share count moved to
+match, with Market Cap continuous, is reported as a split warning rather
+than blocking. Exits non-zero with a report when anything blocks publishing.
+
+Usage: python scripts/validate_snapshot.py [--date YYYY-MM-DD] [--report report.json]
+"""
+
+import argparse
+import json
+import sys
+import time
+import warnings
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from price_adjustments import detect_splits, ratio_label
+from snapshot_history import DATA_DIR, TEXT_COLUMNS, list_snapshot_dates, load_history, read_snapshot
+
+LOOKBACK = 20                 # previous snapshots used for each ticker's change distribution
+LOG_METRICS = ['Market Cap', 'Price', 'Volume']
+SPLIT_METRICS = ['Price', 'Volume']       # per-share metrics a split rescales
+LEVEL_METRICS = [
+    'ROA', 'ROE', 'ROIC', 'Gross M', 'Oper M', 'Profit M', 'P/E', 'Forward P/E', 'PEG', 'P/S', 'P/B',
+    'EPS This Y', 'EPS Next Y', 'EPS Past 5Y', 'EPS Next 5Y', 'Sales Past 5Y', 'Dividend',
+    'SMA20', 'SMA50', 'SMA200', '52W High', '52W Low', 'Change', 'RSI', 'Beta',
+]
+
+Z_WARNING = 6.0
+Z_ERROR = 10.0
+MAD_FLOOR = {'log': 0.01, 'level': 0.01}       # minimum robust scale of a daily change
+LEVEL_RELATIVE_FLOOR = 0.05                     # ... and, for level metrics, of the previous value
+MIN_LOG_ERROR = np.log(4.0)                     # a 4x move before a log metric can block
+MIN_LEVEL_ERROR = 1.0                           # and at least this (and an order of magnitude) for the rest
+LEVEL_ERROR_MULTIPLE = 9.0
+COLUMN_SHIFT_SHARE = 0.5                        # share of tickers past Z_ERROR that marks a column-wide shift
+ROW_COUNT_DROP = 0.5                            # losing this share of rows blocks; smaller drifts warn
+ROW_COUNT_DRIFT = 0.4
+MIN_HISTORY = 5                                 # past changes a ticker needs for its own distribution
+MIN_OVERLAP = 10                                # tickers with history before column shifts count
+
+
+def issue(severity: str, check: str, message: str, **details) -> Dict:
+    return {'severity': severity, 'check': check, 'message': message, **details}
+
+
+def check_schema(today_columns: List[str], previous_columns: List[str],
+                 today: pd.DataFrame, previous: pd.DataFrame) -> List[Dict]:
+    """Missing/new columns and columns that stopped being numeric or went empty"""
+    issues = []
+    missing = [c for c in previous_columns if c not in today_columns]
+    added = [c for c in today_columns if c not in previous_columns]
+    if missing:
+        issues.append(issue('error', 'schema', f"Columns missing since the previous snapshot: {missing}",
+                            columns=missing))
+    if added:
+        issues.append(issue('warning', 'schema', f"New columns: {added}", columns=added))
+    for column in today_columns:
+        if column in TEXT_COLUMNS or column not in previous.columns:
+            continue
+        before, after = previous[column].notna().mean(), today[column].notna().mean()
+        if before >= 0.5 and after == 0:
+            issues.append(issue('error', 'schema', f"{column} is empty or no longer numeric", column=column))
+    return issues
+
+
+def check_row_count(rows: int, previous_rows: int) -> List[Dict]:
+    if rows == 0:
+        return [issue('error', 'row_count', "Snapshot has no rows", rows=0, previous_rows=previous_rows)]
+    drift = (rows - previous_rows) / max(previous_rows, 1)
+    if drift <= -ROW_COUNT_DROP or abs(drift) > ROW_COUNT_DRIFT:
+        severity = 'error' if drift <= -ROW_COUNT_DROP else 'warning'
+        return [issue(severity, 'row_count', f"Row count moved {drift:+.0%} ({previous_rows} -> {rows})",
+                      rows=rows, previous_rows=previous_rows)]
+    return []
+
+
+def daily_changes(values: np.ndarray, log_scale: np.ndarray) -> np.ndarray:
+    """(D-1, T, M) changes between consecutive snapshots; log ratios where log_scale"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logs = np.where(values > 0, np.log(values), np.nan)
+    level = values[1:] - values[:-1]
+    ratio = logs[1:] - logs[:-1]
+    return np.where(log_scale[None, None, :], ratio, level)
+
+
+def robust_z(changes: np.ndarray, previous: np.ndarray, log_scale: np.ndarray):
+    """z of the last change against the ticker's earlier changes (median / scaled MAD).
+
+    The scale is floored by the metric's typical MAD across tickers and, for
+    level metrics, a share of the previous value, so tickers whose history
+    happens to be flat do not flag ordinary moves. Returns (z, enough) where
+    enough marks tickers with MIN_HISTORY past changes; z is NaN for metrics
+    where no ticker has that much history yet.
+    """
+    past, latest = changes[:-1], changes[-1]
+    enough = np.isfinite(past).sum(axis=0) >= MIN_HISTORY
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        median = np.nanmedian(past, axis=0)
+        mad = np.nanmedian(np.abs(past - median), axis=0) * 1.4826
+        typical = np.nanmedian(np.where(enough, mad, np.nan), axis=0)
+    floor = np.fmax(np.where(log_scale, MAD_FLOOR['log'], MAD_FLOOR['level']), np.nan_to_num(typical))[None, :]
+    floor = np.where(log_scale[None, :], floor, np.fmax(floor, LEVEL_RELATIVE_FLOOR * np.abs(previous)))
+    # Without enough history, compare against no change at the floor scale
+    center = np.where(enough, median, 0.0)
+    scale = np.where(enough, np.fmax(mad, floor), floor)
+    z = (latest - center) / scale
+    z[:, ~enough.any(axis=0)] = np.nan
+    return z, enough
+
+
+def latest_splits(dense: np.ndarray, metrics: List[str]) -> np.ndarray:
+    """Split ratio of each ticker's newest Price move against the previous day, NaN where it is no split"""
+    ratios = np.full(dense.shape[1], np.nan)
+    if 'Price' in metrics and 'Market Cap' in metrics:
+        prices = dense[-2:, :, metrics.index('Price')]
+        caps = dense[-2:, :, metrics.index('Market Cap')]
+        _, cols, _, found = detect_splits(prices, caps)
+        ratios[cols] = found
+    return ratios
+
+
+def check_changes(dense: np.ndarray, tickers: List[str], metrics: List[str]) -> List[Dict]:
+    """Per-ticker outliers and column-wide shifts on the newest day of the dense array"""
+    log_scale = np.array([m in LOG_METRICS for m in metrics])
+    changes = daily_changes(dense, log_scale)
+    latest, previous = changes[-1], dense[-2]
+    z, enough = robust_z(changes, previous, log_scale)
+
+    big_level = (np.abs(latest) >= MIN_LEVEL_ERROR) & (np.abs(latest) >= LEVEL_ERROR_MULTIPLE * np.abs(previous))
+    big_move = np.where(log_scale[None, :], np.abs(latest) >= MIN_LOG_ERROR, big_level)
+    finite = np.isfinite(z)
+    errors = finite & (np.abs(z) >= Z_ERROR) & big_move
+    flagged_warn = finite & (np.abs(z) >= Z_WARNING) & ~errors
+
+    # Splits rescale the per-share metrics; they warn once instead of blocking
+    splits = latest_splits(dense, metrics)
+    split_cells = np.isfinite(splits)[:, None] & np.isin(metrics, SPLIT_METRICS)[None, :]
+    errors &= ~split_cells
+    flagged_warn &= ~split_cells
+
+    issues = []
+    price = metrics.index('Price') if 'Price' in metrics else None
+    for t in np.flatnonzero(np.isfinite(splits)):
+        issues.append(issue(
+            'warning', 'split',
+            f"{tickers[t]} Price: {previous[t, price]:g} -> {dense[-1, t, price]:g} "
+            f"looks like a {ratio_label(splits[t])} split (Market Cap continuous)",
+            ticker=tickers[t], column='Price', previous=float(previous[t, price]),
+            value=float(dense[-1, t, price]), ratio=float(splits[t]),
+        ))
+    with_history = finite & enough
+    compared = with_history.sum(axis=0)
+    flagged_share = (with_history & (np.abs(z) >= Z_ERROR)).sum(axis=0) / np.maximum(compared, 1)
+    shifted = (compared >= MIN_OVERLAP) & (flagged_share >= COLUMN_SHIFT_SHARE)
+    for m in np.flatnonzero(shifted):
+        issues.append(issue('error', 'column_shift',
+                            f"{metrics[m]} jumped for {flagged_share[m]:.0%} of tickers (scale change?)",
+                            column=metrics[m], share=round(float(flagged_share[m]), 3)))
+
+    for severity, mask in (('error', errors & ~shifted[None, :]), ('warning', flagged_warn & ~shifted[None, :])):
+        for t, m in zip(*np.nonzero(mask)):
+            issues.append(issue(
+                severity, 'ticker_change',
+                f"{tickers[t]} {metrics[m]}: {previous[t, m]:g} -> {dense[-1, t, m]:g} (z={z[t, m]:.1f})",
+                ticker=tickers[t], column=metrics[m], previous=float(previous[t, m]),
+                value=float(dense[-1, t, m]), z=round(float(z[t, m]), 2),
+            ))
+    return issues
+
+
+def dense_history(history: pd.DataFrame, metrics: List[str]):
+    """(dates, tickers, metrics) array from the long history"""
+    wide = history.pivot(index='Date', columns='Ticker', values=metrics).sort_index()
+    tickers = list(wide.columns.get_level_values(1)[:len(wide.columns) // len(metrics)])
+    values = wide.to_numpy(dtype=float).reshape(len(wide), len(metrics), -1).transpose(0, 2, 1)
+    return values, tickers
+
+
+def validate(date: str, data_dir: Path = DATA_DIR, lookback: int = LOOKBACK) -> Dict:
+    """Run every check for `date`; the report's `ok` is False when any error was found"""
+    started = time.perf_counter()
+    dates = list_snapshot_dates(data_dir)
+    if date not in dates:
+        raise FileNotFoundError(f"No snapshot for {date}")
+    earlier = [d for d in dates if d < date]
+    report = {'date': date, 'previous_date': earlier[-1] if earlier else None, 'issues': []}
+    if not earlier:
+        report['ok'] = True
+        return report
+
+    window = earlier[-lookback:] + [date]
+    today_columns = list(read_snapshot(date, data_dir).columns)
+    previous_columns = list(read_snapshot(earlier[-1], data_dir).columns)
+    metrics = [m for m in LOG_METRICS + LEVEL_METRICS if m in today_columns or m in previous_columns]
+    history = load_history(data_dir, columns=metrics, dates=window)
+    loaded = time.perf_counter()
+
+    today = history[history['Date'] == date]
+    previous = history[history['Date'] == earlier[-1]]
+    issues = check_schema(today_columns, previous_columns, today, previous)
+    issues += check_row_count(len(today), len(previous))
+    if len(today) and len(previous):
+        dense, tickers = dense_history(history, metrics)
+        issues += check_changes(dense, tickers, metrics)
+    checked = time.perf_counter()
+
+    report['issues'] = issues
+    report['ok'] = not any(i['severity'] == 'error' for i in issues)
+    report['timings_ms'] = {'load': round((loaded - started) * 1000, 1), 'checks': round((checked - loaded) * 1000, 1)}
+    return report
+
+
+def format_report(report: Dict) -> str:
+    errors = [i for i in report['issues'] if i['severity'] == 'error']
+    flagged_warn = [i for i in report['issues'] if i['severity'] == 'warning']
+    status = 'PASSED' if report['ok'] else 'FAILED'
+    lines = [f"Snapshot validation {status} for {report['date']} "
+             f"(vs {report['previous_date']}): {len(errors)} error(s), {len(flagged_warn)} warning(s)"]
+    lines += [f"  ERROR   [{i['check']}] {i['message']}" for i in errors]
+    lines += [f"  WARNING [{i['check']}] {i['message']}" for i in flagged_warn]
+    if 'timings_ms' in report:
+        lines.append(f"Loaded in {report['timings_ms']['load']}ms, checked in {report['timings_ms']['checks']}ms")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Block publishing of anomalous snapshots")
+    parser.add_argument("--date", help="Snapshot date to validate (default: newest)")
+    parser.add_argument("--report", type=Path, help="Also write the report as JSON")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--lookback", type=int, default=LOOKBACK)
+    args = parser.parse_args()
+
+    date = args.date or (list_snapshot_dates(args.data_dir) or [None])[-1]
+    try:
+        report = validate(date, args.data_dir, args.lookback)
+    except (FileNotFoundError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(format_report(report))
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    sys.exit(0 if report['ok'] else 1)
+
+
+if __name__ == "__main__":
+    main()